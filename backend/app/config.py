@@ -0,0 +1,94 @@
+"""Runtime configuration.
+
+Settings are read once from environment variables prefixed with ``RPG_`` so
+the backend can be tuned from ``docker-compose.yml`` without code changes.
+Import the shared ``settings`` object rather than reading the environment
+directly.
+"""
+
+import os
+from dataclasses import dataclass
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _env_str(name: str, default: str) -> str:
+    return os.environ.get(name) or default
+
+
+@dataclass
+class Settings:
+    # SQLAlchemy URL; sqlite:// or postgresql:// (see database.py)
+    database_url: str = "sqlite:///./game.db"
+    sqlite_async_pool_size: int = 1  # SQLite has a single writer anyway
+    entity_cache_size: int = 4096  # players and NPCs kept (see entity_cache.py)
+    # Save profiles (see snapshots.py)
+    save_dir: str = "data/saves"
+    snapshot_max_chain: int = 16  # incremental snapshots before a full one
+    # Shared NPC flow fields (see navigation.py)
+    flow_field_radius: int = 32  # tiles around the goals a field covers
+    flow_field_ttl: float = 5.0  # seconds a field is reused for unchanged goals
+    # Instrumentation (see instrumentation.py)
+    metrics_enabled: bool = True
+    profiling_enabled: bool = False  # honour the X-Profile request header
+    # World simulation (see simulation.py)
+    sim_enabled: bool = False
+    sim_tick_rate: float = 1.0  # ticks per second
+    sim_catch_up: str = "skip"  # "skip" or "burst"
+    sim_max_catch_up: int = 5  # ticks run back to back in "burst" mode
+    sim_workers: int = 0  # region worker processes; 0 ticks in the API process
+    # Game clock and scheduled events (see scheduler.py)
+    clock_enabled: bool = True
+    clock_rate: float = 1.0  # game minutes per real second
+    clock_interval: float = 1.0  # real seconds between clock steps
+    # Event log durability (see event_sink.py)
+    event_mode: str = "async"  # "sync", "batched" or "async"
+    event_batch_size: int = 256  # lines per insert batch
+    event_flush_interval: float = 0.05  # seconds a partial batch may wait
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            database_url=_env_str("RPG_DATABASE_URL", cls.database_url),
+            sqlite_async_pool_size=_env_int(
+                "RPG_SQLITE_ASYNC_POOL_SIZE", cls.sqlite_async_pool_size
+            ),
+            entity_cache_size=_env_int("RPG_ENTITY_CACHE_SIZE", cls.entity_cache_size),
+            save_dir=_env_str("RPG_SAVE_DIR", cls.save_dir),
+            snapshot_max_chain=_env_int("RPG_SNAPSHOT_MAX_CHAIN", cls.snapshot_max_chain),
+            flow_field_radius=_env_int("RPG_FLOW_FIELD_RADIUS", cls.flow_field_radius),
+            flow_field_ttl=_env_float("RPG_FLOW_FIELD_TTL", cls.flow_field_ttl),
+            metrics_enabled=_env_bool("RPG_METRICS_ENABLED", cls.metrics_enabled),
+            profiling_enabled=_env_bool("RPG_PROFILING_ENABLED", cls.profiling_enabled),
+            sim_enabled=_env_bool("RPG_SIM_ENABLED", cls.sim_enabled),
+            sim_tick_rate=_env_float("RPG_SIM_TICK_RATE", cls.sim_tick_rate),
+            sim_catch_up=_env_str("RPG_SIM_CATCH_UP", cls.sim_catch_up),
+            sim_max_catch_up=_env_int("RPG_SIM_MAX_CATCH_UP", cls.sim_max_catch_up),
+            sim_workers=_env_int("RPG_SIM_WORKERS", cls.sim_workers),
+            clock_enabled=_env_bool("RPG_CLOCK_ENABLED", cls.clock_enabled),
+            clock_rate=_env_float("RPG_CLOCK_RATE", cls.clock_rate),
+            clock_interval=_env_float("RPG_CLOCK_INTERVAL", cls.clock_interval),
+            event_mode=_env_str("RPG_EVENT_MODE", cls.event_mode),
+            event_batch_size=_env_int("RPG_EVENT_BATCH_SIZE", cls.event_batch_size),
+            event_flush_interval=_env_float(
+                "RPG_EVENT_FLUSH_INTERVAL", cls.event_flush_interval
+            ),
+        )
+
+
+settings = Settings.from_env()
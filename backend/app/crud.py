@@ -5,17 +5,23 @@ player by name, creating a new NPC or updating location discovery. They take a
 SQLAlchemy session as the first argument and return SQLAlchemy objects.
 """
 
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy.sql import Executable
+from typing import Iterator, List, Optional
 from datetime import datetime
+import json
 
-from . import models
+from . import models, unit_of_work
+from .instrumentation import timed
 
 
+@timed("crud.get_player_by_name")
 def get_player_by_name(db: Session, name: str) -> Optional[models.Player]:
     return db.query(models.Player).filter(models.Player.name == name).first()
 
 
+@timed("crud.create_player")
 def create_player(db: Session, name: str) -> models.Player:
     player = models.Player(name=name)
     db.add(player)
@@ -24,28 +30,111 @@ def create_player(db: Session, name: str) -> models.Player:
     return player
 
 
+@timed("crud.get_locations")
 def get_locations(db: Session) -> List[models.Location]:
     return db.query(models.Location).all()
 
 
+@timed("crud.set_location_discovered")
 def set_location_discovered(db: Session, x: int, y: int) -> None:
-    loc = (
-        db.query(models.Location)
-        .filter(models.Location.x == x, models.Location.y == y)
-        .first()
+    Location = models.Location
+    db.query(Location).filter(Location.x == x, Location.y == y).update(
+        {Location.discovered: True}, synchronize_session=False
     )
-    if loc:
-        loc.discovered = True
-        db.commit()
+    unit_of_work.commit(db)
 
 
+@timed("crud.get_npcs_at")
 def get_npcs_at(db: Session, x: int, y: int) -> List[models.NPC]:
     return db.query(models.NPC).filter(models.NPC.x == x, models.NPC.y == y).all()
 
 
+@timed("crud.create_event")
 def create_event(db: Session, description: str) -> models.Event:
     event = models.Event(description=description, timestamp=datetime.utcnow().isoformat())
     db.add(event)
     db.commit()
     db.refresh(event)
     return event
+
+
+@timed("crud.get_events")
+def get_events(
+    db: Session,
+    since_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+    limit: int = 100,
+) -> List[models.Event]:
+    """Return one page of the event log using the primary key as a cursor.
+
+    With ``since_id`` the page holds the oldest events after that id in
+    ascending order (polling for new events); otherwise it holds the newest
+    events in descending order (scrolling back). ``before_id`` keeps only the
+    events before that id, so with both the page comes from the range between
+    them. Either way the id of the last row is the cursor for the next page,
+    and each page is a range scan on the primary key, so its cost does not
+    depend on the size of the table.
+    """
+    query = db.query(models.Event)
+    if before_id is not None:
+        query = query.filter(models.Event.id < before_id)
+    if since_id is not None:
+        query = query.filter(models.Event.id > since_id).order_by(models.Event.id)
+    else:
+        query = query.order_by(models.Event.id.desc())
+    return query.limit(limit).all()
+
+
+def iter_events(db: Session, since_id: int = 0, batch_size: int = 1000) -> Iterator[List[tuple]]:
+    """Yield ``(id, description, timestamp)`` rows after ``since_id`` in id
+    order, ``batch_size`` rows at a time, from a single cursor.
+
+    Rows are fetched from the driver as the caller consumes them instead of
+    being loaded up front, so memory use is bounded by ``batch_size``.
+    """
+    Event = models.Event
+    stmt = (
+        select(Event.id, Event.description, Event.timestamp)
+        .where(Event.id > since_id)
+        .order_by(Event.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for partition in db.execute(stmt).partitions():
+        yield [tuple(row) for row in partition]
+
+
+@timed("crud.load_rng_state")
+def load_rng_state(db: Session) -> Optional[dict]:
+    world = db.query(models.World).first()
+    if world is None or not world.rng_state:
+        return None
+    return json.loads(world.rng_state)
+
+
+@timed("crud.save_rng_state")
+def save_rng_state(db: Session, state: dict) -> None:
+    world = db.query(models.World).first()
+    if world is None:
+        return
+    world.rng_state = json.dumps(state)
+    db.commit()
+
+
+@timed("crud.executemany")
+def executemany(db: Session, stmt: Executable, rows: List[dict]) -> None:
+    """Execute ``stmt`` once per parameter dict in ``rows`` in a single
+    DBAPI ``executemany`` call.
+
+    The statement is compiled once and the rows are handed straight to the
+    driver, skipping SQLAlchemy's per-row parameter processing, which
+    dominates when writing tens of thousands of rows. Only use this for plain
+    values that need no type conversion (ints, floats, strings).
+    """
+    if not rows:
+        return
+    compiled = stmt.compile(dialect=db.get_bind().dialect, column_keys=list(rows[0]))
+    if compiled.positional:
+        params = [tuple(row[name] for name in compiled.positiontup) for row in rows]
+    else:
+        params = rows
+    db.connection().exec_driver_sql(compiled.string, params)
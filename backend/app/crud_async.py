@@ -0,0 +1,104 @@
+"""Async CRUD helpers for the API endpoints.
+
+Counterparts of the functions in ``crud.py`` for an ``AsyncSession``. Nothing
+may lazy‑load under asyncio, so helpers that return objects which are later
+serialised with their relationships load those relationships eagerly.
+Game logic that is written against a sync ``Session`` (world map, NPC
+agents, event system) is run through ``AsyncSession.run_sync`` rather than
+being duplicated here.
+"""
+
+from typing import AsyncIterator, List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from . import models, unit_of_work
+from .instrumentation import timed
+
+# Loads what ``schemas.Player`` serialises; each entry's item is joined
+_player_inventory = selectinload(models.Player.inventory_items)
+
+
+@timed("crud_async.get_player")
+async def get_player(db: AsyncSession, player_id: int) -> Optional[models.Player]:
+    return await db.get(models.Player, player_id, options=[_player_inventory])
+
+
+@timed("crud_async.get_player_by_name")
+async def get_player_by_name(db: AsyncSession, name: str) -> Optional[models.Player]:
+    result = await db.execute(select(models.Player).where(models.Player.name == name).limit(1))
+    return result.scalars().first()
+
+
+@timed("crud_async.create_player")
+async def create_player(db: AsyncSession, name: str) -> models.Player:
+    # An empty inventory counts as loaded, so serialising it needs no query
+    player = models.Player(name=name, inventory_items=[])
+    db.add(player)
+    await unit_of_work.commit_async(db)
+    return player
+
+
+@timed("crud_async.get_discovered_locations")
+async def get_discovered_locations(
+    db: AsyncSession,
+    x0: Optional[int] = None,
+    y0: Optional[int] = None,
+    x1: Optional[int] = None,
+    y1: Optional[int] = None,
+) -> List[models.Location]:
+    """Discovered locations, optionally limited to ``x0 <= x < x1`` and ``y0 <= y < y1``."""
+    Location = models.Location
+    stmt = select(Location).where(Location.discovered == True)
+    if x0 is not None:
+        stmt = stmt.where(Location.x >= x0, Location.x < x1, Location.y >= y0, Location.y < y1)
+    return list((await db.execute(stmt)).scalars())
+
+
+@timed("crud_async.delete_players_and_events")
+async def delete_players_and_events(db: AsyncSession) -> None:
+    await db.execute(delete(models.Event))
+    await db.execute(delete(models.PlayerFog))
+    # Inventories reference their owners, which foreign_keys=ON enforces
+    await db.execute(delete(models.InventoryItem))
+    await db.execute(delete(models.Player))
+    await db.commit()
+
+
+@timed("crud_async.get_events")
+async def get_events(
+    db: AsyncSession,
+    since_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+    limit: int = 100,
+) -> List[models.Event]:
+    """Async ``crud.get_events``: one keyset page of the event log."""
+    Event = models.Event
+    stmt = select(Event)
+    if before_id is not None:
+        stmt = stmt.where(Event.id < before_id)
+    if since_id is not None:
+        stmt = stmt.where(Event.id > since_id).order_by(Event.id)
+    else:
+        stmt = stmt.order_by(Event.id.desc())
+    return list((await db.execute(stmt.limit(limit))).scalars())
+
+
+async def iter_events(
+    db: AsyncSession, since_id: int = 0, batch_size: int = 1000
+) -> AsyncIterator[List[tuple]]:
+    """Async ``crud.iter_events``: batches of ``(id, description, timestamp)``
+    rows streamed from one cursor.
+    """
+    Event = models.Event
+    stmt = (
+        select(Event.id, Event.description, Event.timestamp)
+        .where(Event.id > since_id)
+        .order_by(Event.id)
+        .execution_options(yield_per=batch_size)
+    )
+    result = await db.stream(stmt)
+    async for partition in result.partitions():
+        yield [tuple(row) for row in partition]
@@ -1,24 +1,113 @@
 """Database setup and session helpers.
 
-This module configures the SQLAlchemy engine and session maker for the game. The
-default configuration uses a local SQLite database file (`game.db`) stored in
-the backend directory. SQLAlchemy’s declarative base is exposed as `Base` so
-models can inherit from it.
+This module configures the SQLAlchemy engines and session makers for the game.
+The database URL comes from ``settings.database_url`` (``RPG_DATABASE_URL``)
+and defaults to a local SQLite database file (`game.db`) in the working
+directory; a PostgreSQL URL works as well once the drivers in
+``requirements-postgres.txt`` are installed. SQLAlchemy’s declarative base is
+exposed as `Base` so models can inherit from it.
+
+Two engines share the same database:
+
+* ``engine``/``SessionLocal`` – synchronous, used by background workers (world
+  simulation, event sink) and by game logic that runs inside
+  ``AsyncSession.run_sync``.
+* ``async_engine``/``AsyncSessionLocal`` – asyncio, used by the API endpoints
+  through the ``get_async_db`` dependency (aiosqlite for SQLite, asyncpg for
+  PostgreSQL).
+
+SQLite connections are switched to WAL journaling so readers no longer block
+the writer, with ``synchronous=NORMAL`` and a busy timeout so concurrent
+writers wait for the lock instead of failing. The async engine keeps a small
+pool of SQLite connections (``RPG_SQLITE_ASYNC_POOL_SIZE``, default 1) rather
+than opening one per request.
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from .config import settings
+from .instrumentation import count_statements
+
+# Async drivers used for each backend when the URL names none (or a sync one)
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,  # milliseconds
+    "foreign_keys": "ON",
+}
+
+SQLALCHEMY_DATABASE_URL = settings.database_url
+
+
+def async_url(url: str) -> str:
+    """Return ``url`` with the async driver for its backend."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver known for {backend!r} databases")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(
+        hide_password=False
+    )
+
+
+def _set_sqlite_pragmas(dbapi_connection, _connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def _connect_args(url: str) -> dict:
+    # ``check_same_thread=False`` allows a SQLite connection to be used from
+    # the worker threads FastAPI runs sync code in.
+    return {"check_same_thread": False} if make_url(url).get_backend_name() == "sqlite" else {}
+
 
-# SQLite database URL. Using a relative path stores the DB in the working
-# directory. ``check_same_thread=False`` allows the connection to be shared
-# across threads, which FastAPI uses when running in async mode.
-SQLALCHEMY_DATABASE_URL = "sqlite:///./game.db"
+def _configure(sync_engine: Engine) -> None:
+    if sync_engine.dialect.name == "sqlite":
+        event.listen(sync_engine, "connect", _set_sqlite_pragmas)
+    count_statements(sync_engine)
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+
+def make_engine(url: str) -> Engine:
+    """Create a synchronous engine for ``url`` with the SQLite pragmas applied."""
+    engine = create_engine(url, connect_args=_connect_args(url))
+    _configure(engine)
+    return engine
+
+
+def make_async_engine(url: str) -> AsyncEngine:
+    """Create an asyncio engine for ``url`` (sync driver names are swapped)."""
+    url = async_url(url)
+    kwargs = {}
+    if make_url(url).get_backend_name() == "sqlite":
+        # aiosqlite defaults to NullPool, i.e. a new connection, thread and
+        # pragma round trip per session; a small persistent pool avoids that
+        # and also queues writers in the pool instead of in busy_timeout
+        # sleeps.
+        kwargs = {
+            "poolclass": AsyncAdaptedQueuePool,
+            "pool_size": settings.sqlite_async_pool_size,
+            "max_overflow": 0,
+        }
+    engine = create_async_engine(url, connect_args=_connect_args(url), **kwargs)
+    _configure(engine.sync_engine)
+    return engine
+
+
+engine = make_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = make_async_engine(SQLALCHEMY_DATABASE_URL)
+# Objects stay usable after commit, as endpoints return them afterwards
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -39,3 +128,16 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Async counterpart of ``get_db`` yielding an ``AsyncSession``. Usage:
+
+    ```python
+    @app.get("/players/{player_id}")
+    async def read_player(player_id: int, db: AsyncSession = Depends(get_async_db)):
+        return await db.get(models.Player, player_id)
+    ```
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,275 @@
+"""Write‑through cache of hot players and NPCs.
+
+Action endpoints load the same few hundred players and NPCs over and over.
+``EntityCache`` keeps the column values of recently used entities in an LRU
+and hands out instances attached to the caller's session without a query:
+an instance is rebuilt from the snapshot, marked as loaded and added to the
+session, so changing it and committing emits the usual ``UPDATE``.
+Relationships are not cached; they load as the model declares them (the
+player's inventory is never loaded lazily and must be loaded eagerly).
+
+The cache is write‑through. Mapper events record the values of every
+player or NPC the ORM inserts or updates, and once the session commits those
+values replace the cached ones. Rolling back the transaction discards them;
+rolling back a savepoint (``begin_nested``) brings back those recorded
+before it, and the rest of the transaction still commits. Writes that bypass
+the ORM (``executemany`` in the world tick, bulk deletes when a world is
+created) must call ``invalidate`` or ``clear``. A session may have read an
+entity before such a write and commit after it; its values are then older
+than the row, so entities are stamped with the cache's clock when they are
+read and a snapshot is only stored if the entity was not invalidated since.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.session import make_transient_to_detached, object_session
+
+from . import models
+from .config import settings
+
+CACHED_MODELS = (models.Player, models.NPC)
+
+Key = Tuple[type, int]
+
+
+class EntityCache:
+    """Bounded LRU of entity snapshots keyed by ``(model, id)``."""
+
+    def __init__(self, capacity: int, cached_models: Iterable[type] = CACHED_MODELS):
+        self.capacity = capacity
+        self.models = tuple(cached_models)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[Key, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Advanced by every invalidation. Holds at most one entry per entity.
+        self._clock = 0
+        self._invalidated: Dict[Key, int] = {}  # key -> clock when last invalidated
+        self._cleared = 0  # clock when last cleared
+        # Key of the pending snapshots in ``Session.info``, and of the clock an
+        # instance's values were read at in ``InstanceState.info``
+        self._info_key = f"entity_cache_{id(self)}"
+        # Pending snapshots as they were when each open savepoint began
+        self._savepoints_key = f"entity_cache_savepoints_{id(self)}"
+
+    # -- snapshots ---------------------------------------------------------
+
+    def _lookup(self, model: type, entity_id: int) -> Optional[dict]:
+        with self._lock:
+            values = self._entries.get((model, entity_id))
+            if values is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((model, entity_id))
+            self.hits += 1
+            return values
+
+    def _store(self, key: Key, values: dict, read_at: Optional[int]) -> None:
+        """Cache ``values`` read at clock ``read_at``, or drop the entry if the
+        entity was invalidated after they were read.
+        """
+        with self._lock:
+            if read_at is None or max(self._cleared, self._invalidated.get(key, 0)) > read_at:
+                self._entries.pop(key, None)
+                return
+            self._entries[key] = values
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def put(self, obj) -> None:
+        """Cache the loaded column values of ``obj``."""
+        values = _snapshot(obj)
+        if values is not None:
+            self._store((type(obj), values["id"]), values, self._read_at(obj))
+
+    def invalidate(self, model: type, ids: Iterable[int]) -> None:
+        with self._lock:
+            self._clock += 1
+            for entity_id in ids:
+                self._invalidated[(model, entity_id)] = self._clock
+                if self._entries.pop((model, entity_id), None) is not None:
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop every entry, e.g. when a new world replaces all entities."""
+        with self._lock:
+            self._clock += 1
+            self._cleared = self._clock
+            self._invalidated.clear()
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def _stamp(self, obj, clock: Optional[int] = None) -> None:
+        inspect(obj).info[self._info_key] = self._clock if clock is None else clock
+
+    def _read_at(self, obj) -> Optional[int]:
+        return inspect(obj).info.get(self._info_key)
+
+    # -- reads ---------------------------------------------------------------
+
+    def _attach(self, session: Session, model: type, entity_id: int):
+        """Return the session's instance for a cached entity, or ``None`` on a miss."""
+        existing = session.identity_map.get(session.identity_key(model, entity_id))
+        if existing is not None:
+            return existing
+        # Read first: an invalidation between the two makes the entity stale
+        clock = self._clock
+        values = self._lookup(model, entity_id)
+        if values is None:
+            return None
+        obj = inspect(model).class_manager.new_instance()
+        for key, value in values.items():
+            set_committed_value(obj, key, value)
+        self._stamp(obj, clock)
+        make_transient_to_detached(obj)
+        session.add(obj)
+        return obj
+
+    def get(self, db: Session, model: type, entity_id: int):
+        """``db.get(model, entity_id)`` served from the cache when possible."""
+        obj = self._attach(db, model, entity_id)
+        if obj is None:
+            obj = db.get(model, entity_id)
+            if obj is not None:
+                self.put(obj)
+        return obj
+
+    async def get_async(self, db: AsyncSession, model: type, entity_id: int):
+        """``get`` for an ``AsyncSession``."""
+        obj = self._attach(db.sync_session, model, entity_id)
+        if obj is None:
+            obj = await db.get(model, entity_id)
+            if obj is not None:
+                self.put(obj)
+        return obj
+
+    def get_many(self, db: Session, model: type, ids: Iterable[int]) -> List:
+        """Load several entities, querying only the misses (in one query).
+        Results follow the order of ``ids``; missing rows are skipped.
+        """
+        found: Dict[int, object] = {}
+        missing = []
+        for entity_id in ids:
+            obj = self._attach(db, model, entity_id)
+            if obj is None:
+                missing.append(entity_id)
+            else:
+                found[entity_id] = obj
+        if missing:
+            for obj in db.query(model).filter(model.id.in_(missing)):
+                self.put(obj)
+                found[obj.id] = obj
+        return [found[i] for i in ids if i in found]
+
+    # -- write‑through ---------------------------------------------------------
+
+    def install(self, target=Session) -> None:
+        """Keep the cache in step with ORM writes committed by sessions of
+        ``target`` (a ``Session`` class or ``sessionmaker``).
+        """
+        for model in self.models:
+            event.listen(model, "load", self._loaded)
+            event.listen(model, "refresh", self._refreshed)
+            event.listen(model, "after_insert", self._record_insert)
+            event.listen(model, "after_update", self._record)
+            event.listen(model, "after_delete", self._record_delete)
+        event.listen(target, "after_commit", self._apply)
+        event.listen(target, "after_transaction_create", self._begin)
+        event.listen(target, "after_soft_rollback", self._discard)
+
+    def _pending(self, target) -> Optional[dict]:
+        session = object_session(target)
+        if session is None:
+            return None
+        return session.info.setdefault(self._info_key, {})
+
+    def _loaded(self, target, _context) -> None:
+        self._stamp(target)
+
+    def _refreshed(self, target, _context, attrs) -> None:
+        if attrs is None:  # every column was read again
+            self._stamp(target)
+
+    def _record(self, _mapper, _connection, target, inserted: bool = False) -> None:
+        pending = self._pending(target)
+        if pending is not None:
+            values = _snapshot(target, inserted)
+            pending[(type(target), target.id)] = values and (values, self._read_at(target))
+
+    def _record_insert(self, mapper, connection, target) -> None:
+        self._stamp(target)
+        self._record(mapper, connection, target, inserted=True)
+
+    def _record_delete(self, _mapper, _connection, target) -> None:
+        pending = self._pending(target)
+        if pending is not None:
+            pending[(type(target), target.id)] = None
+
+    def _apply(self, session: Session) -> None:
+        session.info.pop(self._savepoints_key, None)
+        for key, snapshot in session.info.pop(self._info_key, {}).items():
+            if snapshot is None:
+                self.invalidate(key[0], [key[1]])
+            else:
+                self._store(key, *snapshot)
+
+    def _begin(self, session: Session, transaction) -> None:
+        if transaction.nested:
+            pending = dict(session.info.get(self._info_key, {}))
+            session.info.setdefault(self._savepoints_key, {})[transaction] = pending
+
+    def _discard(self, session: Session, previous_transaction) -> None:
+        if previous_transaction.nested:
+            saved = session.info.get(self._savepoints_key, {}).pop(previous_transaction, None)
+            if saved is not None:
+                session.info[self._info_key] = saved
+        elif previous_transaction.parent is None:
+            session.info.pop(self._info_key, None)
+            session.info.pop(self._savepoints_key, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+def _snapshot(obj, inserted: bool = False) -> Optional[dict]:
+    """Column values of ``obj``, or ``None`` if some are not loaded (reading
+    them would need a query, which is not allowed inside a flush).
+
+    Right after an insert, columns that were never set and have no server
+    default are known to be NULL.
+    """
+    state = inspect(obj)
+    loaded = state.dict
+    values = {}
+    for attr in state.mapper.column_attrs:
+        if attr.key in loaded:
+            values[attr.key] = loaded[attr.key]
+        elif inserted and all(col.server_default is None for col in attr.columns):
+            values[attr.key] = None
+        else:
+            return None
+    return values
+
+
+# Cache shared by the API process and the world simulation.
+entity_cache = EntityCache(settings.entity_cache_size)
+entity_cache.install()
@@ -0,0 +1,295 @@
+"""Write‑behind sink for the event log.
+
+Endpoints produce event log lines in bursts (one per combat round, one per
+NPC on a tile) and committing each line separately costs one SQLite
+transaction per line. ``EventSink`` instead queues lines in memory and a
+background flusher inserts them with one ``executemany`` and one commit per
+batch. In ``"async"`` mode a batch is written as soon as ``batch_size`` lines
+are waiting or ``flush_interval`` seconds after its first line arrived,
+whichever comes first.
+
+Three durability modes are supported:
+
+* ``"sync"`` – every ``emit`` writes and commits before returning, like
+  ``crud.create_event`` (no queue, no background thread).
+* ``"batched"`` – ``emit`` queues the lines and waits until the batch holding
+  them has been committed (group commit). The flusher does not linger here:
+  lines that arrive while a commit is in progress form the next batch, so
+  concurrent callers share transactions and a lone caller waits for a single
+  commit.
+* ``"async"`` – ``emit`` returns immediately; lines reach the database within
+  ``flush_interval``. Lines still queued when the process dies are lost.
+
+``flush`` blocks until everything queued so far is written; the API calls it
+before reading the log and on shutdown. Lines are published to
+``realtime.hub`` as soon as they are emitted, whatever the mode.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Deque, Iterable, List, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from . import crud, models
+from .realtime import hub
+
+logger = logging.getLogger(__name__)
+
+EVENT_MODES = ("sync", "batched", "async")
+
+_insert_events = insert(models.Event.__table__)
+
+
+@dataclass
+class SinkMetrics:
+    """Counters describing the queue and the flusher."""
+
+    enqueued: int = 0
+    written: int = 0
+    flushes: int = 0
+    failed_flushes: int = 0
+    total_flush_seconds: float = 0.0
+    last_flush_seconds: float = 0.0
+    max_flush_seconds: float = 0.0
+    max_queue_depth: int = 0
+
+    def record(self, seconds: float, rows: int) -> None:
+        self.flushes += 1
+        self.written += rows
+        self.total_flush_seconds += seconds
+        self.last_flush_seconds = seconds
+        self.max_flush_seconds = max(self.max_flush_seconds, seconds)
+
+    def as_dict(self) -> dict:
+        return {
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_seconds": self.last_flush_seconds,
+            "max_flush_seconds": self.max_flush_seconds,
+            "mean_flush_seconds": (
+                self.total_flush_seconds / self.flushes if self.flushes else 0.0
+            ),
+            "mean_batch_size": self.written / self.flushes if self.flushes else 0.0,
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+
+class EventSink:
+    """Buffers event log lines and writes them to the ``events`` table in batches."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        mode: str = "async",
+        batch_size: int = 256,
+        flush_interval: float = 0.05,
+    ):
+        if mode not in EVENT_MODES:
+            raise ValueError(f"mode must be one of {EVENT_MODES}")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.session_factory = session_factory
+        self.mode = mode
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.metrics = SinkMetrics()
+        self._queue: Deque[Tuple[str, str]] = deque()
+        # Lines are numbered in queue order; ``_written`` is the number of
+        # lines committed so far, so a line is durable once it drops below it.
+        self._queued = 0
+        self._written = 0
+        self._cond = threading.Condition()
+        self._flush_requested = False
+        self._stop = False
+        self._thread = None
+        self._write_lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def start(self) -> None:
+        if self.mode == "sync" or self.running:
+            return
+        with self._cond:
+            self._stop = False
+        self._thread = threading.Thread(target=self._run, name="event-sink", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Write everything still queued and stop the flusher."""
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        # Anything enqueued after the flusher exited, or left by a failed flush
+        self._drain()
+
+    def emit(self, description: str) -> models.Event:
+        """Record one log line and return it as an unsaved ``Event``."""
+        return self.emit_many([description])[0]
+
+    def emit_many(self, descriptions: Iterable[str]) -> List[models.Event]:
+        """Record several log lines that keep their order in the log."""
+        timestamp = datetime.utcnow().isoformat()
+        rows = [(description, timestamp) for description in descriptions]
+        events = [models.Event(description=d, timestamp=t) for d, t in rows]
+        if not rows:
+            return events
+        hub.publish("events", [{"description": d, "timestamp": t} for d, t in rows])
+        if self.mode == "sync":
+            with self._cond:
+                self.metrics.enqueued += len(rows)
+            self._write(rows)
+            return events
+        if not self.running:
+            self.start()
+        with self._cond:
+            self._queue.extend(rows)
+            self._queued += len(rows)
+            ticket = self._queued
+            self.metrics.enqueued += len(rows)
+            self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, len(self._queue))
+            self._cond.notify_all()
+            if self.mode == "batched":
+                self._wait_for(ticket)
+        return events
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until every line queued so far is committed.
+
+        Returns ``False`` if the lines were not written within ``timeout``.
+        """
+        if self.mode == "sync":
+            return True
+        with self._cond:
+            if self._written >= self._queued:
+                return True
+            if self.running:
+                self._flush_requested = True
+                self._cond.notify_all()
+                return self._wait_for(self._queued, timeout)
+        # No flusher to wait for: write the queue from this thread
+        self._drain()
+        return not self._queue
+
+    async def emit_many_async(self, descriptions: Iterable[str]) -> List[models.Event]:
+        """``emit_many`` for async endpoints. Modes that wait for the database
+        run in a worker thread so the event loop is never blocked.
+        """
+        if self.mode == "async":
+            return self.emit_many(descriptions)
+        return await asyncio.to_thread(self.emit_many, list(descriptions))
+
+    async def flush_async(self, timeout: float = 5.0) -> bool:
+        """``flush`` for async endpoints; returns at once if nothing is pending."""
+        with self._cond:
+            if self._written >= self._queued:
+                return True
+        return await asyncio.to_thread(self.flush, timeout)
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "running": self.running,
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval,
+            "queue_depth": self.queue_depth,
+            **self.metrics.as_dict(),
+        }
+
+    # -- internals --------------------------------------------------------
+
+    def _wait_for(self, ticket: int, timeout: float = None) -> bool:
+        """Wait (holding ``_cond``) until line number ``ticket`` is written."""
+        return self._cond.wait_for(lambda: self._written >= ticket, timeout)
+
+    def _take_batch(self) -> List[Tuple[str, str]]:
+        n = min(self.batch_size, len(self._queue))
+        return [self._queue.popleft() for _ in range(n)]
+
+    def _write(self, rows: List[Tuple[str, str]]) -> None:
+        """Insert ``rows`` in one transaction and update the metrics."""
+        start = time.perf_counter()
+        with self._write_lock:
+            db = self.session_factory()
+            try:
+                crud.executemany(
+                    db,
+                    _insert_events,
+                    [{"description": d, "timestamp": t} for d, t in rows],
+                )
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+        with self._cond:
+            self.metrics.record(time.perf_counter() - start, len(rows))
+
+    def _write_batch(self, batch: List[Tuple[str, str]]) -> bool:
+        try:
+            self._write(batch)
+        except Exception:
+            logger.exception("Writing %d events failed; will retry", len(batch))
+            with self._cond:
+                self.metrics.failed_flushes += 1
+                # Put the batch back in front so order is preserved
+                self._queue.extendleft(reversed(batch))
+            return False
+        with self._cond:
+            self._written += len(batch)
+            self._cond.notify_all()
+        return True
+
+    def _drain(self) -> None:
+        """Write the queue from the calling thread until it is empty."""
+        while True:
+            with self._cond:
+                batch = self._take_batch()
+            if not batch or not self._write_batch(batch):
+                return
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                # Sleep until there is something to write, then give the batch
+                # up to ``flush_interval`` to fill unless a flush was requested
+                # or callers are blocked on it.
+                self._cond.wait_for(lambda: self._queue or self._stop)
+                linger = self.flush_interval if self.mode == "async" else 0.0
+                deadline = time.monotonic() + linger
+                while (
+                    len(self._queue) < self.batch_size
+                    and not self._flush_requested
+                    and not self._stop
+                ):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._stop and not self._queue:
+                    return
+                batch = self._take_batch()
+                if not self._queue:
+                    self._flush_requested = False
+            if batch and not self._write_batch(batch):
+                if self._stop:
+                    return  # stop() retries once more from its own thread
+                time.sleep(self.flush_interval)
@@ -0,0 +1,222 @@
+"""Per‑player fog of war stored as bitsets.
+
+What each player has discovered is kept as one bitset per chunk rather than
+one row per (player, tile): ``chunk_size * chunk_size`` bits where bit
+``ly * chunk_size + lx`` stands for tile ``(x0 + lx, y0 + ly)``, least
+significant bit first within each byte. A 16x16 chunk takes 32 bytes, so a
+player who has explored a thousand chunks costs about 32 KB, and discovering
+or checking a tile is a dict lookup plus a bit operation.
+
+Bitsets are persisted in the ``player_fog`` table, one row per player and
+chunk, and the bitsets of recently active players are kept in an LRU. A
+player's rows are loaded with a single query the first time they are needed.
+
+``encode_chunk`` serialises one chunk for the ``/world`` response: the bitset
+and the terrain of the tiles it marks, both base64 encoded. Each bitset also
+carries the map version of its last change (see ``world_map.py``) so the
+binary format can skip chunks a client already has.
+"""
+
+import base64
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models, unit_of_work
+from .world_map import Chunk, WorldMap, chunk_coords, world_map as default_world_map
+
+# Number of players whose bitsets are kept in memory
+DEFAULT_CACHE_PLAYERS = 4096
+# Terrain byte sent for tiles the player has not discovered (or off the map)
+UNKNOWN_TERRAIN = 255
+
+ChunkKey = Tuple[int, int]
+
+
+def bitset_size(chunk_size: int) -> int:
+    """Bytes needed for the bitset of one chunk."""
+    return (chunk_size * chunk_size + 7) // 8
+
+
+def _bit(chunk_size: int, lx: int, ly: int) -> Tuple[int, int]:
+    index = ly * chunk_size + lx
+    return index >> 3, 1 << (index & 7)
+
+
+def unpack(bits: bytes, chunk_size: int) -> np.ndarray:
+    """Return the bitset as a ``(chunk_size, chunk_size)`` bool array indexed [y, x]."""
+    n = chunk_size * chunk_size
+    seen = np.unpackbits(np.frombuffer(bits, dtype=np.uint8), bitorder="little")[:n]
+    return seen.reshape(chunk_size, chunk_size).astype(bool)
+
+
+def encode_chunk(chunk: Chunk, bits: bytes, chunk_size: int) -> dict:
+    """Serialise the discovered part of ``chunk`` for one player.
+
+    ``terrain`` holds one byte per tile in the same order as the bits: an
+    index into ``world_generator.TERRAINS``, or ``UNKNOWN_TERRAIN`` for tiles
+    the player has not discovered.
+    """
+    terrain = np.full((chunk_size, chunk_size), UNKNOWN_TERRAIN, dtype=np.uint8)
+    w, h = chunk.terrain.shape
+    # Chunk terrain is indexed [x, y]; the wire format is row‑major [y, x]
+    terrain[:h, :w] = chunk.terrain.T
+    terrain[~unpack(bits, chunk_size)] = UNKNOWN_TERRAIN
+    return {
+        "cx": chunk.cx,
+        "cy": chunk.cy,
+        "bits": base64.b64encode(bits).decode("ascii"),
+        "terrain": base64.b64encode(terrain.tobytes()).decode("ascii"),
+    }
+
+
+class _PlayerFog:
+    """One player's bitsets and the map version each was last changed at."""
+
+    __slots__ = ("bits", "versions")
+
+    def __init__(self, bits: Dict[ChunkKey, bytearray], version: int):
+        self.bits = bits
+        self.versions = dict.fromkeys(bits, version)
+
+
+class FogOfWar:
+    """Discovered‑tile bitsets of every player, cached per player."""
+
+    def __init__(self, world_map: WorldMap = default_world_map, capacity: int = DEFAULT_CACHE_PLAYERS):
+        self.world_map = world_map
+        self.capacity = capacity
+        self._players: "OrderedDict[int, _PlayerFog]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _bitsets(self, db: Session, player_id: int) -> _PlayerFog:
+        with self._lock:
+            player = self._players.get(player_id)
+            if player is not None:
+                self._players.move_to_end(player_id)
+                return player
+        Fog = models.PlayerFog
+        rows = db.query(Fog.cx, Fog.cy, Fog.bits).filter(Fog.player_id == player_id).all()
+        loaded = _PlayerFog(
+            {(cx, cy): bytearray(bits) for cx, cy, bits in rows}, self.world_map.version
+        )
+        with self._lock:
+            # Another request may have loaded the player meanwhile
+            player = self._players.setdefault(player_id, loaded)
+            self._players.move_to_end(player_id)
+            while len(self._players) > self.capacity:
+                self._players.popitem(last=False)
+            return player
+
+    def is_discovered(self, db: Session, player_id: int, x: int, y: int) -> bool:
+        cs = self.world_map.chunk_size
+        key = chunk_coords(x, y, cs)
+        bits = self._bitsets(db, player_id).bits.get(key)
+        if bits is None:
+            return False
+        byte, mask = _bit(cs, x - key[0] * cs, y - key[1] * cs)
+        return bool(bits[byte] & mask)
+
+    def discover(self, db: Session, player_id: int, x: int, y: int) -> bool:
+        """Mark ``(x, y)`` as discovered by the player and persist the chunk's
+        bitset. Returns ``True`` if the player had not seen the tile before.
+        """
+        if not self.world_map.in_bounds(x, y):
+            return False
+        cs = self.world_map.chunk_size
+        key = chunk_coords(x, y, cs)
+        byte, mask = _bit(cs, x - key[0] * cs, y - key[1] * cs)
+        player = self._bitsets(db, player_id)
+        with self._lock:
+            bits = player.bits.get(key)
+            is_new_chunk = bits is None
+            if not is_new_chunk and bits[byte] & mask:
+                return False
+            data = bytearray(bitset_size(cs) if is_new_chunk else bits)
+        data[byte] |= mask
+        data = bytes(data)
+        Fog = models.PlayerFog
+        row = db.query(Fog).filter(Fog.player_id == player_id, Fog.cx == key[0], Fog.cy == key[1])
+        if is_new_chunk:
+            # The savepoint limits the rollback to the row when this runs
+            # inside a request's unit of work
+            try:
+                with db.begin_nested():
+                    db.add(Fog(player_id=player_id, cx=key[0], cy=key[1], bits=data))
+                    db.flush()
+            except IntegrityError:
+                # A concurrent first discovery in the chunk inserted the row
+                # meanwhile; add the bit to the bitset it wrote
+                stored = bytearray(row.with_entities(Fog.bits).scalar())
+                if stored[byte] & mask:
+                    return False
+                stored[byte] |= mask
+                row.update({Fog.bits: bytes(stored)}, synchronize_session=False)
+        else:
+            # The whole bitset is written, so a lost update is repaired by the
+            # player's next discovery in the chunk
+            row.update({Fog.bits: data}, synchronize_session=False)
+        unit_of_work.commit(db)
+        # The cached bitset only changes once the row is committed: were the
+        # request rolled back, it would otherwise claim a row that does not
+        # exist and the next discovery in the chunk would update nothing
+        unit_of_work.after_commit(db, self._set, player_id, key, byte, mask)
+        return True
+
+    def _set(self, player_id: int, key: ChunkKey, byte: int, mask: int) -> None:
+        with self._lock:
+            player = self._players.get(player_id)
+            if player is None:
+                return  # evicted; reloaded from the committed rows
+            bits = player.bits.get(key)
+            if bits is None:
+                bits = player.bits[key] = bytearray(bitset_size(self.world_map.chunk_size))
+            bits[byte] |= mask
+            player.versions[key] = self.world_map.next_version()
+
+    def chunks(self, db: Session, player_id: int) -> Dict[ChunkKey, Tuple[bytes, int]]:
+        """Return a copy of the player's bitsets keyed by chunk, each with the
+        map version of its last change.
+        """
+        player = self._bitsets(db, player_id)
+        with self._lock:
+            return {key: (bytes(bits), player.versions[key]) for key, bits in player.bits.items()}
+
+    def encode(
+        self, db: Session, player_id: int, rect: Optional[Tuple[int, int, int, int]] = None
+    ) -> list:
+        """Encode the chunks the player has discovered tiles in, optionally
+        only those overlapping the tile rectangle ``(x0, y0, x1, y1)``.
+        """
+        cs = self.world_map.chunk_size
+        encoded = []
+        for (cx, cy), (bits, _version) in sorted(self.chunks(db, player_id).items()):
+            if rect is not None:
+                x0, y0, x1, y1 = rect
+                if not (x0 <= cx * cs < x1 and y0 <= cy * cs < y1):
+                    continue
+            chunk = self.world_map.ensure_chunk(db, cx, cy)
+            encoded.append(encode_chunk(chunk, bits, cs))
+        return encoded
+
+    def clear(self) -> None:
+        """Drop every cached bitset, e.g. when a new world is created."""
+        with self._lock:
+            self._players.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            chunks = sum(len(p.bits) for p in self._players.values())
+            return {
+                "players": len(self._players),
+                "chunks": chunks,
+                "bytes": chunks * bitset_size(self.world_map.chunk_size),
+            }
+
+
+# Fog of the map shared by the API process.
+fog = FogOfWar()
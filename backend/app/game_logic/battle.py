@@ -0,0 +1,289 @@
+"""Multi‑party battles with thousands of combatants.
+
+``Battle`` applies the rules of ``combat.CombatEncounter`` (d20 initiative,
+then on each turn a d20 attack roll and a d6 of damage, doubled on a natural
+20) to any number of combatants on any number of sides. A turn costs
+O(log n) rather than O(n):
+
+* The turn order is a heap of ``(round, initiative slot)``. Each combatant
+  pushes its next turn when it acts. Combatants who fall are not removed;
+  their turns are skipped when popped (lazy deletion).
+* Each side keeps a count of combatants still standing, so telling whether
+  the battle is over takes O(1).
+* Targets are chosen by a ``Targeting`` strategy. Each side has one instance,
+  which indexes that side's standing combatants for a query such as "lowest
+  hit points" or "nearest to the attacker". Heap‑based strategies are lazy
+  as well: an entry whose key is out of date is dropped once it reaches the
+  top.
+
+With ``FirstInOrder`` targeting and two sides, a battle replays a
+``CombatEncounter`` roll for roll from the same generator.
+"""
+
+import heapq
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple, Union
+
+from ..instrumentation import timed
+from .combat import Combatant
+from .dice import roll_d20, roll_d6
+from .rng import GameRNG
+
+Pick = Tuple[tuple, int]  # (score, slot); the lowest score is attacked
+
+
+class Targeting:
+    """Index of one side's standing combatants, by slot in initiative order."""
+
+    def add(self, slot: int, combatant: Combatant) -> None:
+        raise NotImplementedError
+
+    def hit(self, slot: int, combatant: Combatant) -> None:
+        """``combatant`` lost hit points but is still standing."""
+
+    def dealt(self, slot: int, combatant: Combatant) -> None:
+        """``combatant`` dealt damage, raising its threat."""
+
+    def remove(self, slot: int, combatant: Combatant) -> None:
+        """``combatant`` fell."""
+
+    def pick(self, attacker: Combatant) -> Optional[Pick]:
+        raise NotImplementedError
+
+
+class _HeapTargeting(Targeting):
+    """Keeps the combatant with the lowest ``key`` on top of a heap."""
+
+    def __init__(self):
+        self._heap: List[Tuple[tuple, int, Combatant]] = []
+
+    def key(self, slot: int, combatant: Combatant) -> tuple:
+        raise NotImplementedError
+
+    def add(self, slot: int, combatant: Combatant) -> None:
+        heapq.heappush(self._heap, (self.key(slot, combatant), slot, combatant))
+
+    def pick(self, attacker: Combatant) -> Optional[Pick]:
+        heap = self._heap
+        while heap:
+            key, slot, combatant = heap[0]
+            if combatant.hp > 0 and key == self.key(slot, combatant):
+                return key, slot
+            heapq.heappop(heap)
+        return None
+
+
+class FirstInOrder(_HeapTargeting):
+    """Attack the standing opponent who is earliest in the initiative order."""
+
+    def key(self, slot: int, combatant: Combatant) -> tuple:
+        return (slot,)
+
+
+class LowestHP(_HeapTargeting):
+    """Attack the opponent with the fewest hit points left."""
+
+    def key(self, slot: int, combatant: Combatant) -> tuple:
+        return combatant.hp, slot
+
+    def hit(self, slot: int, combatant: Combatant) -> None:
+        self.add(slot, combatant)  # the old entry goes stale
+
+
+class HighestThreat(_HeapTargeting):
+    """Attack the opponent who has dealt the most damage so far."""
+
+    def key(self, slot: int, combatant: Combatant) -> tuple:
+        return -combatant.threat, slot
+
+    def dealt(self, slot: int, combatant: Combatant) -> None:
+        self.add(slot, combatant)  # the old entry goes stale
+
+
+class Nearest(Targeting):
+    """Attack the closest opponent (Euclidean distance between tiles).
+
+    Standing combatants are hashed into square cells. A pick searches rings
+    of cells around the attacker, outward, and stops once no unsearched
+    cell can hold anyone closer than the best found so far. When only a few
+    cells are still occupied it compares them all instead.
+    """
+
+    def __init__(self, cell_size: int = 8):
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], Dict[int, Combatant]] = {}
+        # Bounding box of the cells ever occupied, which limits the search
+        self._box = [0, 0, -1, -1]
+
+    def add(self, slot: int, combatant: Combatant) -> None:
+        key = combatant.x // self.cell_size, combatant.y // self.cell_size
+        self._cells.setdefault(key, {})[slot] = combatant
+        box = self._box
+        if box[2] < box[0]:
+            box[:] = [key[0], key[1], key[0], key[1]]
+        else:
+            box[:] = [min(box[0], key[0]), min(box[1], key[1]), max(box[2], key[0]), max(box[3], key[1])]
+
+    def remove(self, slot: int, combatant: Combatant) -> None:
+        key = combatant.x // self.cell_size, combatant.y // self.cell_size
+        cell = self._cells[key]
+        del cell[slot]
+        if not cell:
+            del self._cells[key]
+
+    def _ring(self, cx: int, cy: int, d: int):
+        if d == 0:
+            yield cx, cy
+            return
+        for x in range(cx - d, cx + d + 1):
+            yield x, cy - d
+            yield x, cy + d
+        for y in range(cy - d + 1, cy + d):
+            yield cx - d, y
+            yield cx + d, y
+
+    def pick(self, attacker: Combatant) -> Optional[Pick]:
+        cells = self._cells
+        if not cells:
+            return None
+        x, y, cs = attacker.x, attacker.y, self.cell_size
+        cx, cy = x // cs, y // cs
+        x0, y0, x1, y1 = self._box
+        reach = max(cx - x0, x1 - cx, cy - y0, y1 - cy)
+        if len(cells) <= 4 * reach:
+            candidates = list(cells.values())
+        else:
+            candidates = []
+            best = None
+            for d in range(reach + 1):
+                # Every tile d rings out is at least (d - 1) * cs + 1 away
+                if best is not None and ((d - 1) * cs + 1) ** 2 > best:
+                    break
+                for key in self._ring(cx, cy, d):
+                    cell = cells.get(key)
+                    if cell is not None:
+                        candidates.append(cell)
+                        nearest = min((c.x - x) ** 2 + (c.y - y) ** 2 for c in cell.values())
+                        best = nearest if best is None else min(best, nearest)
+        return min(
+            (((c.x - x) ** 2 + (c.y - y) ** 2, slot), slot)
+            for cell in candidates
+            for slot, c in cell.items()
+        )
+
+
+TARGETING: Dict[str, Callable[[], Targeting]] = {
+    "first": FirstInOrder,
+    "lowest_hp": LowestHP,
+    "nearest": Nearest,
+    "threat": HighestThreat,
+}
+
+
+def side_of(combatant: Combatant) -> Hashable:
+    """``combatant.side``, or players against NPCs when it is not set."""
+    return combatant.is_player if combatant.side is None else combatant.side
+
+
+class Battle:
+    """A fight between every side present among ``participants``."""
+
+    def __init__(
+        self,
+        participants: Sequence[Combatant],
+        rng: Optional[GameRNG] = None,
+        targeting: Union[str, Callable[[], Targeting]] = "first",
+    ):
+        self.rng = rng
+        factory = TARGETING[targeting] if isinstance(targeting, str) else targeting
+        for c in participants:
+            c.initiative = self._roll(roll_d20)
+        self.order: List[Combatant] = sorted(participants, key=lambda c: c.initiative, reverse=True)
+        self._sides = [side_of(c) for c in self.order]
+        self.targeting: Dict[Hashable, Targeting] = {}
+        self.standing: Dict[Hashable, int] = {}
+        for slot, (c, side) in enumerate(zip(self.order, self._sides)):
+            if side not in self.targeting:
+                self.targeting[side] = factory()
+                self.standing[side] = 0
+            if c.hp > 0:
+                self.targeting[side].add(slot, c)
+                self.standing[side] += 1
+        self._sides_standing = sum(1 for n in self.standing.values() if n)
+        # Slots are pushed in order, so the list is already a heap
+        self._turns: List[Tuple[int, int]] = [(0, s) for s, c in enumerate(self.order) if c.hp > 0]
+        self.round = 0
+        self.turns = 0
+        self.active = True
+
+    def _roll(self, die) -> int:
+        """Roll ``die`` with this battle's RNG, or the dice default if none."""
+        return die(self.rng) if self.rng is not None else die()
+
+    @property
+    def winner(self) -> Optional[Hashable]:
+        """The last side standing, once the battle is over."""
+        if self._sides_standing > 1:
+            return None
+        return next((side for side, n in self.standing.items() if n), None)
+
+    def _target(self, side: Hashable, attacker: Combatant) -> int:
+        best: Optional[Pick] = None
+        for other, targeting in self.targeting.items():
+            if other != side and self.standing[other]:
+                pick = targeting.pick(attacker)
+                if pick is not None and (best is None or pick < best):
+                    best = pick
+        return best[1]
+
+    def next_turn(self) -> Optional[Tuple[Combatant, str]]:
+        """Let the next combatant attack. Returns it with a message describing
+        the attack, or ``None`` once a single side is left standing.
+        """
+        if self._sides_standing < 2:
+            self.active = False
+            return None
+        while True:
+            self.round, slot = heapq.heappop(self._turns)
+            combatant = self.order[slot]
+            if combatant.hp > 0:
+                break
+        heapq.heappush(self._turns, (self.round + 1, slot))
+        side = self._sides[slot]
+        target_slot = self._target(side, combatant)
+        target = self.order[target_slot]
+
+        attack_roll = self._roll(roll_d20)
+        damage = self._roll(roll_d6)
+        critical = attack_roll == 20
+        if critical:
+            damage *= 2
+        target.hp -= damage
+        combatant.threat += damage
+        self.targeting[side].dealt(slot, combatant)
+        target_side = self._sides[target_slot]
+        if target.hp > 0:
+            self.targeting[target_side].hit(target_slot, target)
+        else:
+            self.targeting[target_side].remove(target_slot, target)
+            self.standing[target_side] -= 1
+            if not self.standing[target_side]:
+                self._sides_standing -= 1
+        self.turns += 1
+        message = (
+            f"{combatant.name} attacks {target.name} (roll {attack_roll}) "
+            f"for {damage} damage{' (critical)' if critical else ''}."
+        )
+        return combatant, message
+
+    @timed("battle.run")
+    def run(self, max_turns: Optional[int] = None) -> List[str]:
+        """Fight until one side is left (or for ``max_turns`` turns) and
+        return the messages.
+        """
+        log: List[str] = []
+        while max_turns is None or len(log) < max_turns:
+            result = self.next_turn()
+            if result is None:
+                break
+            log.append(result[1])
+        return log
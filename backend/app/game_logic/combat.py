@@ -6,14 +6,19 @@ order remains fixed for the duration of the encounter. On their turn
 characters may attack a target. Damage is determined by rolling a weapon
 damage die (default d6 for all combatants). Critical hits occur on natural 20s
 and double the damage.
+
+``CombatEncounter`` is meant for a handful of combatants on two sides. Large
+fights between several sides use ``battle.Battle``, which follows the same
+rules.
 """
 
 from dataclasses import dataclass
 from typing import List, Tuple, Optional
-import random
 
+from ..instrumentation import timed
 from ..models import Player, NPC
 from .dice import roll_d20, roll_d6
+from .rng import GameRNG
 
 
 @dataclass
@@ -25,25 +30,43 @@ class Combatant:
     is_player: bool
     entity: object  # underlying Player or NPC object
     initiative: int = 0
+    # Used by battle.Battle: the side fought for (players against NPCs if
+    # None), the tile stood on, and the damage dealt so far
+    side: Optional[str] = None
+    x: int = 0
+    y: int = 0
+    threat: int = 0
 
 
 class CombatEncounter:
     """Manages a single combat encounter between players and NPCs."""
 
-    def __init__(self, participants: List[Combatant]):
+    def __init__(self, participants: List[Combatant], rng: Optional[GameRNG] = None):
         self.participants = participants
+        self.rng = rng
         self.round_order: List[Combatant] = []
         self.current_index = 0
         self.active = True
         self._roll_initiative()
 
+    def _roll(self, die) -> int:
+        """Roll ``die`` with this encounter's RNG, or the dice default if none."""
+        return die(self.rng) if self.rng is not None else die()
+
     def _roll_initiative(self):
         """Determine initiative order by rolling a d20 for each participant."""
         for c in self.participants:
-            c.initiative = roll_d20()
+            c.initiative = self._roll(roll_d20)
         self.participants.sort(key=lambda c: c.initiative, reverse=True)
         self.round_order = self.participants.copy()
-
+        # Alive combatants per side, kept in initiative order and updated as
+        # combatants fall so turns never rescan the whole participant list.
+        self._alive = {
+            True: [c for c in self.participants if c.is_player and c.hp > 0],
+            False: [c for c in self.participants if not c.is_player and c.hp > 0],
+        }
+
+    @timed("combat.next_turn")
     def next_turn(self) -> Optional[Tuple[Combatant, str]]:
         """Advance to the next combatant's turn and perform a basic attack.
 
@@ -51,35 +74,29 @@ class CombatEncounter:
         If the encounter is over (all enemies or players are down), returns None.
         """
         # Check if combat is over
-        alive_players = [c for c in self.participants if c.is_player and c.hp > 0]
-        alive_npcs = [c for c in self.participants if not c.is_player and c.hp > 0]
-        if not alive_players or not alive_npcs:
+        if not self._alive[True] or not self._alive[False]:
             self.active = False
             return None
 
-        combatant = self.round_order[self.current_index]
         # Skip dead combatants
-        if combatant.hp <= 0:
+        combatant = self.round_order[self.current_index]
+        while combatant.hp <= 0:
             self.current_index = (self.current_index + 1) % len(self.round_order)
-            return self.next_turn()
+            combatant = self.round_order[self.current_index]
 
         # Determine target: pick first alive opponent
-        if combatant.is_player:
-            targets = alive_npcs
-        else:
-            targets = alive_players
-        if not targets:
-            self.active = False
-            return None
+        targets = self._alive[not combatant.is_player]
         target = targets[0]
 
         # Attack roll and damage
-        attack_roll = roll_d20()
-        damage = roll_d6()
+        attack_roll = self._roll(roll_d20)
+        damage = self._roll(roll_d6)
         critical = attack_roll == 20
         if critical:
             damage *= 2
         target.hp -= damage
+        if target.hp <= 0:
+            targets.remove(target)
         message = (
             f"{combatant.name} attacks {target.name} (roll {attack_roll}) "
             f"for {damage} damage{' (critical)' if critical else ''}."
@@ -0,0 +1,157 @@
+"""Monte Carlo combat simulation.
+
+Game designers balance encounters by running the same fight many times and
+looking at the outcome distribution. ``simulate_encounters`` runs ``n``
+independent copies of an encounter side by side: hit points live in an
+``(n, combatants)`` array and every d20/d6 roll for one turn slot of all
+encounters is drawn in a single vectorised call.
+
+The rules are those of ``combat.CombatEncounter``: initiative is a d20 per
+combatant (ties keep the listed order), each living combatant attacks the
+first living opponent in initiative order for a d6, doubled on a natural 20,
+and the fight ends as soon as one side has nobody standing.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .rng import GameRNG
+
+# Encounters simulated per vectorised batch; bounds peak memory.
+BATCH_SIZE = 100_000
+DEFAULT_MAX_ROUNDS = 100
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+@dataclass
+class CombatSimulationResult:
+    """Aggregate outcome of many simulated encounters."""
+
+    encounters: int
+    player_wins: int
+    npc_wins: int
+    unfinished: int
+    mean_rounds: float
+    rounds_percentiles: Dict[int, float] = field(default_factory=dict)
+    player_hp_percentiles: Dict[int, float] = field(default_factory=dict)
+    npc_hp_percentiles: Dict[int, float] = field(default_factory=dict)
+    player_hp_histogram: List[int] = field(default_factory=list)
+
+    @property
+    def player_win_rate(self) -> float:
+        return self.player_wins / self.encounters if self.encounters else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "encounters": self.encounters,
+            "player_wins": self.player_wins,
+            "npc_wins": self.npc_wins,
+            "unfinished": self.unfinished,
+            "player_win_rate": self.player_win_rate,
+            "mean_rounds": self.mean_rounds,
+            "rounds_percentiles": self.rounds_percentiles,
+            "player_hp_percentiles": self.player_hp_percentiles,
+            "npc_hp_percentiles": self.npc_hp_percentiles,
+            "player_hp_histogram": self.player_hp_histogram,
+        }
+
+
+def _simulate_batch(
+    player_hp: Sequence[int],
+    npc_hp: Sequence[int],
+    n: int,
+    rng: np.random.Generator,
+    max_rounds: int,
+):
+    """Simulate ``n`` encounters; return final HP (initiative order), sides and rounds."""
+    start_hp = np.array(list(player_hp) + list(npc_hp), dtype=np.int64)
+    is_player = np.array([True] * len(player_hp) + [False] * len(npc_hp))
+    k = len(start_hp)
+
+    # Initiative: stable descending sort so ties keep the listed order, as
+    # list.sort(reverse=True) does in CombatEncounter.
+    initiative = rng.integers(1, 21, size=(n, k))
+    order = np.argsort(-initiative, axis=1, kind="stable")
+    hp = start_hp[order]
+    side = is_player[order]
+    rows = np.arange(n)
+
+    def finished() -> np.ndarray:
+        alive = hp > 0
+        return ~((alive & side).any(axis=1) & (alive & ~side).any(axis=1))
+
+    active = ~finished()
+    rounds = np.zeros(n, dtype=np.int64)
+    for _ in range(max_rounds):
+        if not active.any():
+            break
+        rounds += active
+        for slot in range(k):
+            acting = active & (hp[:, slot] > 0)
+            if not acting.any():
+                continue
+            opponents = (hp > 0) & (side != side[:, slot : slot + 1])
+            # First living opponent in initiative order
+            target = np.argmax(opponents, axis=1)
+            attack_roll = rng.integers(1, 21, size=n)
+            damage = rng.integers(1, 7, size=n) * np.where(attack_roll == 20, 2, 1)
+            hp[rows[acting], target[acting]] -= damage[acting]
+            active &= ~finished()
+    return hp, side, rounds, active
+
+
+def simulate_encounters(
+    player_hp: Sequence[int],
+    npc_hp: Sequence[int],
+    n: int,
+    seed: Optional[int] = None,
+    max_rounds: int = DEFAULT_MAX_ROUNDS,
+    rng: Optional[GameRNG] = None,
+) -> CombatSimulationResult:
+    """Run ``n`` independent encounters between players and NPCs.
+
+    ``player_hp`` and ``npc_hp`` list the starting hit points of each
+    combatant on either side. Dice come from ``rng`` (or a new ``GameRNG``
+    for ``seed``), so results are reproducible for a given seed.
+    Encounters still running after ``max_rounds`` are reported as unfinished.
+    """
+    if not player_hp or not npc_hp:
+        raise ValueError("Both sides need at least one combatant")
+    if n < 1:
+        raise ValueError("n must be at least 1")
+    generator = (rng or GameRNG(seed)).numpy
+    player_totals, npc_totals, all_rounds = [], [], []
+    player_wins = npc_wins = unfinished = 0
+    for start in range(0, n, BATCH_SIZE):
+        size = min(BATCH_SIZE, n - start)
+        hp, side, rounds, active = _simulate_batch(player_hp, npc_hp, size, generator, max_rounds)
+        remaining = np.clip(hp, 0, None)
+        players_left = np.where(side, remaining, 0).sum(axis=1)
+        npcs_left = np.where(side, 0, remaining).sum(axis=1)
+        player_wins += int(((players_left > 0) & (npcs_left == 0)).sum())
+        npc_wins += int(((npcs_left > 0) & (players_left == 0)).sum())
+        unfinished += int(active.sum())
+        player_totals.append(players_left)
+        npc_totals.append(npcs_left)
+        all_rounds.append(rounds)
+
+    player_left = np.concatenate(player_totals)
+    npc_left = np.concatenate(npc_totals)
+    rounds = np.concatenate(all_rounds)
+
+    def pct(values: np.ndarray) -> Dict[int, float]:
+        return {p: float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+    return CombatSimulationResult(
+        encounters=n,
+        player_wins=player_wins,
+        npc_wins=npc_wins,
+        unfinished=unfinished,
+        mean_rounds=float(rounds.mean()),
+        rounds_percentiles=pct(rounds),
+        player_hp_percentiles=pct(player_left),
+        npc_hp_percentiles=pct(npc_left),
+        player_hp_histogram=np.bincount(player_left, minlength=sum(player_hp) + 1).tolist(),
+    )
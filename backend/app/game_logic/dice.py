@@ -2,49 +2,56 @@
 
 The D20 system uses fair polyhedral dice where each face has an equal
 probability of landing face up【171953677326081†L563-L566】. These helper
-functions wrap Python's ``random`` module and provide convenience rolls for
-common dice used in tabletop RPGs. All functions return integers.
+functions draw from a ``GameRNG`` (see ``rng.py``) and provide convenience
+rolls for common dice used in tabletop RPGs. Pass the generator of the world
+or session you are simulating as ``rng`` for reproducible results; without
+one the shared ``rng.default_rng`` is used. All functions return integers.
 """
 
-import random
-from typing import List
+from typing import List, Optional
 
+import numpy as np
 
-def roll_die(sides: int) -> int:
+from .rng import GameRNG, default_rng
+
+
+def roll_die(sides: int, rng: Optional[GameRNG] = None) -> int:
     """Roll a die with the given number of sides and return the result.
 
-    A fair die has a uniform probability distribution across all faces. The
-    built‑in random number generator is used here for simplicity. In a
-    production system you may wish to inject your own random source for
-    reproducibility.
+    A fair die has a uniform probability distribution across all faces.
     """
-    return random.randint(1, sides)
+    return (rng or default_rng).roll(sides)
 
 
-def roll_d4() -> int:
-    return roll_die(4)
+def roll_d4(rng: Optional[GameRNG] = None) -> int:
+    return roll_die(4, rng)
 
 
-def roll_d6() -> int:
-    return roll_die(6)
+def roll_d6(rng: Optional[GameRNG] = None) -> int:
+    return roll_die(6, rng)
 
 
-def roll_d8() -> int:
-    return roll_die(8)
+def roll_d8(rng: Optional[GameRNG] = None) -> int:
+    return roll_die(8, rng)
 
 
-def roll_d10() -> int:
-    return roll_die(10)
+def roll_d10(rng: Optional[GameRNG] = None) -> int:
+    return roll_die(10, rng)
 
 
-def roll_d12() -> int:
-    return roll_die(12)
+def roll_d12(rng: Optional[GameRNG] = None) -> int:
+    return roll_die(12, rng)
 
 
-def roll_d20() -> int:
-    return roll_die(20)
+def roll_d20(rng: Optional[GameRNG] = None) -> int:
+    return roll_die(20, rng)
 
 
-def roll_multiple(sides: int, count: int) -> List[int]:
+def roll_multiple(sides: int, count: int, rng: Optional[GameRNG] = None) -> List[int]:
     """Roll a die multiple times and return a list of results."""
-    return [roll_die(sides) for _ in range(count)]
+    return roll_many(sides, count, rng).tolist()
+
+
+def roll_many(sides: int, n: int, rng: Optional[GameRNG] = None) -> np.ndarray:
+    """Roll ``n`` dice in one vectorised draw and return them as an array."""
+    return (rng or default_rng).roll_many(sides, n)
@@ -1,24 +1,31 @@
 """Random event system.
 
 The event system triggers pseudo‑random global events such as weather changes,
-ambushes or diplomatic developments. Events are persisted via the Event model
-and broadcast to connected clients through the API. This implementation is
-intentionally simple — a real system might schedule events based on a game
-clock or player actions.
+ambushes or diplomatic developments. Events run on the game clock: handlers
+are registered with the ``EventScheduler`` (see ``scheduler.py``), which calls
+them as their timers expire and records the lines they return in the event
+log, from where they are broadcast to connected clients.
+
+Weather holds for a few game hours; each change schedules the next one and
+remembers the current weather in the timer's payload.
 """
 
-import random
-from datetime import datetime
 from typing import Optional
 
-from sqlalchemy.orm import Session
+from ..instrumentation import timed
+from ..scheduler import MINUTES_PER_HOUR, EventScheduler
+from .rng import GameRNG, rng_service
+from .timer_wheel import Timer
 
-from .. import models, crud
+# Game hours the weather holds for, at least and at most
+WEATHER_HOURS = (2, 8)
 
 
 class EventSystem:
-    def __init__(self, db: Session):
-        self.db = db
+    def __init__(self, rng: Optional[GameRNG] = None):
+        # Without an explicit generator events draw from the current world's
+        # "events" substream, which /init resets.
+        self._rng = rng
         self.weather_states = [
             "clear skies",
             "drizzle",
@@ -27,14 +34,27 @@ class EventSystem:
             "snow",
         ]
 
-    def maybe_trigger(self) -> Optional[models.Event]:
-        """Randomly decide whether to trigger an event. Returns the Event if one
-        occurred, else None. The probability of an event each call is low to
-        avoid spamming the log.
+    @property
+    def rng(self) -> GameRNG:
+        return self._rng or rng_service.stream("events")
+
+    def install(self, scheduler: EventScheduler) -> None:
+        """Register the handlers with ``scheduler`` and start the weather if
+        the world has no weather change pending.
+        """
+        scheduler.handlers["weather"] = self.change_weather
+        if not scheduler.pending("weather"):
+            scheduler.schedule("weather", self._weather_minutes())
+
+    def _weather_minutes(self) -> int:
+        return self.rng.randint(*WEATHER_HOURS) * MINUTES_PER_HOUR
+
+    @timed("event_system.change_weather")
+    def change_weather(self, scheduler: EventScheduler, timer: Timer, minute: int) -> str:
+        """Pick new weather, different from the current one, and schedule
+        the next change.
         """
-        # 10% chance to trigger a weather event
-        if random.random() < 0.1:
-            weather = random.choice(self.weather_states)
-            description = f"The weather shifts to {weather}."
-            return crud.create_event(self.db, description)
-        return None
+        current = (timer.payload or {}).get("weather")
+        weather = self.rng.choice([w for w in self.weather_states if w != current])
+        scheduler.schedule("weather", self._weather_minutes(), {"weather": weather})
+        return f"The weather shifts to {weather}."
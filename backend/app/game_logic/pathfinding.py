@@ -0,0 +1,723 @@
+"""Grid pathfinding: A*, Jump Point Search and hierarchical A* (HPA*).
+
+Paths are searched on a grid of per‑tile movement costs indexed ``[x, y]``,
+like the terrain arrays of ``world_generator``. Movement is 8‑connected; a
+diagonal step may not cut the corner of an impassable tile. A step between
+neighbouring tiles costs its length (1 or √2) times the mean of the two
+tiles' costs, so costs are symmetric. Mountains are slow to cross and tiles
+with an infinite cost (``water``) cannot be entered.
+
+* ``astar`` finds the cheapest path on a ``Grid``.
+* ``jps`` finds the shortest path ignoring terrain weights (every passable
+  tile costs 1). Jump Point Search skips the symmetric paths A* would
+  expand on open ground, so it is much faster on large uniform areas.
+* ``HierarchicalPathfinder`` splits the map into square clusters (the
+  world's chunks). Transition tiles on the borders between clusters and the
+  costs between them form a small abstract graph. Long routes are searched on
+  that graph and then refined cluster by cluster with A*. Clusters are built
+  lazily, the first time a search reaches them. Finished routes are cached by
+  ``(start cluster, goal)``. A later request from anywhere in the same
+  cluster to the same goal only searches its way to the cached route, so an
+  NPC walking towards a goal pays for a full search once rather than every
+  tick. ``invalidate`` drops what depends on a cluster whose terrain changed.
+* ``flow_field`` computes the cost to the nearest of several goal tiles for
+  every tile of a grid at once (a "Dijkstra map") and the direction of the
+  next step from each tile. Any number of NPCs heading for the same goals
+  then move by looking up their tile.
+"""
+
+import heapq
+import math
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .world_generator import TERRAINS
+
+INF = math.inf
+SQRT2 = math.sqrt(2.0)
+
+# Cost of entering each terrain; infinite means impassable.
+TERRAIN_COSTS = {"plains": 1.0, "desert": 1.5, "forest": 2.0, "mountain": 4.0, "water": INF}
+# Indexed like TERRAINS so terrain arrays can be mapped in one step.
+_COST_TABLE = np.array([TERRAIN_COSTS[name] for name in TERRAINS], dtype=np.float64)
+
+# Border stretches at least this long get two transitions (one at each end)
+LONG_ENTRANCE = 6
+DEFAULT_PATH_CACHE = 4096
+
+Point = Tuple[int, int]
+Path = List[Point]
+
+_DIRECTIONS = [
+    (1, 0, 1.0), (-1, 0, 1.0), (0, 1, 1.0), (0, -1, 1.0),
+    (1, 1, SQRT2), (1, -1, SQRT2), (-1, 1, SQRT2), (-1, -1, SQRT2),
+]
+
+
+def terrain_costs(terrain: np.ndarray) -> np.ndarray:
+    """Map an array of terrain indices to movement costs."""
+    return _COST_TABLE[terrain]
+
+
+def octile(a: Point, b: Point) -> float:
+    """Length of the shortest 8‑connected path between ``a`` and ``b`` on open ground."""
+    dx, dy = abs(a[0] - b[0]), abs(a[1] - b[1])
+    return max(dx, dy) + (SQRT2 - 1.0) * min(dx, dy)
+
+
+def path_cost(grid: "Grid", path: Path) -> float:
+    """Cost of walking ``path`` on ``grid``."""
+    total = 0.0
+    for (x, y), (nx, ny) in zip(path, path[1:]):
+        step = SQRT2 if x != nx and y != ny else 1.0
+        total += step * (grid.cost(x, y) + grid.cost(nx, ny)) * 0.5
+    return total
+
+
+class Grid:
+    """Movement costs of a rectangle of tiles whose corner is ``origin``.
+
+    Costs are kept in a flat list (index ``(x - x0) * height + (y - y0)``)
+    because the search loops read them one at a time.
+    """
+
+    def __init__(self, costs: np.ndarray, origin: Point = (0, 0)):
+        self.width, self.height = costs.shape
+        self.x0, self.y0 = origin
+        self.array = np.asarray(costs, dtype=np.float64)
+        self.costs: List[float] = self.array.ravel().tolist()
+        finite = [c for c in self.costs if c != INF]
+        self.min_cost = min(finite) if finite else 1.0
+
+    def contains(self, x: int, y: int) -> bool:
+        return 0 <= x - self.x0 < self.width and 0 <= y - self.y0 < self.height
+
+    def cost(self, x: int, y: int) -> float:
+        if not self.contains(x, y):
+            return INF
+        return self.costs[(x - self.x0) * self.height + (y - self.y0)]
+
+    def passable(self, x: int, y: int) -> bool:
+        return self.cost(x, y) != INF
+
+
+def _search(grid: Grid, start: Point, goals: Set[Point], heuristic_goal: Optional[Point]):
+    """A* (or Dijkstra without ``heuristic_goal``) from ``start`` until every
+    tile in ``goals`` is settled. Returns ``(distances, parents)`` keyed by
+    flat index.
+    """
+    w, h, x0, y0 = grid.width, grid.height, grid.x0, grid.y0
+    costs = grid.costs
+    source = (start[0] - x0) * h + (start[1] - y0)
+    pending = {(gx - x0) * h + (gy - y0) for gx, gy in goals if grid.passable(gx, gy)}
+    if heuristic_goal is not None:
+        gx, gy = heuristic_goal[0] - x0, heuristic_goal[1] - y0
+        hmin = grid.min_cost
+    best = {source: 0.0}
+    parents = {source: -1}
+    settled = {}
+    heap = [(0.0, 0.0, source)]
+    while heap and pending:
+        _f, g, n = heapq.heappop(heap)
+        if n in settled:
+            continue
+        settled[n] = g
+        pending.discard(n)
+        x, y = divmod(n, h)
+        cn = costs[n]
+        for dx, dy, length in _DIRECTIONS:
+            nx, ny = x + dx, y + dy
+            if nx < 0 or ny < 0 or nx >= w or ny >= h:
+                continue
+            m = nx * h + ny
+            cm = costs[m]
+            if cm == INF or m in settled:
+                continue
+            if dx and dy and (costs[nx * h + y] == INF or costs[x * h + ny] == INF):
+                continue
+            ng = g + length * (cn + cm) * 0.5
+            if ng < best.get(m, INF):
+                best[m] = ng
+                parents[m] = n
+                f = ng
+                if heuristic_goal is not None:
+                    ax, ay = abs(nx - gx), abs(ny - gy)
+                    f += hmin * (max(ax, ay) + (SQRT2 - 1.0) * min(ax, ay))
+                heapq.heappush(heap, (f, ng, m))
+    return settled, parents
+
+
+def _unwind(grid: Grid, parents: Dict[int, int], n: int) -> Path:
+    h = grid.height
+    path = []
+    while n != -1:
+        x, y = divmod(n, h)
+        path.append((x + grid.x0, y + grid.y0))
+        n = parents[n]
+    path.reverse()
+    return path
+
+
+def astar(grid: Grid, start: Point, goal: Point) -> Optional[Path]:
+    """Cheapest path from ``start`` to ``goal`` (both included), or ``None``."""
+    if not grid.passable(*start) or not grid.passable(*goal):
+        return None
+    settled, parents = _search(grid, start, {goal}, goal)
+    n = (goal[0] - grid.x0) * grid.height + (goal[1] - grid.y0)
+    return _unwind(grid, parents, n) if n in settled else None
+
+
+def distances(grid: Grid, start: Point, targets: Iterable[Point]) -> Dict[Point, float]:
+    """Path costs from ``start`` to each reachable tile of ``targets``."""
+    targets = set(targets)
+    if not grid.passable(*start) or not targets:
+        return {}
+    settled, _parents = _search(grid, start, targets, None)
+    h = grid.height
+    found = {}
+    for x, y in targets:
+        n = (x - grid.x0) * h + (y - grid.y0)
+        if grid.contains(x, y) and n in settled:
+            found[(x, y)] = settled[n]
+    return found
+
+
+# -- Jump Point Search -------------------------------------------------------
+
+
+def _sign(v: int) -> int:
+    return (v > 0) - (v < 0)
+
+
+def jps(grid: Grid, start: Point, goal: Point) -> Optional[Path]:
+    """Shortest path counting every passable tile as cost 1, or ``None``.
+
+    Uses the pruning rules for grids where diagonal moves need both adjacent
+    straight tiles to be open. Jumps are iterative, so long corridors do not
+    hit the recursion limit.
+    """
+    if not grid.passable(*start) or not grid.passable(*goal):
+        return None
+    walk = grid.passable
+
+    def jump_straight(x, y, dx, dy):
+        while True:
+            if not walk(x, y):
+                return None
+            if (x, y) == goal:
+                return x, y
+            if dx:
+                if (walk(x, y - 1) and not walk(x - dx, y - 1)) or (
+                    walk(x, y + 1) and not walk(x - dx, y + 1)
+                ):
+                    return x, y
+            elif (walk(x - 1, y) and not walk(x - 1, y - dy)) or (
+                walk(x + 1, y) and not walk(x + 1, y - dy)
+            ):
+                return x, y
+            x += dx
+            y += dy
+
+    def jump(x, y, dx, dy):
+        if not (dx and dy):
+            return jump_straight(x, y, dx, dy)
+        while True:
+            if not walk(x, y):
+                return None
+            if (x, y) == goal:
+                return x, y
+            if jump_straight(x + dx, y, dx, 0) or jump_straight(x, y + dy, 0, dy):
+                return x, y
+            if not (walk(x + dx, y) and walk(x, y + dy)):
+                return None
+            x += dx
+            y += dy
+
+    def successors(x, y, parent):
+        if parent is None:
+            for dx, dy, _ in _DIRECTIONS:
+                if walk(x + dx, y + dy) and (
+                    not (dx and dy) or (walk(x + dx, y) and walk(x, y + dy))
+                ):
+                    yield dx, dy
+            return
+        dx, dy = _sign(x - parent[0]), _sign(y - parent[1])
+        if dx and dy:
+            vertical, horizontal = walk(x, y + dy), walk(x + dx, y)
+            if vertical:
+                yield 0, dy
+            if horizontal:
+                yield dx, 0
+            if vertical and horizontal:
+                yield dx, dy
+        elif dx:
+            ahead, up, down = walk(x + dx, y), walk(x, y + 1), walk(x, y - 1)
+            if ahead:
+                yield dx, 0
+                if up:
+                    yield dx, 1
+                if down:
+                    yield dx, -1
+            if up:
+                yield 0, 1
+            if down:
+                yield 0, -1
+        else:
+            ahead, right, left = walk(x, y + dy), walk(x + 1, y), walk(x - 1, y)
+            if ahead:
+                yield 0, dy
+                if right:
+                    yield 1, dy
+                if left:
+                    yield -1, dy
+            if right:
+                yield 1, 0
+            if left:
+                yield -1, 0
+
+    best = {start: 0.0}
+    parents: Dict[Point, Optional[Point]] = {start: None}
+    closed = set()
+    heap = [(octile(start, goal), 0.0, start)]
+    while heap:
+        _f, g, node = heapq.heappop(heap)
+        if node in closed:
+            continue
+        if node == goal:
+            break
+        closed.add(node)
+        x, y = node
+        for dx, dy in successors(x, y, parents[node]):
+            point = jump(x + dx, y + dy, dx, dy)
+            if point is None or point in closed:
+                continue
+            ng = g + octile(node, point)
+            if ng < best.get(point, INF):
+                best[point] = ng
+                parents[point] = node
+                heapq.heappush(heap, (ng + octile(point, goal), ng, point))
+    if goal not in closed and goal not in parents:
+        return None
+    # Jump points are joined by straight or diagonal runs; fill them in
+    jumps = []
+    node: Optional[Point] = goal
+    while node is not None:
+        jumps.append(node)
+        node = parents[node]
+    jumps.reverse()
+    path = [start]
+    for (x, y), (tx, ty) in zip(jumps, jumps[1:]):
+        dx, dy = _sign(tx - x), _sign(ty - y)
+        while (x, y) != (tx, ty):
+            x, y = x + dx, y + dy
+            path.append((x, y))
+    return path
+
+
+# -- Flow fields -----------------------------------------------------------------
+
+
+class FlowField:
+    """Costs to the nearest goal and next steps for a rectangle of tiles.
+
+    ``distance`` and ``direction`` are indexed ``[x - x0, y - y0]``;
+    ``direction`` indexes the 8 unit moves and is -1 where there is no next
+    step (goals, impassable and unreachable tiles).
+    """
+
+    def __init__(self, distance: np.ndarray, direction: np.ndarray, origin: Point, goals: Iterable[Point]):
+        self.distance = distance
+        self.direction = direction
+        self.x0, self.y0 = origin
+        self.width, self.height = distance.shape
+        self.goals = frozenset(goals)
+
+    def contains(self, x: int, y: int) -> bool:
+        return 0 <= x - self.x0 < self.width and 0 <= y - self.y0 < self.height
+
+    def cost(self, x: int, y: int) -> float:
+        """Cost from ``(x, y)`` to the nearest goal; infinite if unreachable."""
+        if not self.contains(x, y):
+            return INF
+        return float(self.distance[x - self.x0, y - self.y0])
+
+    def next_step(self, x: int, y: int) -> Optional[Point]:
+        """Tile to move to from ``(x, y)``, or ``None`` to stay put."""
+        if not self.contains(x, y):
+            return None
+        d = self.direction[x - self.x0, y - self.y0]
+        if d < 0:
+            return None
+        return x + int(_STEP_X[d]), y + int(_STEP_Y[d])
+
+    def next_steps(self, xs: np.ndarray, ys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """``next_step`` for arrays of tiles; tiles without a step stay put."""
+        xs, ys = np.asarray(xs, dtype=np.int64), np.asarray(ys, dtype=np.int64)
+        i, j = xs - self.x0, ys - self.y0
+        inside = (i >= 0) & (i < self.width) & (j >= 0) & (j < self.height)
+        d = np.full(xs.shape, -1, dtype=np.int64)
+        d[inside] = self.direction[i[inside], j[inside]]
+        moving = d >= 0
+        return (
+            np.where(moving, xs + _STEP_X[d], xs),
+            np.where(moving, ys + _STEP_Y[d], ys),
+        )
+
+
+_STEP_X = np.array([dx for dx, _dy, _len in _DIRECTIONS], dtype=np.int64)
+_STEP_Y = np.array([dy for _dx, dy, _len in _DIRECTIONS], dtype=np.int64)
+
+
+def _step_costs(costs: np.ndarray) -> np.ndarray:
+    """Cost of each of the 8 moves out of every tile, shape ``(8, w, h)``;
+    infinite where the move leaves the grid, enters an impassable tile or
+    cuts its corner.
+    """
+    w, h = costs.shape
+    padded = np.full((w + 2, h + 2), INF)
+    padded[1:-1, 1:-1] = costs
+    steps = np.empty((len(_DIRECTIONS), w, h))
+    for k, (dx, dy, length) in enumerate(_DIRECTIONS):
+        target = padded[1 + dx : 1 + dx + w, 1 + dy : 1 + dy + h]
+        with np.errstate(invalid="ignore"):
+            steps[k] = length * (costs + target) * 0.5
+        if dx and dy:
+            side_x = padded[1 + dx : 1 + dx + w, 1 : 1 + h]
+            side_y = padded[1 : 1 + w, 1 + dy : 1 + dy + h]
+            steps[k][np.isinf(side_x) | np.isinf(side_y)] = INF
+    return steps
+
+
+def flow_field(costs: np.ndarray, goals: Iterable[Point], origin: Point = (0, 0)) -> FlowField:
+    """Flow field towards ``goals`` over the cost grid ``costs`` whose corner
+    is ``origin``. Goals outside the grid or on impassable tiles are ignored.
+
+    The distances are relaxed with whole‑array operations, every tile taking
+    the cheapest of its 8 neighbours' distances plus the step cost, until
+    nothing changes (Bellman‑Ford on the grid graph). This needs as many
+    rounds as the longest route has steps, each a handful of numpy calls, so
+    it suits the window around a goal rather than a whole large map.
+    """
+    costs = np.asarray(costs, dtype=np.float64)
+    w, h = costs.shape
+    x0, y0 = origin
+    goals = [g for g in goals if 0 <= g[0] - x0 < w and 0 <= g[1] - y0 < h]
+    steps = _step_costs(costs)
+    padded = np.full((w + 2, h + 2), INF)
+    dist = padded[1:-1, 1:-1]
+    for gx, gy in goals:
+        if costs[gx - x0, gy - y0] != INF:
+            dist[gx - x0, gy - y0] = 0.0
+    neighbours = [padded[1 + dx : 1 + dx + w, 1 + dy : 1 + dy + h] for dx, dy, _len in _DIRECTIONS]
+    candidate = np.empty((w, h))
+    for _round in range(w * h):
+        changed = False
+        for k, neighbour in enumerate(neighbours):
+            np.add(neighbour, steps[k], out=candidate)
+            better = candidate < dist
+            if better.any():
+                dist[better] = candidate[better]
+                changed = True
+        if not changed:
+            break
+    totals = np.stack([neighbour + steps[k] for k, neighbour in enumerate(neighbours)])
+    direction = np.argmin(totals, axis=0)
+    direction[np.isinf(dist) | (dist == 0.0)] = -1
+    return FlowField(dist.copy(), direction.astype(np.int8), origin, goals)
+
+
+# -- Hierarchical A* ------------------------------------------------------------
+
+
+class CostSource:
+    """Where ``HierarchicalPathfinder`` gets terrain costs from.
+
+    ``costs(cx, cy)`` returns the costs of cluster ``(cx, cy)`` indexed
+    ``[x - x0, y - y0]``, clipped to the ``width`` x ``height`` map.
+    """
+
+    width: int
+    height: int
+    cluster_size: int
+
+    def costs(self, cx: int, cy: int) -> np.ndarray:
+        raise NotImplementedError
+
+
+class ArrayCostSource(CostSource):
+    """Clusters cut from one cost array covering the whole map."""
+
+    def __init__(self, costs: np.ndarray, cluster_size: int):
+        self.array = costs
+        self.width, self.height = costs.shape
+        self.cluster_size = cluster_size
+
+    def costs(self, cx: int, cy: int) -> np.ndarray:
+        s = self.cluster_size
+        return self.array[cx * s : (cx + 1) * s, cy * s : (cy + 1) * s]
+
+
+class _Cluster:
+    """Abstract graph of one cluster: its transition tiles and the costs
+    between them (``edges``), and the transitions across its borders
+    (``crossings``).
+    """
+
+    __slots__ = ("grid", "edges", "crossings", "segments")
+
+    def __init__(self, grid: Grid):
+        self.grid = grid
+        self.edges: Dict[Point, Dict[Point, float]] = {}
+        self.crossings: Dict[Point, List[Tuple[Point, float]]] = {}
+        # Refined tile paths between transitions, filled in on use
+        self.segments: Dict[Tuple[Point, Point], Path] = {}
+
+
+class HierarchicalPathfinder:
+    """HPA* over lazily built clusters, with a route cache."""
+
+    def __init__(
+        self,
+        source: CostSource,
+        cache_size: int = DEFAULT_PATH_CACHE,
+        min_cost: float = min(TERRAIN_COSTS.values()),
+    ):
+        self.source = source
+        self.cache_size = cache_size
+        # Cheapest tile cost anywhere, for an admissible heuristic
+        self.min_cost = min_cost
+        self._grids: Dict[Point, Grid] = {}
+        self._clusters: Dict[Point, _Cluster] = {}
+        # (start cluster, goal) -> (first transition, path from it to goal, clusters crossed)
+        self._routes: "OrderedDict[Tuple[Point, Point], Tuple[Point, Path, Set[Point]]]" = OrderedDict()
+        self._routes_through: Dict[Point, Set[Tuple[Point, Point]]] = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.clusters_built = 0
+        self.invalidations = 0
+
+    # -- clusters ------------------------------------------------------------
+
+    def cluster_of(self, x: int, y: int) -> Point:
+        s = self.source.cluster_size
+        return x // s, y // s
+
+    def _in_map(self, c: Point) -> bool:
+        s = self.source.cluster_size
+        return 0 <= c[0] * s < self.source.width and 0 <= c[1] * s < self.source.height
+
+    def grid(self, c: Point) -> Grid:
+        grid = self._grids.get(c)
+        if grid is None:
+            s = self.source.cluster_size
+            grid = self._grids[c] = Grid(self.source.costs(*c), (c[0] * s, c[1] * s))
+        return grid
+
+    def costs(self, c: Point) -> np.ndarray:
+        """Cost array of cluster ``c``, indexed like ``CostSource.costs``."""
+        with self._lock:
+            return self.grid(c).array
+
+    def passable(self, x: int, y: int) -> bool:
+        if not (0 <= x < self.source.width and 0 <= y < self.source.height):
+            return False
+        with self._lock:
+            return self.grid(self.cluster_of(x, y)).passable(x, y)
+
+    def _transitions(self, a: Point, b: Point) -> List[Tuple[Point, Point]]:
+        """Pairs of facing tiles ``(in a, in b)`` where routes cross from
+        cluster ``a`` to its right or lower neighbour ``b``.
+        """
+        ga, gb = self.grid(a), self.grid(b)
+        if b[0] > a[0]:
+            xa = ga.x0 + ga.width - 1
+            span = range(max(ga.y0, gb.y0), min(ga.y0 + ga.height, gb.y0 + gb.height))
+            facing = [((xa, y), (xa + 1, y)) for y in span]
+        else:
+            ya = ga.y0 + ga.height - 1
+            span = range(max(ga.x0, gb.x0), min(ga.x0 + ga.width, gb.x0 + gb.width))
+            facing = [((x, ya), (x, ya + 1)) for x in span]
+        pairs, run = [], []
+        for pair in facing + [None]:
+            if pair is not None and ga.passable(*pair[0]) and gb.passable(*pair[1]):
+                run.append(pair)
+                continue
+            if len(run) >= LONG_ENTRANCE:
+                pairs.extend([run[0], run[-1]])
+            elif run:
+                pairs.append(run[len(run) // 2])
+            run = []
+        return pairs
+
+    def cluster(self, c: Point) -> _Cluster:
+        """Return the abstract graph of cluster ``c``, building it if needed."""
+        cluster = self._clusters.get(c)
+        if cluster is not None:
+            return cluster
+        grid = self.grid(c)
+        cluster = _Cluster(grid)
+        cx, cy = c
+        for other, forward in (
+            ((cx + 1, cy), True), ((cx, cy + 1), True),
+            ((cx - 1, cy), False), ((cx, cy - 1), False),
+        ):
+            if not self._in_map(other):
+                continue
+            pairs = self._transitions(c, other) if forward else [
+                (q, p) for p, q in self._transitions(other, c)
+            ]
+            og = self.grid(other)
+            for p, q in pairs:
+                step = (grid.cost(*p) + og.cost(*q)) * 0.5
+                cluster.crossings.setdefault(p, []).append((q, step))
+        nodes = list(cluster.crossings)
+        for node in nodes:
+            found = distances(grid, node, nodes)
+            found.pop(node, None)
+            cluster.edges[node] = found
+        self._clusters[c] = cluster
+        self.clusters_built += 1
+        return cluster
+
+    # -- queries -------------------------------------------------------------
+
+    def find(self, start: Point, goal: Point) -> Optional[Path]:
+        """Path from ``start`` to ``goal`` (both included), or ``None``.
+
+        Routes within one cluster are exact. Longer routes follow the
+        abstract graph, so they can be slightly costlier than the optimum;
+        routes served from the cache also reuse the path from the first
+        transition onwards.
+        """
+        if not (self.passable(*start) and self.passable(*goal)):
+            return None
+        with self._lock:
+            sc, gc = self.cluster_of(*start), self.cluster_of(*goal)
+            if sc == gc:
+                path = astar(self.grid(sc), start, goal)
+                if path is not None:
+                    return path
+            key = (sc, goal)
+            cached = self._routes.get(key)
+            if cached is not None:
+                first, tail, _clusters = cached
+                head = self._segment(sc, start, first)
+                if head is not None:
+                    self._routes.move_to_end(key)
+                    self.hits += 1
+                    return head + tail[1:]
+            self.misses += 1
+            route = self._abstract_route(start, goal)
+            if route is None:
+                return None
+            path = [start]
+            crossed = {sc}
+            for a, b in zip(route, route[1:]):
+                ca, cb = self.cluster_of(*a), self.cluster_of(*b)
+                crossed.add(cb)
+                if ca == cb:
+                    path.extend(self._segment(ca, a, b)[1:])
+                else:
+                    path.append(b)
+            if len(route) > 2:
+                first = route[1]
+                self._remember(key, first, path[path.index(first):], crossed)
+            return path
+
+    def _segment(self, c: Point, a: Point, b: Point) -> Optional[Path]:
+        """Tile path between two tiles of cluster ``c``, searched within it."""
+        cluster = self._clusters.get(c)
+        if cluster is None:
+            return astar(self.grid(c), a, b)
+        path = cluster.segments.get((a, b))
+        if path is None:
+            path = astar(cluster.grid, a, b)
+            if path is not None and a in cluster.edges and b in cluster.edges:
+                cluster.segments[(a, b)] = path
+        return path
+
+    def _abstract_route(self, start: Point, goal: Point) -> Optional[List[Point]]:
+        sc, gc = self.cluster_of(*start), self.cluster_of(*goal)
+        start_edges = distances(self.grid(sc), start, self.cluster(sc).edges)
+        goal_edges = distances(self.grid(gc), goal, self.cluster(gc).edges)
+        if not start_edges or not goal_edges:
+            return None
+        hmin = self.min_cost
+        heap = [(0.0, 0.0, start)]
+        best = {start: 0.0}
+        parents: Dict[Point, Optional[Point]] = {start: None}
+        closed = set()
+        while heap:
+            _f, g, node = heapq.heappop(heap)
+            if node in closed:
+                continue
+            if node == goal:
+                break
+            closed.add(node)
+            if node == start:
+                neighbours = start_edges.items()
+            else:
+                cluster = self.cluster(self.cluster_of(*node))
+                neighbours = list(cluster.edges[node].items()) + cluster.crossings[node]
+                if node in goal_edges:
+                    neighbours.append((goal, goal_edges[node]))
+            for other, cost in neighbours:
+                ng = g + cost
+                if ng < best.get(other, INF):
+                    best[other] = ng
+                    parents[other] = node
+                    heapq.heappush(heap, (ng + hmin * octile(other, goal), ng, other))
+        if goal not in parents:
+            return None
+        route = []
+        node: Optional[Point] = goal
+        while node is not None:
+            route.append(node)
+            node = parents[node]
+        route.reverse()
+        return route
+
+    # -- cache ---------------------------------------------------------------
+
+    def _remember(self, key, first: Point, tail: Path, crossed: Set[Point]) -> None:
+        self._routes[key] = (first, tail, crossed)
+        for c in crossed:
+            self._routes_through.setdefault(c, set()).add(key)
+        while len(self._routes) > self.cache_size:
+            old, (_first, _tail, old_crossed) = self._routes.popitem(last=False)
+            for c in old_crossed:
+                self._routes_through.get(c, set()).discard(old)
+
+    def invalidate(self, cx: int, cy: int) -> None:
+        """Forget everything that depends on the terrain of cluster ``(cx, cy)``."""
+        with self._lock:
+            c = (cx, cy)
+            self._grids.pop(c, None)
+            # Neighbours' transitions on the shared borders change as well
+            for other in (c, (cx + 1, cy), (cx - 1, cy), (cx, cy + 1), (cx, cy - 1)):
+                self._clusters.pop(other, None)
+                for key in self._routes_through.pop(other, set()):
+                    if self._routes.pop(key, None) is not None:
+                        self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.invalidations += len(self._routes)
+            self._grids.clear()
+            self._clusters.clear()
+            self._routes.clear()
+            self._routes_through.clear()
+
+    def stats(self) -> dict:
+        return {
+            "clusters": len(self._clusters),
+            "clusters_built": self.clusters_built,
+            "cached_routes": len(self._routes),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
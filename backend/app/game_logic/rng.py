@@ -0,0 +1,160 @@
+"""Seedable random number generation for game logic.
+
+``GameRNG`` replaces the process‑wide ``random`` module in the game systems.
+Each instance owns its own NumPy PCG64 generators, so concurrent requests
+never share state and a world can be replayed exactly from its seed.
+
+* Scalar draws (``random``, ``roll``, ``randint``, ``choice``) are served from
+  a buffer of floats generated in bulk, which keeps per‑roll overhead close to
+  a list index in hot loops.
+* Bulk draws (``roll_many``) and vectorised code (``numpy``) use a second,
+  independent generator so they never disturb the scalar buffer.
+* ``spawn(*key)`` derives an independent substream for an entity or session
+  (e.g. ``rng.spawn("player", 7)``) deterministically from the parent seed.
+* ``get_state``/``from_state`` round‑trip the full state through plain JSON
+  types so it can be stored with a save game.
+
+``RNGService`` holds the world generator and caches per‑session substreams;
+the process‑wide ``rng_service`` serves the current world. ``default_rng`` is
+used by helpers that are called without an explicit generator.
+"""
+
+import secrets
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple, TypeVar
+
+import numpy as np
+
+T = TypeVar("T")
+
+# Floats drawn per buffer refill for scalar rolls.
+BUFFER_SIZE = 256
+
+
+def _key_to_ints(key: Sequence) -> Tuple[int, ...]:
+    """Map a substream key of ints/strings onto non‑negative integers."""
+    out = []
+    for part in key:
+        if isinstance(part, int) and part >= 0:
+            out.append(part)
+        else:
+            out.append(zlib.crc32(str(part).encode("utf-8")))
+    return tuple(out)
+
+
+class GameRNG:
+    """Independent, seedable random source with buffered scalar draws."""
+
+    def __init__(self, seed: Optional[int] = None, spawn_key: Sequence[int] = ()):
+        if seed is None:
+            seed = secrets.randbits(64)
+        self.seed = seed
+        self.spawn_key = tuple(spawn_key)
+        entropy = seed % (1 << 64)  # SeedSequence needs a non-negative seed
+        scalar_seq, bulk_seq = np.random.SeedSequence(entropy, spawn_key=self.spawn_key).spawn(2)
+        self._scalar = np.random.Generator(np.random.PCG64(scalar_seq))
+        self._bulk = np.random.Generator(np.random.PCG64(bulk_seq))
+        # State of the scalar generator before the current buffer was drawn;
+        # together with the read position this fully describes the buffer.
+        self._buffer_origin = self._scalar.bit_generator.state
+        self._buffer: List[float] = []
+        self._pos = 0
+
+    # -- scalar draws -----------------------------------------------------
+
+    def _refill(self) -> None:
+        self._buffer_origin = self._scalar.bit_generator.state
+        self._buffer = self._scalar.random(BUFFER_SIZE).tolist()
+        self._pos = 0
+
+    def random(self) -> float:
+        """Return a uniform float in ``[0, 1)``."""
+        if self._pos >= len(self._buffer):
+            self._refill()
+        value = self._buffer[self._pos]
+        self._pos += 1
+        return value
+
+    def roll(self, sides: int) -> int:
+        """Roll one fair die with ``sides`` faces."""
+        return int(self.random() * sides) + 1
+
+    def randint(self, low: int, high: int) -> int:
+        """Return an integer in ``[low, high]`` inclusive, like ``random.randint``."""
+        return low + int(self.random() * (high - low + 1))
+
+    def choice(self, seq: Sequence[T]) -> T:
+        return seq[int(self.random() * len(seq))]
+
+    # -- bulk draws -------------------------------------------------------
+
+    @property
+    def numpy(self) -> np.random.Generator:
+        """Generator for vectorised code; independent of the scalar buffer."""
+        return self._bulk
+
+    def roll_many(self, sides: int, n: int) -> np.ndarray:
+        """Roll ``n`` dice with ``sides`` faces and return them as an array."""
+        return self._bulk.integers(1, sides + 1, size=n)
+
+    # -- substreams and state -------------------------------------------
+
+    def spawn(self, *key) -> "GameRNG":
+        """Derive an independent generator for ``key`` (ints or strings)."""
+        return GameRNG(self.seed, self.spawn_key + _key_to_ints(key))
+
+    def get_state(self) -> dict:
+        return {
+            "seed": self.seed,
+            "spawn_key": list(self.spawn_key),
+            "scalar": self._buffer_origin,
+            "position": self._pos if self._buffer else None,
+            "bulk": self._bulk.bit_generator.state,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "GameRNG":
+        rng = cls(state["seed"], state["spawn_key"])
+        rng._scalar.bit_generator.state = state["scalar"]
+        rng._buffer_origin = state["scalar"]
+        if state["position"] is not None:
+            rng._refill()
+            rng._pos = state["position"]
+        rng._bulk.bit_generator.state = state["bulk"]
+        return rng
+
+
+class RNGService:
+    """World generator plus cached per‑session substreams."""
+
+    def __init__(self, seed: Optional[int] = None):
+        self.reset(seed)
+
+    def reset(self, seed: Optional[int] = None) -> None:
+        self.world = GameRNG(seed)
+        self._streams: Dict[Tuple, GameRNG] = {}
+
+    def stream(self, *key) -> GameRNG:
+        """Return the substream for ``key``, creating it on first use."""
+        rng = self._streams.get(key)
+        if rng is None:
+            rng = self._streams[key] = self.world.spawn(*key)
+        return rng
+
+    def get_state(self) -> dict:
+        return {
+            "world": self.world.get_state(),
+            "streams": [[list(key), rng.get_state()] for key, rng in self._streams.items()],
+        }
+
+    def set_state(self, state: dict) -> None:
+        self.world = GameRNG.from_state(state["world"])
+        self._streams = {
+            tuple(key): GameRNG.from_state(rng_state) for key, rng_state in state["streams"]
+        }
+
+
+# Fallback for helpers called without an explicit generator.
+default_rng = GameRNG()
+# Generators of the world served by this process; reset by /init.
+rng_service = RNGService()
@@ -0,0 +1,198 @@
+"""Hierarchical timer wheel.
+
+``TimerWheel`` holds timers due at integer ticks (game minutes, see
+``scheduler.py``) and hands them out in order as time advances. Scheduling
+and cancelling a timer take O(1), and so does advancing by one tick; this
+stays true with millions of timers pending.
+
+The wheel has ``levels`` rings of ``2 ** bits`` slots. Ring 0 holds the
+timers due within the current block of ``2 ** bits`` ticks, one slot per
+tick. Ring 1 holds those due later in the current block of
+``2 ** (2 * bits)`` ticks, one slot per block of ``2 ** bits``, and so on.
+When time enters a new block, the timers in that block's slot of the ring
+above are moved down to the finer ring (cascading); each timer cascades at
+most ``levels - 1`` times. Timers due beyond the top ring wait in a heap,
+which costs O(log n) but only holds timers decades of game time away.
+Slots are plain lists: a cancelled timer is only forgotten, and its entry
+is dropped when its slot is emptied (lazy deletion).
+
+Blocks that hold no timers are skipped over, so advancing by a day of game
+time with nothing due is as cheap as advancing by one tick.
+"""
+
+import heapq
+from operator import attrgetter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class Timer:
+    """A ``kind`` of event due at tick ``due``, then every ``interval``
+    ticks if that is set. ``payload`` is passed along untouched.
+    """
+
+    __slots__ = ("id", "due", "kind", "payload", "interval", "_slot")
+
+    def __init__(
+        self,
+        id: int,
+        due: int,
+        kind: str,
+        payload: Any = None,
+        interval: Optional[int] = None,
+    ):
+        if interval is not None and interval <= 0:
+            raise ValueError("interval must be positive")
+        self.id = id
+        self.due = due
+        self.kind = kind
+        self.payload = payload
+        self.interval = interval
+        # The slot (or the far heap) holding the timer; None once it is gone
+        self._slot: Optional[list] = None
+
+    def __repr__(self) -> str:
+        every = f", every {self.interval}" if self.interval is not None else ""
+        return f"Timer({self.id}, {self.kind!r} at {self.due}{every})"
+
+
+class TimerWheel:
+    """Pending timers, ordered by the tick they are due at."""
+
+    def __init__(self, now: int = 0, bits: int = 6, levels: int = 4):
+        self._bits = bits
+        self._mask = (1 << bits) - 1
+        self._rings: List[List[List[Timer]]] = [
+            [[] for _ in range(1 << bits)] for _ in range(levels)
+        ]
+        # Entries per ring, counting those of cancelled timers until their
+        # slot is emptied
+        self._counts = [0] * levels
+        # (tick, id, timer) of the timers beyond the top ring
+        self._far: List[Tuple[int, int, Timer]] = []
+        self._timers: Dict[int, Timer] = {}
+        self._tick = now + 1  # the next tick to expire
+
+    @property
+    def now(self) -> int:
+        """The last tick whose timers have expired."""
+        return self._tick - 1
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def __contains__(self, timer_id: int) -> bool:
+        return timer_id in self._timers
+
+    def __iter__(self) -> Iterator[Timer]:
+        return iter(list(self._timers.values()))
+
+    def get(self, timer_id: int) -> Optional[Timer]:
+        return self._timers.get(timer_id)
+
+    def schedule(self, timer: Timer) -> Timer:
+        """Add ``timer``. One due at or before ``now`` is moved to the next
+        tick.
+        """
+        if timer.id in self._timers:
+            raise ValueError(f"timer {timer.id} is already scheduled")
+        if timer.due < self._tick:
+            timer.due = self._tick
+        self._timers[timer.id] = timer
+        self._place(timer)
+        return timer
+
+    def cancel(self, timer_id: int) -> bool:
+        """Remove a pending timer. Returns False if there was none.
+
+        Its entry stays in its slot and is dropped when the slot is emptied.
+        """
+        timer = self._timers.pop(timer_id, None)
+        if timer is None:
+            return False
+        timer._slot = None
+        return True
+
+    def _place(self, timer: Timer) -> None:
+        # The finest ring whose current block holds the tick: the one above
+        # the highest bit in which the tick differs from the next tick
+        tick = timer.due
+        differ = (tick ^ self._tick).bit_length()
+        ring = (differ - 1) // self._bits if differ else 0
+        if ring < len(self._counts):
+            slot = self._rings[ring][(tick >> (ring * self._bits)) & self._mask]
+            slot.append(timer)
+            timer._slot = slot
+            self._counts[ring] += 1
+        else:
+            timer._slot = self._far
+            heapq.heappush(self._far, (tick, timer.id, timer))
+
+    def _cascade(self, tick: int) -> None:
+        """Move the timers of the blocks starting at ``tick`` to finer rings."""
+        bits = self._bits
+        top = bits * len(self._rings)
+        if not tick & ((1 << top) - 1):
+            far = self._far
+            while far and far[0][0] >> top == tick >> top:
+                timer = heapq.heappop(far)[2]
+                if timer._slot is far:
+                    self._place(timer)
+        for ring in range(len(self._rings) - 1, 0, -1):
+            shift = bits * ring
+            if tick & ((1 << shift) - 1):
+                continue
+            index = (tick >> shift) & self._mask
+            slot = self._rings[ring][index]
+            if slot:
+                self._rings[ring][index] = []
+                self._counts[ring] -= len(slot)
+                for timer in slot:
+                    if timer._slot is slot:
+                        self._place(timer)
+
+    def _skip(self, limit: int) -> None:
+        """Jump over the ticks before ``limit`` at which nothing can expire
+        or cascade.
+        """
+        shift = 0
+        for count in self._counts:
+            if count:
+                break
+            shift += self._bits
+        if shift:
+            # The next block boundary, which may be the next tick itself
+            boundary = ((self._tick + (1 << shift) - 1) >> shift) << shift
+            self._tick = min(boundary, limit)
+
+    def advance(self, to: int) -> Iterator[Tuple[int, Timer]]:
+        """Move the clock to tick ``to``, yielding ``(tick, timer)`` for every
+        timer that expires, in order of tick then id.
+
+        The clock moves as the iteration goes: while a timer is being
+        handled ``now`` is the tick it expired at, and timers scheduled or
+        cancelled then take effect from the next tick. A recurring timer is
+        rescheduled before it is yielded and may come up more than once.
+        """
+        ring0 = self._rings[0]
+        while self._tick <= to:
+            tick = self._tick
+            if not tick & self._mask:
+                self._cascade(tick)
+            index = tick & self._mask
+            slot = ring0[index]
+            self._tick = tick + 1
+            if slot:
+                ring0[index] = []
+                self._counts[0] -= len(slot)
+                slot.sort(key=attrgetter("id"))
+                for timer in slot:
+                    if timer._slot is not slot:
+                        continue  # cancelled, possibly by an earlier handler
+                    if timer.interval is None:
+                        timer._slot = None
+                        del self._timers[timer.id]
+                    else:
+                        timer.due += timer.interval
+                        self._place(timer)
+                    yield tick, timer
+            self._skip(to + 1)
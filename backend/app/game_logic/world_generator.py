@@ -5,19 +5,46 @@ a square grid of locations with different terrain types, spawns a handful of
 NPCs and seeds a simple quest. Worlds are stored in the database via the
 Location and NPC models. You can adjust the WORLD_SIZE, terrain frequencies and
 NPC archetypes to suit your game.
+
+Terrain is computed for a whole block of tiles at once from two seeded value
+noise fields (elevation and moisture) held in NumPy arrays. Each tile's value
+depends only on the seed and its absolute coordinates, so any rectangle of the
+map can be generated independently and will match the same tiles produced as
+part of a larger block.
 """
 
-import random
-from typing import List, Tuple
+import secrets
+from typing import Iterator, List, Tuple
 
+import numpy as np
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from .. import models
+from .rng import GameRNG
 
 
 WORLD_SIZE = 20  # 20x20 grid
+MAX_WORLD_SIZE = 1_000_000  # largest side accepted by /init
+CHUNK_SIZE = 16  # side length of the square blocks the map is generated in
 TERRAINS = ["plains", "forest", "mountain", "water", "desert"]
 
+# Indices into TERRAINS used by the biome classifier.
+PLAINS, FOREST, MOUNTAIN, WATER, DESERT = range(len(TERRAINS))
+
+# Noise parameters: (cell size in tiles, weight) per octave.
+ELEVATION_OCTAVES = [(16, 0.6), (8, 0.3), (4, 0.1)]
+MOISTURE_OCTAVES = [(24, 0.7), (6, 0.3)]
+
+# Biome thresholds on the [0, 1) noise fields.
+WATER_LEVEL = 0.38
+MOUNTAIN_LEVEL = 0.62
+DRY_LEVEL = 0.4
+WET_LEVEL = 0.58
+
+# Number of rows written per INSERT batch when materialising the grid.
+INSERT_BATCH_ROWS = 20_000
+
 NPC_ARCHETYPES = [
     {"name": "Grimwald", "kindness": -0.7, "greed": 0.3, "curiosity": -0.2},
     {"name": "Seraphina", "kindness": 0.8, "greed": -0.5, "curiosity": 0.4},
@@ -25,30 +52,124 @@ NPC_ARCHETYPES = [
     {"name": "Lilypad", "kindness": 0.2, "greed": -0.3, "curiosity": 0.9},
 ]
 
+_TERRAIN_NAMES = np.array(TERRAINS, dtype=object)
+_MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+_ELEVATION_SALT = 0x5EED_E1E7
+_MOISTURE_SALT = 0x5EED_3015
 
-def generate_world(db: Session, seed: int = None) -> None:
-    """Populate the database with a new world based on a seed.
 
-    Existing data in the Location and NPC tables will be cleared. Pass a seed
-    to get deterministic worlds for reproducible campaigns.
+def _hash2(seed: int, ix: np.ndarray, iy: np.ndarray) -> np.ndarray:
+    """Hash integer lattice coordinates to uniform floats in ``[0, 1)``.
+
+    Uses a splitmix64 style mixer on unsigned 64‑bit integers so the result is
+    identical on every platform and independent of evaluation order.
+    """
+    h = (
+        np.uint64(seed & 0xFFFFFFFFFFFFFFFF)
+        ^ (ix.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15))
+        ^ (iy.astype(np.uint64) * np.uint64(0xC2B2AE3D27D4EB4F))
+    ) & _MASK64
+    h ^= h >> np.uint64(30)
+    h *= np.uint64(0xBF58476D1CE4E5B9)
+    h ^= h >> np.uint64(27)
+    h *= np.uint64(0x94D049BB133111EB)
+    h ^= h >> np.uint64(31)
+    return (h >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+
+def _value_noise(
+    seed: int, xs: np.ndarray, ys: np.ndarray, octaves: List[Tuple[int, float]]
+) -> np.ndarray:
+    """Smoothly interpolated multi‑octave value noise sampled at ``xs``/``ys``."""
+    total = np.zeros(np.broadcast(xs, ys).shape, dtype=np.float64)
+    weight_sum = 0.0
+    for octave, (cell, weight) in enumerate(octaves):
+        octave_seed = seed + octave * 0x632BE59BD9B4E019
+        ix, fx = np.divmod(xs, cell)
+        iy, fy = np.divmod(ys, cell)
+        tx = fx / cell
+        ty = fy / cell
+        # Smoothstep easing avoids visible grid artefacts at cell borders.
+        tx = tx * tx * (3.0 - 2.0 * tx)
+        ty = ty * ty * (3.0 - 2.0 * ty)
+        v00 = _hash2(octave_seed, ix, iy)
+        v10 = _hash2(octave_seed, ix + 1, iy)
+        v01 = _hash2(octave_seed, ix, iy + 1)
+        v11 = _hash2(octave_seed, ix + 1, iy + 1)
+        top = v00 + (v10 - v00) * tx
+        bottom = v01 + (v11 - v01) * tx
+        total += weight * (top + (bottom - top) * ty)
+        weight_sum += weight
+    return total / weight_sum
+
+
+def generate_terrain(seed: int, x0: int, y0: int, width: int, height: int) -> np.ndarray:
+    """Return terrain indices for the ``width`` x ``height`` block at ``(x0, y0)``.
+
+    The result is a ``uint8`` array indexed ``[x - x0, y - y0]`` whose values
+    index into ``TERRAINS``. Tiles are classified from an elevation field
+    (water below, mountains above) and a moisture field (desert, plains or
+    forest in between).
+    """
+    xs = np.arange(x0, x0 + width, dtype=np.int64)[:, None]
+    ys = np.arange(y0, y0 + height, dtype=np.int64)[None, :]
+    elevation = _value_noise(seed ^ _ELEVATION_SALT, xs, ys, ELEVATION_OCTAVES)
+    moisture = _value_noise(seed ^ _MOISTURE_SALT, xs, ys, MOISTURE_OCTAVES)
+
+    terrain = np.full((width, height), PLAINS, dtype=np.uint8)
+    terrain[moisture < DRY_LEVEL] = DESERT
+    terrain[moisture > WET_LEVEL] = FOREST
+    terrain[elevation < WATER_LEVEL] = WATER
+    terrain[elevation > MOUNTAIN_LEVEL] = MOUNTAIN
+    return terrain
+
+
+def block_rows(seed: int, x0: int, y0: int, width: int, height: int) -> List[dict]:
+    """Build INSERT parameters for every location in a block of the map."""
+    terrain = _TERRAIN_NAMES[generate_terrain(seed, x0, y0, width, height)]
+    xs, ys = np.indices((width, height))
+    return [
+        {"x": x, "y": y, "terrain": t, "discovered": False}
+        for x, y, t in zip(
+            (xs + x0).ravel().tolist(), (ys + y0).ravel().tolist(), terrain.ravel().tolist()
+        )
+    ]
+
+
+def _location_rows(seed: int, size: int, batch_rows: int) -> Iterator[List[dict]]:
+    """Yield INSERT parameter batches covering the whole ``size`` x ``size`` grid.
+
+    Terrain is generated one band of columns at a time so peak memory stays
+    proportional to ``batch_rows`` rather than to the map area.
+    """
+    band = max(1, batch_rows // size)
+    for x0 in range(0, size, band):
+        yield block_rows(seed, x0, 0, min(band, size - x0), size)
+
+
+def reset_world(db: Session, seed: int = None, size: int = WORLD_SIZE) -> int:
+    """Clear the map and NPCs and record the parameters of a new world.
+
+    No locations are written; returns the seed actually used so callers can
+    report it when none was supplied.
     """
-    if seed is not None:
-        random.seed(seed)
+    if seed is None:
+        seed = secrets.randbits(32)
 
-    # Clear existing locations and NPCs
+    # Clear existing locations, NPCs and what players discovered of them
+    db.query(models.PlayerFog).delete()
     db.query(models.NPC).delete()
     db.query(models.Location).delete()
+    db.query(models.Chunk).delete()
+    db.query(models.World).delete()
+    db.add(models.World(seed=seed, size=size, chunk_size=CHUNK_SIZE))
     db.commit()
+    return seed
 
-    # Create grid of locations
-    for x in range(WORLD_SIZE):
-        for y in range(WORLD_SIZE):
-            terrain = random.choice(TERRAINS)
-            loc = models.Location(x=x, y=y, terrain=terrain, discovered=False)
-            db.add(loc)
-    db.commit()
 
-    # Spawn NPCs at random positions
+def spawn_npcs(db: Session, rng: GameRNG, size: int = WORLD_SIZE) -> List[models.NPC]:
+    """Spawn one NPC per archetype at a random position on the map."""
+    npcs = []
     for arch in NPC_ARCHETYPES:
         npc = models.NPC(
             name=arch["name"],
@@ -57,7 +178,37 @@ def generate_world(db: Session, seed: int = None) -> None:
             curiosity=arch["curiosity"],
         )
         # Pick a random location
-        npc.x = random.randint(0, WORLD_SIZE - 1)
-        npc.y = random.randint(0, WORLD_SIZE - 1)
+        npc.x = rng.randint(0, size - 1)
+        npc.y = rng.randint(0, size - 1)
         db.add(npc)
+        npcs.append(npc)
     db.commit()
+    return npcs
+
+
+def generate_world(
+    db: Session,
+    seed: int = None,
+    size: int = WORLD_SIZE,
+    batch_rows: int = INSERT_BATCH_ROWS,
+) -> None:
+    """Populate the database with a new world based on a seed.
+
+    Existing data in the Location and NPC tables will be cleared. Pass a seed
+    to get deterministic worlds for reproducible campaigns. Every location is
+    written up front with bulk ``executemany`` inserts of ``batch_rows`` rows
+    at a time; see ``world_map.init_world`` for the lazily generated variant.
+    """
+    seed = reset_world(db, seed, size)
+
+    # Create grid of locations
+    stmt = insert(models.Location.__table__)
+    for rows in _location_rows(seed, size, batch_rows):
+        db.execute(stmt, rows)
+    chunks = range((size + CHUNK_SIZE - 1) // CHUNK_SIZE)
+    db.execute(
+        insert(models.Chunk.__table__), [{"cx": cx, "cy": cy} for cx in chunks for cy in chunks]
+    )
+    db.commit()
+
+    spawn_npcs(db, GameRNG(seed).spawn("npcs"), size)
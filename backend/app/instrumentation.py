@@ -0,0 +1,361 @@
+"""Timers, counters and per‑request profiling.
+
+Hot paths are decorated with ``timed("name")``, which records every call's
+duration in the ``rpg_hot_path_seconds`` histogram. The decorator costs two
+``perf_counter`` calls, a bucket search and a lock per call (about a
+microsecond), so it belongs on functions that do real work rather than on
+inner loops. With metrics disabled
+(``RPG_METRICS_ENABLED=0``) it returns the function unchanged, so disabled
+instrumentation costs nothing at all.
+
+``InstrumentationMiddleware`` times each HTTP request by route. It also
+counts the SQL statements the request ran: ``count_statements`` hooks an
+engine's ``before_cursor_execute`` and ``commit`` events (a commit counts
+as one statement) and adds to the current request, which is tracked in a
+context variable. The context follows the request
+into ``run_sync`` and the threadpool. The count is also returned in the
+``X-SQL-Statements`` header.
+
+``/metrics`` renders everything in the Prometheus text format, together with
+the counters of the ``/stats/*`` endpoints, registered as collectors.
+
+With ``RPG_PROFILING_ENABLED=1`` a request sent with ``X-Profile: 1`` is run
+under ``cProfile``. Instead of the usual body, the response carries the
+slowest functions by cumulative time as plain text. Only one request is
+profiled at a time. For async endpoints the profile also includes whatever
+else the event loop ran in the meantime.
+"""
+
+import asyncio
+import cProfile
+import functools
+import io
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import settings
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PROFILE_HEADER = b"x-profile"
+PROFILE_LINES = 40
+
+# Upper bounds of the latency buckets, in seconds
+TIME_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000)
+
+
+def _label_text(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Family:
+    """A metric and its children, one per combination of label values."""
+
+    def __init__(self, name: str, help: str, kind: str, labels: Sequence[str], factory: Callable):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = tuple(labels)
+        self._factory = factory
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._factory())
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            if isinstance(child, Histogram):
+                running = 0
+                for bound, count in zip(child.bounds + (float("inf"),), child.counts):
+                    running += count
+                    labels = _label_text(self.labelnames + ("le",), values + (_number(bound),))
+                    lines.append(f"{self.name}_bucket{labels} {running}")
+                labels = _label_text(self.labelnames, values)
+                lines.append(f"{self.name}_sum{labels} {_number(child.sum)}")
+                lines.append(f"{self.name}_count{labels} {child.count}")
+            else:
+                lines.append(f"{self.name}{_label_text(self.labelnames, values)} {_number(child.value)}")
+        return lines
+
+
+class Metrics:
+    """Registry of metric families and collectors rendered by ``/metrics``."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._families: Dict[str, Family] = {}
+        self._collectors: Dict[str, Callable[[], dict]] = {}
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Family:
+        return self._families.setdefault(name, Family(name, help, "counter", labels, Counter))
+
+    def histogram(
+        self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = TIME_BUCKETS
+    ) -> Family:
+        return self._families.setdefault(
+            name, Family(name, help, "histogram", labels, lambda: Histogram(buckets))
+        )
+
+    def collector(self, prefix: str, stats: Callable[[], dict]) -> None:
+        """Export the numeric values of ``stats()`` as ``rpg_<prefix>_<key>`` gauges."""
+        self._collectors[prefix] = stats
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for family in self._families.values():
+            lines.extend(family.render())
+        for prefix, stats in self._collectors.items():
+            for key, value in stats().items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"rpg_{prefix}_{key}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics(settings.metrics_enabled)
+
+HOT_PATH_SECONDS = metrics.histogram(
+    "rpg_hot_path_seconds", "Time spent in instrumented functions.", ["name"]
+)
+REQUEST_SECONDS = metrics.histogram(
+    "rpg_http_request_seconds", "HTTP request latency by route.", ["method", "route"]
+)
+REQUESTS = metrics.counter(
+    "rpg_http_requests_total", "HTTP requests by route and status.", ["method", "route", "status"]
+)
+REQUEST_STATEMENTS = metrics.histogram(
+    "rpg_http_request_sql_statements",
+    "SQL statements executed per HTTP request.",
+    ["method", "route"],
+    COUNT_BUCKETS,
+)
+SQL_STATEMENTS = metrics.counter("rpg_sql_statements_total", "SQL statements executed.")
+_all_statements = SQL_STATEMENTS.labels()
+
+
+# -- hot paths ---------------------------------------------------------------------
+
+
+def timed(name: str):
+    """Decorator recording the duration of each call under ``name``."""
+
+    def decorate(fn):
+        if not metrics.enabled:
+            return fn
+        histogram = HOT_PATH_SECONDS.labels(name)
+        perf_counter = time.perf_counter
+        if asyncio.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    histogram.observe(perf_counter() - start)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(perf_counter() - start)
+
+        return wrapper
+
+    return decorate
+
+
+# -- SQL statements ------------------------------------------------------------------
+
+
+class RequestStats:
+    __slots__ = ("sql_statements",)
+
+    def __init__(self):
+        self.sql_statements = 0
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("rpg_request_stats", default=None)
+
+
+def current_request() -> Optional[RequestStats]:
+    """Counters of the request being handled, if any."""
+    return _current.get()
+
+
+def _count_statement(*_args) -> None:
+    _all_statements.inc()
+    stats = _current.get()
+    if stats is not None:
+        stats.sql_statements += 1
+
+
+def count_statements(engine: Engine) -> None:
+    """Count the statements run through ``engine`` (a sync engine, or an
+    async engine's ``sync_engine``).
+    """
+    if metrics.enabled:
+        event.listen(engine, "before_cursor_execute", _count_statement)
+        event.listen(engine, "commit", _count_statement)
+
+
+# -- HTTP ------------------------------------------------------------------------
+
+
+class InstrumentationMiddleware:
+    """ASGI middleware timing requests and counting their SQL statements."""
+
+    def __init__(self, app, profiling: bool = settings.profiling_enabled):
+        self.app = app
+        self.profiling = profiling
+        self._routes: Dict[object, str] = {}
+        self._profile_lock = asyncio.Lock()
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        route = self._routes.get(endpoint)
+        if route is None:
+            for candidate in scope["app"].routes:
+                if getattr(candidate, "endpoint", None) is endpoint:
+                    route = candidate.path
+                    break
+            else:
+                route = getattr(endpoint, "__name__", "unknown")
+            self._routes[endpoint] = route
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if self.profiling and (PROFILE_HEADER, b"1") in scope.get("headers", ()):
+            await self._profile(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = _current.set(stats)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", ()))
+                headers.append((b"x-sql-statements", str(stats.sql_statements).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current.reset(token)
+            method, route = scope["method"], self._route(scope)
+            REQUEST_SECONDS.labels(method, route).observe(elapsed)
+            REQUESTS.labels(method, route, str(status)).inc()
+            REQUEST_STATEMENTS.labels(method, route).observe(stats.sql_statements)
+
+    async def _profile(self, scope, receive, send):
+        status = 500
+
+        async def discard(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        async with self._profile_lock:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                await self.app(scope, receive, discard)
+            finally:
+                profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+        body = out.getvalue().encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+def instrument_serialization() -> None:
+    """Time FastAPI's response model validation and serialisation.
+
+    ``fastapi.routing`` looks ``serialize_response`` up as a module global on
+    every request, so replacing it there wraps all routes.
+    """
+    import fastapi.routing
+
+    original = fastapi.routing.serialize_response
+    if metrics.enabled and not hasattr(original, "__wrapped__"):
+        fastapi.routing.serialize_response = timed("fastapi.serialize_response")(original)
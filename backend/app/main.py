@@ -5,149 +5,624 @@ engine and event system into a collection of REST endpoints. It exposes
 operations for initialising a world, creating players, moving around the map,
 interacting with NPCs and retrieving the world state. The API is stateless
 apart from the persisted SQLite database.
+
+Endpoints are ``async`` and use an ``AsyncSession`` (see ``database.py``).
+Game logic written against a sync ``Session`` — the world map, NPC agents —
+runs inside ``AsyncSession.run_sync`` on the same connection and transaction.
+CPU‑bound endpoints (combat simulation, world tick) stay sync so they run in
+the threadpool instead of on the event loop.
 """
 
-from fastapi import FastAPI, Depends, HTTPException, Body
+import asyncio
+import json
+
+from fastapi import FastAPI, Depends, HTTPException, Body, Header, Query
+from fastapi import WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from .database import get_db
-from . import models, schemas, crud
-from .game_logic import world_generator, combat
+from .database import get_async_db, AsyncSessionLocal, SessionLocal, engine
+from . import models, schemas, crud, crud_async, map_codec
+from .game_logic import world_generator, combat, combat_sim
+from .game_logic.battle import Battle
 from .npc_agent import NPCAgent
 from .game_logic.event_system import EventSystem
+from .game_logic.rng import rng_service
+from .world_map import world_map, chunk_coords, init_world as init_lazy_world
+from .fog import fog
+from .navigation import navigator
+from .entity_cache import entity_cache
+from .spatial_index import move_player_on_commit, player_index, npcs_at, players_at, reconcile_with_db
+from .simulation import WorldSimulation
+from .sharding import ShardedSimulation
+from .scheduler import EventScheduler, clock_time
+from .event_sink import EventSink
+from .realtime import hub
+from .snapshots import snapshots
+from .unit_of_work import after_commit, unit_of_work
+from .config import settings
+from .instrumentation import CONTENT_TYPE, InstrumentationMiddleware, instrument_serialization, metrics
 
 app = FastAPI(title="AI‑Powered RPG Engine", version="0.1.0")
 
+# Largest page of events a single /events request may ask for
+MAX_EVENT_PAGE = 1000
+# Seconds between keep-alive comments on an idle /stream connection
+SSE_KEEPALIVE = 15.0
+
+_schedule = dict(
+    tick_rate=settings.sim_tick_rate,
+    catch_up=settings.sim_catch_up,
+    max_catch_up=settings.sim_max_catch_up,
+)
+if settings.sim_workers > 0:
+    simulation = ShardedSimulation(SessionLocal, settings.sim_workers, **_schedule)
+else:
+    simulation = WorldSimulation(SessionLocal, **_schedule)
+scheduler = EventScheduler(SessionLocal, rate=settings.clock_rate, interval=settings.clock_interval)
+world_events = EventSystem()
+event_sink = EventSink(
+    SessionLocal,
+    mode=settings.event_mode,
+    batch_size=settings.event_batch_size,
+    flush_interval=settings.event_flush_interval,
+)
+
+if metrics.enabled:
+    app.add_middleware(InstrumentationMiddleware)
+    instrument_serialization()
+    for prefix, stats in (
+        ("entity_cache", entity_cache.stats),
+        ("fog", fog.stats),
+        ("realtime", hub.stats),
+        ("simulation", simulation.stats),
+        ("clock", scheduler.stats),
+        ("events", event_sink.stats),
+        ("paths", navigator.stats),
+    ):
+        metrics.collector(prefix, stats)
+
 
 @app.on_event("startup")
 def startup_event():
-    """Create database tables on startup."""
+    """Create database tables on startup, load the current world, restore its
+    random generators and scheduled events and check the spatial index
+    against the stored entity positions.
+    """
     models.create_all()
+    db = SessionLocal()
+    try:
+        world_map.load(db)
+        rng_state = crud.load_rng_state(db)
+        if rng_state is not None:
+            rng_service.set_state(rng_state)
+        reconcile_with_db(db)
+        _load_clock(db)
+    finally:
+        db.close()
+    event_sink.start()
+    if settings.sim_enabled:
+        simulation.start()
+    if settings.clock_enabled:
+        scheduler.start()
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """Stop background workers, write queued events and save the state of
+    the random generators and of the game clock.
+    """
+    scheduler.stop()
+    simulation.stop()
+    event_sink.stop()
+    db = SessionLocal()
+    try:
+        scheduler.save(db)
+        crud.save_rng_state(db, rng_service.get_state())
+    finally:
+        db.close()
+
+
+def _load_clock(db: Session) -> None:
+    scheduler.load(db)
+    world_events.install(scheduler)
+    scheduler.save(db)
+
+
+def _init_world(db: Session, seed: Optional[int], size: int) -> int:
+    seed = init_lazy_world(db, world_map, seed, size)
+    fog.clear()
+    navigator.reset()
+    rng_service.reset(seed)
+    crud.save_rng_state(db, rng_service.get_state())
+    reconcile_with_db(db)
+    scheduler.reset(db)
+    world_events.install(scheduler)
+    scheduler.save(db)
+    return seed
 
 
 @app.post("/init", summary="Initialise a new world")
-def init_world(seed: Optional[int] = None, db: Session = Depends(get_db)):
+async def init_world(
+    seed: Optional[int] = None,
+    size: int = Query(world_generator.WORLD_SIZE, ge=1, le=world_generator.MAX_WORLD_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+):
     """(Re)generate the world. All existing data will be overwritten.
 
     Passing a seed allows reproducible world generation. This endpoint also
-    resets all events and players. Use with caution.
+    resets all events and players. Use with caution. Terrain is generated
+    chunk by chunk as the map is explored, so this runs in constant time
+    whatever the ``size`` of the map.
     """
     # Delete events and players
-    db.query(models.Event).delete()
-    db.query(models.Player).delete()
-    db.commit()
-    world_generator.generate_world(db, seed)
-    return {"message": "World initialised", "seed": seed}
+    await event_sink.flush_async()
+    await crud_async.delete_players_and_events(db)
+    seed = await db.run_sync(_init_world, seed, size)
+    entity_cache.clear()
+    await asyncio.to_thread(simulation.reload)
+    hub.reset("new world")
+    return {"message": "World initialised", "seed": seed, "size": size}
+
+
+def _reload_world(db: Session, rng_state: Optional[dict]) -> None:
+    world_map.load(db)
+    fog.clear()
+    navigator.reset()
+    if rng_state is not None:
+        rng_service.set_state(rng_state)
+        crud.save_rng_state(db, rng_state)
+    reconcile_with_db(db)
+    _load_clock(db)
+
+
+@app.post("/save/{profile}", summary="Save the game to a profile")
+async def save_profile(profile: str, full: bool = False):
+    """Write a snapshot of the game to ``profile`` (see ``snapshots.py``).
+
+    Unless ``full`` is set only the chunks and rows that changed since the
+    profile's previous snapshot are written. The export runs in a worker
+    thread in a read transaction of its own, so play goes on meanwhile.
+    """
+    await event_sink.flush_async()
+    await asyncio.to_thread(_save_clock)
+    try:
+        return await asyncio.to_thread(snapshots.save, engine, profile, rng_service.get_state(), full)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+def _save_clock() -> None:
+    db = SessionLocal()
+    try:
+        scheduler.save(db)
+    finally:
+        db.close()
+
+
+@app.post("/load/{profile}", summary="Replace the game with a saved profile")
+async def load_profile(profile: str, db: AsyncSession = Depends(get_async_db)):
+    """Restore the latest snapshot of ``profile``. Everything else in the
+    database is replaced, as with ``/init``.
+    """
+    running, clock_running = simulation.running, scheduler.running
+    simulation.stop()
+    scheduler.stop()
+    await event_sink.flush_async()
+    try:
+        result = await asyncio.to_thread(snapshots.load, engine, profile)
+        await db.run_sync(_reload_world, result.pop("rng"))
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    finally:
+        entity_cache.clear()
+        await asyncio.to_thread(simulation.reload)
+        if running:
+            simulation.start()
+        if clock_running:
+            scheduler.start()
+    hub.reset("profile loaded")
+    return result
 
 
 @app.post("/players", response_model=schemas.Player)
-def create_player(request: schemas.CreatePlayerRequest, db: Session = Depends(get_db)):
+async def create_player(
+    request: schemas.CreatePlayerRequest, db: AsyncSession = Depends(get_async_db)
+):
     """Create a new player with default stats and place them at the origin (0,0)."""
-    if crud.get_player_by_name(db, request.name):
-        raise HTTPException(status_code=400, detail="Player name already exists")
-    player = crud.create_player(db, request.name)
+    async with unit_of_work(db):
+        if await crud_async.get_player_by_name(db, request.name):
+            raise HTTPException(status_code=400, detail="Player name already exists")
+        player = await crud_async.create_player(db, request.name)
+        await db.run_sync(world_map.ensure_tile, player.x, player.y)
+    player_index.insert(player.id, player.x, player.y)
+    simulation.player_moved(player.id, player.name, player.x, player.y)
     return player
 
 
 @app.get("/players/{player_id}", response_model=schemas.Player)
-def get_player(player_id: int, db: Session = Depends(get_db)):
-    player = db.query(models.Player).get(player_id)
+async def get_player(player_id: int, db: AsyncSession = Depends(get_async_db)):
+    player = await crud_async.get_player(db, player_id)
     if not player:
         raise HTTPException(status_code=404, detail="Player not found")
     return player
 
 
-@app.post("/players/{player_id}/move")
-def move_player(player_id: int, move: schemas.MoveRequest, db: Session = Depends(get_db)):
-    """Move a player by dx/dy. Discover the new location and trigger NPC ticks and events."""
-    player = db.query(models.Player).get(player_id)
-    if not player:
-        raise HTTPException(status_code=404, detail="Player not found")
-    # Update position within bounds
-    new_x = max(0, min(world_generator.WORLD_SIZE - 1, player.x + move.dx))
-    new_y = max(0, min(world_generator.WORLD_SIZE - 1, player.y + move.dy))
-    player.x, player.y = new_x, new_y
-    db.commit()
-    # Discover location
-    crud.set_location_discovered(db, new_x, new_y)
+def _arrive(db: Session, player: models.Player) -> List[str]:
+    """Discover the player's tile and tick the NPCs standing on it."""
+    x, y = player.x, player.y
+    # Discover location, generating its chunk on first entry
+    world_map.discover(db, x, y)
+    if fog.discover(db, player.id, x, y):
+        tile = {"x": x, "y": y, "terrain": world_map.terrain_at(db, x, y)}
+        after_commit(db, hub.publish, "tiles", [tile], player.id)
     # Tick NPCs at the new location
-    npcs = crud.get_npcs_at(db, new_x, new_y)
+    rng = rng_service.stream("player", player.id)
     messages: List[str] = []
-    for npc in npcs:
-        agent = NPCAgent(npc, db)
-        msg = agent.tick()
+    for npc in npcs_at(db, x, y):
+        msg = NPCAgent(npc, db, rng).tick()
         if msg:
             messages.append(msg)
-            crud.create_event(db, msg)
-    # Trigger random event
-    event_system = EventSystem(db)
-    random_event = event_system.maybe_trigger()
-    if random_event:
-        messages.append(random_event.description)
-    return {"x": new_x, "y": new_y, "messages": messages}
+        if (npc.x, npc.y) != (x, y):
+            # Shard workers never re-read the database, so they only hear of
+            # moves that were committed
+            after_commit(db, simulation.npc_moved, npc.id, npc.x, npc.y)
+    return messages
+
+
+@app.post("/players/{player_id}/move")
+async def move_player(
+    player_id: int, move: schemas.MoveRequest, db: AsyncSession = Depends(get_async_db)
+):
+    """Move a player by dx/dy. Discover the new location and tick the NPCs there.
+
+    Everything the move changes is committed at once at the end.
+    """
+    async with unit_of_work(db):
+        player = await entity_cache.get_async(db, models.Player, player_id)
+        if not player:
+            raise HTTPException(status_code=404, detail="Player not found")
+        # Update position within bounds
+        new_x, new_y = world_map.clamp(player.x + move.dx, player.y + move.dy)
+        player.x, player.y = new_x, new_y
+        await db.flush()
+        # The index and the simulation follow the player once the move is
+        # committed; a rolled back move must leave them where the row is
+        move_player_on_commit(db, player.id, new_x, new_y)
+        after_commit(db, simulation.player_moved, player.id, player.name, new_x, new_y)
+        after_commit(db, hub.publish, "player_move", {"id": player.id, "x": new_x, "y": new_y}, player.id)
+        messages = await db.run_sync(_arrive, player)
+    await event_sink.emit_many_async(messages)
+    cx, cy = chunk_coords(new_x, new_y, world_map.chunk_size)
+    return {"x": new_x, "y": new_y, "chunk": [cx, cy], "messages": messages}
 
 
 @app.post("/players/{player_id}/talk")
-def talk_to_npc(
+async def talk_to_npc(
     player_id: int,
     request: schemas.TalkRequest = Body(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Initiate dialogue with an NPC at the player's current location."""
-    player = db.query(models.Player).get(player_id)
+    player = await entity_cache.get_async(db, models.Player, player_id)
     if not player:
         raise HTTPException(status_code=404, detail="Player not found")
-    npc = db.query(models.NPC).get(request.npc_id)
+    npc = await entity_cache.get_async(db, models.NPC, request.npc_id)
     if not npc or npc.x != player.x or npc.y != player.y:
         raise HTTPException(status_code=400, detail="NPC not at player's location")
-    agent = NPCAgent(npc, db)
+    # Talking only reads the NPC's traits, so the agent needs no session
+    agent = NPCAgent(npc, None, rng_service.stream("player", player.id))
     message = agent.act("talk")
-    crud.create_event(db, message)
+    await event_sink.emit_many_async([message])
     return {"message": message}
 
 
 @app.post("/players/{player_id}/attack")
-def attack_npc(player_id: int, request: schemas.AttackRequest, db: Session = Depends(get_db)):
-    """Start a combat encounter between the player and the target NPC."""
-    player = db.query(models.Player).get(player_id)
-    npc = db.query(models.NPC).get(request.target_id)
-    if not player or not npc:
-        raise HTTPException(status_code=404, detail="Invalid combatants")
-    combatants = [
-        combat.Combatant(name=player.name, hp=player.hp, is_player=True, entity=player),
-        combat.Combatant(name=npc.name, hp=npc.hp, is_player=False, entity=npc),
-    ]
-    encounter = combat.CombatEncounter(combatants)
-    log: List[str] = []
-    while encounter.active:
-        result = encounter.next_turn()
-        if result:
-            _combatant, msg = result
-            log.append(msg)
-    # Update HP back into the models
-    player.hp = combatants[0].hp
-    npc.hp = combatants[1].hp
-    db.commit()
+async def attack_npc(
+    player_id: int, request: schemas.AttackRequest, db: AsyncSession = Depends(get_async_db)
+):
+    """Start a fight between the player and the target NPC.
+
+    With ``group`` the fight is joined by every player on the attacker's tile
+    and every NPC on the target's, and may involve thousands of combatants.
+    ``targeting`` picks how combatants choose their victims: ``first`` (in
+    initiative order), ``lowest_hp``, ``nearest`` or ``threat`` (whoever
+    dealt the most damage).
+    """
+    async with unit_of_work(db):
+        player = await entity_cache.get_async(db, models.Player, player_id)
+        npc = await entity_cache.get_async(db, models.NPC, request.target_id)
+        if not player or not npc:
+            raise HTTPException(status_code=404, detail="Invalid combatants")
+        players, npcs = [player], [npc]
+        if request.group:
+            players += [p for p in await db.run_sync(players_at, player.x, player.y) if p is not player]
+            npcs += [n for n in await db.run_sync(npcs_at, npc.x, npc.y) if n is not npc]
+        combatants = [
+            combat.Combatant(name=e.name, hp=e.hp, is_player=is_player, entity=e, x=e.x, y=e.y)
+            for entities, is_player in ((players, True), (npcs, False))
+            for e in entities
+        ]
+        battle = Battle(combatants, rng_service.stream("player", player.id), request.targeting)
+        log = battle.run()
+        # Update HP back into the models
+        for c in combatants:
+            if c.entity.hp != c.hp:
+                c.entity.hp = c.hp
+                delta = {"entity": "player" if c.is_player else "npc", "id": c.entity.id, "hp": c.hp}
+                after_commit(db, hub.publish, "hp", delta, c.entity.id if c.is_player else None)
     # Persist combat log as events
-    for line in log:
-        crud.create_event(db, line)
-    return {"log": log}
+    await event_sink.emit_many_async(log)
+    winner = {True: "players", False: "npcs"}.get(battle.winner)
+    return {"log": log, "winner": winner}
+
+
+@app.post("/simulate/combat", summary="Monte Carlo balance check for an encounter")
+def simulate_combat(request: schemas.CombatSimulationRequest):
+    """Run many independent copies of an encounter and summarise the outcomes.
+
+    Nothing is persisted; the response reports win rates, round counts and the
+    distribution of hit points left on each side.
+    """
+    result = combat_sim.simulate_encounters(
+        request.player_hp,
+        request.npc_hp,
+        request.encounters,
+        seed=request.seed,
+        max_rounds=request.max_rounds,
+    )
+    return result.as_dict()
 
 
 @app.get("/world")
-def get_visible_world(player_id: Optional[int] = None, db: Session = Depends(get_db)):
+async def get_visible_world(
+    player_id: Optional[int] = None,
+    chunk_x: Optional[int] = None,
+    chunk_y: Optional[int] = None,
+    radius: int = 1,
+    format: Optional[str] = Query(None, pattern="^(json|binary)$"),
+    since: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
     """Return all discovered locations, or if player_id provided only those discovered by the player.
 
-    In this demo implementation discovery is global; a location is either
-    discovered or not regardless of who found it. Future work could track
-    discovery per player.
+    Without ``player_id`` every location discovered by anyone is listed. With
+    it the player's fog of war is returned as ``chunks`` instead, one entry per
+    chunk the player has seen part of (see ``fog.py``)::
+
+        {"cx": 0, "cy": 1, "bits": "<base64>", "terrain": "<base64>"}
+
+    ``bits`` has one bit per tile of the chunk, row by row, least significant
+    bit first; ``terrain`` has one byte per tile in the same order, an index
+    into ``terrains`` or 255 for tiles the player has not discovered.
+
+    Passing ``chunk_x``/``chunk_y`` restricts the result to the chunks within
+    ``radius`` chunks of that one, which keeps the payload bounded on large
+    maps.
+
+    ``format=binary`` (or ``Accept: application/x-rpg-map``) returns the same
+    view in the compact binary format of ``map_codec.py`` instead. Its
+    payload carries a version token; passing it back as ``since`` returns
+    only the chunks that changed after it.
     """
-    locations = db.query(models.Location).filter(models.Location.discovered == True).all()
-    return {"locations": [schemas.Location.from_orm(loc) for loc in locations]}
+    rect = None
+    if chunk_x is not None and chunk_y is not None:
+        rect = world_map.chunk_rect(chunk_x, chunk_y, radius)
+    if player_id is not None and not await db.get(models.Player, player_id):
+        raise HTTPException(status_code=404, detail="Player not found")
+    if format == "binary" or (format is None and map_codec.MEDIA_TYPE in (accept or "")):
+        # Taken first so changes made while encoding are resent next time
+        token = world_map.version_token()
+        version = world_map.parse_version_token(since)
+        if player_id is not None:
+            regions = await db.run_sync(map_codec.player_regions, fog, player_id, rect, version)
+        else:
+            regions = await db.run_sync(map_codec.world_regions, world_map, rect, version)
+        content = map_codec.encode(
+            regions,
+            world_map.size,
+            world_map.chunk_size,
+            world_generator.TERRAINS,
+            token,
+            delta=version is not None,
+        )
+        return Response(content, media_type=map_codec.MEDIA_TYPE)
+    if player_id is not None:
+        return {
+            "size": world_map.size,
+            "chunk_size": world_map.chunk_size,
+            "terrains": world_generator.TERRAINS,
+            "chunks": await db.run_sync(fog.encode, player_id, rect),
+        }
+    if rect is not None:
+        locations = await crud_async.get_discovered_locations(db, *rect)
+    else:
+        locations = await crud_async.get_discovered_locations(db)
+    return {
+        "size": world_map.size,
+        "chunk_size": world_map.chunk_size,
+        "locations": [schemas.Location.model_validate(loc) for loc in locations],
+    }
 
 
 @app.get("/events", response_model=List[schemas.Event])
-def list_events(db: Session = Depends(get_db)):
-    events = db.query(models.Event).order_by(models.Event.id.desc()).all()
-    return events
+async def list_events(
+    since_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=MAX_EVENT_PAGE),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Return one page of the event log.
+
+    Without a cursor the newest ``limit`` events are returned, newest first;
+    pass the last id as ``before_id`` to page further back. Pass ``since_id``
+    instead to poll for events newer than that id, oldest first. Both together
+    return the events between the two ids, oldest first.
+    """
+    # Include lines still waiting in the write-behind queue
+    await event_sink.flush_async()
+    return await crud_async.get_events(db, since_id=since_id, before_id=before_id, limit=limit)
+
+
+@app.get("/events/export", summary="Stream the event log as NDJSON")
+async def export_events(since_id: int = 0):
+    """Stream every event after ``since_id`` as one JSON object per line.
+
+    Rows are read from a single cursor in batches while the response is being
+    sent, so exporting millions of events needs constant memory.
+    """
+    await event_sink.flush_async()
+
+    async def lines():
+        # The request-scoped session is closed before a streaming body is
+        # sent, so the export opens its own.
+        async with AsyncSessionLocal() as db:
+            async for batch in crud_async.iter_events(db, since_id):
+                yield "".join(
+                    json.dumps({"id": i, "description": d, "timestamp": t}) + "\n"
+                    for i, d, t in batch
+                )
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.get("/clock", summary="Current game time")
+def get_clock():
+    """Game time (advanced by the scheduler, see ``scheduler.py``) and the
+    number of scheduled events still pending.
+    """
+    return {**clock_time(scheduler.now), "pending": len(scheduler.wheel)}
+
+
+def _delta_kinds(types: Optional[str]):
+    return [t for t in types.split(",") if t] if types else None
+
+
+@app.websocket("/ws")
+async def world_updates_ws(
+    websocket: WebSocket,
+    since: Optional[int] = None,
+    types: Optional[str] = None,
+    player_id: Optional[int] = None,
+):
+    """Push world deltas to the client as JSON text frames.
+
+    Every frame is ``{"seq", "type", "data"}``. The first is ``hello`` with the
+    current sequence number; reconnect with ``?since=<last seq seen>`` to
+    receive what was missed. A ``reset`` frame means the client must reload
+    ``/world`` and ``/events``. ``types`` (comma separated) limits the delta
+    types sent and ``player_id`` drops other players' moves and hit points.
+    """
+    await websocket.accept()
+    sub = hub.subscribe(since, _delta_kinds(types), player_id)
+    try:
+        while True:
+            _seq, kind, frame = await sub.get()
+            await websocket.send_text(frame)
+            if kind == "reset" and sub.closed:
+                await websocket.close()
+                break
+    except WebSocketDisconnect:
+        pass
+    finally:
+        hub.unsubscribe(sub)
+
+
+@app.get("/stream", summary="Server-Sent Events stream of world deltas")
+async def world_updates_sse(
+    since: Optional[int] = None,
+    types: Optional[str] = None,
+    player_id: Optional[int] = None,
+    last_event_id: Optional[int] = Header(None),
+):
+    """Same deltas and parameters as ``/ws`` as a ``text/event-stream``; each
+    message's data is one frame. Browsers resume automatically by sending the
+    ``Last-Event-ID`` header on reconnect.
+    """
+    resume = last_event_id if last_event_id is not None else since
+    sub = hub.subscribe(resume, _delta_kinds(types), player_id)
+
+    async def frames():
+        try:
+            while True:
+                try:
+                    seq, kind, frame = await asyncio.wait_for(sub.get(), SSE_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"id: {seq}\ndata: {frame}\n\n"
+                if kind == "reset" and sub.closed:
+                    break
+        finally:
+            hub.unsubscribe(sub)
+
+    return StreamingResponse(frames(), media_type="text/event-stream")
+
+
+@app.get("/path", summary="Plan a route between two tiles")
+def find_path(from_x: int, from_y: int, to_x: int, to_y: int):
+    """Return the cheapest known route as a list of ``[x, y]`` tiles, both
+    ends included. Routes avoid water and prefer plains to mountains.
+    """
+    if not (world_map.in_bounds(from_x, from_y) and world_map.in_bounds(to_x, to_y)):
+        raise HTTPException(status_code=400, detail="Tile out of bounds")
+    path = navigator.path((from_x, from_y), (to_x, to_y))
+    if path is None:
+        raise HTTPException(status_code=404, detail="No path")
+    return {"path": [list(p) for p in path], "steps": len(path) - 1}
+
+
+@app.get("/metrics", summary="Prometheus metrics")
+def get_metrics():
+    """Request latencies, SQL statement counts, hot path timings and the
+    ``/stats/*`` counters in the Prometheus text format.
+    """
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/stats/cache")
+def cache_stats():
+    """Size, hit rate and eviction counters of the player/NPC cache."""
+    return entity_cache.stats()
+
+
+@app.get("/stats/fog")
+def fog_stats():
+    """Players, chunks and bytes of fog‑of‑war bitsets held in memory."""
+    return fog.stats()
+
+
+@app.get("/stats/paths")
+def path_stats():
+    """Clusters built and route cache counters of the pathfinder."""
+    return navigator.stats()
+
+
+@app.get("/stats/realtime")
+def realtime_stats():
+    """Sequence number, subscriber count and delivery counters of the push channel."""
+    return hub.stats()
+
+
+@app.post("/simulation/tick", summary="Advance every NPC by one tick")
+def simulation_tick():
+    """Run one batched world tick immediately and return what happened."""
+    result = simulation.tick()
+    return {"npcs": result.npcs, "moved": result.moved, "messages": result.messages}
+
+
+@app.get("/stats/simulation")
+def simulation_stats():
+    """Tick duration and throughput metrics of the world simulation."""
+    return simulation.stats()
+
+
+@app.get("/stats/events")
+def event_stats():
+    """Queue depth and flush latency of the write-behind event log."""
+    return event_sink.stats()
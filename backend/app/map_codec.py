@@ -0,0 +1,177 @@
+"""Compact binary map payload for ``/world``.
+
+The JSON response lists every discovered location as an object with five
+fields. This format sends the map per chunk ("region") instead: a bitmask of
+the discovered tiles followed by one palette index per discovered tile. A
+16x16 chunk costs at most 10 + 32 + 256 bytes. With a version token from an
+earlier response only the regions that changed since are sent.
+
+All integers are little endian::
+
+    header   4s  magic b"RPGM"
+             B   format version (1)
+             B   flags (bit 0: delta, i.e. only regions changed since the
+                 client's version; otherwise the client replaces its map)
+             B   chunk size
+             I   map size in tiles
+             B   palette length, then per entry: B length + UTF‑8 name
+             H   version token length + ASCII token
+             I   region count
+    region   i i chunk coordinates cx, cy
+             B B width w and height h (clipped at the map edge)
+             ceil(w*h/8) bytes discovered bitmask, row by row, least
+                 significant bit first
+             one byte per set bit: palette index of that tile's terrain
+
+The version token is ``WorldMap.version_token()``; pass it back as ``since``.
+"""
+
+import struct
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from . import models
+from .fog import FogOfWar, UNKNOWN_TERRAIN, unpack
+from .world_map import WorldMap
+
+MEDIA_TYPE = "application/x-rpg-map"
+MAGIC = b"RPGM"
+FORMAT_VERSION = 1
+FLAG_DELTA = 1
+
+_HEADER = struct.Struct("<4sBBBI")
+_REGION = struct.Struct("<iiBB")
+
+Rect = Tuple[int, int, int, int]
+
+
+@dataclass
+class Region:
+    """Discovered part of one chunk. Arrays are indexed [y - y0, x - x0]."""
+
+    cx: int
+    cy: int
+    discovered: np.ndarray  # bool
+    terrain: np.ndarray  # uint8 palette indices
+
+
+def _in_rect(world_map: WorldMap, cx: int, cy: int, rect: Optional[Rect]) -> bool:
+    if rect is None:
+        return True
+    x0, y0, x1, y1 = rect
+    cs = world_map.chunk_size
+    return x0 <= cx * cs < x1 and y0 <= cy * cs < y1
+
+
+def world_regions(
+    db: Session, world_map: WorldMap, rect: Optional[Rect] = None, since: Optional[int] = None
+) -> List[Region]:
+    """Regions of the globally discovered map, optionally limited to the
+    tile rectangle ``(x0, y0, x1, y1)`` and to chunks changed after ``since``.
+    """
+    regions = []
+    for cx, cy in db.query(models.Chunk.cx, models.Chunk.cy).order_by(models.Chunk.cx, models.Chunk.cy):
+        if not _in_rect(world_map, cx, cy, rect):
+            continue
+        chunk = world_map.ensure_chunk(db, cx, cy)
+        if since is not None and chunk.version <= since:
+            continue
+        discovered = chunk.discovered.T
+        if discovered.any():
+            regions.append(Region(cx, cy, discovered, chunk.terrain.T))
+    return regions
+
+
+def player_regions(
+    db: Session,
+    fog: FogOfWar,
+    player_id: int,
+    rect: Optional[Rect] = None,
+    since: Optional[int] = None,
+) -> List[Region]:
+    """Like ``world_regions`` for the tiles one player has discovered."""
+    world_map = fog.world_map
+    regions = []
+    for (cx, cy), (bits, version) in sorted(fog.chunks(db, player_id).items()):
+        if not _in_rect(world_map, cx, cy, rect):
+            continue
+        if since is not None and version <= since:
+            continue
+        chunk = world_map.ensure_chunk(db, cx, cy)
+        w, h = chunk.terrain.shape
+        discovered = unpack(bits, world_map.chunk_size)[:h, :w]
+        regions.append(Region(cx, cy, discovered, chunk.terrain.T))
+    return regions
+
+
+def encode(
+    regions: Sequence[Region],
+    size: int,
+    chunk_size: int,
+    palette: Sequence[str],
+    token: str,
+    delta: bool = False,
+) -> bytes:
+    """Serialise ``regions`` into the binary payload described above."""
+    parts = [_HEADER.pack(MAGIC, FORMAT_VERSION, FLAG_DELTA if delta else 0, chunk_size, size)]
+    parts.append(struct.pack("<B", len(palette)))
+    for name in palette:
+        raw = name.encode("utf-8")
+        parts.append(struct.pack("<B", len(raw)) + raw)
+    raw = token.encode("ascii")
+    parts.append(struct.pack("<H", len(raw)) + raw)
+    parts.append(struct.pack("<I", len(regions)))
+    for region in regions:
+        h, w = region.discovered.shape
+        parts.append(_REGION.pack(region.cx, region.cy, w, h))
+        parts.append(np.packbits(region.discovered, axis=None, bitorder="little").tobytes())
+        parts.append(np.ascontiguousarray(region.terrain[region.discovered], dtype=np.uint8).tobytes())
+    return b"".join(parts)
+
+
+def decode(data: bytes) -> dict:
+    """Parse a payload back into a dict; used by tests and Python clients.
+
+    Each region's ``terrain`` is a ``(h, w)`` array of palette indices with
+    ``fog.UNKNOWN_TERRAIN`` for undiscovered tiles.
+    """
+    magic, fmt, flags, chunk_size, size = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC or fmt != FORMAT_VERSION:
+        raise ValueError("Not a version 1 map payload")
+    offset = _HEADER.size
+    (count,) = struct.unpack_from("<B", data, offset)
+    offset += 1
+    palette = []
+    for _ in range(count):
+        (length,) = struct.unpack_from("<B", data, offset)
+        palette.append(data[offset + 1 : offset + 1 + length].decode("utf-8"))
+        offset += 1 + length
+    (length,) = struct.unpack_from("<H", data, offset)
+    token = data[offset + 2 : offset + 2 + length].decode("ascii")
+    offset += 2 + length
+    (count,) = struct.unpack_from("<I", data, offset)
+    offset += 4
+    regions = []
+    for _ in range(count):
+        cx, cy, w, h = _REGION.unpack_from(data, offset)
+        offset += _REGION.size
+        nbytes = (w * h + 7) // 8
+        bits = np.frombuffer(data, dtype=np.uint8, count=nbytes, offset=offset)
+        discovered = np.unpackbits(bits, bitorder="little")[: w * h].astype(bool).reshape(h, w)
+        offset += nbytes
+        seen = int(discovered.sum())
+        terrain = np.full((h, w), UNKNOWN_TERRAIN, dtype=np.uint8)
+        terrain[discovered] = np.frombuffer(data, dtype=np.uint8, count=seen, offset=offset)
+        offset += seen
+        regions.append({"cx": cx, "cy": cy, "discovered": discovered, "terrain": terrain})
+    return {
+        "size": size,
+        "chunk_size": chunk_size,
+        "palette": palette,
+        "version": token,
+        "delta": bool(flags & FLAG_DELTA),
+        "regions": regions,
+    }
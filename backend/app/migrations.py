@@ -0,0 +1,198 @@
+"""Versioned schema migrations.
+
+``Base.metadata.create_all`` creates missing tables but never changes one
+that already exists, so a database created by an older release keeps its
+old columns and indexes. ``upgrade`` brings any database to ``HEAD``:
+
+* an empty database gets the current schema from ``models.py`` and is
+  stamped with ``HEAD``;
+* a database without a version predates migrations and is version 1, the
+  schema ``create_all`` built until then;
+* each migration newer than the stored version then runs in a transaction
+  of its own, which also records the new version.
+
+Tables added to ``models.py`` are still created without a migration. A
+change to an existing table needs one: write a function taking a
+``Connection``, append it to ``MIGRATIONS`` with the next version number,
+and change ``models.py`` so that a new database ends up with the same
+schema. The version is kept in ``schema_version``, outside
+``Base.metadata``, so snapshots neither save nor restore it.
+
+``full_scans`` runs ``EXPLAIN`` on the queries in ``hot_queries`` and
+returns those whose plan reads a whole table instead of using an index.
+
+Usage::
+
+    python -m app.migrations [upgrade|current|check]
+"""
+
+import logging
+import sys
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import Column, Integer, MetaData, Table, inspect, select, text, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.sql import Executable
+
+from . import models
+
+logger = logging.getLogger(__name__)
+
+_metadata = MetaData()
+schema_version = Table("schema_version", _metadata, Column("version", Integer, nullable=False))
+
+
+def _index(table: str, name: str):
+    """Index ``name`` of ``table`` as declared in ``models.py``."""
+    return next(i for i in models.Base.metadata.tables[table].indexes if i.name == name)
+
+
+def _coordinate_indexes(conn: Connection) -> None:
+    # Tiles generated twice before chunks were claimed in their own table.
+    # NPCs pointing at a duplicate are moved to the row that is kept.
+    conn.execute(text(
+        "UPDATE npcs SET location_id = ("
+        " SELECT MIN(k.id) FROM locations k JOIN locations l ON k.x = l.x AND k.y = l.y"
+        " WHERE l.id = npcs.location_id)"
+        " WHERE location_id IS NOT NULL"
+    ))
+    conn.execute(text(
+        "DELETE FROM locations WHERE id NOT IN (SELECT MIN(id) FROM locations GROUP BY x, y)"
+    ))
+    for name in ("ix_locations_x", "ix_locations_y"):
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    for table, name in (
+        ("locations", "uq_locations_xy"),
+        ("npcs", "ix_npcs_xy"),
+        ("players", "ix_players_xy"),
+        ("events", "ix_events_timestamp"),
+    ):
+        _index(table, name).create(conn, checkfirst=True)
+
+
+def _game_clock(conn: Connection) -> None:
+    # scheduled_events is a new table, which create_all adds afterwards. So is
+    # worlds in a database from before worlds were generated lazily; it is
+    # then created with game_time.
+    if not inspect(conn).has_table("worlds"):
+        return
+    if "game_time" not in {c["name"] for c in inspect(conn).get_columns("worlds")}:
+        conn.execute(text("ALTER TABLE worlds ADD COLUMN game_time INTEGER NOT NULL DEFAULT 0"))
+
+
+# (version, description, migration), in order
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (2, "unique tile coordinates, entity position and event time indexes", _coordinate_indexes),
+    (3, "game clock", _game_clock),
+]
+HEAD = MIGRATIONS[-1][0]
+
+
+def current_version(conn: Connection) -> Optional[int]:
+    """Schema version of the database; ``None`` if it has none yet."""
+    if not inspect(conn).has_table(schema_version.name):
+        return None
+    return conn.execute(select(schema_version.c.version)).scalar()
+
+
+def _stamp(conn: Connection, version: int) -> None:
+    conn.execute(update(schema_version).values(version=version))
+
+
+def upgrade(engine: Engine) -> int:
+    """Create or upgrade the schema of ``engine``'s database to ``HEAD`` and
+    return the version it was at.
+    """
+    with engine.begin() as conn:
+        start = current_version(conn)
+        if start is None:
+            existing = set(inspect(conn).get_table_names()) & set(models.Base.metadata.tables)
+            start = 1 if existing else HEAD
+            if not existing:
+                models.Base.metadata.create_all(bind=conn)
+            schema_version.create(conn)
+            conn.execute(schema_version.insert().values(version=start))
+    for version, description, migrate in MIGRATIONS:
+        if version <= start:
+            continue
+        logger.info("Migrating the schema to version %d: %s", version, description)
+        with engine.begin() as conn:
+            migrate(conn)
+            _stamp(conn, version)
+    # New tables; existing ones are left alone
+    models.Base.metadata.create_all(bind=engine)
+    return start
+
+
+# -- query plans ------------------------------------------------------------------
+
+
+def hot_queries() -> Dict[str, Executable]:
+    """The lookups run on every move, tick and page of the event log."""
+    NPC, Player, Location, Event = models.NPC, models.Player, models.Location, models.Event
+    return {
+        "get_npcs_at": select(NPC).where(NPC.x == 3, NPC.y == 4),
+        "players_at": select(Player).where(Player.x == 3, Player.y == 4),
+        "set_location_discovered": update(Location)
+        .where(Location.x == 3, Location.y == 4)
+        .values(discovered=True),
+        "load_chunk": select(Location.x, Location.y, Location.terrain, Location.discovered).where(
+            Location.x >= 0, Location.x < 16, Location.y >= 0, Location.y < 16
+        ),
+        "events_since": select(Event).where(Event.id > 100).order_by(Event.id).limit(100),
+        "events_between": select(Event.id).where(
+            Event.timestamp >= "2026-01-01", Event.timestamp < "2026-01-02"
+        ),
+    }
+
+
+def explain(conn: Connection, stmt: Executable) -> List[str]:
+    """Lines of the database's query plan for ``stmt``."""
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "sqlite":
+        return [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+    return [row[0] for row in conn.exec_driver_sql(f"EXPLAIN {sql}")]
+
+
+def _scans(plan: List[str]) -> bool:
+    # SQLite: "SCAN npcs", PostgreSQL: "Seq Scan on npcs"
+    return any(line.startswith("SCAN ") or "Seq Scan" in line for line in plan)
+
+
+def full_scans(engine: Engine) -> Dict[str, List[str]]:
+    """Plans of the hot queries that read a whole table.
+
+    PostgreSQL picks plans from table statistics, so run this on a database
+    holding a realistic amount of data; SQLite uses an index whenever one
+    fits.
+    """
+    with engine.connect() as conn:
+        plans = {name: explain(conn, stmt) for name, stmt in hot_queries().items()}
+    return {name: plan for name, plan in plans.items() if _scans(plan)}
+
+
+def main(argv=None) -> int:
+    from .database import engine
+
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else "upgrade"
+    if command == "upgrade":
+        start = upgrade(engine)
+        print(f"schema version {start} -> {HEAD}")
+    elif command == "current":
+        with engine.connect() as conn:
+            print(f"schema version {current_version(conn)} (head {HEAD})")
+    elif command == "check":
+        scans = full_scans(engine)
+        for name, plan in scans.items():
+            print(f"{name}: {'; '.join(plan)}")
+        print(f"{len(scans)} of {len(hot_queries())} hot queries scan a table")
+        return 1 if scans else 0
+    else:
+        print(__doc__.split("Usage::")[1].strip())
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
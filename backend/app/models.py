@@ -4,12 +4,44 @@ These models form the persistent schema for the game. Each table has a
 corresponding Pydantic schema defined in ``schemas.py`` for serialisation.
 """
 
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Boolean
+from sqlalchemy import (
+    Column, Integer, String, Float, ForeignKey, Boolean, Text, UniqueConstraint, LargeBinary, Index
+)
 from sqlalchemy.orm import relationship
 
 from .database import Base
 
 
+class World(Base):
+    """Parameters of the current campaign world.
+
+    Only the seed and dimensions are stored up front; tiles are generated from
+    them chunk by chunk as the map is explored (see ``world_map.py``).
+    """
+
+    __tablename__ = "worlds"
+
+    id = Column(Integer, primary_key=True, index=True)
+    seed = Column(Integer, nullable=False)
+    size = Column(Integer, nullable=False)
+    chunk_size = Column(Integer, nullable=False)
+    # JSON state of the world's random generators (see game_logic/rng.py)
+    rng_state = Column(Text, nullable=True)
+    # Game minutes since the world was created (see scheduler.py)
+    game_time = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class Chunk(Base):
+    """Marks a square block of the map whose locations have been persisted."""
+
+    __tablename__ = "chunks"
+    __table_args__ = (UniqueConstraint("cx", "cy", name="uq_chunks_cx_cy"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    cx = Column(Integer, nullable=False)
+    cy = Column(Integer, nullable=False)
+
+
 class Location(Base):
     """A tile on the world map.
 
@@ -19,10 +51,12 @@ class Location(Base):
     """
 
     __tablename__ = "locations"
+    # One row per tile; also serves ranges of x, as when loading a chunk
+    __table_args__ = (Index("uq_locations_xy", "x", "y", unique=True),)
 
     id = Column(Integer, primary_key=True, index=True)
-    x = Column(Integer, index=True)
-    y = Column(Integer, index=True)
+    x = Column(Integer)
+    y = Column(Integer)
     terrain = Column(String, default="plains")
     discovered = Column(Boolean, default=False)
     # Relationship defined on NPC side
@@ -37,6 +71,7 @@ class Player(Base):
     """
 
     __tablename__ = "players"
+    __table_args__ = (Index("ix_players_xy", "x", "y"),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True)
@@ -46,14 +81,30 @@ class Player(Base):
     fatigue = Column(Integer, default=0)
     x = Column(Integer, default=0)
     y = Column(Integer, default=0)
-    # relationship to inventory
-    inventory_items = relationship("InventoryItem", back_populates="owner")
+    # relationship to inventory. Never lazy loaded: read paths that need it
+    # load it eagerly (see ``crud_async.get_player``), so serialising many
+    # players can't turn into one query each.
+    inventory_items = relationship("InventoryItem", back_populates="owner", lazy="raise_on_sql")
+
+
+class PlayerFog(Base):
+    """Tiles of one chunk discovered by one player, as a bitset (see ``fog.py``)."""
+
+    __tablename__ = "player_fog"
+    __table_args__ = (UniqueConstraint("player_id", "cx", "cy", name="uq_player_fog_chunk"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    player_id = Column(Integer, ForeignKey("players.id"), nullable=False, index=True)
+    cx = Column(Integer, nullable=False)
+    cy = Column(Integer, nullable=False)
+    bits = Column(LargeBinary, nullable=False)
 
 
 class NPC(Base):
     """Non‑player character with personality traits and world position."""
 
     __tablename__ = "npcs"
+    __table_args__ = (Index("ix_npcs_xy", "x", "y"),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
@@ -90,7 +141,7 @@ class InventoryItem(Base):
     quantity = Column(Integer, default=1)
 
     owner = relationship("Player", back_populates="inventory_items")
-    item = relationship("Item")
+    item = relationship("Item", lazy="joined")
 
 
 class Event(Base):
@@ -100,13 +151,27 @@ class Event(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     description = Column(String)
-    timestamp = Column(String)  # ISO 8601 datetime string
+    timestamp = Column(String, index=True)  # ISO 8601 datetime string
+
+
+class ScheduledEvent(Base):
+    """A pending timer of the event scheduler (see ``scheduler.py``)."""
+
+    __tablename__ = "scheduled_events"
+
+    id = Column(Integer, primary_key=True)
+    due = Column(Integer, nullable=False)  # game minute
+    kind = Column(String, nullable=False)
+    payload = Column(Text, nullable=True)  # JSON
+    interval = Column(Integer, nullable=True)  # game minutes between repeats
 
 
 def create_all():
-    """Initialise the database by creating all tables. Call this during app
-    startup or from a CLI script.
+    """Create the tables of a new database or upgrade an existing one to the
+    current schema (see ``migrations.py``). Call this during app startup or
+    from a CLI script.
     """
     from .database import engine
+    from .migrations import upgrade
 
-    Base.metadata.create_all(bind=engine)
+    upgrade(engine)
@@ -0,0 +1,203 @@
+"""Pathfinding on the world map.
+
+Adapts ``game_logic.pathfinding`` to the chunked world. The clusters of the
+hierarchical search are the map's chunks. A chunk's costs come from its
+terrain: the copy loaded from the locations table when the chunk is hot,
+otherwise the terrain generated from the world seed, which is what the chunk
+holds once materialised. Planning a long route therefore does not write
+unexplored chunks to the database.
+
+Many NPCs heading for the same goals (hostiles closing in on a player,
+villagers fleeing to a town) share one flow field from ``flow_field``
+instead of searching a route each. A field covers the tiles within
+``flow_field_radius`` of its goals and is cached under a key, e.g.
+``("player", id)``. It is reused for ``flow_field_ttl`` seconds, or until
+it is requested with different goals because the target moved. The
+world simulation only asks ``passable``; routes and fields are for game
+code that sends NPCs somewhere (see ``docs/EXTENDING.md``).
+
+``navigator`` is shared by the API and the world simulation. It starts over
+by itself when the map's seed or size changes; ``invalidate_tile`` must be
+called when a tile's terrain is edited.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Iterable, Optional, Tuple
+
+import numpy as np
+
+from .config import settings
+from .game_logic import world_generator
+from .game_logic.pathfinding import (
+    DEFAULT_PATH_CACHE,
+    CostSource,
+    FlowField,
+    HierarchicalPathfinder,
+    Path,
+    Point,
+    flow_field,
+    terrain_costs,
+)
+from .world_map import WorldMap, chunk_coords, world_map as default_world_map
+
+# Flow fields kept at once, least recently used dropped first
+MAX_FLOW_FIELDS = 256
+
+
+class WorldCostSource(CostSource):
+    """Chunk terrain costs of a ``WorldMap``."""
+
+    def __init__(self, world_map: WorldMap):
+        self.world_map = world_map
+
+    @property
+    def width(self) -> int:
+        return self.world_map.size
+
+    @property
+    def height(self) -> int:
+        return self.world_map.size
+
+    @property
+    def cluster_size(self) -> int:
+        return self.world_map.chunk_size
+
+    def costs(self, cx: int, cy: int) -> np.ndarray:
+        chunk = self.world_map.cache.get((cx, cy))
+        if chunk is not None:
+            return terrain_costs(chunk.terrain)
+        x0, y0, w, h = self.world_map.chunk_bounds(cx, cy)
+        if self.world_map.seed is None:
+            return terrain_costs(np.zeros((w, h), dtype=np.uint8))
+        return terrain_costs(world_generator.generate_terrain(self.world_map.seed, x0, y0, w, h))
+
+
+class Navigator:
+    """Route planning for NPCs on one world map."""
+
+    def __init__(
+        self,
+        world_map: WorldMap = default_world_map,
+        cache_size: int = DEFAULT_PATH_CACHE,
+        field_radius: int = settings.flow_field_radius,
+        field_ttl: float = settings.flow_field_ttl,
+        clock=time.monotonic,
+    ):
+        self.world_map = world_map
+        self.pathfinder = HierarchicalPathfinder(WorldCostSource(world_map), cache_size)
+        self.field_radius = field_radius
+        self.field_ttl = field_ttl
+        self.clock = clock
+        # key -> (time built, field)
+        self._fields: "OrderedDict[Hashable, Tuple[float, FlowField]]" = OrderedDict()
+        self._fields_lock = threading.Lock()
+        self.fields_built = 0
+        self.field_hits = 0
+        self._world = self._world_key()
+
+    def _world_key(self) -> Tuple:
+        return self.world_map.seed, self.world_map.size, self.world_map.chunk_size
+
+    def _sync(self) -> None:
+        key = self._world_key()
+        if key != self._world:
+            self.reset()
+            self._world = key
+
+    def reset(self) -> None:
+        """Forget all terrain and routes, e.g. after a new world was created."""
+        self.pathfinder.clear()
+        with self._fields_lock:
+            self._fields.clear()
+
+    def passable(self, x: int, y: int) -> bool:
+        """Whether ``(x, y)`` is on the map and may be entered."""
+        self._sync()
+        return self.pathfinder.passable(x, y)
+
+    def path(self, start: Point, goal: Point) -> Optional[Path]:
+        """Tiles from ``start`` to ``goal`` (both included), or ``None``."""
+        self._sync()
+        return self.pathfinder.find(start, goal)
+
+    def next_step(self, start: Point, goal: Point) -> Optional[Point]:
+        """The tile to move to next on the way to ``goal``; ``None`` if the
+        goal is unreachable or already reached.
+        """
+        path = self.path(start, goal)
+        if not path or len(path) < 2:
+            return None
+        return path[1]
+
+    def costs(self, x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+        """Movement costs of the tiles ``x0 <= x < x1``, ``y0 <= y < y1``
+        (clipped to the map), indexed ``[x - x0, y - y0]``.
+        """
+        self._sync()
+        x0, y0 = max(0, x0), max(0, y0)
+        x1, y1 = min(self.world_map.size, x1), min(self.world_map.size, y1)
+        out = np.empty((max(0, x1 - x0), max(0, y1 - y0)))
+        if out.size == 0:
+            return out
+        s = self.world_map.chunk_size
+        for cx in range(x0 // s, (x1 - 1) // s + 1):
+            for cy in range(y0 // s, (y1 - 1) // s + 1):
+                chunk = self.pathfinder.costs((cx, cy))
+                # Overlap of the chunk and the window, in window coordinates
+                ax, ay = max(x0, cx * s), max(y0, cy * s)
+                bx, by = min(x1, cx * s + chunk.shape[0]), min(y1, cy * s + chunk.shape[1])
+                out[ax - x0 : bx - x0, ay - y0 : by - y0] = chunk[
+                    ax - cx * s : bx - cx * s, ay - cy * s : by - cy * s
+                ]
+        return out
+
+    def flow_field(self, goals: Iterable[Point], key: Optional[Hashable] = None) -> FlowField:
+        """Flow field towards the nearest of ``goals``, cached under ``key``
+        (the goal tiles themselves by default).
+        """
+        goals = frozenset(goals)
+        if not goals:
+            raise ValueError("A flow field needs at least one goal")
+        key = goals if key is None else key
+        self._sync()
+        now = self.clock()
+        with self._fields_lock:
+            entry = self._fields.get(key)
+            if entry is not None and entry[1].goals == goals and now - entry[0] < self.field_ttl:
+                self._fields.move_to_end(key)
+                self.field_hits += 1
+                return entry[1]
+        r = self.field_radius
+        x0 = max(0, min(x for x, _y in goals) - r)
+        y0 = max(0, min(y for _x, y in goals) - r)
+        x1 = max(x for x, _y in goals) + r + 1
+        y1 = max(y for _x, y in goals) + r + 1
+        field = flow_field(self.costs(x0, y0, x1, y1), goals, (x0, y0))
+        with self._fields_lock:
+            self.fields_built += 1
+            self._fields[key] = (now, field)
+            self._fields.move_to_end(key)
+            while len(self._fields) > MAX_FLOW_FIELDS:
+                self._fields.popitem(last=False)
+        return field
+
+    def invalidate_tile(self, x: int, y: int) -> None:
+        """Call after changing the terrain of ``(x, y)``."""
+        self.pathfinder.invalidate(*chunk_coords(x, y, self.world_map.chunk_size))
+        with self._fields_lock:
+            for key in [k for k, (_t, f) in self._fields.items() if f.contains(x, y)]:
+                del self._fields[key]
+
+    def stats(self) -> dict:
+        return {
+            **self.pathfinder.stats(),
+            "flow_fields": len(self._fields),
+            "flow_fields_built": self.fields_built,
+            "flow_field_hits": self.field_hits,
+        }
+
+
+# Navigator of the map shared by the API process.
+navigator = Navigator()
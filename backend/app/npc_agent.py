@@ -7,23 +7,109 @@ here are simplistic: speak, move randomly, trade (no actual inventory
 exchange), attack the player, or do nothing.
 
 This module does not use asynchronous loops because it is run on demand by
-the backend when an endpoint requests an NPC update. In a real game you
-would run agents in background tasks or using websockets to push updates.
+the backend when an endpoint requests an NPC update. The module level helpers
+(``eligible_actions``, ``dialogue_line`` ...) are shared with the batched world
+tick in ``simulation.py``, which advances every NPC on a fixed cadence.
 """
 
-import random
 from typing import Optional, Tuple, List
 
 from sqlalchemy.orm import Session
 
-from . import models, crud
+from . import models, crud, unit_of_work
+from .navigation import navigator
+from .world_map import world_map
+from .realtime import hub
+from .spatial_index import npc_index, players_at
 from .game_logic.dice import roll_d20
+from .game_logic.rng import GameRNG, default_rng
+from .game_logic.pathfinding import FlowField
+from .instrumentation import timed
+
+
+# Unit steps an NPC may take when wandering.
+WANDER_STEPS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+# Every action in the order eligible_actions lists them.
+ACTIONS = ("attack", "talk", "wander", "trade")
+# Relative likelihood of each action among those an NPC is eligible for.
+ACTION_WEIGHTS = {"attack": 1.0, "talk": 1.0, "wander": 1.0, "trade": 1.0}
+
+# Trait thresholds that make an action available when players are present.
+ATTACK_BELOW_KINDNESS = -0.3
+TALK_ABOVE_CURIOSITY = 0.0
+TRADE_BELOW_GREED = -0.2
+
+
+def eligible_actions(
+    kindness: float, greed: float, curiosity: float, players_present: bool
+) -> List[str]:
+    """Return the actions an NPC with these traits may choose from.
+
+    The order of the returned list is part of the contract: callers pick an
+    element at random, so changing it changes which action a given random
+    draw selects.
+    """
+    actions = []
+    # Attack probability increases when players are present and kindness is low
+    if players_present and kindness < ATTACK_BELOW_KINDNESS:
+        actions.append("attack")
+    # Talk if curious and players are present
+    if players_present and curiosity > TALK_ABOVE_CURIOSITY:
+        actions.append("talk")
+    # Wander randomly if no other drives
+    actions.append("wander")
+    # Trade if greed is low (generous) and player present
+    if players_present and greed < TRADE_BELOW_GREED:
+        actions.append("trade")
+    return actions
+
+
+def choose_action(actions: List[str], roll: float) -> str:
+    """Pick one of ``actions`` using a uniform ``roll`` in ``[0, 1)``.
+
+    Actions are weighted by ``ACTION_WEIGHTS``: the roll is scaled by the
+    total weight and the first action whose running total exceeds it wins.
+    ``npc_decision.DecisionEngine`` performs the same arithmetic on arrays,
+    so both give identical choices for identical rolls.
+    """
+    total = 0.0
+    for action in actions:
+        total += ACTION_WEIGHTS[action]
+    threshold = roll * total
+    running = 0.0
+    for action in actions:
+        running += ACTION_WEIGHTS[action]
+        if running > threshold:
+            return action
+    return actions[-1]
+
+
+def dialogue_line(name: str, kindness: float) -> str:
+    """Return a simple dialogue line based on personality."""
+    # Very simple dialogue generator. You can replace this with an LLM.
+    if kindness > 0.5:
+        line = "Greetings, traveller. The weather is nice today, isn't it?"
+    elif kindness < -0.5:
+        line = "Get lost. I don't trust strangers."
+    else:
+        line = "What brings you to these parts?"
+    return f"{name} says: '{line}'"
+
+
+def trade_line(name: str) -> str:
+    return f"{name} offers to trade, but real trading isn't implemented yet."
+
+
+def attack_line(name: str, target: str, attack_roll: int, damage: int) -> str:
+    return f"{name} attacks {target}! (roll {attack_roll}) dealing {damage} damage."
 
 
 class NPCAgent:
-    def __init__(self, npc: models.NPC, db: Session):
+    def __init__(self, npc: models.NPC, db: Session, rng: Optional[GameRNG] = None):
         self.npc = npc
         self.db = db
+        self.rng = rng or default_rng
 
     def observe(self) -> dict:
         """Observe the immediate surroundings: adjacent players or NPCs.
@@ -31,40 +117,23 @@ class NPCAgent:
         This simplified version checks for players at the same location. It
         could be extended to look within a radius or line of sight.
         """
-        players_here = (
-            self.db.query(models.Player)
-            .filter(models.Player.x == self.npc.x, models.Player.y == self.npc.y)
-            .all()
-        )
+        players_here = players_at(self.db, self.npc.x, self.npc.y)
         return {"players": players_here}
 
-    def decide(self, observation: dict) -> str:
+    def decide(self, observation: dict, roll: Optional[float] = None) -> str:
         """Decide on an action based on personality and observation.
 
         The decision logic uses the personality axes to weight possible actions.
         For instance, a hostile (low kindness) NPC is more likely to attack,
         whereas a curious NPC might initiate dialogue. The output is a string
-        representing the chosen action.
+        representing the chosen action. ``roll`` is the uniform random draw
+        used to pick among the eligible actions; one is drawn if omitted.
         """
-        kindness = self.npc.kindness
-        greed = self.npc.greed
-        curiosity = self.npc.curiosity
         players_here = observation.get("players", [])
-
-        actions = []
-        # Attack probability increases when players are present and kindness is low
-        if players_here and kindness < -0.3:
-            actions.append("attack")
-        # Talk if curious and players are present
-        if players_here and curiosity > 0.0:
-            actions.append("talk")
-        # Wander randomly if no other drives
-        actions.append("wander")
-        # Trade if greed is low (generous) and player present
-        if players_here and greed < -0.2:
-            actions.append("trade")
-
-        return random.choice(actions)
+        actions = eligible_actions(
+            self.npc.kindness, self.npc.greed, self.npc.curiosity, bool(players_here)
+        )
+        return choose_action(actions, self.rng.random() if roll is None else roll)
 
     def act(self, action: str) -> Optional[str]:
         """Perform the chosen action. Returns a message describing the action.
@@ -81,45 +150,62 @@ class NPCAgent:
 
     def _attack(self) -> str:
         """Attack the first player at the NPC's location."""
-        players_here = (
-            self.db.query(models.Player)
-            .filter(models.Player.x == self.npc.x, models.Player.y == self.npc.y)
-            .all()
-        )
+        players_here = players_at(self.db, self.npc.x, self.npc.y)
         if not players_here:
             return f"{self.npc.name} looks around but finds no one to attack."
         player = players_here[0]
-        attack_roll = roll_d20()
-        damage = random.randint(1, 6)
+        attack_roll = roll_d20(self.rng)
+        damage = self.rng.randint(1, 6)
         player.hp -= damage
-        self.db.commit()
-        return (
-            f"{self.npc.name} attacks {player.name}! (roll {attack_roll}) "
-            f"dealing {damage} damage."
+        unit_of_work.commit(self.db)
+        unit_of_work.after_commit(
+            self.db, hub.publish, "hp", {"entity": "player", "id": player.id, "hp": player.hp}, player.id
         )
+        return attack_line(self.npc.name, player.name, attack_roll, damage)
 
     def _talk(self) -> str:
         """Return a simple dialogue line based on personality."""
-        # Very simple dialogue generator. You can replace this with an LLM.
-        if self.npc.kindness > 0.5:
-            line = "Greetings, traveller. The weather is nice today, isn't it?"
-        elif self.npc.kindness < -0.5:
-            line = "Get lost. I don't trust strangers."
-        else:
-            line = "What brings you to these parts?"
-        return f"{self.npc.name} says: '{line}'"
+        return dialogue_line(self.npc.name, self.npc.kindness)
 
     def _trade(self) -> str:
-        return f"{self.npc.name} offers to trade, but real trading isn't implemented yet."
+        return trade_line(self.npc.name)
 
     def _wander(self) -> str:
-        """Move one step in a random direction."""
-        dx, dy = random.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
-        self.npc.x += dx
-        self.npc.y += dy
-        self.db.commit()
+        """Move one step in a random direction, unless that tile is blocked."""
+        dx, dy = self.rng.choice(WANDER_STEPS)
+        x, y = self.npc.x + dx, self.npc.y + dy
+        if not navigator.passable(x, y):
+            return f"{self.npc.name} stays at ({self.npc.x}, {self.npc.y})."
+        self._move(x, y)
         return f"{self.npc.name} wanders to ({self.npc.x}, {self.npc.y})."
 
+    def travel_to(self, x: int, y: int) -> str:
+        """Take one step along the cheapest route to ``(x, y)``."""
+        step = navigator.next_step((self.npc.x, self.npc.y), (x, y))
+        if step is None:
+            if (self.npc.x, self.npc.y) == (x, y):
+                return f"{self.npc.name} has arrived at ({x}, {y})."
+            return f"{self.npc.name} finds no way to ({x}, {y})."
+        self._move(*step)
+        return f"{self.npc.name} travels to ({self.npc.x}, {self.npc.y})."
+
+    def follow(self, field: FlowField) -> str:
+        """Take one step down a flow field shared by NPCs with the same goal."""
+        step = field.next_step(self.npc.x, self.npc.y)
+        if step is None:
+            return f"{self.npc.name} stays at ({self.npc.x}, {self.npc.y})."
+        self._move(*step)
+        return f"{self.npc.name} heads to ({self.npc.x}, {self.npc.y})."
+
+    def _move(self, x: int, y: int) -> None:
+        self.npc.x, self.npc.y = x, y
+        unit_of_work.commit(self.db)
+        unit_of_work.after_commit(self.db, npc_index.move, self.npc.id, self.npc.x, self.npc.y)
+        unit_of_work.after_commit(self.db, hub.publish, "npc_moves", [[self.npc.id, self.npc.x, self.npc.y]])
+        # Entering an unexplored chunk generates it
+        world_map.ensure_materialised(self.db, self.npc.x, self.npc.y)
+
+    @timed("npc_agent.tick")
     def tick(self) -> Optional[str]:
         """Run a single observe‑decide‑act loop and return the action message."""
         obs = self.observe()
@@ -0,0 +1,89 @@
+"""Vectorised NPC decision engine.
+
+``DecisionEngine`` keeps the personality traits of many NPCs as parallel NumPy
+arrays (structure of arrays) and chooses an action for all of them at once:
+an ``(n, 4)`` eligibility mask is built from the trait thresholds, weighted by
+``ACTION_WEIGHTS`` and turned into a choice with one cumulative sum and one
+comparison against the per‑NPC random rolls.
+
+The arithmetic mirrors ``npc_agent.choose_action`` exactly, so for the same
+rolls the engine returns the same actions as calling ``NPCAgent.decide`` on
+each NPC in turn. Actions are returned as small integer codes indexing
+``ACTIONS``.
+"""
+
+from typing import Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .game_logic.rng import GameRNG, default_rng
+from .npc_agent import (
+    ACTIONS,
+    ACTION_WEIGHTS,
+    ATTACK_BELOW_KINDNESS,
+    TALK_ABOVE_CURIOSITY,
+    TRADE_BELOW_GREED,
+)
+
+ATTACK, TALK, WANDER, TRADE = (ACTIONS.index(a) for a in ("attack", "talk", "wander", "trade"))
+
+
+class DecisionEngine:
+    """Chooses actions for a population of NPCs held as trait arrays."""
+
+    def __init__(
+        self,
+        ids: Sequence[int],
+        kindness: Sequence[float],
+        greed: Sequence[float],
+        curiosity: Sequence[float],
+    ):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.kindness = np.asarray(kindness, dtype=np.float64)
+        self.greed = np.asarray(greed, dtype=np.float64)
+        self.curiosity = np.asarray(curiosity, dtype=np.float64)
+        self.weights = np.array([ACTION_WEIGHTS[a] for a in ACTIONS], dtype=np.float64)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[int, float, float, float]]) -> "DecisionEngine":
+        """Build an engine from ``(id, kindness, greed, curiosity)`` rows."""
+        rows = list(rows)
+        if not rows:
+            return cls([], [], [], [])
+        ids, kindness, greed, curiosity = zip(*rows)
+        return cls(ids, kindness, greed, curiosity)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def eligibility(self, players_present: np.ndarray) -> np.ndarray:
+        """Return an ``(n, len(ACTIONS))`` boolean mask of available actions."""
+        present = np.asarray(players_present, dtype=bool)
+        mask = np.empty((len(self.ids), len(ACTIONS)), dtype=bool)
+        mask[:, ATTACK] = present & (self.kindness < ATTACK_BELOW_KINDNESS)
+        mask[:, TALK] = present & (self.curiosity > TALK_ABOVE_CURIOSITY)
+        mask[:, WANDER] = True
+        mask[:, TRADE] = present & (self.greed < TRADE_BELOW_GREED)
+        return mask
+
+    def decide(
+        self,
+        players_present: np.ndarray,
+        rolls: Optional[np.ndarray] = None,
+        rng: Optional[GameRNG] = None,
+    ) -> np.ndarray:
+        """Choose an action code for every NPC.
+
+        ``rolls`` holds one uniform draw in ``[0, 1)`` per NPC; if omitted they
+        are drawn from ``rng`` (or ``rng.default_rng``).
+        """
+        if rolls is None:
+            rolls = (rng or default_rng).numpy.random(len(self.ids))
+        weighted = self.eligibility(players_present) * self.weights
+        running = np.cumsum(weighted, axis=1)
+        total = running[:, -1]
+        # Clamp below the total so rounding can never leave every action
+        # unselected; npc_agent.choose_action falls back to the last one.
+        threshold = np.minimum(rolls * total, np.nextafter(total, 0))
+        # First action whose running weight exceeds the scaled roll
+        return np.argmax(running > threshold[:, None], axis=1).astype(np.int8)
@@ -0,0 +1,193 @@
+"""Push channel for incremental world updates.
+
+Game code publishes small deltas to the module‑level ``hub`` as things
+change (a tile is discovered, NPCs move, hit points change, an event is
+logged) and every connected WebSocket or SSE client receives them, instead of
+re‑fetching ``/world`` and ``/events`` after each action.
+
+Each delta gets the next number of a global sequence and is encoded to JSON
+once, whatever the number of subscribers. The last ``history`` deltas are
+kept in a ring buffer so a client that reconnects with the last sequence
+number it saw receives exactly what it missed. If that number has already
+left the buffer, or a client falls more than ``queue_size`` deltas behind, it
+is sent a ``reset`` frame and must reload the full state before resuming.
+
+Clients can narrow what they receive: ``kinds`` selects delta types and
+``player_id`` drops deltas scoped to other players (their moves, hit points
+and discovered tiles), so a client is not sent every other player's private
+updates.
+
+Publishing is thread‑safe and never blocks: request handlers and the world
+simulation run in worker threads, while subscribers are asyncio queues that
+are fed with ``call_soon_threadsafe`` on the event loop they belong to.
+"""
+
+import asyncio
+import json
+import threading
+from collections import deque
+from typing import Deque, Iterable, List, Optional, Set, Tuple
+
+DEFAULT_HISTORY = 10_000
+DEFAULT_QUEUE_SIZE = 1_000
+
+
+def _frame(seq: int, kind: str, data) -> str:
+    return json.dumps({"seq": seq, "type": kind, "data": data}, separators=(",", ":"))
+
+
+# (seq, kind, player scope or None, encoded frame)
+Delta = Tuple[int, str, Optional[int], str]
+
+
+class Subscription:
+    """One client's queue of encoded frames."""
+
+    def __init__(
+        self,
+        hub: "DeltaHub",
+        loop: asyncio.AbstractEventLoop,
+        queue_size: int,
+        kinds: Optional[Set[str]] = None,
+        player_id: Optional[int] = None,
+    ):
+        self.hub = hub
+        self.loop = loop
+        self.queue: "asyncio.Queue[Tuple[int, str, str]]" = asyncio.Queue()
+        self.queue_size = queue_size
+        self.kinds = kinds
+        self.player_id = player_id
+        self.closed = False
+
+    def wants(self, delta: Delta) -> bool:
+        _seq, kind, scope, _frame = delta
+        if kind == "reset":
+            return True
+        if self.kinds is not None and kind not in self.kinds:
+            return False
+        return scope is None or self.player_id is None or scope == self.player_id
+
+    def _offer(self, delta: Delta) -> None:
+        """Queue a frame; runs on the subscriber's event loop."""
+        if self.closed or not self.wants(delta):
+            return
+        item = (delta[0], delta[1], delta[3])
+        if self.queue.qsize() >= self.queue_size:
+            # Too far behind to catch up incrementally
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            seq = item[0]
+            self.queue.put_nowait((seq, "reset", _frame(seq, "reset", {"reason": "lagging"})))
+            self.closed = True
+            self.hub.unsubscribe(self)
+            return
+        self.queue.put_nowait(item)
+
+    async def get(self) -> Tuple[int, str, str]:
+        """Wait for the next ``(seq, type, frame)``."""
+        item = await self.queue.get()
+        self.hub.delivered += 1
+        return item
+
+
+class DeltaHub:
+    """Sequences deltas, keeps recent history and fans them out to subscribers."""
+
+    def __init__(self, history: int = DEFAULT_HISTORY, queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.seq = 0
+        self.published = 0
+        self.delivered = 0
+        self.resets = 0
+        self._history: Deque[Delta] = deque(maxlen=history)
+        self._subscribers: Set[Subscription] = set()
+        self._lock = threading.Lock()
+
+    def publish(self, kind: str, data, player_id: Optional[int] = None) -> int:
+        """Record a delta and push it to every interested subscriber; returns
+        its sequence number. ``player_id`` scopes the delta to one player.
+        """
+        closed = []
+        with self._lock:
+            self.seq += 1
+            item = (self.seq, kind, player_id, _frame(self.seq, kind, data))
+            self._history.append(item)
+            self.published += 1
+            # Scheduled under the lock so that every loop runs the offers in
+            # sequence order whichever threads publish
+            for sub in self._subscribers:
+                try:
+                    sub.loop.call_soon_threadsafe(sub._offer, item)
+                except RuntimeError:
+                    closed.append(sub)  # event loop already closed
+        for sub in closed:
+            self.unsubscribe(sub)
+        return item[0]
+
+    def subscribe(
+        self,
+        since: Optional[int] = None,
+        kinds: Optional[Iterable[str]] = None,
+        player_id: Optional[int] = None,
+        loop=None,
+    ) -> Subscription:
+        """Register a subscriber on the running event loop.
+
+        With ``since`` the deltas after that sequence number are queued first
+        (or a ``reset`` frame if they are no longer available). Replay and
+        registration happen under one lock so no delta is missed or repeated.
+        """
+        loop = loop or asyncio.get_running_loop()
+        kinds = set(kinds) if kinds is not None else None
+        sub = Subscription(self, loop, self.queue_size, kinds, player_id)
+        with self._lock:
+            current = self.seq
+            if since is None or since >= current:
+                backlog: List[Tuple[int, str, str]] = []
+            elif self._history and since >= self._history[0][0] - 1:
+                backlog = [
+                    (seq, kind, frame)
+                    for seq, kind, scope, frame in self._history
+                    if seq > since and sub.wants((seq, kind, scope, frame))
+                ]
+            else:
+                backlog = None
+            if backlog is None or len(backlog) > self.queue_size:
+                self.resets += 1
+                backlog = [(current, "reset", _frame(current, "reset", {"reason": "expired"}))]
+            self._subscribers.add(sub)
+        hello = (current, "hello", _frame(current, "hello", {"seq": current}))
+        sub.queue.put_nowait(hello)
+        for item in backlog:
+            sub.queue.put_nowait(item)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.discard(sub)
+                if sub.closed:
+                    self.resets += 1
+        sub.closed = True
+
+    def reset(self, reason: str) -> int:
+        """Forget the history and tell every client to reload, e.g. after a
+        new world was created. Clients resuming from before this point get a
+        ``reset`` frame as well.
+        """
+        with self._lock:
+            self._history.clear()
+        return self.publish("reset", {"reason": reason})
+
+    def stats(self) -> dict:
+        return {
+            "seq": self.seq,
+            "subscribers": len(self._subscribers),
+            "history": len(self._history),
+            "published": self.published,
+            "delivered": self.delivered,
+            "resets": self.resets,
+        }
+
+
+hub = DeltaHub()
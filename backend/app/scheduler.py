@@ -0,0 +1,294 @@
+"""Game clock and scheduled world events.
+
+Game time is counted in whole minutes since the world was created and is
+stored in ``worlds.game_time``. ``EventScheduler`` advances it on a
+background thread: every ``interval`` real seconds the clock moves on by
+``rate`` game minutes per second elapsed, so events follow game time
+whatever the request rate.
+
+Timers live in a ``TimerWheel`` (see ``game_logic/timer_wheel.py``): a
+``kind`` due at a game minute, optionally repeating every so many minutes,
+with a JSON ``payload``. When one expires the handler registered for its
+kind runs and may return a line for the event log; it may also schedule or
+cancel other timers, which is how effects lasting a while (weather that
+holds for a few hours, a plague spreading from town to town) are written.
+
+Each step writes, in one transaction, the event log lines of the timers
+that fired, the timers added, changed or removed since the previous step,
+and the new game time. Pending timers are thus rows of
+``scheduled_events``: they survive restarts and are part of save profiles.
+``load`` rebuilds the wheel from them.
+"""
+
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Set
+
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from . import crud, models
+from .game_logic.timer_wheel import Timer, TimerWheel
+from .instrumentation import timed
+from .realtime import hub
+
+logger = logging.getLogger(__name__)
+
+MINUTES_PER_HOUR = 60
+MINUTES_PER_DAY = 24 * MINUTES_PER_HOUR
+
+# Handlers get the scheduler, the timer and the game minute it expired at
+Handler = Callable[["EventScheduler", Timer, int], Optional[str]]
+
+_timers = models.ScheduledEvent.__table__
+_insert_timers = insert(_timers)
+_delete_timers = delete(_timers).where(_timers.c.id == bindparam("timer_id"))
+_set_game_time = update(models.World.__table__).values(game_time=bindparam("game_time"))
+_insert_events = insert(models.Event.__table__)
+
+
+def clock_time(minute: int) -> dict:
+    """A game time as the day (from 1) and the time of day."""
+    day, rest = divmod(minute, MINUTES_PER_DAY)
+    hour, minutes = divmod(rest, MINUTES_PER_HOUR)
+    return {"game_time": minute, "day": day + 1, "time": f"{hour:02d}:{minutes:02d}"}
+
+
+@dataclass
+class SchedulerMetrics:
+    """Running totals describing the scheduler."""
+
+    steps: int = 0
+    fired: int = 0
+    failed: int = 0
+    last_step_seconds: float = 0.0
+    max_step_seconds: float = 0.0
+
+    def record(self, seconds: float, fired: int) -> None:
+        self.steps += 1
+        self.fired += fired
+        self.last_step_seconds = seconds
+        self.max_step_seconds = max(self.max_step_seconds, seconds)
+
+    def as_dict(self) -> dict:
+        return {
+            "steps": self.steps,
+            "fired": self.fired,
+            "failed": self.failed,
+            "last_step_seconds": self.last_step_seconds,
+            "max_step_seconds": self.max_step_seconds,
+        }
+
+
+class EventScheduler:
+    """Runs the game clock and the timers due on it."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        rate: float = 1.0,
+        interval: float = 1.0,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.session_factory = session_factory
+        self.rate = rate
+        self.interval = interval
+        self.handlers: Dict[str, Handler] = {}
+        self.metrics = SchedulerMetrics()
+        self.wheel = TimerWheel()
+        # Timers changed since the last write: id -> timer, or None if gone
+        self._dirty: Dict[int, Optional[Timer]] = {}
+        self._new: Set[int] = set()  # those of them not written yet
+        self._next_id = 1
+        self._carry = 0.0  # game minutes elapsed but not yet applied
+        # Handlers schedule timers while a step holds the lock
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def now(self) -> int:
+        """Current game time in minutes."""
+        return self.wheel.now
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def schedule(
+        self, kind: str, delay: int, payload=None, every: Optional[int] = None
+    ) -> int:
+        """Fire ``kind`` in ``delay`` game minutes (at least one), then every
+        ``every`` minutes if given. Returns the timer id.
+        """
+        with self._lock:
+            timer = Timer(self._next_id, self.now + max(delay, 1), kind, payload, every)
+            self._next_id += 1
+            self.wheel.schedule(timer)
+            self._dirty[timer.id] = timer
+            self._new.add(timer.id)
+            return timer.id
+
+    def cancel(self, timer_id: int) -> bool:
+        """Cancel a pending timer. Returns False if there was none."""
+        with self._lock:
+            if not self.wheel.cancel(timer_id):
+                return False
+            self._dirty[timer_id] = None
+            return True
+
+    def pending(self, kind: Optional[str] = None) -> int:
+        """Number of pending timers, or of those of ``kind``."""
+        with self._lock:
+            if kind is None:
+                return len(self.wheel)
+            return sum(1 for timer in self.wheel if timer.kind == kind)
+
+    @timed("scheduler.step")
+    def step(self, minutes: int) -> List[str]:
+        """Advance the clock by ``minutes``, running the handler of each timer
+        as it expires, and write the result. Returns the event log lines.
+        """
+        start = time.perf_counter()
+        with self._lock:
+            fired = 0
+            messages: List[str] = []
+            for tick, timer in self.wheel.advance(self.now + minutes):
+                fired += 1
+                self._dirty[timer.id] = timer if timer.id in self.wheel else None
+                handler = self.handlers.get(timer.kind)
+                if handler is None:
+                    logger.warning("No handler for scheduled %s event", timer.kind)
+                    continue
+                try:
+                    line = handler(self, timer, tick)
+                except Exception:
+                    self.metrics.failed += 1
+                    logger.exception("Scheduled %s event failed", timer.kind)
+                    continue
+                if line:
+                    messages.append(line)
+            db = self.session_factory()
+            try:
+                timestamp = self.save(db, messages)
+            finally:
+                db.close()
+        self.metrics.record(time.perf_counter() - start, fired)
+        if messages:
+            hub.publish("events", [{"description": m, "timestamp": timestamp} for m in messages])
+        return messages
+
+    def save(self, db: Session, messages: Sequence[str] = ()) -> str:
+        """Write the timer changes, the game time and ``messages`` in one
+        transaction. Returns the timestamp of the messages.
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+            new, self._new = self._new, set()
+            timestamp = datetime.utcnow().isoformat()
+            try:
+                crud.executemany(
+                    db, _delete_timers, [{"timer_id": i} for i in dirty if i not in new]
+                )
+                crud.executemany(
+                    db,
+                    _insert_timers,
+                    [
+                        {
+                            "id": t.id,
+                            "due": t.due,
+                            "kind": t.kind,
+                            "payload": json.dumps(t.payload) if t.payload is not None else None,
+                            "interval": t.interval,
+                        }
+                        for t in dirty.values()
+                        if t is not None
+                    ],
+                )
+                db.execute(_set_game_time, {"game_time": self.now})
+                crud.executemany(
+                    db, _insert_events, [{"description": m, "timestamp": timestamp} for m in messages]
+                )
+                db.commit()
+            except Exception:
+                db.rollback()
+                # Keep the changes for the next write; newer ones win
+                dirty.update(self._dirty)
+                self._dirty = dirty
+                self._new |= new
+                raise
+            return timestamp
+
+    def load(self, db: Session) -> None:
+        """Replace the clock and the timers with those stored in ``db``."""
+        with self._lock:
+            now = db.execute(select(models.World.game_time).order_by(models.World.id)).scalar()
+            wheel = TimerWheel(now or 0)
+            timer_id = 0
+            rows = db.execute(
+                select(_timers.c.id, _timers.c.due, _timers.c.kind, _timers.c.payload, _timers.c.interval)
+                .order_by(_timers.c.id)
+            )
+            for timer_id, due, kind, payload, interval in rows:
+                payload = json.loads(payload) if payload is not None else None
+                wheel.schedule(Timer(timer_id, due, kind, payload, interval))
+            self.wheel = wheel
+            self._next_id = timer_id + 1
+            self._dirty = {}
+            self._new = set()
+            self._carry = 0.0
+
+    def reset(self, db: Session) -> None:
+        """Start a new world's clock at minute 0 with no timers."""
+        with self._lock:
+            db.execute(delete(_timers))
+            self.wheel = TimerWheel()
+            self._next_id = 1
+            self._dirty = {}
+            self._new = set()
+            self._carry = 0.0
+            self.save(db)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="event-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        last = time.monotonic()
+        while not self._stop.wait(self.interval):
+            now = time.monotonic()
+            self._carry += (now - last) * self.rate
+            last = now
+            minutes = int(self._carry)
+            if not minutes:
+                continue
+            self._carry -= minutes
+            try:
+                self.step(minutes)
+            except Exception:
+                logger.exception("Scheduler step failed")
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "game_time": self.now,
+            "pending": len(self.wheel),
+            "rate": self.rate,
+            **self.metrics.as_dict(),
+        }
@@ -6,7 +6,7 @@ fields such as database IDs.
 """
 
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Annotated, List, Optional
 
 
 class LocationBase(BaseModel):
@@ -20,7 +20,7 @@ class Location(LocationBase):
     id: int
 
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 
 class Item(BaseModel):
@@ -30,7 +30,7 @@ class Item(BaseModel):
     stackable: bool = True
 
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 
 class InventoryItem(BaseModel):
@@ -39,7 +39,7 @@ class InventoryItem(BaseModel):
     quantity: int
 
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 
 class Player(BaseModel):
@@ -54,7 +54,7 @@ class Player(BaseModel):
     inventory_items: List[InventoryItem] = []
 
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 
 class NPCTraits(BaseModel):
@@ -72,7 +72,7 @@ class NPC(BaseModel):
     traits: NPCTraits
 
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 
 class Event(BaseModel):
@@ -81,7 +81,7 @@ class Event(BaseModel):
     timestamp: str
 
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 
 class MoveRequest(BaseModel):
@@ -96,7 +96,27 @@ class TalkRequest(BaseModel):
 
 class AttackRequest(BaseModel):
     target_id: int
+    # Join every player on the attacker's tile and every NPC on the target's
+    group: bool = False
+    # How combatants choose whom to attack (see game_logic/battle.py)
+    targeting: str = Field("first", pattern="^(first|lowest_hp|nearest|threat)$")
 
 
 class CreatePlayerRequest(BaseModel):
     name: str
+
+
+# Hit points of one simulated combatant
+SimulatedHP = Annotated[int, Field(ge=1, le=1000)]
+
+
+class CombatSimulationRequest(BaseModel):
+    # Runs on a worker thread of the API, so the work and the memory it takes
+    # (an array of encounters x combatants, a histogram of the players' total
+    # hit points) are bounded; larger studies belong in
+    # benchmarks/bench_combat.py or a script calling combat_sim directly
+    player_hp: List[SimulatedHP] = Field(..., min_length=1, max_length=32)
+    npc_hp: List[SimulatedHP] = Field(..., min_length=1, max_length=32)
+    encounters: int = Field(1000, ge=1, le=10_000)
+    seed: Optional[int] = None
+    max_rounds: int = Field(100, ge=1, le=10_000)
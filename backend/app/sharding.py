@@ -0,0 +1,426 @@
+"""Region‑sharded world simulation in worker processes.
+
+The GIL keeps ``WorldSimulation`` on one core. With ``RPG_SIM_WORKERS`` set
+above 0 the tick runs in that many worker processes instead. The map is
+split into ``Regions``, vertical bands of whole chunks, one per worker.
+Each worker keeps the NPCs and players standing in its band in memory,
+along with the terrain it has needed so far. It runs the same decision
+step as ``simulation.run_tick`` (``step_npcs``) on them, without reading
+the database.
+
+``ShardedSimulation`` coordinates the workers from the API process and
+keeps ``WorldSimulation``'s scheduler. A tick:
+
+1. sends every worker a ``tick`` message carrying what was routed to its
+   region since the last tick: players that were created or moved
+   (``player_moved``), NPCs the API moved (``npc_moved``) and NPCs handed
+   over by other workers;
+2. waits for the workers, which step their regions in parallel;
+3. hands NPCs that walked out of a region over to the owner of their new
+   tile, to be delivered with the next tick;
+4. writes and publishes the moves, damage and event lines with
+   ``apply_tick``, as an unsharded tick does.
+
+Messages travel over ``multiprocessing`` pipes, with positions as NumPy
+arrays so pickling stays cheap. Step 4 runs in the API process because
+SQLite has a single writer. It is the serial part of the tick.
+
+Each worker draws from its own substream of the simulation generator.
+Runs are reproducible for a given number of workers, but they differ from
+an unsharded run.
+"""
+
+import logging
+import multiprocessing
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from . import models
+from .game_logic.rng import GameRNG, rng_service
+from .navigation import WorldCostSource
+from .npc_decision import DecisionEngine
+from .simulation import TickResult, WorldSimulation, apply_tick, move_rows, step_npcs
+from .world_map import WorldMap, world_map as default_world_map
+
+logger = logging.getLogger(__name__)
+
+# Worker processes are started fresh rather than forked from the API
+# process, whose threads and database connections must not be copied
+START_METHOD = "spawn"
+
+NPCRow = Tuple[int, str, float, float, float, int, int]  # id, name, traits, x, y
+PlayerRow = Tuple[int, Optional[str], int, int]  # id, name (None: left), x, y
+
+
+@dataclass
+class Regions:
+    """Split of a ``size`` x ``size`` map into ``count`` bands of whole chunks."""
+
+    size: int
+    chunk_size: int
+    count: int
+    width: int = 0
+
+    def __post_init__(self):
+        chunks = -(-self.size // self.chunk_size)
+        self.width = max(1, -(-chunks // self.count)) * self.chunk_size
+
+    def owner(self, x: int, y: int) -> int:
+        return min(self.count - 1, max(0, x) // self.width)
+
+    def owners(self, xs: np.ndarray) -> np.ndarray:
+        return np.minimum(self.count - 1, np.maximum(xs, 0) // self.width)
+
+    def bounds(self, region: int) -> Tuple[int, int]:
+        """Columns ``[x0, x1)`` owned by ``region``."""
+        return region * self.width, min(self.size, (region + 1) * self.width)
+
+
+# -- worker side ------------------------------------------------------------------
+
+
+class _Passability:
+    """Passable tiles of the world, generated chunk by chunk on first use."""
+
+    def __init__(self, seed: Optional[int], size: int, chunk_size: int):
+        world = WorldMap(cache_chunks=0)
+        world.seed, world.size, world.chunk_size = seed, size, chunk_size
+        self.world = world
+        self._costs = WorldCostSource(world)
+        self._chunks: Dict[Tuple[int, int], np.ndarray] = {}
+
+    def __call__(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        size, cs = self.world.size, self.world.chunk_size
+        ok = (xs >= 0) & (ys >= 0) & (xs < size) & (ys < size)
+        inside = np.flatnonzero(ok)
+        keys = ((xs[inside] // cs) << 32) | (ys[inside] // cs)
+        for key in np.unique(keys).tolist():
+            cx, cy = key >> 32, key & 0xFFFFFFFF
+            tiles = self._chunks.get((cx, cy))
+            if tiles is None:
+                tiles = self._chunks[cx, cy] = np.isfinite(self._costs.costs(cx, cy))
+            sel = inside[keys == key]
+            ok[sel] = tiles[xs[sel] - cx * cs, ys[sel] - cy * cs]
+        return ok
+
+
+def _npc_arrays(rows: List[NPCRow]) -> Tuple[List[str], DecisionEngine, np.ndarray, np.ndarray]:
+    ids, names, kindness, greed, curiosity, xs, ys = zip(*rows) if rows else ([],) * 7
+    engine = DecisionEngine(ids, kindness, greed, curiosity)
+    return list(names), engine, np.asarray(xs, dtype=np.int64), np.asarray(ys, dtype=np.int64)
+
+
+class _Region:
+    """NPCs and players of one region, held by a worker process."""
+
+    def __init__(self, index: int, regions: Regions, world: tuple, rng_state: dict):
+        self.index = index
+        self.regions = regions
+        self.rng = GameRNG.from_state(rng_state)
+        self.passable = _Passability(*world)
+        self.players: Dict[int, Tuple[str, int, int]] = {}
+        self._set_npcs([])
+
+    def _set_npcs(self, rows: List[NPCRow]) -> None:
+        self.names, self.engine, self.xs, self.ys = _npc_arrays(rows)
+
+    def _add_npcs(self, rows: List[NPCRow]) -> None:
+        names, new, xs, ys = _npc_arrays(rows)
+        old = self.engine
+        self.names += names
+        self.engine = DecisionEngine(
+            np.concatenate([old.ids, new.ids]),
+            np.concatenate([old.kindness, new.kindness]),
+            np.concatenate([old.greed, new.greed]),
+            np.concatenate([old.curiosity, new.curiosity]),
+        )
+        self.xs = np.concatenate([self.xs, xs])
+        self.ys = np.concatenate([self.ys, ys])
+
+    def _keep(self, mask: np.ndarray) -> None:
+        e = self.engine
+        self.names = [name for name, keep in zip(self.names, mask.tolist()) if keep]
+        self.engine = DecisionEngine(e.ids[mask], e.kindness[mask], e.greed[mask], e.curiosity[mask])
+        self.xs, self.ys = self.xs[mask], self.ys[mask]
+
+    def _rows(self, indices) -> List[NPCRow]:
+        e = self.engine
+        return [
+            (int(e.ids[i]), self.names[i], float(e.kindness[i]), float(e.greed[i]),
+             float(e.curiosity[i]), int(self.xs[i]), int(self.ys[i]))
+            for i in indices
+        ]
+
+    def load(self, npcs: List[NPCRow], players: List[PlayerRow]) -> int:
+        self._set_npcs(npcs)
+        self.players = {pid: (name, x, y) for pid, name, x, y in players}
+        return len(npcs)
+
+    def tick(self, players: List[PlayerRow], npc_moves: List[Tuple[int, int, int]], arrivals: List[NPCRow]) -> dict:
+        start = time.perf_counter()
+        for pid, name, x, y in players:
+            if name is None:
+                self.players.pop(pid, None)
+            else:
+                self.players[pid] = (name, x, y)
+        for npc_id, x, y in npc_moves:
+            found = np.flatnonzero(self.engine.ids == npc_id)
+            self.xs[found], self.ys[found] = x, y
+        if arrivals:
+            self._add_npcs(arrivals)
+        # NPCs the API moved out of the region leave before the step
+        emigrants = self._emigrate()
+
+        players_by_tile: Dict[Tuple[int, int], tuple] = {}
+        for pid in sorted(self.players):
+            # NPCAgent attacks the first player on the tile
+            name, x, y = self.players[pid]
+            players_by_tile.setdefault((x, y), (pid, name))
+        npcs = len(self.names)
+        step = step_npcs(self.engine, self.names, self.xs, self.ys, players_by_tile, self.rng, self.passable)
+        ids = self.engine.ids[step.moved]
+        self.xs[step.moved], self.ys[step.moved] = step.xs, step.ys
+        emigrants += self._emigrate()
+        return {
+            "npcs": npcs,
+            "ids": ids,
+            "xs": step.xs,
+            "ys": step.ys,
+            "damage": step.damage,
+            "messages": step.messages,
+            "emigrants": emigrants,
+            "seconds": time.perf_counter() - start,
+        }
+
+    def _emigrate(self) -> List[NPCRow]:
+        leaving = self.regions.owners(self.xs) != self.index
+        if not leaving.any():
+            return []
+        rows = self._rows(np.flatnonzero(leaving).tolist())
+        self._keep(~leaving)
+        return rows
+
+
+def _serve(conn) -> None:
+    """Worker process main loop: answer the coordinator's messages in order."""
+    region = None
+    while True:
+        kind, *args = conn.recv()
+        if kind == "stop":
+            break
+        try:
+            if kind == "load":
+                index, regions, world, rng_state, npcs, players = args
+                region = _Region(index, regions, world, rng_state)
+                reply = region.load(npcs, players)
+            else:
+                reply = getattr(region, kind)(*args)
+        except Exception as exc:  # returned to the coordinator, which raises it
+            reply = exc
+        conn.send(reply)
+    conn.close()
+
+
+# -- coordinator side --------------------------------------------------------------
+
+
+@dataclass
+class _Inbox:
+    """Changes routed to one region, delivered with its next tick."""
+
+    players: List[PlayerRow] = field(default_factory=list)
+    npc_moves: List[Tuple[int, int, int]] = field(default_factory=list)
+    arrivals: List[NPCRow] = field(default_factory=list)
+
+
+class ShardedSimulation(WorldSimulation):
+    """``WorldSimulation`` whose ticks run in ``workers`` processes, one per region."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        workers: int,
+        world_map: WorldMap = default_world_map,
+        **kwargs,
+    ):
+        super().__init__(session_factory, **kwargs)
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.workers = workers
+        self.world_map = world_map
+        self.regions: Optional[Regions] = None
+        self.shard_npcs = [0] * workers
+        self.shard_seconds = [0.0] * workers
+        self.handoffs = 0
+        self._pipes = []
+        self._processes = []
+        self._inboxes = [_Inbox() for _ in range(workers)]
+        self._npc_owner: Dict[int, int] = {}
+        self._player_owner: Dict[int, int] = {}
+        self._route_lock = threading.Lock()
+
+    # -- routing ----------------------------------------------------------
+
+    def player_moved(self, player_id: int, name: str, x: int, y: int) -> None:
+        """Route a player's new position to the region it stands in, handing
+        it over if it crossed a boundary.
+        """
+        with self._route_lock:
+            if self.regions is None:
+                return  # read from the database when the workers start
+            owner = self.regions.owner(x, y)
+            previous = self._player_owner.get(player_id)
+            if previous is not None and previous != owner:
+                self._inboxes[previous].players.append((player_id, None, x, y))
+            self._player_owner[player_id] = owner
+            self._inboxes[owner].players.append((player_id, name, x, y))
+
+    def npc_moved(self, npc_id: int, x: int, y: int) -> None:
+        """Route a move made outside the simulation to the NPC's owner."""
+        with self._route_lock:
+            owner = self._npc_owner.get(npc_id)
+            if owner is not None:
+                self._inboxes[owner].npc_moves.append((npc_id, x, y))
+
+    # -- workers ----------------------------------------------------------
+
+    def _request(self, messages: List[tuple]) -> list:
+        """Send one message to each worker, then collect all the replies."""
+        for pipe, message in zip(self._pipes, messages):
+            pipe.send(message)
+        replies = [pipe.recv() for pipe in self._pipes]
+        for reply in replies:
+            if isinstance(reply, Exception):
+                raise RuntimeError("Simulation worker failed") from reply
+        return replies
+
+    def _spawn(self) -> None:
+        context = multiprocessing.get_context(START_METHOD)
+        for i in range(self.workers):
+            parent, child = context.Pipe()
+            process = context.Process(target=_serve, args=(child,), name=f"world-shard-{i}", daemon=True)
+            process.start()
+            child.close()
+            self._pipes.append(parent)
+            self._processes.append(process)
+        self._load()
+
+    def _load(self) -> None:
+        NPC, Player = models.NPC, models.Player
+        db = self.session_factory()
+        try:
+            npcs = [tuple(r) for r in db.query(
+                NPC.id, NPC.name, NPC.kindness, NPC.greed, NPC.curiosity, NPC.x, NPC.y
+            )]
+            players = [tuple(r) for r in db.query(Player.id, Player.name, Player.x, Player.y)]
+        finally:
+            db.close()
+        wm = self.world_map
+        regions = Regions(wm.size, wm.chunk_size, self.workers)
+        world = (wm.seed, wm.size, wm.chunk_size)
+        rng = self.rng or rng_service.stream("simulation")
+        npc_owners = regions.owners(np.array([r[5] for r in npcs], dtype=np.int64)).tolist()
+        player_owners = regions.owners(np.array([r[2] for r in players], dtype=np.int64)).tolist()
+        by_region = [([], []) for _ in range(self.workers)]
+        for row, owner in zip(npcs, npc_owners):
+            by_region[owner][0].append(row)
+        for row, owner in zip(players, player_owners):
+            by_region[owner][1].append(row)
+        with self._route_lock:
+            self.shard_npcs = self._request(
+                [
+                    ("load", i, regions, world, rng.spawn("shard", i).get_state(), region_npcs, region_players)
+                    for i, (region_npcs, region_players) in enumerate(by_region)
+                ]
+            )
+            self.regions = regions
+            self._npc_owner = {row[0]: owner for row, owner in zip(npcs, npc_owners)}
+            self._player_owner = {row[0]: owner for row, owner in zip(players, player_owners)}
+            self._inboxes = [_Inbox() for _ in range(self.workers)]
+
+    def _shutdown(self) -> None:
+        for pipe in self._pipes:
+            try:
+                pipe.send(("stop",))
+            except OSError:
+                pass
+        for process in self._processes:
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
+        self._pipes, self._processes = [], []
+        with self._route_lock:
+            self.regions = None
+
+    def reload(self) -> None:
+        """Re-read the world, NPCs and players, e.g. after ``/init`` or ``/load``."""
+        with self._tick_lock:
+            if self._pipes:
+                self._load()
+
+    # -- ticks -----------------------------------------------------------
+
+    def tick(self) -> TickResult:
+        with self._tick_lock:
+            start = time.perf_counter()
+            try:
+                if not self._pipes:
+                    self._spawn()
+                with self._route_lock:
+                    inboxes, self._inboxes = self._inboxes, [_Inbox() for _ in range(self.workers)]
+                replies = self._request(
+                    [("tick", box.players, box.npc_moves, box.arrivals) for box in inboxes]
+                )
+            except Exception:
+                # Start over from the database on the next tick
+                self._shutdown()
+                raise
+            self._hand_over(replies)
+            result = TickResult(npcs=sum(r["npcs"] for r in replies))
+            ids = np.concatenate([r["ids"] for r in replies])
+            moves = move_rows(
+                ids, np.concatenate([r["xs"] for r in replies]), np.concatenate([r["ys"] for r in replies])
+            )
+            damage: Dict[int, int] = {}
+            for reply in replies:
+                for player_id, dealt in reply["damage"].items():
+                    damage[player_id] = damage.get(player_id, 0) + dealt
+                result.messages.extend(reply["messages"])
+            db = self.session_factory()
+            try:
+                apply_tick(db, moves, damage, result.messages)
+            finally:
+                db.close()
+            result.moved = len(moves)
+            self.shard_npcs = [r["npcs"] for r in replies]
+            self.shard_seconds = [r["seconds"] for r in replies]
+            self.metrics.record(time.perf_counter() - start, result.npcs)
+        return result
+
+    def _hand_over(self, replies: List[dict]) -> None:
+        with self._route_lock:
+            for reply in replies:
+                for row in reply["emigrants"]:
+                    owner = self.regions.owner(row[5], row[6])
+                    self._npc_owner[row[0]] = owner
+                    self._inboxes[owner].arrivals.append(row)
+                    self.handoffs += 1
+
+    def stop(self, timeout: float = 5.0) -> None:
+        super().stop(timeout)
+        with self._tick_lock:
+            self._shutdown()
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            "workers": self.workers,
+            "handoffs": self.handoffs,
+            "shard_npcs": list(self.shard_npcs),
+            "max_shard_seconds": max(self.shard_seconds),
+        }
@@ -0,0 +1,347 @@
+"""Batched world simulation.
+
+``WorldSimulation`` advances every NPC in the world on a fixed cadence rather
+than only when a player steps onto their tile. Each tick runs in three phases:
+
+1. **Snapshot** – NPC traits/positions and player positions are read with two
+   column queries inside one transaction, so every NPC sees the same world.
+2. **Decide** – ``npc_decision.DecisionEngine`` picks an action for every NPC
+   at once from the snapshot, using the same rules as ``NPCAgent``.
+3. **Apply** – all mutations (NPC moves, player damage, event log lines) are
+   written with ``executemany`` statements and committed once, then published
+   to ``realtime.hub`` as one delta per kind.
+
+The scheduler runs ticks on a background thread at ``tick_rate`` ticks per
+second. When a tick overruns its slot the catch‑up policy decides what happens
+to the ticks that were missed: ``"skip"`` drops them and realigns to the
+schedule, ``"burst"`` runs up to ``max_catch_up`` of them back to back.
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.orm import Session
+
+from . import models, crud
+from .entity_cache import entity_cache
+from .game_logic.dice import roll_d20
+from .game_logic.rng import GameRNG, rng_service
+from .instrumentation import timed
+from .navigation import navigator
+from .npc_agent import WANDER_STEPS, attack_line, dialogue_line, trade_line
+from .npc_decision import ATTACK, TALK, TRADE, WANDER, DecisionEngine
+from .realtime import hub
+from .spatial_index import npc_index
+from .world_map import world_map
+
+logger = logging.getLogger(__name__)
+
+CATCH_UP_POLICIES = ("skip", "burst")
+
+_npcs = models.NPC.__table__
+_players = models.Player.__table__
+_move_npcs = (
+    update(_npcs)
+    .where(_npcs.c.id == bindparam("npc_id"))
+    .values(x=bindparam("new_x"), y=bindparam("new_y"))
+)
+_damage_players = (
+    update(_players)
+    .where(_players.c.id == bindparam("player_id"))
+    .values(hp=_players.c.hp - bindparam("damage"))
+)
+_insert_events = insert(models.Event.__table__)
+_WANDER_STEPS = np.array(WANDER_STEPS, dtype=np.int64)
+
+
+def _tile_key(x, y):
+    """Pack tile coordinates into one integer (works on scalars and arrays)."""
+    return x * (1 << 32) + y
+
+
+@dataclass
+class TickResult:
+    """Summary of a single world tick."""
+
+    npcs: int = 0
+    moved: int = 0
+    messages: List[str] = field(default_factory=list)
+
+
+@dataclass
+class TickMetrics:
+    """Running totals describing scheduler performance."""
+
+    ticks: int = 0
+    late_ticks: int = 0
+    skipped_ticks: int = 0
+    npcs_processed: int = 0
+    total_seconds: float = 0.0
+    last_tick_seconds: float = 0.0
+    max_tick_seconds: float = 0.0
+
+    def record(self, seconds: float, npcs: int) -> None:
+        self.ticks += 1
+        self.npcs_processed += npcs
+        self.total_seconds += seconds
+        self.last_tick_seconds = seconds
+        self.max_tick_seconds = max(self.max_tick_seconds, seconds)
+
+    def as_dict(self) -> dict:
+        return {
+            "ticks": self.ticks,
+            "late_ticks": self.late_ticks,
+            "skipped_ticks": self.skipped_ticks,
+            "npcs_processed": self.npcs_processed,
+            "last_tick_seconds": self.last_tick_seconds,
+            "max_tick_seconds": self.max_tick_seconds,
+            "mean_tick_seconds": self.total_seconds / self.ticks if self.ticks else 0.0,
+            "npcs_per_second": (
+                self.npcs_processed / self.total_seconds if self.total_seconds else 0.0
+            ),
+        }
+
+
+@dataclass
+class Step:
+    """What a population of NPCs decided to do in one tick."""
+
+    moved: np.ndarray  # indices of the NPCs that moved
+    xs: np.ndarray  # and their new positions
+    ys: np.ndarray
+    damage: Dict[int, int] = field(default_factory=dict)  # player id -> hit points lost
+    messages: List[str] = field(default_factory=list)
+
+
+def _passable_tiles(xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    return np.fromiter(
+        (navigator.passable(x, y) for x, y in zip(xs.tolist(), ys.tolist())), dtype=bool, count=len(xs)
+    )
+
+
+def step_npcs(
+    engine: DecisionEngine,
+    names: Sequence[str],
+    xs: np.ndarray,
+    ys: np.ndarray,
+    players_by_tile: Dict[Tuple[int, int], tuple],
+    rng: GameRNG,
+    passable: Callable[[np.ndarray, np.ndarray], np.ndarray] = _passable_tiles,
+) -> Step:
+    """Decide and resolve one tick for the NPCs in ``engine`` standing at
+    ``xs``/``ys``. ``players_by_tile`` maps a tile to the ``(id, name)`` of
+    the player an NPC there would attack. Nothing is written.
+    """
+    player_tiles = np.array([_tile_key(x, y) for x, y in players_by_tile], dtype=np.int64)
+    present = np.isin(_tile_key(xs, ys), player_tiles)
+    actions = engine.decide(present, rng=rng)
+    steps = _WANDER_STEPS[rng.numpy.integers(0, len(WANDER_STEPS), len(xs))]
+    wandering = np.flatnonzero(actions == WANDER)
+    new_xs = xs[wandering] + steps[wandering, 0]
+    new_ys = ys[wandering] + steps[wandering, 1]
+    # Wanderers whose step would leave the map or enter water stay put
+    ok = passable(new_xs, new_ys)
+    step = Step(wandering[ok], new_xs[ok], new_ys[ok])
+
+    damage: Dict[int, int] = defaultdict(int)
+    for i in np.flatnonzero(actions != WANDER).tolist():
+        action, name = actions[i], names[i]
+        if action == ATTACK:
+            target_id, target_name = players_by_tile[(int(xs[i]), int(ys[i]))]
+            attack_roll = roll_d20(rng)
+            dealt = rng.randint(1, 6)
+            damage[target_id] += dealt
+            step.messages.append(attack_line(name, target_name, attack_roll, dealt))
+        elif action == TALK:
+            step.messages.append(dialogue_line(name, float(engine.kindness[i])))
+        elif action == TRADE:
+            step.messages.append(trade_line(name))
+    step.damage = dict(damage)
+    return step
+
+
+def apply_tick(
+    db: Session, moves: List[dict], damage: Dict[int, int], messages: List[str]
+) -> None:
+    """Write one tick's NPC moves, player damage and event lines in a single
+    transaction, then update the caches and publish the changes.
+    """
+    NPC, Player = models.NPC, models.Player
+    crud.executemany(db, _move_npcs, moves)
+    crud.executemany(
+        db,
+        _damage_players,
+        [{"player_id": pid, "damage": dealt} for pid, dealt in damage.items()],
+    )
+    timestamp = datetime.utcnow().isoformat()
+    crud.executemany(
+        db,
+        _insert_events,
+        [{"description": m, "timestamp": timestamp} for m in messages],
+    )
+    db.commit()
+    # The statements above bypass the ORM, so the cache is not updated by them
+    entity_cache.invalidate(NPC, [m["npc_id"] for m in moves])
+    entity_cache.invalidate(Player, list(damage))
+
+    positions = [(m["npc_id"], m["new_x"], m["new_y"]) for m in moves]
+    npc_index.move_many(positions)
+    if positions:
+        hub.publish("npc_moves", positions)
+    if damage:
+        for player_id, hp in db.query(Player.id, Player.hp).filter(Player.id.in_(list(damage))):
+            hub.publish("hp", {"entity": "player", "id": player_id, "hp": hp}, player_id)
+    if messages:
+        hub.publish("events", [{"description": m, "timestamp": timestamp} for m in messages])
+    size = world_map.chunk_size
+    entered = {(x // size, y // size) for _, x, y in positions}
+    # ``world_map.materialised`` is added to by requests on the event loop
+    # while shards run this on their own threads, so it is only tested for
+    # membership here, never iterated
+    for cx, cy in entered:
+        world_map.ensure_materialised(db, cx * size, cy * size)
+
+
+def move_rows(ids: np.ndarray, xs: np.ndarray, ys: np.ndarray) -> List[dict]:
+    """Parameters of ``_move_npcs`` for NPCs ``ids`` moving to ``xs``/``ys``."""
+    return [
+        {"npc_id": npc_id, "new_x": x, "new_y": y}
+        for npc_id, x, y in zip(ids.tolist(), xs.tolist(), ys.tolist())
+    ]
+
+
+@timed("simulation.run_tick")
+def run_tick(db: Session, rng: GameRNG) -> TickResult:
+    """Advance every NPC by one observe‑decide‑act step in a single transaction."""
+    NPC, Player = models.NPC, models.Player
+    rows = db.query(NPC.id, NPC.name, NPC.kindness, NPC.greed, NPC.curiosity, NPC.x, NPC.y).all()
+    players_by_tile: Dict[Tuple[int, int], tuple] = {}
+    for player in db.query(Player.id, Player.name, Player.x, Player.y).order_by(Player.id):
+        # NPCAgent attacks the first player on the tile
+        players_by_tile.setdefault((player.x, player.y), (player.id, player.name))
+
+    result = TickResult(npcs=len(rows))
+    if not rows:
+        db.commit()
+        return result
+    ids, names, kindness, greed, curiosity, xs, ys = zip(*rows)
+    engine = DecisionEngine(ids, kindness, greed, curiosity)
+    xs = np.asarray(xs, dtype=np.int64)
+    ys = np.asarray(ys, dtype=np.int64)
+    step = step_npcs(engine, names, xs, ys, players_by_tile, rng)
+    moves = move_rows(engine.ids[step.moved], step.xs, step.ys)
+    apply_tick(db, moves, step.damage, step.messages)
+    result.moved = len(moves)
+    result.messages = step.messages
+    return result
+
+
+class WorldSimulation:
+    """Runs ``run_tick`` on a fixed cadence on a background thread."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        tick_rate: float = 1.0,
+        catch_up: str = "skip",
+        max_catch_up: int = 5,
+        rng: Optional[GameRNG] = None,
+    ):
+        if tick_rate <= 0:
+            raise ValueError("tick_rate must be positive")
+        if catch_up not in CATCH_UP_POLICIES:
+            raise ValueError(f"catch_up must be one of {CATCH_UP_POLICIES}")
+        self.session_factory = session_factory
+        self.tick_rate = tick_rate
+        self.catch_up = catch_up
+        self.max_catch_up = max_catch_up
+        # Without an explicit generator ticks draw from the current world's
+        # "simulation" substream, which /init resets.
+        self.rng = rng
+        self.metrics = TickMetrics()
+        self._tick_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def interval(self) -> float:
+        return 1.0 / self.tick_rate
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def tick(self) -> TickResult:
+        """Run one tick now. Safe to call while the background loop runs."""
+        with self._tick_lock:
+            db = self.session_factory()
+            start = time.perf_counter()
+            try:
+                result = run_tick(db, self.rng or rng_service.stream("simulation"))
+            finally:
+                db.close()
+            self.metrics.record(time.perf_counter() - start, result.npcs)
+        return result
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="world-simulation", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+                continue
+            # Whole slots that passed while we were busy with earlier ticks
+            overdue = int(-delay // self.interval)
+            if overdue:
+                self.metrics.late_ticks += 1
+                if self.catch_up == "skip":
+                    skipped = overdue
+                else:
+                    skipped = max(0, overdue - self.max_catch_up)
+                self.metrics.skipped_ticks += skipped
+                next_tick += skipped * self.interval
+            try:
+                self.tick()
+            except Exception:
+                logger.exception("World tick failed")
+            next_tick += self.interval
+
+    # Every tick reads the database, so there is nothing to route or reload;
+    # ShardedSimulation (see sharding.py) overrides these.
+
+    def player_moved(self, player_id: int, name: str, x: int, y: int) -> None:
+        pass
+
+    def npc_moved(self, npc_id: int, x: int, y: int) -> None:
+        pass
+
+    def reload(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "tick_rate": self.tick_rate,
+            "catch_up": self.catch_up,
+            **self.metrics.as_dict(),
+        }
@@ -0,0 +1,763 @@
+"""Save profiles as compact, incremental binary snapshots.
+
+A snapshot holds the whole game: the world parameters and the state of its
+random generators, every materialised chunk of the map and every row of
+the other tables (players, inventories, NPCs, fog of war, events, ...).
+Saving does not stop the game. All tables are exported in one read
+transaction, so the snapshot is consistent, and with WAL journaling that
+transaction does not block writers (see ``database.py``). There is no need
+to close connections or copy ``game.db``.
+
+Locations are not stored row by row. Each chunk is stored as arrays: the
+terrain (one palette index per tile), a bitmask of discovered tiles and the
+location ids. The ids of a materialised chunk are consecutive, so usually
+only the first id is stored. Other tables are stored as pages of
+``PAGE_ROWS`` ids, column by column. The whole body is compressed with zlib.
+
+Saves are incremental. Every snapshot ends with a manifest listing a CRC of
+each page and chunk. The next save compares against the manifest of the
+previous snapshot and writes only the pages and chunks whose CRC changed.
+It also writes an empty page or chunk for each one that disappeared.
+Loading replays the latest full snapshot and the incremental ones after it.
+After ``max_chain`` incremental snapshots the next save is a full one, and
+a full save deletes the older snapshots. A profile's files are
+``<save_dir>/<profile>/<seq>.snap``.
+
+File layout (integers little endian)::
+
+    header    4s  magic b"RPGS"
+              B   format version (1)
+              B   flags (bit 0: incremental)
+              I   sequence number
+              I   sequence number of the snapshot this one builds on, 0 if full
+              d   creation time (Unix seconds)
+    body      zlib stream of sections, each a kind byte followed by:
+              META     I length + JSON: world parameters, terrain palette,
+                       RNG state
+              TABLE    H length + table name, H column count, then per
+                       column H length + name and a type code (``_CODES``);
+                       the pages that follow belong to this table
+              PAGE     I length + payload: q page number, I row count, then
+                       per column a null flag byte (plus a null bitmask if
+                       set) and the values: int64, float64, uint8, or uint32
+                       lengths followed by the UTF‑8/raw bytes
+              PALETTE  H length + a terrain name appended to the palette
+              CHUNK    I length + payload: i cx, i cy, H w, H h, B flags,
+                       w*h palette indices (x‑major), the discovered bitmask
+                       (least significant bit first), then the location
+                       ids: q first id if they are consecutive (flag bit 0),
+                       otherwise w*h int64 with -1 for missing tiles. A
+                       chunk with w = 0 was deleted.
+              END
+    manifest  zlib: I JSON length + JSON (world, columns, counts), then
+              (i cx, i cy, I crc) per chunk and (q page, I crc) per page
+    footer    Q offset of the manifest, 4s magic
+"""
+
+import json
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import Table, insert, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from . import crud, models
+from .config import settings
+from .game_logic import world_generator
+from .game_logic.world_generator import CHUNK_SIZE
+from .instrumentation import timed
+
+MAGIC = b"RPGS"
+FORMAT_VERSION = 1
+FLAG_INCREMENTAL = 1
+FLAG_CONSECUTIVE_IDS = 1
+SUFFIX = ".snap"
+PROFILE_NAME = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+PAGE_ROWS = 256  # ids per page, the unit of incremental saves
+EXPORT_ROWS = 8192  # rows fetched at a time while saving
+INSERT_ROWS = 2000  # rows per INSERT while loading
+READ_SIZE = 1 << 16
+COMPRESSION_LEVEL = 6
+DEFAULT_MAX_CHAIN = 16
+
+END, META, TABLE, PAGE, PALETTE, CHUNK = range(6)
+
+_HEADER = struct.Struct("<4sBBIId")
+_FOOTER = struct.Struct("<Q4s")
+_PAGE = struct.Struct("<qI")
+_CHUNK = struct.Struct("<iiHHB")
+_MANIFEST_CHUNK = np.dtype([("cx", "<i4"), ("cy", "<i4"), ("crc", "<u4")])
+_MANIFEST_PAGE = np.dtype([("page", "<i8"), ("crc", "<u4")])
+
+# Type code of each column's Python type, and how fixed-width codes are stored
+_CODES = {int: "i", float: "f", bool: "b", str: "s", bytes: "y"}
+_DTYPES = {"i": "<i8", "f": "<f8", "b": "u1"}
+_ZERO = {"i": 0, "f": 0.0, "b": False, "s": "", "y": b""}
+
+Locations: Table = models.Location.__table__
+ChunkKey = Tuple[int, int]
+
+
+def _tables() -> List[Table]:
+    """Tables in dependency order, parents first."""
+    return list(models.Base.metadata.sorted_tables)
+
+
+def _codes(table: Table) -> List[str]:
+    return [_CODES[column.type.python_type] for column in table.columns]
+
+
+def _string(value: str) -> bytes:
+    data = value.encode()
+    return struct.pack("<H", len(data)) + data
+
+
+# -- manifest ------------------------------------------------------------------
+
+
+@dataclass
+class Manifest:
+    """CRCs of every page and chunk of the state a snapshot leaves behind."""
+
+    world: Optional[list] = None  # [seed, size, chunk_size]
+    columns: Dict[str, List[str]] = field(default_factory=dict)
+    chunks: Dict[ChunkKey, int] = field(default_factory=dict)
+    pages: Dict[str, Dict[int, int]] = field(default_factory=dict)
+
+    def encode(self) -> bytes:
+        tables = sorted(self.pages)
+        head = json.dumps(
+            {
+                "world": self.world,
+                "columns": self.columns,
+                "chunks": len(self.chunks),
+                "pages": {name: len(self.pages[name]) for name in tables},
+            }
+        ).encode()
+        chunks = np.array(
+            [(cx, cy, crc) for (cx, cy), crc in sorted(self.chunks.items())], dtype=_MANIFEST_CHUNK
+        )
+        parts = [struct.pack("<I", len(head)), head, chunks.tobytes()]
+        for name in tables:
+            parts.append(np.array(sorted(self.pages[name].items()), dtype=_MANIFEST_PAGE).tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def decode(cls, data: bytes) -> "Manifest":
+        (length,) = struct.unpack_from("<I", data)
+        head = json.loads(data[4 : 4 + length])
+        offset = 4 + length
+        chunks = np.frombuffer(data, _MANIFEST_CHUNK, head["chunks"], offset)
+        offset += chunks.nbytes
+        pages = {}
+        for name, count in head["pages"].items():
+            array = np.frombuffer(data, _MANIFEST_PAGE, count, offset)
+            offset += array.nbytes
+            pages[name] = dict(zip(array["page"].tolist(), array["crc"].tolist()))
+        return cls(
+            head["world"],
+            head["columns"],
+            {(cx, cy): crc for cx, cy, crc in chunks.tolist()},
+            pages,
+        )
+
+
+# -- pages ---------------------------------------------------------------------
+
+
+def encode_page(page: int, rows: List[tuple], codes: List[str]) -> bytes:
+    """Encode rows column by column (see the module docstring)."""
+    parts = [_PAGE.pack(page, len(rows))]
+    for i, code in enumerate(codes):
+        values = [row[i] for row in rows]
+        nulls = [value is None for value in values]
+        if any(nulls):
+            parts.append(b"\x01" + np.packbits(nulls, bitorder="little").tobytes())
+            values = [_ZERO[code] if value is None else value for value in values]
+        else:
+            parts.append(b"\x00")
+        if code == "s" or code == "y":
+            data = [value.encode() for value in values] if code == "s" else [bytes(v) for v in values]
+            parts.append(np.array([len(d) for d in data], "<u4").tobytes())
+            parts.append(b"".join(data))
+        else:
+            parts.append(np.array(values, _DTYPES[code]).tobytes())
+    return b"".join(parts)
+
+
+def decode_page(data: bytes, codes: List[str]) -> Tuple[int, List[tuple]]:
+    page, n = _PAGE.unpack_from(data)
+    if n == 0:
+        return page, []
+    offset = _PAGE.size
+    columns = []
+    for code in codes:
+        nulls = None
+        if data[offset]:
+            size = (n + 7) // 8
+            bits = np.frombuffer(data, np.uint8, size, offset + 1)
+            nulls = np.unpackbits(bits, count=n, bitorder="little").astype(bool).tolist()
+            offset += size
+        offset += 1
+        if code == "s" or code == "y":
+            lengths = np.frombuffer(data, "<u4", n, offset).tolist()
+            offset += 4 * n
+            values = []
+            for length in lengths:
+                value = data[offset : offset + length]
+                values.append(value.decode() if code == "s" else value)
+                offset += length
+        else:
+            array = np.frombuffer(data, _DTYPES[code], n, offset)
+            offset += array.nbytes
+            values = array.astype(bool).tolist() if code == "b" else array.tolist()
+        if nulls is not None:
+            values = [None if null else value for value, null in zip(values, nulls)]
+        columns.append(values)
+    return page, list(zip(*columns))
+
+
+def _export_pages(conn: Connection, table: Table, codes: List[str]) -> Iterator[Tuple[int, bytes]]:
+    """Yield ``(page, payload)`` for the rows of ``table`` in id order."""
+    pk = list(table.primary_key.columns)
+    paged = len(pk) == 1 and pk[0].type.python_type is int
+    key = list(table.columns).index(pk[0]) if paged else None
+    stmt = select(table).order_by(*pk).execution_options(yield_per=EXPORT_ROWS)
+    page, rows = None, []
+    for row in conn.execute(stmt):
+        row_page = row[key] // PAGE_ROWS if paged else 0
+        if row_page != page and rows:
+            yield page, encode_page(page, rows, codes)
+            rows = []
+        page = row_page
+        rows.append(tuple(row))
+    if rows:
+        yield page, encode_page(page, rows, codes)
+
+
+# -- chunks ----------------------------------------------------------------------
+
+
+class _Tiles:
+    """Locations of one chunk collected while exporting."""
+
+    def __init__(self, cx: int, cy: int, chunk_size: int, size: Optional[int]):
+        self.cx, self.cy = cx, cy
+        self.x0, self.y0 = cx * chunk_size, cy * chunk_size
+        # Tiles past the edge of the map are not expected
+        self.w = chunk_size if size is None else max(0, min(chunk_size, size - self.x0))
+        self.h = chunk_size if size is None else max(0, min(chunk_size, size - self.y0))
+        self.expected = self.w * self.h or chunk_size * chunk_size
+        self.terrain = np.zeros((chunk_size, chunk_size), np.uint8)
+        self.discovered = np.zeros((chunk_size, chunk_size), bool)
+        self.ids = np.full((chunk_size, chunk_size), -1, np.int64)
+        self.filled = 0
+
+    def encode(self) -> bytes:
+        xs, ys = np.nonzero(self.ids >= 0)
+        w = max(self.w, int(xs.max()) + 1) if len(xs) else self.w
+        h = max(self.h, int(ys.max()) + 1) if len(ys) else self.h
+        ids = self.ids[:w, :h].ravel()
+        first = int(ids[0]) if len(ids) else 0
+        consecutive = bool(len(ids)) and first >= 0 and bool(
+            (ids == first + np.arange(len(ids))).all()
+        )
+        parts = [
+            _CHUNK.pack(self.cx, self.cy, w, h, FLAG_CONSECUTIVE_IDS if consecutive else 0),
+            self.terrain[:w, :h].tobytes(),
+            np.packbits(self.discovered[:w, :h].ravel(), bitorder="little").tobytes(),
+            struct.pack("<q", first) if consecutive else ids.astype("<i8").tobytes(),
+        ]
+        return b"".join(parts)
+
+
+def decode_chunk(data: bytes) -> Tuple[ChunkKey, Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]]:
+    """Return the chunk's key and its ``(terrain, discovered, ids)`` arrays,
+    indexed ``[x - x0, y - y0]``, or ``None`` if the chunk was deleted.
+    """
+    cx, cy, w, h, flags = _CHUNK.unpack_from(data)
+    if w == 0:
+        return (cx, cy), None
+    n = w * h
+    offset = _CHUNK.size
+    terrain = np.frombuffer(data, np.uint8, n, offset).reshape(w, h)
+    offset += n
+    size = (n + 7) // 8
+    bits = np.frombuffer(data, np.uint8, size, offset)
+    discovered = np.unpackbits(bits, count=n, bitorder="little").astype(bool).reshape(w, h)
+    offset += size
+    if flags & FLAG_CONSECUTIVE_IDS:
+        (first,) = struct.unpack_from("<q", data, offset)
+        ids = np.arange(first, first + n, dtype=np.int64)
+    else:
+        ids = np.frombuffer(data, "<i8", n, offset)
+    return (cx, cy), (terrain, discovered, ids.reshape(w, h))
+
+
+def _export_chunks(
+    conn: Connection, world: Optional[list], palette: Dict[str, int], new_name: Callable[[str], None]
+) -> Iterator[Tuple[ChunkKey, bytes]]:
+    """Yield ``(key, payload)`` for every chunk with locations.
+
+    Locations are read in id order. A materialised chunk's locations were
+    inserted together, so chunks complete one after another and only a few
+    are held in memory at a time.
+    """
+    size, chunk_size = (world[1], world[2]) if world else (None, CHUNK_SIZE)
+    pending: Dict[ChunkKey, _Tiles] = {}
+
+    def index(name: str) -> int:
+        i = palette.get(name)
+        if i is None:
+            if len(palette) > 255:
+                raise ValueError("Snapshots support at most 256 terrain types")
+            i = palette[name] = len(palette)
+            new_name(name)
+        return i
+
+    L = Locations.c
+    stmt = (
+        select(L.id, L.x, L.y, L.terrain, L.discovered)
+        .order_by(L.id)
+        .execution_options(yield_per=EXPORT_ROWS)
+    )
+    for partition in conn.execute(stmt).partitions():
+        ids, xs, ys, names, seen = (np.array(column) for column in zip(*partition))
+        xs, ys = xs.astype(np.int64), ys.astype(np.int64)
+        terrain = np.array([index(name) for name in names.tolist()], np.uint8)
+        seen = np.array([bool(s) for s in seen.tolist()])
+        cxs, cys = xs // chunk_size, ys // chunk_size
+        # One int per chunk; np.unique on rows of a 2‑D array is much slower
+        keys, inverse = np.unique((cxs << 32) | (cys & 0xFFFFFFFF), return_inverse=True)
+        for i, key in enumerate(keys.tolist()):
+            cx, cy = key >> 32, key & 0xFFFFFFFF
+            tiles = pending.get((cx, cy))
+            if tiles is None:
+                tiles = pending[cx, cy] = _Tiles(cx, cy, chunk_size, size)
+            mask = inverse == i
+            lx, ly = xs[mask] - tiles.x0, ys[mask] - tiles.y0
+            tiles.ids[lx, ly] = ids[mask]
+            tiles.terrain[lx, ly] = terrain[mask]
+            tiles.discovered[lx, ly] = seen[mask]
+            tiles.filled += int(mask.sum())
+            if tiles.filled >= tiles.expected:
+                yield (cx, cy), pending.pop((cx, cy)).encode()
+    for key in sorted(pending):
+        yield key, pending[key].encode()
+
+
+# -- files -----------------------------------------------------------------------
+
+
+class _Writer:
+    """Compressed section stream of a snapshot body."""
+
+    def __init__(self, f):
+        self._f = f
+        self._z = zlib.compressobj(COMPRESSION_LEVEL)
+
+    def write(self, *parts: bytes) -> None:
+        for part in parts:
+            self._f.write(self._z.compress(part))
+
+    def blob(self, kind: int, payload: bytes) -> None:
+        self.write(bytes((kind,)), struct.pack("<I", len(payload)), payload)
+
+    def table(self, name: str, columns: List[str], codes: List[str]) -> None:
+        self.write(bytes((TABLE,)), _string(name), struct.pack("<H", len(columns)))
+        for column, code in zip(columns, codes):
+            self.write(_string(column), code.encode())
+
+    def end(self) -> None:
+        self.write(bytes((END,)))
+        self._f.write(self._z.flush())
+
+
+class _Reader:
+    """Reads the decompressed section stream of a snapshot body."""
+
+    def __init__(self, f, length: int):
+        self._f = f
+        self._remaining = length
+        self._z = zlib.decompressobj()
+        self._buffer = bytearray()
+        self._pos = 0
+
+    def read(self, n: int) -> bytes:
+        while len(self._buffer) - self._pos < n:
+            data = self._f.read(min(READ_SIZE, self._remaining))
+            if not data:
+                raise ValueError("Truncated snapshot")
+            self._remaining -= len(data)
+            if self._pos > READ_SIZE:
+                del self._buffer[: self._pos]
+                self._pos = 0
+            self._buffer += self._z.decompress(data)
+        data = bytes(self._buffer[self._pos : self._pos + n])
+        self._pos += n
+        return data
+
+    def byte(self) -> int:
+        return self.read(1)[0]
+
+    def string(self) -> str:
+        (length,) = struct.unpack("<H", self.read(2))
+        return self.read(length).decode()
+
+    def blob(self) -> bytes:
+        (length,) = struct.unpack("<I", self.read(4))
+        return self.read(length)
+
+
+@dataclass
+class SnapshotInfo:
+    """Header of a snapshot file."""
+
+    path: str
+    seq: int
+    base_seq: int
+    incremental: bool
+    created: float
+
+
+def read_header(path: str) -> SnapshotInfo:
+    with open(path, "rb") as f:
+        data = f.read(_HEADER.size)
+    if len(data) < _HEADER.size or data[:4] != MAGIC:
+        raise ValueError(f"{os.path.basename(path)} is not a snapshot")
+    _, version, flags, seq, base_seq, created = _HEADER.unpack(data)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format version {version}")
+    return SnapshotInfo(path, seq, base_seq, bool(flags & FLAG_INCREMENTAL), created)
+
+
+def _manifest_offset(f) -> int:
+    f.seek(-_FOOTER.size, os.SEEK_END)
+    offset, magic = _FOOTER.unpack(f.read(_FOOTER.size))
+    if magic != MAGIC:
+        raise ValueError("Truncated snapshot")
+    return offset
+
+
+def read_manifest(path: str) -> Manifest:
+    read_header(path)
+    with open(path, "rb") as f:
+        offset = _manifest_offset(f)
+        f.seek(offset)
+        data = f.read(os.fstat(f.fileno()).st_size - _FOOTER.size - offset)
+    return Manifest.decode(zlib.decompress(data))
+
+
+@contextmanager
+def _read_transaction(engine: Engine) -> Iterator[Connection]:
+    """Connection whose queries all see the same state of the database."""
+    with engine.connect() as conn:
+        if conn.dialect.name == "sqlite":
+            # pysqlite only opens a transaction before writes; without an
+            # explicit BEGIN every SELECT would see a newer state
+            conn.exec_driver_sql("BEGIN")
+        else:
+            conn = conn.execution_options(isolation_level="REPEATABLE READ")
+        try:
+            yield conn
+        finally:
+            conn.rollback()
+
+
+# -- save and load ---------------------------------------------------------------
+
+
+@timed("snapshots.write")
+def write_snapshot(
+    engine: Engine,
+    path: str,
+    rng_state: Optional[dict],
+    base: Optional[Manifest] = None,
+    seq: int = 1,
+    base_seq: int = 0,
+) -> dict:
+    """Export the database to ``path``.
+
+    With a ``base`` manifest only the pages and chunks that differ from it
+    are written. If the world or the schema changed since, a full snapshot
+    is written instead. Returns what was written.
+    """
+    tables = _tables()
+    with _read_transaction(engine) as conn:
+        W = models.World.__table__.c
+        row = conn.execute(select(W.seed, W.size, W.chunk_size).order_by(W.id).limit(1)).first()
+        world = list(row) if row is not None else None
+        columns = {t.name: [c.name for c in t.columns] for t in tables if t is not Locations}
+        if base is not None and (base.world != world or base.columns != columns):
+            base = None
+        manifest = Manifest(world, columns)
+        written = {"chunks": 0, "pages": 0}
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            flags = FLAG_INCREMENTAL if base is not None else 0
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, flags, seq, base_seq if base else 0, time.time()))
+            out = _Writer(f)
+            meta = {"world": world, "terrains": list(world_generator.TERRAINS), "rng": rng_state}
+            out.blob(META, json.dumps(meta).encode())
+            for table in tables:
+                if table is Locations:
+                    palette = {name: i for i, name in enumerate(world_generator.TERRAINS)}
+                    new_name = lambda name: out.write(bytes((PALETTE,)), _string(name))
+                    previous = base.chunks if base is not None else {}
+                    for key, payload in _export_chunks(conn, world, palette, new_name):
+                        crc = manifest.chunks[key] = zlib.crc32(payload)
+                        if previous.get(key) != crc:
+                            out.blob(CHUNK, payload)
+                            written["chunks"] += 1
+                    for cx, cy in previous.keys() - manifest.chunks.keys():
+                        out.blob(CHUNK, _CHUNK.pack(cx, cy, 0, 0, 0))
+                        written["chunks"] += 1
+                    continue
+                codes = _codes(table)
+                out.table(table.name, columns[table.name], codes)
+                pages = manifest.pages[table.name] = {}
+                previous = base.pages.get(table.name, {}) if base is not None else {}
+                for page, payload in _export_pages(conn, table, codes):
+                    crc = pages[page] = zlib.crc32(payload)
+                    if previous.get(page) != crc:
+                        out.blob(PAGE, payload)
+                        written["pages"] += 1
+                for page in sorted(previous.keys() - pages.keys()):
+                    out.blob(PAGE, _PAGE.pack(page, 0))
+                    written["pages"] += 1
+            out.end()
+            offset = f.tell()
+            f.write(zlib.compress(manifest.encode(), COMPRESSION_LEVEL))
+            f.write(_FOOTER.pack(offset, MAGIC))
+            size = f.tell()
+    os.replace(tmp, path)
+    return {"incremental": base is not None, "bytes": size, **written}
+
+
+class _State:
+    """Game state assembled from a chain of snapshots."""
+
+    def __init__(self):
+        self.meta: dict = {}
+        self.columns: Dict[str, Tuple[List[str], List[str]]] = {}
+        self.pages: Dict[str, Dict[int, List[tuple]]] = {}
+        # chunk -> (palette, terrain, discovered, ids)
+        self.chunks: Dict[ChunkKey, tuple] = {}
+
+    def apply(self, path: str) -> None:
+        """Apply one snapshot on top of the state so far."""
+        read_header(path)
+        with open(path, "rb") as f:
+            end = _manifest_offset(f)
+            f.seek(_HEADER.size)
+            reader = _Reader(f, end - _HEADER.size)
+            palette: List[str] = []
+            table = None
+            while True:
+                kind = reader.byte()
+                if kind == END:
+                    break
+                if kind == META:
+                    self.meta = json.loads(reader.blob())
+                    palette = list(self.meta["terrains"])
+                elif kind == PALETTE:
+                    palette.append(reader.string())
+                elif kind == TABLE:
+                    table = reader.string()
+                    (count,) = struct.unpack("<H", reader.read(2))
+                    names, codes = [], []
+                    for _ in range(count):
+                        names.append(reader.string())
+                        codes.append(reader.read(1).decode())
+                    self.columns[table] = (names, codes)
+                    self.pages.setdefault(table, {})
+                elif kind == PAGE:
+                    page, rows = decode_page(reader.blob(), self.columns[table][1])
+                    if rows:
+                        self.pages[table][page] = rows
+                    else:
+                        self.pages[table].pop(page, None)
+                elif kind == CHUNK:
+                    key, arrays = decode_chunk(reader.blob())
+                    if arrays is None:
+                        self.chunks.pop(key, None)
+                    else:
+                        self.chunks[key] = (np.array(palette, dtype=object),) + arrays
+                else:
+                    raise ValueError(f"Unknown snapshot section {kind}")
+
+    def location_rows(self) -> Iterator[List[dict]]:
+        chunk_size = self.meta["world"][2] if self.meta.get("world") else CHUNK_SIZE
+        batch: List[dict] = []
+        for (cx, cy), (palette, terrain, discovered, ids) in sorted(self.chunks.items()):
+            present = ids >= 0
+            xs, ys = np.nonzero(present)
+            batch.extend(
+                {"id": i, "x": x, "y": y, "terrain": t, "discovered": d}
+                for i, x, y, t, d in zip(
+                    ids[present].tolist(),
+                    (xs + cx * chunk_size).tolist(),
+                    (ys + cy * chunk_size).tolist(),
+                    palette[terrain[present]].tolist(),
+                    discovered[present].tolist(),
+                )
+            )
+            if len(batch) >= INSERT_ROWS:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def table_rows(self, table: Table) -> Iterator[List[dict]]:
+        if table.name not in self.columns:
+            return
+        names = self.columns[table.name][0]
+        # Columns added to the model since the save get their defaults
+        keep = [(i, name) for i, name in enumerate(names) if name in table.c]
+        batch: List[dict] = []
+        for page in sorted(self.pages[table.name]):
+            batch.extend({name: row[i] for i, name in keep} for row in self.pages[table.name][page])
+            if len(batch) >= INSERT_ROWS:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def _reset_sequences(db: Session, tables: List[Table]) -> None:
+    # Rows were inserted with explicit ids; PostgreSQL's sequences must
+    # continue after them
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for table in tables:
+        if "id" in table.c:
+            db.execute(
+                text(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                    f"COALESCE((SELECT MAX(id) FROM {table.name}), 0) + 1, false)"
+                )
+            )
+
+
+@timed("snapshots.load")
+def load_snapshots(engine: Engine, paths: List[str]) -> dict:
+    """Replace the contents of the database with the state saved in
+    ``paths``, a full snapshot followed by incremental ones. Returns the
+    snapshot metadata, including the RNG state to restore.
+    """
+    state = _State()
+    for path in paths:
+        state.apply(path)
+    tables = _tables()
+    with engine.connect() as conn:
+        db = Session(bind=conn)
+        for table in reversed(tables):
+            db.execute(table.delete())
+        for table in tables:
+            if table is Locations:
+                for batch in state.location_rows():
+                    crud.executemany(db, insert(Locations), batch)
+            else:
+                for batch in state.table_rows(table):
+                    db.execute(insert(table), batch)
+        _reset_sequences(db, tables)
+        db.commit()
+        db.close()
+    return state.meta
+
+
+class SnapshotStore:
+    """Snapshot files of the save profiles kept under ``root``."""
+
+    def __init__(self, root: str, max_chain: int = DEFAULT_MAX_CHAIN):
+        self.root = root
+        self.max_chain = max_chain
+        self._lock = threading.Lock()
+
+    def _directory(self, profile: str) -> str:
+        if not PROFILE_NAME.match(profile):
+            raise ValueError("Profile names are 1-64 letters, digits, '-' or '_'")
+        return os.path.join(self.root, profile)
+
+    def snapshots(self, profile: str) -> List[SnapshotInfo]:
+        """Every snapshot of ``profile``, oldest first."""
+        directory = self._directory(profile)
+        if not os.path.isdir(directory):
+            return []
+        names = sorted(n for n in os.listdir(directory) if n.endswith(SUFFIX))
+        return [read_header(os.path.join(directory, name)) for name in names]
+
+    def chain(self, profile: str) -> List[SnapshotInfo]:
+        """The latest full snapshot of ``profile`` and the incremental ones
+        built on it.
+        """
+        chain: List[SnapshotInfo] = []
+        for info in reversed(self.snapshots(profile)):
+            if chain and chain[0].base_seq != info.seq:
+                raise ValueError(f"Snapshot {chain[0].seq} of {profile!r} is missing its base")
+            chain.insert(0, info)
+            if not info.incremental:
+                return chain
+        if chain:
+            raise ValueError(f"Profile {profile!r} has no full snapshot")
+        return chain
+
+    def save(self, engine: Engine, profile: str, rng_state: Optional[dict], full: bool = False) -> dict:
+        """Write the next snapshot of ``profile``: incremental on top of the
+        previous one unless ``full`` is set or the chain is ``max_chain``
+        long.
+        """
+        directory = self._directory(profile)
+        with self._lock:
+            os.makedirs(directory, exist_ok=True)
+            existing = self.snapshots(profile)
+            seq = existing[-1].seq + 1 if existing else 1
+            base, base_seq = None, 0
+            if not full and existing:
+                chain = self.chain(profile)
+                if len(chain) - 1 < self.max_chain:
+                    base, base_seq = read_manifest(chain[-1].path), chain[-1].seq
+            path = os.path.join(directory, f"{seq:06d}{SUFFIX}")
+            start = time.perf_counter()
+            result = write_snapshot(engine, path, rng_state, base, seq, base_seq)
+            if not result["incremental"]:
+                for info in existing:
+                    os.remove(info.path)
+            return {
+                "profile": profile,
+                "seq": seq,
+                **result,
+                "seconds": round(time.perf_counter() - start, 4),
+            }
+
+    def load(self, engine: Engine, profile: str) -> dict:
+        """Restore the latest snapshot of ``profile`` into the database.
+        Raises ``FileNotFoundError`` if the profile has none.
+        """
+        with self._lock:
+            chain = self.chain(profile)
+            if not chain:
+                raise FileNotFoundError(f"No snapshots saved for profile {profile!r}")
+            start = time.perf_counter()
+            meta = load_snapshots(engine, [info.path for info in chain])
+            return {
+                "profile": profile,
+                "seq": chain[-1].seq,
+                "snapshots": len(chain),
+                "rng": meta.get("rng"),
+                "seconds": round(time.perf_counter() - start, 4),
+            }
+
+
+# Save profiles of the API process.
+snapshots = SnapshotStore(settings.save_dir, settings.snapshot_max_chain)
@@ -0,0 +1,209 @@
+"""In‑memory spatial index of NPC and player positions.
+
+Positions are hashed into a uniform grid of square cells. Each cell holds the
+ids of the entities inside it, and a per‑tile map answers the most common
+question ("who is standing here?") in O(1). Radius and rectangle queries only
+visit the cells that overlap the query area, so their cost depends on the
+number of nearby entities rather than on the total population.
+
+The index mirrors the ``x``/``y`` columns of the ``npcs`` and ``players``
+tables. Code that moves an entity must update the index as well (see
+``move``) once the move is committed. ``move_player_on_commit`` does so for
+a player moved inside a unit of work, and until then ``players_at`` on that
+session already sees the player at the new position. ``reconcile`` rebuilds
+the index from the database on startup and after a world is regenerated.
+The index lives in process memory, so it assumes a single API process owns
+the database.
+"""
+
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from . import models, unit_of_work
+from .entity_cache import entity_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CELL_SIZE = 16
+# Key of the players moved but not yet committed in ``unit_of_work.state``
+_PLAYER_MOVES = "player_moves"
+
+
+class SpatialIndex:
+    """Uniform grid hash mapping entity ids to tile positions."""
+
+    def __init__(self, cell_size: int = DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self._positions: Dict[int, Tuple[int, int]] = {}
+        self._tiles: Dict[Tuple[int, int], Set[int]] = defaultdict(set)
+        self._cells: Dict[Tuple[int, int], Set[int]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, entity_id: int) -> bool:
+        return entity_id in self._positions
+
+    def _cell(self, x: int, y: int) -> Tuple[int, int]:
+        return x // self.cell_size, y // self.cell_size
+
+    def _discard(self, entity_id: int) -> None:
+        pos = self._positions.pop(entity_id, None)
+        if pos is None:
+            return
+        tile = self._tiles[pos]
+        tile.discard(entity_id)
+        if not tile:
+            del self._tiles[pos]
+        cell_key = self._cell(*pos)
+        cell = self._cells[cell_key]
+        cell.discard(entity_id)
+        if not cell:
+            del self._cells[cell_key]
+
+    def _add(self, entity_id: int, x: int, y: int) -> None:
+        self._positions[entity_id] = (x, y)
+        self._tiles[(x, y)].add(entity_id)
+        self._cells[self._cell(x, y)].add(entity_id)
+
+    def insert(self, entity_id: int, x: int, y: int) -> None:
+        """Add an entity, or move it if it is already indexed."""
+        self.move(entity_id, x, y)
+
+    def move(self, entity_id: int, x: int, y: int) -> None:
+        """Record that ``entity_id`` now stands at ``(x, y)``."""
+        with self._lock:
+            if self._positions.get(entity_id) == (x, y):
+                return
+            self._discard(entity_id)
+            self._add(entity_id, x, y)
+
+    def move_many(self, moves: Iterable[Tuple[int, int, int]]) -> None:
+        """Apply a batch of ``(id, x, y)`` moves under a single lock."""
+        with self._lock:
+            for entity_id, x, y in moves:
+                if self._positions.get(entity_id) != (x, y):
+                    self._discard(entity_id)
+                    self._add(entity_id, x, y)
+
+    def remove(self, entity_id: int) -> None:
+        with self._lock:
+            self._discard(entity_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._positions.clear()
+            self._tiles.clear()
+            self._cells.clear()
+
+    def position(self, entity_id: int):
+        return self._positions.get(entity_id)
+
+    def at(self, x: int, y: int) -> List[int]:
+        """Return the ids of entities standing on tile ``(x, y)``."""
+        with self._lock:
+            ids = self._tiles.get((x, y))
+            return sorted(ids) if ids else []
+
+    def in_rect(self, x0: int, y0: int, x1: int, y1: int) -> List[int]:
+        """Return ids of entities with ``x0 <= x <= x1`` and ``y0 <= y <= y1``."""
+        cx0, cy0 = self._cell(x0, y0)
+        cx1, cy1 = self._cell(x1, y1)
+        found = []
+        with self._lock:
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    for entity_id in self._cells.get((cx, cy), ()):
+                        x, y = self._positions[entity_id]
+                        if x0 <= x <= x1 and y0 <= y <= y1:
+                            found.append(entity_id)
+        found.sort()
+        return found
+
+    def within_radius(self, x: int, y: int, radius: float) -> List[int]:
+        """Return ids of entities within Euclidean distance ``radius`` of ``(x, y)``."""
+        r = int(radius)
+        r2 = radius * radius
+        found = []
+        for entity_id in self.in_rect(x - r, y - r, x + r, y + r):
+            ex, ey = self._positions[entity_id]
+            if (ex - x) ** 2 + (ey - y) ** 2 <= r2:
+                found.append(entity_id)
+        return found
+
+    def load(self, rows: Iterable[Tuple[int, int, int]]) -> None:
+        """Replace the index contents with ``(id, x, y)`` rows."""
+        with self._lock:
+            self._positions.clear()
+            self._tiles.clear()
+            self._cells.clear()
+            for entity_id, x, y in rows:
+                self._add(entity_id, x, y)
+
+    def reconcile(self, rows: Iterable[Tuple[int, int, int]]) -> int:
+        """Make the index match ``(id, x, y)`` rows and return the number of
+        entries that had to be added, moved or removed.
+        """
+        expected = {entity_id: (x, y) for entity_id, x, y in rows}
+        fixes = 0
+        with self._lock:
+            for entity_id in [e for e in self._positions if e not in expected]:
+                self._discard(entity_id)
+                fixes += 1
+            for entity_id, pos in expected.items():
+                if self._positions.get(entity_id) != pos:
+                    self._discard(entity_id)
+                    self._add(entity_id, *pos)
+                    fixes += 1
+        return fixes
+
+
+npc_index = SpatialIndex()
+player_index = SpatialIndex()
+
+
+def reconcile_with_db(db: Session) -> int:
+    """Check both indexes against the ``npcs`` and ``players`` tables and fix
+    any drift. Returns the total number of corrected entries.
+    """
+    fixes = npc_index.reconcile(db.query(models.NPC.id, models.NPC.x, models.NPC.y))
+    fixes += player_index.reconcile(
+        db.query(models.Player.id, models.Player.x, models.Player.y)
+    )
+    logger.info(
+        "Spatial index holds %d NPCs and %d players (%d corrections)",
+        len(npc_index),
+        len(player_index),
+        fixes,
+    )
+    return fixes
+
+
+def npcs_at(db: Session, x: int, y: int) -> List[models.NPC]:
+    """Load the NPCs standing on ``(x, y)`` using the index to find them."""
+    return entity_cache.get_many(db, models.NPC, sorted(npc_index.at(x, y)))
+
+
+def move_player_on_commit(db: Session, player_id: int, x: int, y: int) -> None:
+    """Move a player in ``player_index`` once ``db`` commits."""
+    moves = unit_of_work.state(db).setdefault(_PLAYER_MOVES, {})
+    moves[player_id] = (x, y)
+    unit_of_work.after_commit(db, player_index.move, player_id, x, y)
+
+
+def players_at(db: Session, x: int, y: int) -> List[models.Player]:
+    """Load the players standing on ``(x, y)`` using the index to find them,
+    counting the moves of ``move_player_on_commit`` still pending on ``db``.
+    """
+    ids = player_index.at(x, y)
+    moves = unit_of_work.state(db).get(_PLAYER_MOVES) if db is not None else None
+    if moves:
+        ids = sorted(
+            {i for i in ids if i not in moves} | {i for i, tile in moves.items() if tile == (x, y)}
+        )
+    return entity_cache.get_many(db, models.Player, ids)
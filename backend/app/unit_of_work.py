@@ -0,0 +1,89 @@
+"""Request‑scoped unit of work.
+
+Game logic commits as it goes: moving a player used to commit the new
+position, the discovered tile, the fog bitset and every NPC that wandered or
+attacked on the tile, one transaction each. An endpoint wrapped in
+``unit_of_work`` collects those writes instead. Inside it, ``commit`` only
+flushes, so later queries in the request see the changes, and the request
+commits once when the block ends. Side effects that must not be seen before
+the data is committed, such as realtime deltas, are queued with
+``after_commit`` and run after that commit. If the block raises, everything
+is rolled back and the queued callbacks are dropped. ``state`` holds what
+code needs to remember until then, such as moves not yet visible to the
+in‑memory indexes.
+
+Outside a unit of work ``commit`` commits and ``after_commit`` runs its
+callback at once, so background workers and scripts behave as before.
+"""
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, List, Tuple, Union
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+# Key of the pending callbacks in ``Session.info`` (shared with the
+# ``AsyncSession`` wrapping the session)
+_KEY = "unit_of_work"
+_STATE_KEY = "unit_of_work.state"
+
+
+def active(db: Union[Session, AsyncSession]) -> bool:
+    """Whether ``db`` is inside ``unit_of_work``."""
+    return _KEY in db.info
+
+
+def commit(db: Session) -> None:
+    """Commit ``db``, or only flush it inside a unit of work."""
+    if active(db):
+        db.flush()
+    else:
+        db.commit()
+
+
+async def commit_async(db: AsyncSession) -> None:
+    """``commit`` for an ``AsyncSession``."""
+    if active(db):
+        await db.flush()
+    else:
+        await db.commit()
+
+
+def after_commit(db: Union[Session, AsyncSession], fn: Callable, *args) -> None:
+    """Call ``fn(*args)`` once the unit of work ``db`` is in has committed,
+    or now outside one.
+    """
+    callbacks: List[Tuple[Callable, tuple]] = db.info.get(_KEY)
+    if callbacks is None:
+        fn(*args)
+    else:
+        callbacks.append((fn, args))
+
+
+def state(db: Union[Session, AsyncSession]) -> Dict:
+    """Scratch space of the unit of work ``db`` is in, dropped when it ends;
+    an empty dict outside one.
+    """
+    return db.info.get(_STATE_KEY, {})
+
+
+@asynccontextmanager
+async def unit_of_work(db: AsyncSession) -> AsyncIterator[AsyncSession]:
+    """Commit everything written to ``db`` in the block once, at its end."""
+    if active(db):
+        yield db  # joins the enclosing unit of work
+        return
+    callbacks: List[Tuple[Callable, tuple]] = []
+    db.info[_KEY] = callbacks
+    db.info[_STATE_KEY] = {}
+    try:
+        yield db
+        del db.info[_KEY], db.info[_STATE_KEY]
+        await db.commit()
+    except BaseException:
+        db.info.pop(_KEY, None)
+        db.info.pop(_STATE_KEY, None)
+        await db.rollback()
+        raise
+    for fn, args in callbacks:
+        fn(*args)
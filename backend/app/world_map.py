@@ -0,0 +1,278 @@
+"""Chunked, lazily materialised world map.
+
+The map is split into square chunks of ``CHUNK_SIZE`` tiles. A chunk's terrain
+is a pure function of ``(seed, chunk_x, chunk_y)`` (see
+``world_generator.generate_terrain``), so nothing needs to be written when a
+world is created: the first time a player or NPC enters a chunk its locations
+are generated and persisted, and a ``Chunk`` row records that this happened.
+
+Recently used chunks are kept in an in‑memory LRU together with their
+discovery state, so moving around a chunk that is already hot does not need to
+ask the database whether it exists or whether a tile was already discovered.
+
+Every discovery takes the next number of a map‑wide version counter and
+stamps it on the chunk, so clients can ask only for chunks that changed since
+the version they last saw (see ``map_codec.py``). Versions are only
+meaningful within one ``epoch``, which changes whenever the map is (re)loaded.
+"""
+
+import secrets
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models, crud, unit_of_work
+from .game_logic import world_generator
+from .game_logic.world_generator import CHUNK_SIZE
+from .game_logic.rng import GameRNG
+
+# Number of chunks kept in memory. 256 chunks of 16x16 tiles is ~64k tiles.
+DEFAULT_CACHE_CHUNKS = 256
+
+
+def chunk_coords(x: int, y: int, chunk_size: int = CHUNK_SIZE) -> Tuple[int, int]:
+    """Return the coordinates of the chunk containing tile ``(x, y)``."""
+    return x // chunk_size, y // chunk_size
+
+
+@dataclass
+class Chunk:
+    """In‑memory copy of a materialised chunk."""
+
+    cx: int
+    cy: int
+    x0: int
+    y0: int
+    terrain: np.ndarray  # uint8 indices into TERRAINS, indexed [x - x0, y - y0]
+    discovered: np.ndarray  # bool, same shape as terrain
+    version: int = 0  # map version of the last change
+
+    def contains(self, x: int, y: int) -> bool:
+        w, h = self.terrain.shape
+        return self.x0 <= x < self.x0 + w and self.y0 <= y < self.y0 + h
+
+
+class ChunkCache:
+    """Thread‑safe LRU of hot chunks keyed by ``(cx, cy)``."""
+
+    def __init__(self, capacity: int = DEFAULT_CACHE_CHUNKS):
+        self.capacity = capacity
+        self._chunks: "OrderedDict[Tuple[int, int], Chunk]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[int, int]) -> Optional[Chunk]:
+        with self._lock:
+            chunk = self._chunks.get(key)
+            if chunk is not None:
+                self._chunks.move_to_end(key)
+            return chunk
+
+    def put(self, chunk: Chunk) -> None:
+        with self._lock:
+            self._chunks[(chunk.cx, chunk.cy)] = chunk
+            self._chunks.move_to_end((chunk.cx, chunk.cy))
+            while len(self._chunks) > self.capacity:
+                self._chunks.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._chunks.clear()
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+
+class WorldMap:
+    """Parameters of the current world plus the hot chunk cache."""
+
+    def __init__(self, cache_chunks: int = DEFAULT_CACHE_CHUNKS):
+        self.seed: Optional[int] = None
+        self.size: int = world_generator.WORLD_SIZE
+        self.chunk_size: int = CHUNK_SIZE
+        self.cache = ChunkCache(cache_chunks)
+        # Coordinates of every chunk known to be persisted. Much smaller than
+        # the chunks themselves, so it is not bounded like the LRU.
+        self.materialised = set()
+        self.epoch = secrets.token_hex(4)
+        self.version = 0
+        self._version_lock = threading.Lock()
+
+    def next_version(self) -> int:
+        """Advance the map version and return it."""
+        with self._version_lock:
+            self.version += 1
+            return self.version
+
+    def version_token(self) -> str:
+        """Opaque ``"<epoch>.<version>"`` string handed to clients."""
+        return f"{self.epoch}.{self.version}"
+
+    def parse_version_token(self, token: Optional[str]) -> Optional[int]:
+        """Return the version in ``token``, or ``None`` if it is missing,
+        malformed or from another epoch (the client must then reload).
+        """
+        epoch, _, version = (token or "").partition(".")
+        if epoch != self.epoch or not version.isdigit():
+            return None
+        return int(version)
+
+    def load(self, db: Session) -> None:
+        """Read the world parameters from the database and drop cached chunks."""
+        world = db.query(models.World).first()
+        if world is not None:
+            self.seed, self.size, self.chunk_size = world.seed, world.size, world.chunk_size
+        else:
+            self.seed, self.size, self.chunk_size = None, world_generator.WORLD_SIZE, CHUNK_SIZE
+        self.cache.clear()
+        self.materialised = set()
+        self.epoch = secrets.token_hex(4)
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self.size and 0 <= y < self.size
+
+    def clamp(self, x: int, y: int) -> Tuple[int, int]:
+        return max(0, min(self.size - 1, x)), max(0, min(self.size - 1, y))
+
+    def chunk_bounds(self, cx: int, cy: int) -> Tuple[int, int, int, int]:
+        """Return ``(x0, y0, width, height)`` of a chunk clipped to the map."""
+        x0, y0 = cx * self.chunk_size, cy * self.chunk_size
+        return (
+            x0,
+            y0,
+            min(self.chunk_size, self.size - x0),
+            min(self.chunk_size, self.size - y0),
+        )
+
+    def ensure_chunk(self, db: Session, cx: int, cy: int) -> Chunk:
+        """Return chunk ``(cx, cy)``, generating and persisting it if needed."""
+        chunk = self.cache.get((cx, cy))
+        if chunk is not None:
+            return chunk
+        x0, y0, w, h = self.chunk_bounds(cx, cy)
+        exists = (
+            db.query(models.Chunk.id)
+            .filter(models.Chunk.cx == cx, models.Chunk.cy == cy)
+            .first()
+        )
+        if exists is None and self.seed is not None:
+            self._materialise(db, cx, cy, x0, y0, w, h)
+        chunk = self._load_chunk(db, cx, cy, x0, y0, w, h)
+        self.cache.put(chunk)
+        self.materialised.add((cx, cy))
+        return chunk
+
+    def ensure_tile(self, db: Session, x: int, y: int) -> Optional[Chunk]:
+        """Materialise the chunk containing ``(x, y)``; ``None`` if off the map."""
+        if not self.in_bounds(x, y):
+            return None
+        return self.ensure_chunk(db, *chunk_coords(x, y, self.chunk_size))
+
+    def ensure_materialised(self, db: Session, x: int, y: int) -> None:
+        """Like ``ensure_tile`` but skips loading chunks already known to be
+        persisted. Used on hot paths that only need the tiles to exist.
+        """
+        if not self.in_bounds(x, y):
+            return
+        key = chunk_coords(x, y, self.chunk_size)
+        if key not in self.materialised:
+            self.ensure_chunk(db, *key)
+
+    def terrain_at(self, db: Session, x: int, y: int) -> Optional[str]:
+        """Return the terrain name of ``(x, y)``; ``None`` if off the map."""
+        chunk = self.ensure_tile(db, x, y)
+        if chunk is None:
+            return None
+        return world_generator.TERRAINS[chunk.terrain[x - chunk.x0, y - chunk.y0]]
+
+    def discover(self, db: Session, x: int, y: int) -> bool:
+        """Mark ``(x, y)`` as discovered. Returns ``True`` if it was new."""
+        chunk = self.ensure_tile(db, x, y)
+        if chunk is None:
+            return False
+        lx, ly = x - chunk.x0, y - chunk.y0
+        if chunk.discovered[lx, ly]:
+            return False
+        crud.set_location_discovered(db, x, y)
+        # Like the fog, the cached chunk changes only once this is committed
+        unit_of_work.after_commit(db, self._set_discovered, chunk, lx, ly)
+        return True
+
+    def _set_discovered(self, chunk: Chunk, lx: int, ly: int) -> None:
+        chunk.discovered[lx, ly] = True
+        chunk.version = self.next_version()
+
+    def _materialise(self, db: Session, cx, cy, x0, y0, w, h) -> None:
+        # The Chunk row is flushed first so that a concurrent request
+        # materialising the same chunk fails on the unique constraint instead
+        # of inserting duplicate locations. The savepoint limits the rollback
+        # to the chunk when this runs inside a request's unit of work.
+        try:
+            with db.begin_nested():
+                db.add(models.Chunk(cx=cx, cy=cy))
+                db.flush()
+                db.execute(
+                    insert(models.Location.__table__),
+                    world_generator.block_rows(self.seed, x0, y0, w, h),
+                )
+        except IntegrityError:
+            pass  # materialised by another request meanwhile
+        unit_of_work.commit(db)
+
+    def _load_chunk(self, db: Session, cx, cy, x0, y0, w, h) -> Chunk:
+        terrain = np.zeros((w, h), dtype=np.uint8)
+        discovered = np.zeros((w, h), dtype=bool)
+        index = {name: i for i, name in enumerate(world_generator.TERRAINS)}
+        rows = (
+            db.query(models.Location.x, models.Location.y, models.Location.terrain, models.Location.discovered)
+            .filter(
+                models.Location.x >= x0,
+                models.Location.x < x0 + w,
+                models.Location.y >= y0,
+                models.Location.y < y0 + h,
+            )
+            .all()
+        )
+        for x, y, name, seen in rows:
+            terrain[x - x0, y - y0] = index.get(name, 0)
+            discovered[x - x0, y - y0] = bool(seen)
+        # Whatever changed before the chunk was evicted is no newer than now
+        return Chunk(
+            cx=cx, cy=cy, x0=x0, y0=y0, terrain=terrain, discovered=discovered,
+            version=self.version,
+        )
+
+    def chunk_rect(self, cx: int, cy: int, radius: int = 0) -> Tuple[int, int, int, int]:
+        """Return the tile rectangle ``(x0, y0, x1, y1)`` (exclusive) covering
+        the chunks within ``radius`` of ``(cx, cy)``.
+        """
+        x0 = max(0, (cx - radius) * self.chunk_size)
+        y0 = max(0, (cy - radius) * self.chunk_size)
+        x1 = min(self.size, (cx + radius + 1) * self.chunk_size)
+        y1 = min(self.size, (cy + radius + 1) * self.chunk_size)
+        return x0, y0, x1, y1
+
+
+def init_world(db: Session, world_map: "WorldMap", seed: int = None, size: int = None) -> int:
+    """Start a new lazily generated world and return its seed.
+
+    Only the world parameters and the starting NPCs are written; the chunks
+    the NPCs stand in are materialised so their tiles exist. The cost is
+    independent of ``size``.
+    """
+    size = size or world_generator.WORLD_SIZE
+    seed = world_generator.reset_world(db, seed, size)
+    world_map.load(db)
+    npcs: List[models.NPC] = world_generator.spawn_npcs(db, GameRNG(seed).spawn("npcs"), size)
+    for npc in npcs:
+        world_map.ensure_tile(db, npc.x, npc.y)
+    return seed
+
+
+# Map shared by the API process.
+world_map = WorldMap()
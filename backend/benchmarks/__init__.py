@@ -0,0 +1,7 @@
+"""Performance benchmarks for the RPG engine backend.
+
+Benchmarks are plain scripts rather than tests so they never slow down the
+regular ``pytest`` run. Execute them from the ``backend`` directory, e.g.::
+
+    python -m benchmarks.bench_world_generation
+"""
@@ -0,0 +1,67 @@
+"""Benchmark large battles: ``CombatEncounter`` versus ``Battle``.
+
+Two armies of equal size, with random hit points and positions on a
+200x200 field, fight until one side is down. ``encounter`` is
+``CombatEncounter``, which only supports its fixed targeting. ``battle``
+is ``battle.Battle`` with every targeting strategy. Each reports the time
+for the whole fight and the turns per second.
+
+Usage::
+
+    python -m benchmarks.bench_battle [COMBATANTS ...]
+"""
+
+import sys
+import time
+
+from app.game_logic import combat
+from app.game_logic.battle import TARGETING, Battle
+from app.game_logic.rng import GameRNG
+
+DEFAULT_SIZES = [10, 1_000, 10_000]
+FIELD = 200
+
+
+def armies(size: int, seed: int = 0):
+    rng = GameRNG(seed)
+    return [
+        combat.Combatant(
+            f"{'P' if i % 2 else 'N'}{i}", rng.randint(8, 20), bool(i % 2), None,
+            x=rng.randint(0, FIELD - 1), y=rng.randint(0, FIELD - 1),
+        )
+        for i in range(size)
+    ]
+
+
+def run_encounter(size: int) -> tuple:
+    start = time.perf_counter()
+    encounter = combat.CombatEncounter(armies(size), GameRNG(1))
+    turns = 0
+    while encounter.active:
+        turns += encounter.next_turn() is not None
+    return time.perf_counter() - start, turns
+
+
+def run_battle(size: int, targeting: str) -> tuple:
+    start = time.perf_counter()
+    battle = Battle(armies(size), GameRNG(1), targeting)
+    battle.run()
+    return time.perf_counter() - start, battle.turns
+
+
+def main(argv=None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    sizes = [int(a) for a in argv] or DEFAULT_SIZES
+    print(f"{'combatants':>10} {'engine':>9} {'targeting':>10} {'turns':>8} {'ms':>9} {'turns/s':>10}")
+    for size in sizes:
+        runs = [("encounter", "first", run_encounter(size))]
+        runs += [("battle", name, run_battle(size, name)) for name in TARGETING]
+        for engine, targeting, (seconds, turns) in runs:
+            print(
+                f"{size:>10} {engine:>9} {targeting:>10} {turns:>8} "
+                f"{seconds * 1e3:>9.1f} {turns / seconds:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
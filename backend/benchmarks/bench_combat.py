@@ -0,0 +1,53 @@
+"""Benchmark combat throughput in encounters per second.
+
+Compares running ``CombatEncounter`` to completion one fight at a time with
+the vectorised Monte Carlo simulator for a duel and a 4v4 skirmish.
+
+Usage::
+
+    python -m benchmarks.bench_combat [ENCOUNTERS]
+"""
+
+import sys
+import time
+
+from app.game_logic import combat
+from app.game_logic.combat_sim import simulate_encounters
+
+SCENARIOS = {
+    "1v1": ([20], [15]),
+    "4v4": ([20, 16, 12, 10], [15, 15, 10, 8]),
+}
+SCALAR_ENCOUNTERS = 5_000
+
+
+def scalar_rate(player_hp, npc_hp, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        party = [combat.Combatant(f"P{i}", hp, True, None) for i, hp in enumerate(player_hp)]
+        foes = [combat.Combatant(f"N{i}", hp, False, None) for i, hp in enumerate(npc_hp)]
+        encounter = combat.CombatEncounter(party + foes)
+        while encounter.active:
+            encounter.next_turn()
+    return n / (time.perf_counter() - start)
+
+
+def vector_rate(player_hp, npc_hp, n: int) -> float:
+    start = time.perf_counter()
+    simulate_encounters(player_hp, npc_hp, n, seed=0)
+    return n / (time.perf_counter() - start)
+
+
+def main(argv=None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    n = int(argv[0]) if argv else 1_000_000
+    print(f"{'scenario':>9} {'scalar enc/s':>13} {'vectorised enc/s':>17}")
+    for name, (player_hp, npc_hp) in SCENARIOS.items():
+        print(
+            f"{name:>9} {scalar_rate(player_hp, npc_hp, SCALAR_ENCOUNTERS):>13.0f} "
+            f"{vector_rate(player_hp, npc_hp, n):>17.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark ``POST /players/{id}/move`` throughput under concurrent clients.
+
+A uvicorn server is started on a temporary SQLite database (WAL mode, see
+``database.py``). For each concurrency level that many clients, each with its
+own player, send moves back to back for ``DURATION`` seconds. The table shows
+requests per second and latency percentiles.
+
+Usage::
+
+    python -m benchmarks.bench_concurrency [CLIENTS ...]
+"""
+
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+
+import httpx
+
+from .server import running_server
+
+DEFAULT_CONCURRENCY = [1, 4, 16, 64]
+DURATION = 3.0
+MAP_SIZE = 256
+STEPS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+
+
+async def run(base: str, clients: int) -> dict:
+    limits = httpx.Limits(max_connections=clients)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=60) as http:
+        await http.post("/init", params={"seed": 1, "size": MAP_SIZE})
+        players = []
+        for i in range(clients):
+            r = await http.post("/players", json={"name": f"bench{i}"})
+            players.append(r.json()["id"])
+
+        latencies = []
+        errors = 0
+        deadline = time.perf_counter() + DURATION
+
+        async def client(pid: int) -> None:
+            nonlocal errors
+            step = 0
+            while time.perf_counter() < deadline:
+                dx, dy = STEPS[step % 4]
+                step += 1
+                start = time.perf_counter()
+                r = await http.post(f"/players/{pid}/move", json={"dx": dx, "dy": dy})
+                latencies.append(time.perf_counter() - start)
+                errors += r.status_code != 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client(pid) for pid in players))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "clients": clients,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1e3,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1e3,
+        "errors": errors,
+    }
+
+
+def main(argv=None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    levels = [int(a) for a in argv] or DEFAULT_CONCURRENCY
+    print(f"{'clients':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+    with tempfile.TemporaryDirectory() as tmp, running_server(tmp) as base:
+        for clients in levels:
+            r = asyncio.run(run(base, clients))
+            print(
+                f"{r['clients']:>8} {r['rps']:>8.0f} {r['p50_ms']:>8.1f} "
+                f"{r['p95_ms']:>8.1f} {r['errors']:>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
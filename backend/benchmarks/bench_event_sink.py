@@ -0,0 +1,80 @@
+"""Benchmark event log writes: one commit per line versus the event sink.
+
+Bursts of log lines (the size of a long combat log) are written to a
+temporary SQLite file, first with ``crud.create_event`` per line and then
+through an ``EventSink`` in each durability mode. "caller ms" is the time the
+endpoint spends handing a burst over; "total s" includes the final flush.
+
+Usage::
+
+    python -m benchmarks.bench_event_sink [LINES_PER_BURST ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models
+from app.event_sink import EVENT_MODES, EventSink
+
+DEFAULT_BURSTS = [1, 20]
+TOTAL_LINES = 2000
+
+
+def _fresh(db_path: str):
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(bind=engine)
+
+
+def run(burst: int, mode: str, db_path: str) -> dict:
+    engine, SessionLocal = _fresh(db_path)
+    bursts = [[f"line {b}.{i}" for i in range(burst)] for b in range(TOTAL_LINES // burst)]
+    sink = None if mode == "per-line" else EventSink(SessionLocal, mode=mode)
+    db = SessionLocal()
+    caller = 0.0
+    start = time.perf_counter()
+    for lines in bursts:
+        t0 = time.perf_counter()
+        if sink is None:
+            for line in lines:
+                crud.create_event(db, line)
+        else:
+            sink.emit_many(lines)
+        caller += time.perf_counter() - t0
+    if sink is not None:
+        sink.stop()
+    total = time.perf_counter() - start
+    written = db.query(models.Event).count()
+    db.close()
+    engine.dispose()
+    return {
+        "burst": burst,
+        "mode": mode,
+        "caller_ms": caller / len(bursts) * 1e3,
+        "total_s": total,
+        "lines_per_second": written / total,
+    }
+
+
+def main(argv=None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    bursts = [int(a) for a in argv] or DEFAULT_BURSTS
+    print(f"{'burst':>6} {'mode':>9} {'caller ms':>10} {'total s':>8} {'lines/s':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for burst in bursts:
+            for mode in ("per-line",) + EVENT_MODES:
+                r = run(burst, mode, os.path.join(tmp, "bench.db"))
+                print(
+                    f"{r['burst']:>6} {r['mode']:>9} {r['caller_ms']:>10.3f} "
+                    f"{r['total_s']:>8.2f} {r['lines_per_second']:>10.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Benchmark reading the event log as it grows.
+
+For each table size the old "load everything" query is compared with one
+keyset page (newest 100, and 100 after a cursor in the middle of the log)
+and with a full NDJSON export through ``crud.iter_events``. Page times should
+stay flat while the full load grows with the table.
+
+Usage::
+
+    python -m benchmarks.bench_events [EVENTS ...]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models, schemas
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+PAGE = 100
+FULL_LOAD_LIMIT = 100_000  # beyond this the old query is too slow to bother
+
+
+def _ms(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1e3
+
+
+def run(size: int, db_path: str) -> dict:
+    engine = create_engine(f"sqlite:///{db_path}")
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    rows = [{"description": f"event {i}", "timestamp": "2024-01-01T00:00:00"} for i in range(size)]
+    for start in range(0, size, 100_000):
+        db.execute(insert(models.Event.__table__), rows[start : start + 100_000])
+    db.commit()
+    del rows
+
+    def full():
+        events = db.query(models.Event).order_by(models.Event.id.desc()).all()
+        [schemas.Event.model_validate(e).model_dump() for e in events]
+        db.expunge_all()
+
+    def newest():
+        [schemas.Event.model_validate(e).model_dump() for e in crud.get_events(db, limit=PAGE)]
+        db.expunge_all()
+
+    def since():
+        page = crud.get_events(db, since_id=size // 2, limit=PAGE)
+        [schemas.Event.model_validate(e).model_dump() for e in page]
+        db.expunge_all()
+
+    def export():
+        for batch in crud.iter_events(db):
+            "".join(
+                json.dumps({"id": i, "description": d, "timestamp": t}) + "\n" for i, d, t in batch
+            )
+
+    result = {
+        "size": size,
+        "full_ms": _ms(full) if size <= FULL_LOAD_LIMIT else float("nan"),
+        "newest_ms": _ms(newest),
+        "since_ms": _ms(since),
+        "export_ms": _ms(export),
+    }
+    db.close()
+    engine.dispose()
+    return result
+
+
+def main(argv=None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    sizes = [int(a) for a in argv] or DEFAULT_SIZES
+    print(f"{'events':>9} {'full ms':>9} {'newest ms':>10} {'since ms':>9} {'export ms':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            r = run(size, os.path.join(tmp, "bench.db"))
+            print(
+                f"{r['size']:>9} {r['full_ms']:>9.1f} {r['newest_ms']:>10.2f} "
+                f"{r['since_ms']:>9.2f} {r['export_ms']:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
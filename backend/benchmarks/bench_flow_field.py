@@ -0,0 +1,82 @@
+"""Benchmark many NPCs converging on one goal: per‑NPC search versus a shared
+flow field.
+
+NPCs are scattered over the land tiles within ``RADIUS`` of a goal on a
+generated 1000x1000 world, and every method moves each of them one step
+towards the goal. ``astar`` searches each NPC's route on the window around
+the goal; ``hpa`` asks the world's ``Navigator`` for each next step (cold
+first, then with its cluster and route caches warm). ``field build`` is the
+one‑off cost of the flow field and ``field step`` moves all NPCs with one
+vectorised lookup. Times are milliseconds per tick.
+
+Usage::
+
+    python -m benchmarks.bench_flow_field [NPCS ...]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from app.game_logic.pathfinding import Grid, astar, flow_field
+from app.navigation import Navigator
+from app.world_map import WorldMap
+
+DEFAULT_POPULATIONS = [100, 1000]
+MAP_SIZE = 1000
+RADIUS = 32
+SEED = 42
+
+
+def _ms(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1e3, result
+
+
+def run(population: int) -> list:
+    world_map = WorldMap()
+    world_map.seed, world_map.size = SEED, MAP_SIZE
+    navigator = Navigator(world_map, field_radius=RADIUS)
+    centre = MAP_SIZE // 2
+    x0, y0 = centre - RADIUS, centre - RADIUS
+    costs = navigator.costs(x0, y0, centre + RADIUS + 1, centre + RADIUS + 1)
+    land = np.argwhere(np.isfinite(costs)) + (x0, y0)
+    goal = tuple(int(v) for v in land[np.abs(land - centre).sum(axis=1).argmin()])
+    rng = np.random.default_rng(population)
+    npcs = land[rng.integers(0, len(land), population)]
+    tiles = [(int(x), int(y)) for x, y in npcs]
+    grid = Grid(costs, (x0, y0))
+
+    def per_npc_astar():
+        return [p[1] if p and len(p) > 1 else None for p in (astar(grid, t, goal) for t in tiles)]
+
+    def per_npc_hpa():
+        return [navigator.next_step(t, goal) for t in tiles]
+
+    astar_ms, _ = _ms(per_npc_astar)
+    hpa_cold_ms, _ = _ms(per_npc_hpa)
+    hpa_warm_ms, _ = _ms(per_npc_hpa)
+    build_ms, field = _ms(lambda: flow_field(costs, [goal], (x0, y0)))
+    step_ms, _ = _ms(lambda: field.next_steps(npcs[:, 0], npcs[:, 1]))
+    return [
+        ("astar", astar_ms),
+        ("hpa cold", hpa_cold_ms),
+        ("hpa warm", hpa_warm_ms),
+        ("field build", build_ms),
+        ("field step", step_ms),
+    ]
+
+
+def main(argv=None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    populations = [int(a) for a in argv] or DEFAULT_POPULATIONS
+    print(f"{'npcs':>7} {'method':>12} {'ms/tick':>10}")
+    for population in populations:
+        for method, ms in run(population):
+            print(f"{population:>7} {method:>12} {ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
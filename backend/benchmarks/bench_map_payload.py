@@ -0,0 +1,117 @@
+"""Benchmark the ``/world`` payload: JSON location list versus binary regions.
+
+For each number of discovered tiles (half the tiles of a square area, in
+random order) the table shows the size of each format, raw and gzipped,
+and the best of three times to build it. The JSON path queries the database
+each time; the binary path reads chunks from the world map cache, as the
+server does once they are hot. ``delta`` is the binary payload
+after ten more tiles were discovered, against the version token of the full
+payload.
+
+Usage::
+
+    python -m benchmarks.bench_map_payload [TILES ...]
+"""
+
+import gzip
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import bindparam, create_engine, select, update
+from sqlalchemy.orm import sessionmaker
+
+from app import map_codec, models, schemas
+from app.game_logic.world_generator import TERRAINS
+from app.world_map import WorldMap, init_world
+
+DEFAULT_TILES = [1_000, 10_000, 50_000]
+MAP_SIZE = 1024
+REPEAT = 3
+
+
+def _best_ms(fn):
+    best, result = float("inf"), None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3, result
+
+
+def run(tiles: int, db_path: str) -> dict:
+    engine = create_engine(f"sqlite:///{db_path}")
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    world_map = WorldMap(cache_chunks=4096)
+    init_world(db, world_map, seed=1, size=MAP_SIZE)
+
+    side = math.ceil(math.sqrt(2 * tiles))
+    area = [(x, y) for x in range(side) for y in range(side)]
+    chosen = random.Random(0).sample(area, tiles)
+    for x in range(0, side, world_map.chunk_size):
+        for y in range(0, side, world_map.chunk_size):
+            world_map.ensure_chunk(db, x // world_map.chunk_size, y // world_map.chunk_size)
+    loc = models.Location.__table__
+    ids = {(x, y): i for i, x, y in db.execute(select(loc.c.id, loc.c.x, loc.c.y))}
+    db.execute(
+        update(loc).where(loc.c.id == bindparam("loc_id")).values(discovered=True),
+        [{"loc_id": ids[t]} for t in chosen],
+    )
+    db.commit()
+    world_map.cache.clear()
+
+    def as_json():
+        locations = db.query(models.Location).filter(models.Location.discovered == True).all()
+        body = {
+            "size": world_map.size,
+            "chunk_size": world_map.chunk_size,
+            "locations": [schemas.Location.model_validate(l).model_dump() for l in locations],
+        }
+        db.expunge_all()
+        return json.dumps(body).encode()
+
+    def as_binary(since=None):
+        token = world_map.version_token()
+        version = world_map.parse_version_token(since)
+        regions = map_codec.world_regions(db, world_map, since=version)
+        return map_codec.encode(
+            regions, world_map.size, world_map.chunk_size, TERRAINS, token, delta=version is not None
+        )
+
+    json_ms, json_body = _best_ms(as_json)
+    binary_ms, binary_body = _best_ms(as_binary)
+    token = map_codec.decode(binary_body)["version"]
+    taken = set(chosen)
+    for x, y in random.Random(1).sample([t for t in area if t not in taken], 10):
+        world_map.discover(db, x, y)
+    delta_ms, delta_body = _best_ms(lambda: as_binary(token))
+    db.close()
+    engine.dispose()
+    return {
+        "tiles": tiles,
+        "json": (len(json_body), len(gzip.compress(json_body)), json_ms),
+        "binary": (len(binary_body), len(gzip.compress(binary_body)), binary_ms),
+        "delta": (len(delta_body), len(gzip.compress(delta_body)), delta_ms),
+    }
+
+
+def main(argv=None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    sizes = [int(a) for a in argv] or DEFAULT_TILES
+    print(f"{'tiles':>7} {'format':>7} {'bytes':>10} {'gzip':>9} {'ms':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for tiles in sizes:
+            r = run(tiles, os.path.join(tmp, "bench.db"))
+            for fmt in ("json", "binary", "delta"):
+                size, gz, ms = r[fmt]
+                print(f"{r['tiles']:>7} {fmt:>7} {size:>10} {gz:>9} {ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Microbenchmark: scalar ``NPCAgent.decide`` versus ``DecisionEngine``.
+
+Both paths receive identical traits, observations and random rolls, so the
+benchmark also asserts that they agree before reporting timings.
+
+Usage::
+
+    python -m benchmarks.bench_npc_decision [POPULATION ...]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from app import models
+from app.npc_agent import ACTIONS, NPCAgent
+from app.npc_decision import DecisionEngine
+
+DEFAULT_POPULATIONS = [1_000, 10_000, 100_000]
+
+
+def run(population: int) -> dict:
+    rng = np.random.default_rng(population)
+    traits = rng.uniform(-1, 1, size=(population, 3))
+    present = rng.random(population) < 0.3
+    rolls = rng.random(population)
+    agents = [
+        NPCAgent(models.NPC(name="npc", kindness=k, greed=g, curiosity=c), db=None)
+        for k, g, c in traits.tolist()
+    ]
+    observations = [{"players": ["p"]} if p else {"players": []} for p in present.tolist()]
+    roll_list = rolls.tolist()
+
+    start = time.perf_counter()
+    scalar = [a.decide(o, roll=r) for a, o, r in zip(agents, observations, roll_list)]
+    scalar_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine = DecisionEngine(np.arange(population), traits[:, 0], traits[:, 1], traits[:, 2])
+    vectorised = engine.decide(present, rolls)
+    vector_s = time.perf_counter() - start
+
+    assert scalar == [ACTIONS[a] for a in vectorised.tolist()], "paths disagree"
+    return {
+        "population": population,
+        "scalar_ms": scalar_s * 1e3,
+        "vectorised_ms": vector_s * 1e3,
+        "speedup": scalar_s / vector_s,
+    }
+
+
+def main(argv=None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    populations = [int(a) for a in argv] or DEFAULT_POPULATIONS
+    print(f"{'NPCs':>8} {'scalar ms':>10} {'vectorised ms':>14} {'speedup':>8}")
+    for population in populations:
+        r = run(population)
+        print(
+            f"{r['population']:>8} {r['scalar_ms']:>10.2f} "
+            f"{r['vectorised_ms']:>14.2f} {r['speedup']:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark pathfinding: A*, jump point search and hierarchical A*.
+
+For each map size a generated terrain is turned into a cost grid and the same
+random pairs of land tiles are routed with every method. A* and the
+hierarchical search use the terrain costs; jump point search only handles
+uniform costs, so it runs on the same map with every land tile costing 1.
+``hpa cold`` starts from an empty pathfinder (its clusters are built during
+the queries), ``hpa warm`` reuses the clusters with the route cache disabled,
+and ``hpa cached`` repeats the queries against the route cache. ``cost`` is
+the mean route cost relative to A*.
+
+Usage::
+
+    python -m benchmarks.bench_pathfinding [SIZE ...]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from app.game_logic import world_generator
+from app.game_logic.pathfinding import (
+    ArrayCostSource,
+    Grid,
+    HierarchicalPathfinder,
+    astar,
+    jps,
+    path_cost,
+    terrain_costs,
+)
+
+DEFAULT_SIZES = [100, 1000]
+CLUSTER_SIZE = 16
+QUERIES = 50
+SEED = 42
+
+
+def _timed(fn, pairs):
+    start = time.perf_counter()
+    paths = [fn(a, b) for a, b in pairs]
+    return (time.perf_counter() - start) / len(pairs) * 1e3, paths
+
+
+def _relative_cost(grid, paths, reference):
+    ratios = [
+        path_cost(grid, p) / path_cost(grid, r)
+        for p, r in zip(paths, reference)
+        if p is not None and r is not None and len(r) > 1
+    ]
+    return float(np.mean(ratios)) if ratios else 1.0
+
+
+def run(size: int) -> list:
+    costs = terrain_costs(world_generator.generate_terrain(SEED, 0, 0, size, size))
+    grid = Grid(costs)
+    uniform = Grid(np.where(np.isfinite(costs), 1.0, costs))
+    rng = np.random.default_rng(size)
+    land = np.argwhere(np.isfinite(costs))
+    pairs = [
+        tuple(tuple(int(v) for v in tile) for tile in rng.choice(land, 2)) for _ in range(QUERIES)
+    ]
+
+    astar_ms, reference = _timed(lambda a, b: astar(grid, a, b), pairs)
+    astar_uniform_ms, uniform_reference = _timed(lambda a, b: astar(uniform, a, b), pairs)
+    jps_ms, jps_paths = _timed(lambda a, b: jps(uniform, a, b), pairs)
+    source = ArrayCostSource(costs, CLUSTER_SIZE)
+    hpa = HierarchicalPathfinder(source, cache_size=0)
+    cold_ms, hpa_paths = _timed(hpa.find, pairs)
+    warm_ms, _ = _timed(hpa.find, pairs)
+    hpa.cache_size = QUERIES
+    _timed(hpa.find, pairs)  # fill the route cache
+    cached_ms, _ = _timed(hpa.find, pairs)
+    return [
+        ("astar", astar_ms, 1.0),
+        ("astar uniform", astar_uniform_ms, 1.0),
+        ("jps", jps_ms, _relative_cost(uniform, jps_paths, uniform_reference)),
+        ("hpa cold", cold_ms, _relative_cost(grid, hpa_paths, reference)),
+        ("hpa warm", warm_ms, _relative_cost(grid, hpa_paths, reference)),
+        ("hpa cached", cached_ms, _relative_cost(grid, hpa_paths, reference)),
+    ]
+
+
+def main(argv=None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    sizes = [int(a) for a in argv] or DEFAULT_SIZES
+    print(f"{'size':>6} {'method':>14} {'ms/query':>10} {'cost':>6}")
+    for size in sizes:
+        for method, ms, cost in run(size):
+            print(f"{size:>6} {method:>14} {ms:>10.3f} {cost:>6.3f}")
+
+
+if __name__ == "__main__":
+    main()
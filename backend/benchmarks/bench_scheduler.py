@@ -0,0 +1,153 @@
+"""Benchmark the event scheduler with up to a million pending timers.
+
+Timers due at random minutes over the next 30 game days are scheduled, one
+in ten is cancelled, then the clock runs through one game day a minute at a
+time, as the background thread does. ``wheel`` is ``TimerWheel``; ``heap``
+is a binary heap with lazy cancellation for comparison. For the wheel the
+time to write every pending timer to SQLite, to rebuild the scheduler from
+the database (a restart) and the mean time of a one-minute ``step``, which
+writes only the timers that changed, are also reported.
+
+Usage::
+
+    python -m benchmarks.bench_scheduler [TIMERS ...]
+"""
+
+import heapq
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.database import make_engine
+from app.game_logic.timer_wheel import Timer, TimerWheel
+from app.scheduler import MINUTES_PER_DAY, EventScheduler
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+HORIZON = 30 * MINUTES_PER_DAY
+STEPS = 60  # scheduler steps timed after a restart
+
+
+class HeapTimers:
+    """Timers in a heap of ``(due, id)``; cancelled ids are skipped when popped."""
+
+    def __init__(self):
+        self.heap = []
+        self.timers = {}
+        self.now = 0
+
+    def schedule(self, timer: Timer) -> None:
+        self.timers[timer.id] = timer
+        heapq.heappush(self.heap, (timer.due, timer.id))
+
+    def cancel(self, timer_id: int) -> bool:
+        return self.timers.pop(timer_id, None) is not None
+
+    def advance(self, to: int):
+        heap = self.heap
+        while heap and heap[0][0] <= to:
+            due, timer_id = heapq.heappop(heap)
+            timer = self.timers.get(timer_id)
+            if timer is None or timer.due != due:
+                continue
+            if timer.interval is None:
+                del self.timers[timer_id]
+            else:
+                timer.due += timer.interval
+                heapq.heappush(heap, (timer.due, timer_id))
+            yield due, timer
+        self.now = to
+
+
+def _timers(size: int):
+    rng = random.Random(size)
+    return [
+        Timer(i, rng.randint(1, HORIZON), "k", None, MINUTES_PER_DAY if i % 100 == 0 else None)
+        for i in range(1, size + 1)
+    ]
+
+
+def run(structure, size: int) -> dict:
+    timers = _timers(size)
+    rng = random.Random(0)
+    cancelled = rng.sample(range(1, size + 1), size // 10)
+
+    start = time.perf_counter()
+    for timer in timers:
+        structure.schedule(timer)
+    scheduled = time.perf_counter()
+    for timer_id in cancelled:
+        structure.cancel(timer_id)
+    cancelled_at = time.perf_counter()
+    fired = 0
+    for minute in range(1, MINUTES_PER_DAY + 1):
+        for _ in structure.advance(minute):
+            fired += 1
+    done = time.perf_counter()
+    return {
+        "schedule_ms": (scheduled - start) * 1e3,
+        "cancel_ms": (cancelled_at - scheduled) * 1e3,
+        "advance_us": (done - cancelled_at) / MINUTES_PER_DAY * 1e6,
+        "fired": fired,
+    }
+
+
+def persist(size: int, db_path: str) -> dict:
+    engine = make_engine(f"sqlite:///{db_path}")
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    db.add(models.World(seed=0, size=1000, chunk_size=16))
+    db.commit()
+    scheduler = EventScheduler(Session)
+    for timer in _timers(size):
+        scheduler.schedule(timer.kind, timer.due, every=timer.interval)
+    start = time.perf_counter()
+    scheduler.save(db)
+    saved = time.perf_counter()
+    restarted = EventScheduler(Session)
+    restarted.load(db)
+    loaded = time.perf_counter()
+    assert len(restarted.wheel) == size
+    restarted.handlers["k"] = lambda scheduler, timer, minute: None
+    for _ in range(STEPS):
+        restarted.step(1)
+    stepped = time.perf_counter()
+    db.close()
+    engine.dispose()
+    return {
+        "save_ms": (saved - start) * 1e3,
+        "load_ms": (loaded - saved) * 1e3,
+        "step_ms": (stepped - loaded) / STEPS * 1e3,
+    }
+
+
+def main(argv=None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    sizes = [int(a) for a in argv] or DEFAULT_SIZES
+    nan = float("nan")
+    print(
+        f"{'timers':>9} {'structure':>9} {'schedule ms':>12} {'cancel ms':>10} "
+        f"{'us/minute':>10} {'fired':>7} {'save ms':>9} {'load ms':>9} {'step ms':>8}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            for name, structure in (("heap", HeapTimers()), ("wheel", TimerWheel())):
+                r = run(structure, size)
+                if name == "wheel":
+                    r.update(persist(size, os.path.join(tmp, "bench.db")))
+                print(
+                    f"{size:>9} {name:>9} {r['schedule_ms']:>12.1f} {r['cancel_ms']:>10.1f} "
+                    f"{r['advance_us']:>10.1f} {r['fired']:>7} "
+                    f"{r.get('save_ms', nan):>9.1f} {r.get('load_ms', nan):>9.1f} "
+                    f"{r.get('step_ms', nan):>8.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
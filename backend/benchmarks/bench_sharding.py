@@ -0,0 +1,94 @@
+"""Benchmark the world tick sharded over worker processes.
+
+Populates a temporary SQLite database like ``bench_simulation`` and times
+the tick of ``WorldSimulation`` (workers 0) and ``ShardedSimulation`` with
+1, 2, 4 and 8 worker processes. The first tick is a warm‑up, and it is
+excluded: it starts the workers and loads every chunk the NPCs stand in.
+``max shard ms`` is the slowest worker's share of the last tick. The rest is
+the database writes, which stay in the API process.
+
+Usage::
+
+    python -m benchmarks.bench_sharding [POPULATION ...] [--workers 0,1,2,4,8]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.game_logic.rng import GameRNG
+from app.sharding import ShardedSimulation
+from app.simulation import WorldSimulation
+from app.spatial_index import npc_index
+from app.world_map import world_map
+
+from .bench_simulation import MAP_SIZE, populate
+
+DEFAULT_POPULATIONS = [50_000, 200_000]
+DEFAULT_WORKERS = "0,1,2,4,8"
+TICKS = 5
+
+
+def run(population: int, workers: int, db_path: str) -> dict:
+    engine = create_engine(f"sqlite:///{db_path}")
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine)
+    db = SessionLocal()
+    populate(db, population)
+    db.close()
+
+    npc_index.clear()
+    world_map.seed, world_map.size = 1, MAP_SIZE
+    if workers:
+        simulation = ShardedSimulation(SessionLocal, workers, rng=GameRNG(0))
+    else:
+        simulation = WorldSimulation(SessionLocal, rng=GameRNG(0))
+    try:
+        simulation.tick()  # warm-up
+        durations = []
+        for _ in range(TICKS):
+            before = simulation.metrics.total_seconds
+            simulation.tick()
+            durations.append(simulation.metrics.total_seconds - before)
+        shard_ms = max(simulation.shard_seconds) * 1e3 if workers else None
+    finally:
+        simulation.stop()
+        engine.dispose()
+    mean = statistics.mean(durations)
+    return {
+        "population": population,
+        "workers": workers,
+        "mean_tick_ms": mean * 1e3,
+        "max_shard_ms": shard_ms,
+        "npcs_per_second": population / mean,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("populations", nargs="*", type=int, default=DEFAULT_POPULATIONS)
+    parser.add_argument("--workers", default=DEFAULT_WORKERS, help="comma-separated worker counts, 0 = unsharded")
+    args = parser.parse_args(argv)
+    counts = [int(w) for w in args.workers.split(",")]
+    print(f"{'NPCs':>8} {'workers':>8} {'mean tick ms':>13} {'max shard ms':>13} {'NPCs/s':>10} {'speed-up':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for population in args.populations:
+            baseline = None
+            for workers in counts:
+                r = run(population, workers, os.path.join(tmp, "bench.db"))
+                baseline = baseline or r["mean_tick_ms"]
+                shard = "-" if r["max_shard_ms"] is None else f"{r['max_shard_ms']:.1f}"
+                print(
+                    f"{r['population']:>8} {r['workers']:>8} {r['mean_tick_ms']:>13.1f} {shard:>13} "
+                    f"{r['npcs_per_second']:>10.0f} {baseline / r['mean_tick_ms']:>8.2f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Benchmark the batched world tick.
+
+Populates a temporary SQLite database with NPCs scattered over a 1000x1000
+map plus a handful of players, then times ``WorldSimulation.tick``. The first
+tick is a warm‑up (it loads every chunk the NPCs stand in) and is excluded.
+
+Usage::
+
+    python -m benchmarks.bench_simulation [POPULATION ...]
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.game_logic.rng import GameRNG
+from app.simulation import WorldSimulation
+from app.spatial_index import npc_index
+
+DEFAULT_POPULATIONS = [1_000, 10_000, 50_000]
+MAP_SIZE = 1000
+PLAYERS = 50
+TICKS = 5
+
+
+def populate(db, population: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    db.execute(
+        insert(models.NPC.__table__),
+        [
+            {
+                "name": f"npc{i}",
+                "kindness": rng.uniform(-1, 1),
+                "greed": rng.uniform(-1, 1),
+                "curiosity": rng.uniform(-1, 1),
+                "x": rng.randrange(MAP_SIZE),
+                "y": rng.randrange(MAP_SIZE),
+            }
+            for i in range(population)
+        ],
+    )
+    db.execute(
+        insert(models.Player.__table__),
+        [
+            {"name": f"player{i}", "x": rng.randrange(MAP_SIZE), "y": rng.randrange(MAP_SIZE)}
+            for i in range(PLAYERS)
+        ],
+    )
+    db.commit()
+
+
+def run(population: int, db_path: str) -> dict:
+    engine = create_engine(f"sqlite:///{db_path}")
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine)
+    db = SessionLocal()
+    populate(db, population)
+    db.close()
+
+    npc_index.clear()
+    simulation = WorldSimulation(SessionLocal, rng=GameRNG(0))
+    simulation.tick()  # warm-up
+    durations = []
+    for _ in range(TICKS):
+        before = simulation.metrics.total_seconds
+        simulation.tick()
+        durations.append(simulation.metrics.total_seconds - before)
+    engine.dispose()
+    mean = statistics.mean(durations)
+    return {
+        "population": population,
+        "mean_tick_ms": mean * 1e3,
+        "max_tick_ms": max(durations) * 1e3,
+        "npcs_per_second": population / mean,
+    }
+
+
+def main(argv=None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    populations = [int(a) for a in argv] or DEFAULT_POPULATIONS
+    print(f"{'NPCs':>8} {'mean tick ms':>13} {'max tick ms':>12} {'NPCs/s':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for population in populations:
+            r = run(population, os.path.join(tmp, "bench.db"))
+            print(
+                f"{r['population']:>8} {r['mean_tick_ms']:>13.1f} "
+                f"{r['max_tick_ms']:>12.1f} {r['npcs_per_second']:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
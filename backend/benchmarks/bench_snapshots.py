@@ -0,0 +1,138 @@
+"""Benchmark save profiles: copying ``game.db`` versus snapshots.
+
+A world of 1024x1024 tiles is created with ``CHUNKS`` explored chunks, and
+with players, NPCs and events. Each method then saves it, changes a little
+(some NPCs move, a few events are logged) and saves again, and finally
+loads the last save into a fresh database. ``copy`` is the old approach
+from docs/EXTENDING.md: close every connection and copy the file.
+``snapshot`` writes a full snapshot and then an incremental one (see
+``app/snapshots.py``), without closing anything.
+
+Usage::
+
+    python -m benchmarks.bench_snapshots [CHUNKS ...]
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.database import make_engine
+from app.snapshots import SnapshotStore
+from app.world_map import WorldMap, init_world
+
+DEFAULT_CHUNKS = [100, 1000]
+SIZE = 1024
+PLAYERS = 1000
+NPCS = 10_000
+EVENTS = 50_000
+CHANGED = 100
+
+
+def _engine(path: str):
+    engine = make_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def build(path: str, chunks: int):
+    engine = _engine(path)
+    db = sessionmaker(bind=engine)()
+    world_map = WorldMap()
+    init_world(db, world_map, seed=1, size=SIZE)
+    rng = random.Random(chunks)
+    side = SIZE // world_map.chunk_size
+    for key in rng.sample([(cx, cy) for cx in range(side) for cy in range(side)], chunks):
+        chunk = world_map.ensure_chunk(db, *key)
+        world_map.discover(db, chunk.x0, chunk.y0)
+    tiles = lambda: (rng.randrange(SIZE), rng.randrange(SIZE))
+    db.execute(
+        insert(models.Player.__table__),
+        [{"name": f"p{i}", "x": x, "y": y} for i, (x, y) in enumerate(tiles() for _ in range(PLAYERS))],
+    )
+    db.execute(
+        insert(models.NPC.__table__),
+        [{"name": f"n{i}", "kindness": rng.random(), "x": x, "y": y}
+         for i, (x, y) in enumerate(tiles() for _ in range(NPCS))],
+    )
+    db.execute(
+        insert(models.Event.__table__),
+        [{"description": f"Something happened ({i})", "timestamp": "2026-01-01T00:00:00"} for i in range(EVENTS)],
+    )
+    db.commit()
+    db.close()
+    return engine
+
+
+def change(engine, seed: int) -> None:
+    rng = random.Random(seed)
+    with engine.begin() as conn:
+        for npc_id in rng.sample(range(1, NPCS), CHANGED):
+            conn.execute(
+                update(models.NPC.__table__).where(models.NPC.id == npc_id).values(x=rng.randrange(SIZE))
+            )
+        conn.execute(
+            insert(models.Event.__table__),
+            [{"description": "Later", "timestamp": "2026-01-02T00:00:00"} for _ in range(CHANGED)],
+        )
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def run(chunks: int) -> list:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "game.db")
+        engine = build(db_path, chunks)
+
+        def copy_save(name):
+            engine.dispose()
+            target = os.path.join(tmp, name)
+            shutil.copy(db_path, target)
+            return os.path.getsize(target)
+
+        seconds, size = _timed(lambda: copy_save("copy1.db"))
+        results.append(("copy", "save", seconds, size))
+        change(engine, 1)
+        seconds, size = _timed(lambda: copy_save("copy2.db"))
+        results.append(("copy", "save again", seconds, size))
+        seconds, _ = _timed(lambda: shutil.copy(os.path.join(tmp, "copy2.db"), os.path.join(tmp, "loaded.db")))
+        results.append(("copy", "load", seconds, size))
+
+        store = SnapshotStore(os.path.join(tmp, "saves"))
+        seconds, saved = _timed(lambda: store.save(engine, "bench", None))
+        results.append(("snapshot", "save", seconds, saved["bytes"]))
+        change(engine, 2)
+        seconds, saved = _timed(lambda: store.save(engine, "bench", None))
+        results.append(("snapshot", "save again", seconds, saved["bytes"]))
+        fresh = _engine(os.path.join(tmp, "restored.db"))
+        seconds, _ = _timed(lambda: store.load(fresh, "bench"))
+        total = sum(os.path.getsize(info.path) for info in store.snapshots("bench"))
+        results.append(("snapshot", "load", seconds, total))
+        engine.dispose()
+        fresh.dispose()
+    return results
+
+
+def main(argv=None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    counts = [int(a) for a in argv] or DEFAULT_CHUNKS
+    print(f"{'chunks':>7} {'method':>9} {'step':>11} {'ms':>9} {'bytes':>12}")
+    for chunks in counts:
+        for method, step, seconds, size in run(chunks):
+            print(f"{chunks:>7} {method:>9} {step:>11} {seconds * 1e3:>9.1f} {size:>12,}")
+
+
+if __name__ == "__main__":
+    main()
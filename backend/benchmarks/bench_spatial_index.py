@@ -0,0 +1,104 @@
+"""Benchmark spatial queries: in‑memory grid index versus SQL.
+
+For each population size NPCs are scattered over a 1000x1000 map, stored both
+in a temporary SQLite database and in a ``SpatialIndex``. The same random
+"at tile", "within radius" and "in rect" queries are then timed against each.
+
+Usage::
+
+    python -m benchmarks.bench_spatial_index [POPULATION ...]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.spatial_index import SpatialIndex
+
+DEFAULT_POPULATIONS = [10_000, 100_000]
+MAP_SIZE = 1000
+QUERIES = 200
+
+
+def _time_per_query(fn, points) -> float:
+    start = time.perf_counter()
+    for x, y in points:
+        fn(x, y)
+    return (time.perf_counter() - start) / len(points) * 1e6
+
+
+def run(population: int, db_path: str) -> dict:
+    rng = random.Random(population)
+    rows = [
+        {"id": i + 1, "name": f"npc{i}", "x": rng.randrange(MAP_SIZE), "y": rng.randrange(MAP_SIZE)}
+        for i in range(population)
+    ]
+    engine = create_engine(f"sqlite:///{db_path}")
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.execute(insert(models.NPC.__table__), rows)
+    db.commit()
+
+    index = SpatialIndex()
+    start = time.perf_counter()
+    index.load((r["id"], r["x"], r["y"]) for r in rows)
+    build_ms = (time.perf_counter() - start) * 1e3
+
+    points = [(rng.randrange(MAP_SIZE), rng.randrange(MAP_SIZE)) for _ in range(QUERIES)]
+    NPC = models.NPC
+
+    def sql_at(x, y):
+        return db.query(NPC.id).filter(NPC.x == x, NPC.y == y).all()
+
+    def sql_radius(x, y, r=10):
+        return (
+            db.query(NPC.id)
+            .filter(NPC.x.between(x - r, x + r), NPC.y.between(y - r, y + r))
+            .filter((NPC.x - x) * (NPC.x - x) + (NPC.y - y) * (NPC.y - y) <= r * r)
+            .all()
+        )
+
+    def sql_rect(x, y, w=40):
+        return db.query(NPC.id).filter(NPC.x.between(x, x + w), NPC.y.between(y, y + w)).all()
+
+    result = {
+        "population": population,
+        "build_ms": build_ms,
+        "index_at_us": _time_per_query(index.at, points),
+        "index_radius_us": _time_per_query(lambda x, y: index.within_radius(x, y, 10), points),
+        "index_rect_us": _time_per_query(lambda x, y: index.in_rect(x, y, x + 40, y + 40), points),
+        "sql_at_us": _time_per_query(sql_at, points),
+        "sql_radius_us": _time_per_query(sql_radius, points),
+        "sql_rect_us": _time_per_query(sql_rect, points),
+    }
+    db.close()
+    engine.dispose()
+    return result
+
+
+def main(argv=None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    populations = [int(a) for a in argv] or DEFAULT_POPULATIONS
+    print(
+        f"{'NPCs':>8} {'build ms':>9} | {'at µs':>8} {'radius µs':>10} {'rect µs':>8}"
+        f" | {'SQL at':>8} {'SQL radius':>10} {'SQL rect':>8}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for population in populations:
+            r = run(population, os.path.join(tmp, "bench.db"))
+            print(
+                f"{r['population']:>8} {r['build_ms']:>9.1f} | {r['index_at_us']:>8.1f} "
+                f"{r['index_radius_us']:>10.1f} {r['index_rect_us']:>8.1f} | {r['sql_at_us']:>8.1f} "
+                f"{r['sql_radius_us']:>10.1f} {r['sql_rect_us']:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
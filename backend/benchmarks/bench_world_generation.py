@@ -0,0 +1,73 @@
+"""Benchmark bulk world generation.
+
+Generates worlds of increasing size into a temporary SQLite file and reports
+tiles per second and the peak resident set size of the process. Each size runs
+in a fresh interpreter so the RSS figure is not inflated by earlier runs.
+
+Usage::
+
+    python -m benchmarks.bench_world_generation [SIZE ...]
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+DEFAULT_SIZES = [100, 250, 500, 1000]
+
+
+def run_single(size: int) -> dict:
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app import models
+    from app.game_logic import world_generator
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        models.Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        start = time.perf_counter()
+        world_generator.generate_world(db, seed=1234, size=size)
+        elapsed = time.perf_counter() - start
+        db.close()
+        engine.dispose()
+    # ru_maxrss is reported in kilobytes on Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    tiles = size * size
+    return {
+        "size": size,
+        "tiles": tiles,
+        "seconds": round(elapsed, 3),
+        "tiles_per_second": round(tiles / elapsed),
+        "peak_rss_mb": round(peak_rss_mb, 1),
+    }
+
+
+def main(argv=None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "--single":
+        print(json.dumps(run_single(int(argv[1]))))
+        return
+    sizes = [int(a) for a in argv] or DEFAULT_SIZES
+    print(f"{'size':>6} {'tiles':>10} {'seconds':>8} {'tiles/s':>10} {'peak RSS (MB)':>14}")
+    for size in sizes:
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_world_generation", "--single", str(size)],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(
+            f"{r['size']:>6} {r['tiles']:>10} {r['seconds']:>8} "
+            f"{r['tiles_per_second']:>10} {r['peak_rss_mb']:>14}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""Load generator: many concurrent players driving the real API.
+
+A uvicorn server is started on a temporary database seeded beforehand with
+a lazily generated world of ``--size`` tiles, ``--players`` players and
+``--npcs`` NPCs. Seeding writes the rows directly, so large worlds and
+populations take seconds rather than thousands of requests. Every seeded
+player starts on the tile of a companion NPC.
+
+Each virtual player runs its own asyncio loop for ``--duration`` seconds.
+On every iteration it picks an action from ``--mix`` at random and performs
+it, then waits a think time drawn from an exponential distribution with
+mean ``--think`` milliseconds. Players start spread over ``--ramp``
+seconds. The actions are:
+
+* ``move``: ``POST /players/{id}/move`` one random step.
+* ``talk``: ``POST /players/{id}/talk`` to the companion. A player away from
+  its companion steps back towards it instead.
+* ``attack``: ``POST /players/{id}/attack`` against a random NPC.
+* ``world``: ``GET /world`` for the player's fog of war, limited to the
+  chunks around it.
+* ``events``: ``GET /events``, the newest page.
+* ``create``: ``POST /players`` for a new player.
+
+For every endpoint the report lists the request count, the throughput, the
+error rate (4xx and 5xx responses and failed requests), the share of those
+that were server errors or failed requests, and latency percentiles. Some
+4xx are expected: a companion NPC may wander off before the player talks
+to it.
+Results are saved as JSON. ``--baseline`` prints them next to an earlier
+run's results.
+
+Usage::
+
+    python -m benchmarks.load_players [--players 200] [--duration 30] [--think 500]
+        [--mix move=50,world=15,events=10,talk=10,attack=5,create=10]
+        [--size 1024] [--npcs 5000] [--sim] [-o load.json] [--baseline old.json]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from app.world_map import chunk_coords
+
+from .server import running_server
+
+DEFAULT_MIX = "move=50,world=15,events=10,talk=10,attack=5,create=10"
+ACTIONS = ("move", "talk", "attack", "world", "events", "create")
+STEPS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+PERCENTILES = (50, 90, 95, 99)
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ACTIONS:
+            raise ValueError(f"Unknown action {name!r}; expected one of {ACTIONS}")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise ValueError("The action mix needs a positive weight")
+    return mix
+
+
+# -- seeding ---------------------------------------------------------------------------
+
+
+def seed_database(workdir: str, size: int, players: int, npcs: int, seed: int = 1) -> dict:
+    """Write a world, players and NPCs to ``workdir/game.db`` and return
+    what the virtual players need to know about them.
+    """
+    from sqlalchemy import create_engine, insert, select
+    from sqlalchemy.orm import sessionmaker
+
+    from app import models
+    from app.world_map import WorldMap, init_world
+
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'game.db')}")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    init_world(db, WorldMap(), seed=seed, size=size)
+    rng = random.Random(seed)
+    homes = [(rng.randrange(size), rng.randrange(size)) for _ in range(players)]
+    extra = [(rng.randrange(size), rng.randrange(size)) for _ in range(max(0, npcs - players))]
+
+    def npc_row(i, x, y):
+        return {
+            "name": f"seeded{i}",
+            "kindness": rng.uniform(-1, 1),
+            "greed": rng.uniform(-1, 1),
+            "curiosity": rng.uniform(-1, 1),
+            "x": x,
+            "y": y,
+        }
+
+    npc_table, player_table = models.NPC.__table__, models.Player.__table__
+    db.execute(insert(npc_table), [npc_row(i, x, y) for i, (x, y) in enumerate(homes + extra)])
+    db.execute(
+        insert(player_table), [{"name": f"load{i}", "x": x, "y": y} for i, (x, y) in enumerate(homes)]
+    )
+    db.commit()
+    companions = dict(db.execute(select(npc_table.c.name, npc_table.c.id)).all())
+    player_ids = dict(db.execute(select(player_table.c.name, player_table.c.id)).all())
+    npc_ids = list(companions.values())
+    db.close()
+    engine.dispose()
+    return {
+        "size": size,
+        "npc_ids": npc_ids,
+        "players": [
+            {"id": player_ids[f"load{i}"], "home": home, "companion": companions[f"seeded{i}"]}
+            for i, home in enumerate(homes)
+        ],
+    }
+
+
+# -- virtual players ----------------------------------------------------------------
+
+
+@dataclass
+class Stats:
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    server_errors: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    created: int = 0
+
+    def record(self, endpoint: str, seconds: float, status: Optional[int]) -> None:
+        """Record one request; ``status`` is None when it failed outright."""
+        self.latencies[endpoint].append(seconds)
+        if status is None or status >= 400:
+            self.errors[endpoint] += 1
+        if status is None or status >= 500:
+            self.server_errors[endpoint] += 1
+
+
+async def _request(http, stats: Stats, endpoint: str, method: str, url: str, **kwargs):
+    start = time.perf_counter()
+    try:
+        response = await http.request(method, url, **kwargs)
+    except httpx.HTTPError:
+        stats.record(endpoint, time.perf_counter() - start, None)
+        return None
+    stats.record(endpoint, time.perf_counter() - start, response.status_code)
+    return response
+
+
+async def _player(http, stats: Stats, world: dict, me: dict, mix, think: float, delay: float, deadline: float, rng):
+    await asyncio.sleep(delay)
+    names, weights = list(mix), list(mix.values())
+    x, y = me["home"]
+    chunk = chunk_coords(x, y)
+    while time.monotonic() < deadline:
+        action = rng.choices(names, weights)[0]
+        pid = me["id"]
+        if action == "talk" and (x, y) != me["home"]:
+            action = "home"
+        if action in ("move", "home"):
+            if action == "home":
+                hx, hy = me["home"]
+                dx, dy = (hx > x) - (hx < x), (hy > y) - (hy < y)
+            else:
+                dx, dy = rng.choice(STEPS)
+            r = await _request(
+                http, stats, "POST /players/{id}/move", "POST", f"/players/{pid}/move", json={"dx": dx, "dy": dy}
+            )
+            if r is not None and r.is_success:
+                body = r.json()
+                x, y, chunk = body["x"], body["y"], tuple(body["chunk"])
+        elif action == "talk":
+            await _request(
+                http, stats, "POST /players/{id}/talk", "POST", f"/players/{pid}/talk",
+                json={"npc_id": me["companion"]},
+            )
+        elif action == "attack":
+            await _request(
+                http, stats, "POST /players/{id}/attack", "POST", f"/players/{pid}/attack",
+                json={"target_id": rng.choice(world["npc_ids"])},
+            )
+        elif action == "world":
+            params = {"player_id": pid, "chunk_x": chunk[0], "chunk_y": chunk[1]}
+            await _request(http, stats, "GET /world", "GET", "/world", params=params)
+        elif action == "events":
+            await _request(http, stats, "GET /events", "GET", "/events", params={"limit": 50})
+        elif action == "create":
+            stats.created += 1
+            name = f"new{pid}-{stats.created}"
+            await _request(http, stats, "POST /players", "POST", "/players", json={"name": name})
+        if think:
+            await asyncio.sleep(rng.expovariate(1.0 / think))
+
+
+async def run_load(base: str, world: dict, mix, duration: float, think_ms: float, ramp: float) -> Tuple[Stats, float]:
+    stats = Stats()
+    players = world["players"]
+    limits = httpx.Limits(max_connections=len(players), max_keepalive_connections=len(players))
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=60) as http:
+        start = time.monotonic()
+        deadline = start + ramp + duration
+        await asyncio.gather(
+            *(
+                _player(
+                    http, stats, world, me, mix, think_ms / 1e3,
+                    ramp * i / len(players), deadline, random.Random(me["id"]),
+                )
+                for i, me in enumerate(players)
+            )
+        )
+        elapsed = time.monotonic() - start
+    return stats, elapsed
+
+
+# -- reporting -------------------------------------------------------------------------
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return float("nan")
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))]
+
+
+def summarise(stats: Stats, seconds: float) -> dict:
+    endpoints = {}
+    all_latencies: List[float] = []
+    for endpoint, latencies in sorted(stats.latencies.items()):
+        ordered = sorted(latencies)
+        all_latencies.extend(ordered)
+        endpoints[endpoint] = {
+            "requests": len(ordered),
+            "rps": len(ordered) / seconds,
+            "error_rate": stats.errors[endpoint] / len(ordered),
+            "server_error_rate": stats.server_errors[endpoint] / len(ordered),
+            **{f"p{q}_ms": _percentile(ordered, q) * 1e3 for q in PERCENTILES},
+            "max_ms": ordered[-1] * 1e3,
+        }
+    all_latencies.sort()
+    errors = sum(stats.errors.values())
+    server_errors = sum(stats.server_errors.values())
+    total = {
+        "requests": len(all_latencies),
+        "rps": len(all_latencies) / seconds,
+        "error_rate": errors / len(all_latencies) if all_latencies else 0.0,
+        "server_error_rate": server_errors / len(all_latencies) if all_latencies else 0.0,
+        **{f"p{q}_ms": _percentile(all_latencies, q) * 1e3 for q in PERCENTILES},
+    }
+    return {"endpoints": endpoints, "total": total}
+
+
+def _print_table(summary: dict, baseline: Optional[dict] = None) -> None:
+    print(
+        f"{'endpoint':<26} {'requests':>9} {'req/s':>8} {'errors':>7} {'5xx':>6} "
+        + " ".join(f"{f'p{q} ms':>8}" for q in PERCENTILES)
+    )
+    rows = list(summary["endpoints"].items()) + [("total", summary["total"])]
+    for endpoint, r in rows:
+        print(
+            f"{endpoint:<26} {r['requests']:>9} {r['rps']:>8.1f} {r['error_rate']:>7.1%} {r['server_error_rate']:>6.1%} "
+            + " ".join(f"{r[f'p{q}_ms']:>8.1f}" for q in PERCENTILES)
+        )
+        if baseline is not None:
+            old = baseline["total"] if endpoint == "total" else baseline["endpoints"].get(endpoint)
+            if old is not None:
+                print(
+                    f"{'  baseline':<26} {old['requests']:>9} {old['rps']:>8.1f} {old['error_rate']:>7.1%} {old['server_error_rate']:>6.1%} "
+                    + " ".join(f"{old[f'p{q}_ms']:>8.1f}" for q in PERCENTILES)
+                )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load_players", description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=100, help="concurrent virtual players")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load after ramp-up")
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds over which players start")
+    parser.add_argument("--think", type=float, default=500.0, help="mean think time in ms (0 for none)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="action weights, e.g. move=3,world=1")
+    parser.add_argument("--size", type=int, default=1024, help="world size in tiles")
+    parser.add_argument("--npcs", type=int, default=0, help="NPCs to seed (at least one per player)")
+    parser.add_argument("--sim", action="store_true", help="run the world simulation during the test")
+    parser.add_argument("-o", "--output", default="load-results.json")
+    parser.add_argument("--baseline", help="earlier results to print alongside")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    mix = parse_mix(args.mix)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        world = seed_database(tmp, args.size, args.players, args.npcs)
+        print(
+            f"Seeded a {args.size}x{args.size} world with {len(world['players'])} players and "
+            f"{len(world['npc_ids'])} NPCs in {time.perf_counter() - start:.1f}s"
+        )
+        env = {"RPG_SIM_ENABLED": "1" if args.sim else "0"}
+        with running_server(tmp, env) as base:
+            stats, seconds = asyncio.run(run_load(base, world, mix, args.duration, args.think, args.ramp))
+
+    summary = summarise(stats, seconds)
+    print(f"{args.players} players for {seconds:.1f}s (think {args.think:.0f} ms, mix {args.mix})")
+    _print_table(summary, baseline)
+    report = {
+        "created": datetime.utcnow().isoformat(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "seconds": seconds,
+        **summary,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
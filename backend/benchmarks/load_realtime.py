@@ -0,0 +1,147 @@
+"""Load test: polling after every action versus the SSE push channel.
+
+A real uvicorn server is started on a temporary database. ``CLIENTS``
+simulated players each make ``MOVES`` moves concurrently.
+
+* **poll** – after each move the client re‑fetches ``/world`` and
+  ``/events``, as the frontend used to.
+* **push** – each client holds one ``/stream`` connection open, scoped to
+  its own player, and applies the deltas it receives; moves are the only
+  requests.
+
+Players take a biased random walk so the discovered map keeps growing, as it
+does over a long session.
+
+The table reports requests, bytes received by clients and, for push, the
+delay between sending a move and the moving client seeing its
+``player_move`` delta (the whole action-to-update round trip).
+
+Usage::
+
+    python -m benchmarks.load_realtime [CLIENTS [MOVES]]
+"""
+
+import asyncio
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import httpx
+
+from .server import running_server
+
+DEFAULT_CLIENTS = 50
+DEFAULT_MOVES = 20
+MAP_SIZE = 256
+# Drifts towards +x/+y so most moves reveal a new tile
+STEPS = [(1, 0), (0, 1), (1, 0), (0, 1), (-1, 0), (0, -1)]
+
+
+async def _setup(base: str, clients: int):
+    async with httpx.AsyncClient(base_url=base) as http:
+        await http.post("/init", params={"seed": 1, "size": MAP_SIZE})
+        players = []
+        for i in range(clients):
+            r = await http.post("/players", json={"name": f"load{i}"})
+            players.append(r.json()["id"])
+        return players
+
+
+async def _run_poll(base: str, players, moves: int) -> dict:
+    totals = {"requests": 0, "bytes": 0}
+
+    async def player(http, pid):
+        rng = random.Random(pid)
+        for _ in range(moves):
+            dx, dy = rng.choice(STEPS)
+            r = await http.post(f"/players/{pid}/move", json={"dx": dx, "dy": dy})
+            totals["bytes"] += len(r.content)
+            for path in ("/world", "/events"):
+                r = await http.get(path)
+                totals["bytes"] += len(r.content)
+            totals["requests"] += 3
+
+    limits = httpx.Limits(max_connections=len(players))
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=60) as http:
+        start = time.perf_counter()
+        await asyncio.gather(*(player(http, pid) for pid in players))
+        totals["seconds"] = time.perf_counter() - start
+    return totals
+
+
+async def _run_push(base: str, players, moves: int) -> dict:
+    totals = {"requests": 0, "bytes": 0}
+    sent_at = {}  # (player id, move number) -> time the move request was sent
+    delays = []
+    ready = asyncio.Event()
+    connected = 0
+
+    async def listener(http, pid):
+        nonlocal connected
+        params = {"types": "player_move,tiles,events,hp", "player_id": pid}
+        async with http.stream("GET", "/stream", params=params) as r:
+            totals["requests"] += 1
+            connected += 1
+            if connected == len(players):
+                ready.set()
+            received = 0
+            async for line in r.aiter_lines():
+                totals["bytes"] += len(line) + 1
+                if not line.startswith("data: "):
+                    continue
+                frame = json.loads(line[6:])
+                if frame["type"] != "player_move":
+                    continue
+                received += 1
+                delays.append(time.perf_counter() - sent_at[(pid, received)])
+                if received == moves:
+                    return
+
+    async def player(http, pid):
+        await ready.wait()
+        rng = random.Random(pid)
+        for m in range(moves):
+            dx, dy = rng.choice(STEPS)
+            sent_at[(pid, m + 1)] = time.perf_counter()
+            r = await http.post(f"/players/{pid}/move", json={"dx": dx, "dy": dy})
+            totals["bytes"] += len(r.content)
+            totals["requests"] += 1
+
+    limits = httpx.Limits(max_connections=2 * len(players))
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=60) as http:
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(listener(http, pid) for pid in players),
+            *(player(http, pid) for pid in players),
+        )
+        totals["seconds"] = time.perf_counter() - start
+    if delays:
+        delays.sort()
+        totals["p50_ms"] = statistics.median(delays) * 1e3
+        totals["p95_ms"] = delays[int(len(delays) * 0.95) - 1] * 1e3
+    return totals
+
+
+def main(argv=None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    clients = int(argv[0]) if argv else DEFAULT_CLIENTS
+    moves = int(argv[1]) if len(argv) > 1 else DEFAULT_MOVES
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, running_server(tmp) as base:
+        for mode, run in (("poll", _run_poll), ("push", _run_push)):
+            players = asyncio.run(_setup(base, clients))
+            results[mode] = asyncio.run(run(base, players, moves))
+    print(f"{clients} clients x {moves} moves")
+    print(f"{'mode':>5} {'requests':>9} {'KiB':>9} {'seconds':>8} {'p50 ms':>7} {'p95 ms':>7}")
+    for mode, r in results.items():
+        print(
+            f"{mode:>5} {r['requests']:>9} {r['bytes'] / 1024:>9.0f} {r['seconds']:>8.2f} "
+            f"{r.get('p50_ms', float('nan')):>7.1f} {r.get('p95_ms', float('nan')):>7.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
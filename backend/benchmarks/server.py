@@ -0,0 +1,49 @@
+"""Run the API under uvicorn in a child process for load benchmarks.
+
+The server gets its own interpreter so the load generator does not compete
+with it for the GIL.
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def running_server(workdir: str, env=None, timeout: float = 30.0):
+    """Serve ``app.main:app`` with ``workdir`` as the working directory
+    (where it keeps ``game.db``) and yield its base URL. ``env`` adds
+    environment variables, e.g. ``RPG_*`` settings.
+    """
+    port = free_port()
+    child_env = dict(os.environ, PYTHONPATH=BACKEND_DIR, **(env or {}))
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir,
+        env=child_env,
+    )
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                break
+            except OSError:
+                if proc.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn did not start")
+                time.sleep(0.1)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        proc.terminate()
+        proc.wait(10)
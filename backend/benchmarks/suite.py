@@ -0,0 +1,539 @@
+"""Reproducible benchmark suite for the backend's hot paths.
+
+Runs a fixed set of cases and writes their timings to a JSON file that can
+be compared with an earlier run. Every case builds its own state in
+``setup``: temporary SQLite files, fixed seeds and ``GameRNG`` streams. Runs
+on the same machine therefore do the same work. Each case runs ``WARMUP``
+untimed iterations and then ``REPEAT`` timed ones. The results report the
+median, minimum and maximum in milliseconds per iteration.
+
+Cases, grouped by prefix:
+
+* ``world``: terrain generation, bulk generation of a whole world, and
+  materialising every chunk of a lazily generated one.
+* ``npc``: batched world ticks at several populations and per‑NPC
+  ``NPCAgent`` ticks.
+* ``combat``: ``CombatEncounter`` fights to completion and the vectorised
+  Monte Carlo simulation.
+* ``events``: direct inserts, the write‑behind sink, and a keyset page of a
+  large log.
+* ``path``: route and flow field queries.
+* ``api``: the main endpoints through FastAPI's ``TestClient`` against a
+  temporary SQLite database. The suite points ``RPG_DATABASE_URL`` there
+  before anything imports ``app``.
+
+``--quick`` skips the largest sizes. With ``--baseline`` every case that is
+also in the baseline is compared by its median. The command exits with
+status 1 if any case is more than ``--threshold`` (default 0.2, i.e. 20%)
+slower, so it can gate a deploy. ``--compare OLD NEW`` compares two result
+files without running anything.
+
+Usage::
+
+    python -m benchmarks.suite [-o results.json] [--quick] [-k PATTERN]
+    python -m benchmarks.suite --baseline main.json [--threshold 0.2]
+    python -m benchmarks.suite --compare main.json branch.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+RESULT_VERSION = 1
+WARMUP = 1
+REPEAT = 5
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_OUTPUT = "bench-results.json"
+
+
+@dataclass
+class Case:
+    """One benchmark. ``setup(tmp)`` returns the state ``run`` works on."""
+
+    name: str
+    setup: Callable[[str], object]
+    run: Callable[[object], None]
+    teardown: Callable[[object], None] = lambda state: None
+    quick: bool = True  # part of a --quick run
+
+
+# -- world ------------------------------------------------------------------------
+
+
+def _engine(tmp: str, name: str):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app import models
+
+    engine = create_engine(f"sqlite:///{os.path.join(tmp, name)}")
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(bind=engine)
+
+
+def _close(state) -> None:
+    db, engine = state[0], state[1]
+    db.close()
+    engine.dispose()
+
+
+def _terrain(size: int) -> Case:
+    from app.game_logic import world_generator
+
+    return Case(
+        f"world.terrain[{size}]",
+        lambda tmp: None,
+        lambda _state: world_generator.generate_terrain(1, 0, 0, size, size),
+        quick=size <= 256,
+    )
+
+
+def _generate(size: int) -> Case:
+    from app.game_logic import world_generator
+
+    def setup(tmp):
+        engine, Session = _engine(tmp, "world.db")
+        return Session(), engine
+
+    return Case(
+        f"world.generate[{size}]",
+        setup,
+        lambda state: world_generator.generate_world(state[0], seed=1, size=size),
+        _close,
+        quick=size <= 100,
+    )
+
+
+def _materialise(size: int) -> Case:
+    from app.world_map import WorldMap, init_world
+
+    def setup(tmp):
+        engine, Session = _engine(tmp, "lazy.db")
+        return Session(), engine
+
+    def run(state):
+        db = state[0]
+        world_map = WorldMap(cache_chunks=4096)
+        init_world(db, world_map, seed=1, size=size)
+        chunks = (size + world_map.chunk_size - 1) // world_map.chunk_size
+        for cx in range(chunks):
+            for cy in range(chunks):
+                world_map.ensure_chunk(db, cx, cy)
+
+    return Case(f"world.materialise[{size}]", setup, run, _close)
+
+
+# -- NPCs ------------------------------------------------------------------------------
+
+
+def _world_tick(population: int) -> Case:
+    from app.game_logic.rng import GameRNG
+    from app.simulation import WorldSimulation
+    from app.spatial_index import npc_index
+    from benchmarks.bench_simulation import populate
+
+    def setup(tmp):
+        engine, Session = _engine(tmp, "tick.db")
+        db = Session()
+        populate(db, population)
+        db.close()
+        npc_index.clear()
+        return None, engine, WorldSimulation(Session, rng=GameRNG(0))
+
+    def teardown(state):
+        state[1].dispose()
+
+    return Case(
+        f"npc.world_tick[{population}]",
+        setup,
+        lambda state: state[2].tick(),
+        teardown,
+        quick=population <= 1000,
+    )
+
+
+def _agent_ticks(count: int) -> Case:
+    from app import models
+    from app.game_logic.rng import GameRNG
+    from app.npc_agent import NPCAgent
+
+    def setup(tmp):
+        engine, Session = _engine(tmp, "agents.db")
+        db = Session()
+        rng = random.Random(0)
+        for i in range(count):
+            db.add(
+                models.NPC(
+                    name=f"npc{i}",
+                    kindness=rng.uniform(-1, 1),
+                    greed=rng.uniform(-1, 1),
+                    curiosity=rng.uniform(-1, 1),
+                    x=rng.randrange(1, 19),
+                    y=rng.randrange(1, 19),
+                )
+            )
+        db.add(models.Player(name="p", x=10, y=10))
+        db.commit()
+        return db, engine, db.query(models.NPC).all(), GameRNG(0)
+
+    def run(state):
+        db, _engine, npcs, rng = state
+        for npc in npcs:
+            NPCAgent(npc, db, rng).tick()
+
+    return Case(f"npc.agent_tick[{count}]", setup, run, _close)
+
+
+# -- combat --------------------------------------------------------------------------
+
+
+def _encounters(side: int, fights: int) -> Case:
+    from app.game_logic import combat
+    from app.game_logic.rng import GameRNG
+
+    def setup(_tmp):
+        return GameRNG(0)
+
+    def run(rng):
+        for _ in range(fights):
+            party = [combat.Combatant(f"p{i}", 30, True, None) for i in range(side)]
+            foes = [combat.Combatant(f"n{i}", 20, False, None) for i in range(side)]
+            encounter = combat.CombatEncounter(party + foes, rng)
+            while encounter.active:
+                encounter.next_turn()
+
+    return Case(f"combat.encounter[{side}v{side}x{fights}]", setup, run)
+
+
+def _simulate(n: int) -> Case:
+    from app.game_logic import combat_sim
+
+    return Case(
+        f"combat.simulate[{n}]",
+        lambda tmp: None,
+        lambda _state: combat_sim.simulate_encounters([30, 30], [20, 20, 20], n, seed=1),
+    )
+
+
+# -- events ----------------------------------------------------------------------------
+
+
+def _direct_inserts(count: int) -> Case:
+    from app import crud
+
+    def setup(tmp):
+        engine, Session = _engine(tmp, "events.db")
+        return Session(), engine
+
+    def run(state):
+        for i in range(count):
+            crud.create_event(state[0], f"event {i}")
+
+    return Case(f"events.insert_direct[{count}]", setup, run, _close)
+
+
+def _sink_inserts(count: int) -> Case:
+    from app.event_sink import EventSink
+
+    def setup(tmp):
+        engine, Session = _engine(tmp, "sink.db")
+        return None, engine, EventSink(Session, mode="async")
+
+    def run(state):
+        sink = state[2]
+        lines = [f"event {i}" for i in range(10)]
+        for _ in range(count // 10):
+            sink.emit_many(lines)
+        sink.flush()
+
+    def teardown(state):
+        state[2].stop()
+        state[1].dispose()
+
+    return Case(f"events.insert_sink[{count}]", setup, run, teardown)
+
+
+def _event_page(rows: int) -> Case:
+    from sqlalchemy import insert
+
+    from app import crud, models
+
+    def setup(tmp):
+        engine, Session = _engine(tmp, "log.db")
+        db = Session()
+        db.execute(
+            insert(models.Event.__table__),
+            [{"description": f"event {i}", "timestamp": "2024-01-01T00:00:00"} for i in range(rows)],
+        )
+        db.commit()
+        return db, engine
+
+    def run(state):
+        for _ in range(100):
+            crud.get_events(state[0], limit=100)
+
+    return Case(f"events.page[{rows}]", setup, run, _close, quick=rows <= 10_000)
+
+
+# -- pathfinding -------------------------------------------------------------------
+
+
+def _paths(size: int, queries: int) -> Case:
+    import numpy as np
+
+    from app.game_logic import world_generator
+    from app.game_logic.pathfinding import ArrayCostSource, HierarchicalPathfinder, terrain_costs
+
+    def setup(_tmp):
+        costs = terrain_costs(world_generator.generate_terrain(42, 0, 0, size, size))
+        land = np.argwhere(np.isfinite(costs))
+        rng = np.random.default_rng(0)
+        pairs = [tuple(tuple(int(v) for v in t) for t in rng.choice(land, 2)) for _ in range(queries)]
+        return ArrayCostSource(costs, 16), pairs
+
+    def run(state):
+        source, pairs = state
+        pathfinder = HierarchicalPathfinder(source, cache_size=0)
+        for start, goal in pairs:
+            pathfinder.find(start, goal)
+
+    return Case(f"path.hpa[{size}x{queries}]", setup, run, quick=size <= 256)
+
+
+def _flow_field(radius: int) -> Case:
+    from app.game_logic import world_generator
+    from app.game_logic.pathfinding import flow_field, terrain_costs
+
+    def setup(_tmp):
+        side = 2 * radius + 1
+        return terrain_costs(world_generator.generate_terrain(42, 500, 500, side, side))
+
+    return Case(
+        f"path.flow_field[{radius}]",
+        setup,
+        lambda costs: flow_field(costs, [(radius, radius)]),
+    )
+
+
+# -- API -------------------------------------------------------------------------------
+
+_api_state: Dict[str, object] = {}
+
+
+def _api():
+    """Start the app once for all API cases, on a world with 50 players."""
+    if not _api_state:
+        from fastapi.testclient import TestClient
+
+        from app.main import app
+
+        client = TestClient(app)
+        client.__enter__()
+        client.post("/init", params={"seed": 1, "size": 256})
+        players = [client.post("/players", json={"name": f"bench{i}"}).json()["id"] for i in range(50)]
+        _api_state.update(client=client, players=players, created=0)
+    return _api_state
+
+
+def _api_case(name: str, run: Callable[[dict], None]) -> Case:
+    return Case(f"api.{name}", lambda _tmp: _api(), run)
+
+
+def _api_create_players(state):
+    client = state["client"]
+    for _ in range(20):
+        state["created"] += 1
+        client.post("/players", json={"name": f"new{state['created']}"})
+
+
+def _api_moves(state):
+    client = state["client"]
+    for i, player_id in enumerate(state["players"]):
+        step = 1 if (i + state["created"]) % 2 else -1
+        client.post(f"/players/{player_id}/move", json={"dx": step, "dy": 0})
+
+
+def _api_world(state):
+    for _ in range(10):
+        state["client"].get("/world")
+
+
+def _api_player_world(state):
+    client = state["client"]
+    for player_id in state["players"][:10]:
+        client.get("/world", params={"player_id": player_id, "format": "binary"})
+
+
+def _api_events(state):
+    for _ in range(20):
+        state["client"].get("/events", params={"limit": 100})
+
+
+def _api_close() -> None:
+    if _api_state:
+        _api_state["client"].__exit__(None, None, None)
+        _api_state.clear()
+
+
+# -- running ---------------------------------------------------------------------------
+
+
+def cases() -> List[Case]:
+    return [
+        _terrain(256),
+        _terrain(1024),
+        _generate(100),
+        _generate(250),
+        _materialise(128),
+        _world_tick(1_000),
+        _world_tick(10_000),
+        _agent_ticks(100),
+        _encounters(1, 1000),
+        _encounters(4, 200),
+        _simulate(10_000),
+        _direct_inserts(200),
+        _sink_inserts(10_000),
+        _event_page(10_000),
+        _event_page(200_000),
+        _paths(256, 20),
+        _paths(1000, 20),
+        _flow_field(32),
+        _api_case("create_player", _api_create_players),
+        _api_case("move", _api_moves),
+        _api_case("world", _api_world),
+        _api_case("world_binary", _api_player_world),
+        _api_case("events", _api_events),
+    ]
+
+
+def measure(case: Case, tmp: str, repeat: int = REPEAT, warmup: int = WARMUP) -> dict:
+    state = case.setup(tmp)
+    try:
+        for _ in range(warmup):
+            case.run(state)
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            case.run(state)
+            runs.append((time.perf_counter() - start) * 1e3)
+    finally:
+        case.teardown(state)
+    return {
+        "median_ms": statistics.median(runs),
+        "min_ms": min(runs),
+        "max_ms": max(runs),
+        "runs_ms": runs,
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> List[dict]:
+    """Median of every case in both result sets, with ``regressed`` set
+    where the current run is more than ``threshold`` slower.
+    """
+    rows = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        ratio = result["median_ms"] / before["median_ms"] if before["median_ms"] else 1.0
+        rows.append(
+            {
+                "name": name,
+                "baseline_ms": before["median_ms"],
+                "current_ms": result["median_ms"],
+                "change": ratio - 1.0,
+                "regressed": ratio > 1.0 + threshold,
+            }
+        )
+    return rows
+
+
+def _print_comparison(rows: List[dict], threshold: float) -> int:
+    print(f"\n{'case':<36} {'baseline ms':>12} {'current ms':>11} {'change':>8}")
+    for r in rows:
+        flag = "  REGRESSION" if r["regressed"] else ""
+        print(
+            f"{r['name']:<36} {r['baseline_ms']:>12.2f} {r['current_ms']:>11.2f} "
+            f"{r['change']:>+8.1%}{flag}"
+        )
+    regressions = [r for r in rows if r["regressed"]]
+    if regressions:
+        print(f"\n{len(regressions)} case(s) more than {threshold:.0%} slower than the baseline")
+        return 1
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite", description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="where to write the results")
+    parser.add_argument("-k", dest="pattern", help="only run cases whose name contains PATTERN")
+    parser.add_argument("--quick", action="store_true", help="skip the largest sizes")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="timed runs per case")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    if args.compare:
+        old, new = (json.load(open(path)) for path in args.compare)
+        return _print_comparison(compare(old, new, args.threshold), args.threshold)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The app's own engines must not touch ./game.db
+        os.environ["RPG_DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'api.db')}"
+        selected = [
+            c
+            for c in cases()
+            if (not args.quick or c.quick) and (not args.pattern or args.pattern in c.name)
+        ]
+        results = {}
+        print(f"{'case':<36} {'median ms':>10} {'min ms':>9} {'max ms':>9}")
+        try:
+            for case in selected:
+                r = results[case.name] = measure(case, tmp, args.repeat)
+                print(f"{case.name:<36} {r['median_ms']:>10.2f} {r['min_ms']:>9.2f} {r['max_ms']:>9.2f}")
+        finally:
+            _api_close()
+
+    report = {
+        "version": RESULT_VERSION,
+        "created": datetime.utcnow().isoformat(),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            return _print_comparison(compare(json.load(f), report, args.threshold), args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Tests for large multi-party battles.
+
+A two-sided battle with the default targeting must replay a
+``CombatEncounter`` roll for roll. Battles with thousands of combatants and
+several sides must run to a single winner. Each targeting strategy must pick
+the right victim even when its index holds stale entries.
+"""
+
+from app.game_logic import combat
+from app.game_logic.battle import Battle, HighestThreat, LowestHP, Nearest
+from app.game_logic.rng import GameRNG
+
+
+def _party(prefix, hps, is_player, **kwargs):
+    return [combat.Combatant(f"{prefix}{i}", hp, is_player, None, **kwargs) for i, hp in enumerate(hps)]
+
+
+def test_default_targeting_replays_combat_encounter():
+    def sides():
+        return _party("P", [20, 16, 12, 10], True) + _party("N", [15, 15, 10, 8], False)
+
+    encounter = combat.CombatEncounter(sides(), GameRNG(5))
+    expected = []
+    while encounter.active:
+        result = encounter.next_turn()
+        if result:
+            expected.append(result[1])
+    battle = Battle(sides(), GameRNG(5))
+    assert battle.run() == expected
+    assert not battle.active
+    assert battle.winner == any(c.hp > 0 for c in battle.order if c.is_player)
+
+
+def test_thousands_of_combatants_on_three_sides():
+    rng = GameRNG(11)
+    fighters = []
+    for side in ("red", "green", "blue"):
+        fighters += _party(side, [rng.randint(5, 20) for _ in range(2000)], False, side=side)
+    fighters += _party("ghost", [0] * 1000, False, side="red")  # already down
+    battle = Battle(fighters, rng, targeting="lowest_hp")
+    log = battle.run()
+    assert len(log) == battle.turns > 6000
+    survivors = {c.side for c in fighters if c.hp > 0}
+    assert survivors == {battle.winner}
+    assert all(not line.startswith("ghost") for line in log)
+
+
+def test_targeting_strategies_skip_stale_entries():
+    weak, mid, strong = _party("N", [3, 7, 9], False)
+    attacker = combat.Combatant("Hero", 10, True, None)
+    lowest = LowestHP()
+    for slot, c in enumerate((weak, mid, strong)):
+        lowest.add(slot, c)
+    assert lowest.pick(attacker)[1] == 0
+    weak.hp = 0
+    lowest.remove(0, weak)
+    strong.hp = 2
+    lowest.hit(2, strong)
+    assert lowest.pick(attacker)[1] == 2
+
+    threat = HighestThreat()
+    for slot, c in enumerate((weak, mid, strong)):
+        threat.add(slot, c)
+    mid.threat = 4
+    threat.dealt(1, mid)
+    assert threat.pick(attacker)[1] == 1
+
+    nearest = Nearest(cell_size=4)
+    far, close = _party("N", [5, 5], False)
+    far.x, far.y, close.x, close.y = 90, 90, 30, 41
+    nearest.add(0, far)
+    nearest.add(1, close)
+    attacker.x, attacker.y = 0, 0
+    assert nearest.pick(attacker)[1] == 1
+    nearest.remove(1, close)
+    assert nearest.pick(attacker)[1] == 0
@@ -7,7 +7,13 @@ predictable results.
 
 import types
 
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from app import main
 from app.game_logic import combat
+from app.schemas import CombatSimulationRequest
 
 
 def test_initiative_order(monkeypatch):
@@ -28,3 +34,57 @@ def test_initiative_order(monkeypatch):
     # Player should act first because of higher initiative
     assert encounter.round_order[0].name == "Hero"
     assert encounter.round_order[1].name == "Goblin"
+
+
+def test_dead_combatants_are_skipped_without_recursion():
+    # A huge party where everyone but the last member is already down must
+    # not recurse once per dead combatant.
+    fallen = [combat.Combatant(name=f"Ghost{i}", hp=0, is_player=True, entity=None) for i in range(5000)]
+    hero = combat.Combatant(name="Hero", hp=30, is_player=True, entity=None)
+    goblin = combat.Combatant(name="Goblin", hp=5, is_player=False, entity=None)
+    encounter = combat.CombatEncounter(fallen + [hero, goblin])
+    actors = []
+    while encounter.active:
+        result = encounter.next_turn()
+        if result:
+            actors.append(result[0].name)
+    assert set(actors) <= {"Hero", "Goblin"}
+    assert goblin.hp <= 0 < hero.hp
+
+
+def test_simulator_matches_scalar_engine():
+    from app.game_logic.combat_sim import simulate_encounters
+    from app.game_logic.rng import GameRNG
+
+    rng = GameRNG(3)
+    wins = 0
+    trials = 4000
+    for _ in range(trials):
+        hero = combat.Combatant(name="Hero", hp=12, is_player=True, entity=None)
+        ogre = combat.Combatant(name="Ogre", hp=15, is_player=False, entity=None)
+        encounter = combat.CombatEncounter([hero, ogre], rng)
+        while encounter.active:
+            encounter.next_turn()
+        wins += hero.hp > 0
+
+    result = simulate_encounters([12], [15], 100_000, seed=3)
+    assert result.unfinished == 0
+    assert result.player_wins + result.npc_wins == result.encounters
+    # Standard error of the scalar estimate is under 0.008
+    assert abs(result.player_win_rate - wins / trials) < 0.035
+    assert simulate_encounters([12], [15], 1000, seed=9).as_dict() == simulate_encounters(
+        [12], [15], 1000, seed=9
+    ).as_dict()
+
+
+def test_simulation_endpoint_is_capped():
+    assert CombatSimulationRequest(player_hp=[12], npc_hp=[15], encounters=10_000)
+    with pytest.raises(ValidationError):
+        CombatSimulationRequest(player_hp=[12], npc_hp=[15], encounters=10_001)
+
+    client = TestClient(main.app)
+    ok = client.post("/simulate/combat", json={"player_hp": [12], "npc_hp": [15], "encounters": 10})
+    assert ok.status_code == 200
+    for player_hp in ([-5], [0], [1001], [12] * 33):
+        response = client.post("/simulate/combat", json={"player_hp": player_hp, "npc_hp": [15]})
+        assert response.status_code == 422, player_hp
@@ -0,0 +1,59 @@
+"""Tests for the database layer.
+
+SQLite connections from both engines must come up in WAL mode, sync URLs must
+map onto the matching async drivers, and the async CRUD helpers must return
+objects that can be serialised without lazy loading.
+"""
+
+import asyncio
+import os
+import tempfile
+
+from sqlalchemy import insert, text
+
+from app import crud_async, models, schemas
+from app.database import async_url, make_async_engine, make_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+
+def test_async_url_picks_driver():
+    assert async_url("sqlite:///./game.db") == "sqlite+aiosqlite:///./game.db"
+    assert async_url("postgresql://u:pw@db/rpg") == "postgresql+asyncpg://u:pw@db/rpg"
+    assert async_url("postgresql+psycopg2://u@db/rpg") == "postgresql+asyncpg://u@db/rpg"
+
+
+def test_sqlite_pragmas_and_async_crud():
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'test.db')}"
+        engine = make_engine(url)
+        models.Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+            conn.execute(
+                insert(models.Event.__table__),
+                [{"description": f"event {i}", "timestamp": ""} for i in range(30)],
+            )
+
+        async def scenario():
+            async_engine = make_async_engine(url)
+            Session = async_sessionmaker(async_engine, expire_on_commit=False)
+            async with Session() as db:
+                mode = (await db.execute(text("PRAGMA journal_mode"))).scalar()
+                player = await crud_async.create_player(db, "Hero")
+                assert schemas.Player.model_validate(player).inventory_items == []
+            async with Session() as db:
+                loaded = await crud_async.get_player(db, player.id)
+                assert schemas.Player.model_validate(loaded).name == "Hero"
+                assert (await crud_async.get_player_by_name(db, "Hero")).id == player.id
+                page = await crud_async.get_events(db, since_id=10, limit=5)
+                batches = [b async for b in crud_async.iter_events(db, 20, batch_size=4)]
+            await async_engine.dispose()
+            return mode, page, batches
+
+        mode, page, batches = asyncio.run(scenario())
+        engine.dispose()
+        assert mode == "wal"
+        assert [e.id for e in page] == [11, 12, 13, 14, 15]
+        assert [len(b) for b in batches] == [4, 4, 2]
+        assert batches[0][0][0] == 21
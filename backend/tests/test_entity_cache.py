@@ -0,0 +1,116 @@
+"""Tests for the write‑through player/NPC cache.
+
+Cached entities must be served without a query, stay correct after ORM
+updates, ignore rolled back changes (but keep those made before a savepoint
+that was rolled back) and respect the size bound. A session committing
+after a world tick changed the same entity must not bring back the values
+it read before the tick.
+"""
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.database import make_engine
+from app.entity_cache import EntityCache, entity_cache
+from app.simulation import apply_tick
+
+
+def _setup(capacity=10):
+    engine = create_engine("sqlite:///:memory:")
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    cache = EntityCache(capacity)
+    cache.install(Session)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    db = Session()
+    db.add_all([models.Player(name="hero"), models.NPC(name="Grom", hp=10)])
+    db.commit()
+    db.close()
+    return Session, cache, statements
+
+
+def test_hit_needs_no_query_and_writes_through():
+    Session, cache, statements = _setup()
+    assert cache.stats()["size"] == 2  # written through on insert
+
+    statements.clear()
+    db = Session()
+    npc = cache.get(db, models.NPC, 1)
+    assert npc.name == "Grom" and npc.hp == 10
+    assert statements == []
+    npc.hp = 4
+    db.commit()
+    assert [s.split()[0] for s in statements] == ["UPDATE"]
+    db.close()
+
+    db = Session()
+    assert cache.get(db, models.NPC, 1).hp == 4
+    cache.get(db, models.NPC, 1).hp = 0
+    db.rollback()
+    db.close()
+    assert cache.get(Session(), models.NPC, 1).hp == 4
+    assert cache.stats()["misses"] == 0
+
+
+def test_miss_eviction_and_invalidation():
+    Session, cache, statements = _setup(capacity=1)
+    assert cache.stats()["evictions"] == 1  # two inserts, room for one
+    cache.clear()
+    db = Session()
+    assert cache.get(db, models.Player, 1).name == "hero"
+    assert [n.name for n in cache.get_many(db, models.NPC, [1, 99])] == ["Grom"]
+    stats = cache.stats()
+    assert (stats["misses"], stats["evictions"], stats["size"]) == (3, 2, 1)
+
+    cache.invalidate(models.NPC, [1])
+    assert cache.stats()["size"] == 0
+    assert cache.get(db, models.Player, 2) is None
+
+
+def test_savepoint_rollback_keeps_earlier_changes():
+    Session, cache, _ = _setup()
+    db = Session()
+    cache.get(db, models.Player, 1).hp = 7
+    db.flush()
+    # As when two requests materialise the same chunk at once
+    with pytest.raises(IntegrityError):
+        with db.begin_nested():
+            cache.get(db, models.NPC, 1).hp = 1
+            db.add(models.Player(name="hero"))
+    db.commit()
+    db.close()
+    db = Session()
+    assert cache.get(db, models.Player, 1).hp == 7
+    assert cache.get(db, models.NPC, 1).hp == 10
+
+
+def test_commit_after_a_tick_keeps_its_damage(tmp_path):
+    # apply_tick invalidates the shared cache, which every session writes to
+    engine = make_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    entity_cache.clear()
+    db = Session()
+    db.add(models.Player(name="hero", hp=20))
+    db.commit()
+    db.close()
+
+    request = Session()
+    player = entity_cache.get(request, models.Player, 1)  # read before the tick
+    tick = Session()
+    apply_tick(tick, [], {1: 3}, [])
+    tick.close()
+    player.x = 1  # the request moves the player and commits after the tick
+    request.commit()
+    request.close()
+
+    db = Session()
+    player = entity_cache.get(db, models.Player, 1)
+    assert (player.x, player.hp) == (1, 17)
+    db.close()
+    entity_cache.clear()
+    engine.dispose()
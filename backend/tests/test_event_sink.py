@@ -0,0 +1,68 @@
+"""Tests for the write‑behind event sink.
+
+Every durability mode must end up with the same rows in the same order; the
+modes only differ in when the rows reach the database.
+"""
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models
+from app.event_sink import EventSink
+
+
+def _session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    models.Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def _descriptions(factory):
+    db = factory()
+    try:
+        return [e.description for e in db.query(models.Event).order_by(models.Event.id)]
+    finally:
+        db.close()
+
+
+def test_modes_write_all_lines_in_order():
+    lines = [f"line {i}" for i in range(25)]
+    for mode in ("sync", "batched", "async"):
+        factory = _session_factory()
+        sink = EventSink(factory, mode=mode, batch_size=10, flush_interval=0.01)
+        sink.emit_many(lines[:20])
+        for line in lines[20:]:
+            sink.emit(line)
+        if mode != "async":
+            assert _descriptions(factory) == lines
+        assert sink.flush()
+        sink.stop()
+        assert _descriptions(factory) == lines
+        stats = sink.stats()
+        assert stats["enqueued"] == stats["written"] == len(lines)
+        assert stats["queue_depth"] == 0
+
+
+def test_async_lines_are_batched():
+    factory = _session_factory()
+    # A long interval keeps partial batches in the queue until flushed
+    sink = EventSink(factory, mode="async", batch_size=100, flush_interval=10)
+    sink.emit_many(f"line {i}" for i in range(30))
+    assert sink.queue_depth == 30
+    assert _descriptions(factory) == []
+    assert sink.flush()
+    assert len(_descriptions(factory)) == 30
+    assert sink.stats()["flushes"] == 1
+    sink.stop()
+
+
+def test_stop_writes_queued_lines():
+    factory = _session_factory()
+    sink = EventSink(factory, mode="async", batch_size=100, flush_interval=10)
+    sink.emit("last words")
+    sink.stop()
+    assert not sink.running
+    assert _descriptions(factory) == ["last words"]
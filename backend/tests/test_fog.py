@@ -0,0 +1,124 @@
+"""Tests for the per‑player fog of war.
+
+Discoveries must be private to each player, survive a restart through the
+``player_fog`` table and encode to bitmaps whose terrain matches the map.
+A discovery rolled back with its request must leave no trace in memory, and
+two first discoveries in a chunk made at once must both be kept.
+"""
+
+import asyncio
+import base64
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.database import make_async_engine
+from app.fog import FogOfWar, UNKNOWN_TERRAIN, bitset_size
+from app.unit_of_work import unit_of_work
+from app.world_map import WorldMap, init_world, CHUNK_SIZE
+
+
+def _world():
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    world_map = WorldMap()
+    init_world(db, world_map, seed=5, size=40)
+    for name in ("a", "b"):
+        db.add(models.Player(name=name))
+    db.commit()
+    return db, world_map
+
+
+def test_discovery_is_per_player_and_persisted():
+    db, world_map = _world()
+    fog = FogOfWar(world_map)
+    assert fog.discover(db, 1, 3, 20)
+    assert not fog.discover(db, 1, 3, 20)
+    assert fog.discover(db, 1, 4, 20)
+    assert not fog.discover(db, 1, 40, 0)  # off the map
+    assert fog.is_discovered(db, 1, 3, 20)
+    assert not fog.is_discovered(db, 2, 3, 20)
+    assert not fog.is_discovered(db, 1, 3, 21)
+
+    # One row per player and chunk, reloaded by a fresh cache
+    assert db.query(models.PlayerFog).count() == 1
+    reloaded = FogOfWar(world_map)
+    assert reloaded.is_discovered(db, 1, 4, 20)
+    assert reloaded.stats() == {"players": 1, "chunks": 1, "bytes": bitset_size(CHUNK_SIZE)}
+
+
+def test_concurrent_first_discoveries_share_the_row():
+    db, world_map = _world()
+    fog = FogOfWar(world_map)
+    other = FogOfWar(world_map)  # the cache as another request left it
+    assert not fog.is_discovered(db, 1, 3, 20) and not other.is_discovered(db, 1, 3, 20)
+    assert fog.discover(db, 1, 3, 20)
+    # Both saw no row for the chunk, so this insert fails on the unique key
+    assert other.discover(db, 1, 4, 20)
+
+    assert db.query(models.PlayerFog).count() == 1
+    reloaded = FogOfWar(world_map)
+    assert reloaded.is_discovered(db, 1, 3, 20) and reloaded.is_discovered(db, 1, 4, 20)
+
+
+def test_encoded_chunk_matches_terrain():
+    db, world_map = _world()
+    fog = FogOfWar(world_map)
+    tiles = [(33, 17), (39, 31), (32, 16)]  # the chunk is clipped to 8x16 tiles
+    for x, y in tiles:
+        fog.discover(db, 2, x, y)
+
+    (entry,) = fog.encode(db, 2)
+    assert (entry["cx"], entry["cy"]) == (2, 1)
+    bits = np.unpackbits(
+        np.frombuffer(base64.b64decode(entry["bits"]), dtype=np.uint8), bitorder="little"
+    )
+    terrain = np.frombuffer(base64.b64decode(entry["terrain"]), dtype=np.uint8)
+    chunk = world_map.ensure_chunk(db, 2, 1)
+    seen = set()
+    for i in np.flatnonzero(bits):
+        x, y = 32 + i % CHUNK_SIZE, 16 + i // CHUNK_SIZE
+        seen.add((x, y))
+        assert terrain[i] == chunk.terrain[x - 32, y - 16]
+    assert seen == set(tiles)
+    assert (terrain[bits[: CHUNK_SIZE * CHUNK_SIZE] == 0] == UNKNOWN_TERRAIN).all()
+
+    assert fog.encode(db, 2, rect=(0, 0, 16, 16)) == []
+
+
+def test_rolled_back_discovery_is_forgotten(tmp_path):
+    engine = make_async_engine(f"sqlite:///{tmp_path / 'fog.db'}")
+    Session = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    world_map = WorldMap()
+    fog = FogOfWar(world_map)
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(models.Base.metadata.create_all)
+        async with Session() as db:
+            await db.run_sync(lambda s: init_world(s, world_map, seed=5, size=40))
+            db.add(models.Player(name="a"))
+            await db.commit()
+            with pytest.raises(RuntimeError):
+                async with unit_of_work(db):
+                    await db.run_sync(world_map.discover, 3, 20)
+                    await db.run_sync(fog.discover, 1, 3, 20)
+                    raise RuntimeError
+            assert not world_map.ensure_chunk(None, 0, 1).discovered[3, 4]
+            assert not await db.run_sync(fog.is_discovered, 1, 3, 20)
+            # The chunk's first row was rolled back, so this must insert it
+            async with unit_of_work(db):
+                assert await db.run_sync(world_map.discover, 3, 20)
+                assert await db.run_sync(fog.discover, 1, 4, 20)
+            assert world_map.ensure_chunk(None, 0, 1).discovered[3, 4]
+            rows = await db.run_sync(lambda s: s.query(models.PlayerFog).count())
+        await engine.dispose()
+        return rows
+
+    assert asyncio.run(scenario()) == 1
+    assert fog.is_discovered(None, 1, 4, 20) and not fog.is_discovered(None, 1, 3, 20)
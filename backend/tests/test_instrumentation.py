@@ -0,0 +1,82 @@
+"""Tests for the instrumentation module.
+
+Decorated functions must be timed (sync and async alike), requests must be
+counted per route with the SQL statements they ran, ``X-Profile`` must return
+a profile instead of the body, and the text output must follow the
+Prometheus exposition format.
+"""
+
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app.instrumentation import (
+    HOT_PATH_SECONDS,
+    REQUEST_STATEMENTS,
+    REQUESTS,
+    InstrumentationMiddleware,
+    Metrics,
+    count_statements,
+    timed,
+)
+
+
+def test_timed_records_sync_and_async_calls():
+    @timed("test.sync")
+    def double(x):
+        return 2 * x
+
+    @timed("test.async")
+    async def triple(x):
+        return 3 * x
+
+    assert double(2) == 4 and double.__name__ == "double"
+    assert asyncio.run(triple(2)) == 6
+    assert HOT_PATH_SECONDS.labels("test.sync").count == 1
+    assert HOT_PATH_SECONDS.labels("test.async").count == 1
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Metrics()
+    latency = registry.histogram("demo_seconds", "Demo.", ["kind"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        latency.labels('a"b').observe(value)
+    registry.counter("demo_total", "Demo.").labels().inc(3)
+    registry.collector("demo", lambda: {"size": 7, "mode": "async", "running": True})
+    lines = registry.render().splitlines()
+    assert '# TYPE demo_seconds histogram' in lines
+    assert 'demo_seconds_bucket{kind="a\\"b",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{kind="a\\"b",le="1.0"} 3' in lines
+    assert 'demo_seconds_bucket{kind="a\\"b",le="+Inf"} 4' in lines
+    assert 'demo_seconds_count{kind="a\\"b"} 4' in lines
+    assert "demo_total 3" in lines
+    assert "rpg_demo_size 7" in lines
+    assert not any("mode" in line or "running" in line for line in lines)
+
+
+def test_middleware_counts_statements_per_route_and_profiles():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    count_statements(engine)
+    app = FastAPI()
+
+    @app.get("/items/{n}")
+    def items(n: int):
+        with engine.connect() as conn:
+            return [conn.execute(text("SELECT :n"), {"n": i}).scalar() for i in range(n)]
+
+    app.add_middleware(InstrumentationMiddleware, profiling=True)
+    client = TestClient(app)
+    response = client.get("/items/3")
+    assert response.json() == [0, 1, 2]
+    assert response.headers["x-sql-statements"] == "3"
+    client.get("/items/1")
+    assert REQUESTS.labels("GET", "/items/{n}", "200").value == 2
+    assert REQUEST_STATEMENTS.labels("GET", "/items/{n}").sum == 4
+
+    profiled = client.get("/items/2", headers={"X-Profile": "1"})
+    assert profiled.status_code == 200
+    assert profiled.headers["content-type"].startswith("text/plain")
+    assert "cumulative" in profiled.text
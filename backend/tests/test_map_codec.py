@@ -0,0 +1,84 @@
+"""Tests for the binary map payload.
+
+A payload must decode back to the discovered tiles and their terrain, and a
+delta against a version token must hold only the chunks changed after it.
+"""
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import map_codec, models
+from app.fog import FogOfWar, UNKNOWN_TERRAIN
+from app.game_logic.world_generator import TERRAINS
+from app.world_map import WorldMap, init_world, CHUNK_SIZE
+
+
+def _world():
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    world_map = WorldMap()
+    init_world(db, world_map, seed=9, size=40)
+    return db, world_map
+
+
+def _payload(db, world_map, since=None):
+    token = world_map.version_token()
+    version = world_map.parse_version_token(since)
+    regions = map_codec.world_regions(db, world_map, since=version)
+    data = map_codec.encode(
+        regions, world_map.size, world_map.chunk_size, TERRAINS, token, delta=version is not None
+    )
+    return map_codec.decode(data)
+
+
+def test_round_trip_matches_map():
+    db, world_map = _world()
+    tiles = {(0, 0), (1, 0), (39, 39), (20, 5)}
+    for x, y in tiles:
+        world_map.discover(db, x, y)
+
+    payload = _payload(db, world_map)
+    assert payload["size"] == 40 and payload["palette"] == TERRAINS and not payload["delta"]
+    seen = set()
+    for region in payload["regions"]:
+        chunk = world_map.ensure_chunk(db, region["cx"], region["cy"])
+        assert region["discovered"].shape == chunk.terrain.T.shape
+        for ly, lx in zip(*np.nonzero(region["discovered"])):
+            seen.add((chunk.x0 + lx, chunk.y0 + ly))
+            assert region["terrain"][ly, lx] == chunk.terrain[lx, ly]
+        assert (region["terrain"][~region["discovered"]] == UNKNOWN_TERRAIN).all()
+    assert seen == tiles
+
+
+def test_delta_holds_only_changed_chunks():
+    db, world_map = _world()
+    world_map.discover(db, 0, 0)
+    world_map.discover(db, 20, 20)
+    token = _payload(db, world_map)["version"]
+
+    assert _payload(db, world_map, since=token)["regions"] == []
+    world_map.discover(db, 21, 20)
+    delta = _payload(db, world_map, since=token)
+    assert delta["delta"]
+    assert [(r["cx"], r["cy"]) for r in delta["regions"]] == [(1, 1)]
+
+    # A token from another epoch gets the full map
+    assert len(_payload(db, world_map, since="stale.1")["regions"]) == 2
+
+
+def test_player_regions_use_fog():
+    db, world_map = _world()
+    db.add(models.Player(name="a"))
+    db.commit()
+    fog = FogOfWar(world_map)
+    fog.discover(db, 1, 5, 5)
+    version = world_map.version
+    fog.discover(db, 1, 35, 35)
+
+    regions = map_codec.player_regions(db, fog, 1)
+    assert [(r.cx, r.cy) for r in regions] == [(0, 0), (2, 2)]
+    assert regions[1].discovered.shape == (40 - 2 * CHUNK_SIZE, 40 - 2 * CHUNK_SIZE)
+    assert regions[0].discovered.sum() == 1 and regions[0].discovered[5, 5]
+    assert [(r.cx, r.cy) for r in map_codec.player_regions(db, fog, 1, since=version)] == [(2, 2)]
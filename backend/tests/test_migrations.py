@@ -0,0 +1,116 @@
+"""Tests for schema migrations.
+
+A database created by the first release, before migrations existed, must
+be upgraded in place: duplicate tiles must be merged, and the new indexes,
+tables and the game clock created; upgrading again must do nothing. A new database must get the
+current schema directly. Either way, the hot queries must be served by
+index lookups.
+"""
+
+from sqlalchemy import (
+    Boolean, Column, Float, ForeignKey, Integer, MetaData, String, Table, inspect, insert, select
+)
+
+from app import migrations, models
+from app.database import make_engine
+
+
+# The tables of the first release, before chunks, fog of war and worlds
+_baseline = MetaData()
+Table(
+    "locations", _baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("x", Integer, index=True),
+    Column("y", Integer, index=True),
+    Column("terrain", String),
+    Column("discovered", Boolean),
+)
+Table(
+    "players", _baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, unique=True, index=True),
+    *(Column(name, Integer) for name in ("hp", "hunger", "thirst", "fatigue", "x", "y")),
+)
+Table(
+    "npcs", _baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, index=True),
+    Column("hp", Integer),
+    *(Column(name, Float) for name in ("kindness", "greed", "curiosity")),
+    Column("x", Integer),
+    Column("y", Integer),
+    Column("location_id", Integer, ForeignKey("locations.id"), nullable=True),
+)
+Table(
+    "items", _baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, unique=True, index=True),
+    Column("description", String),
+    Column("stackable", Boolean),
+)
+Table(
+    "inventory_items", _baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("owner_id", Integer, ForeignKey("players.id")),
+    Column("item_id", Integer, ForeignKey("items.id")),
+    Column("quantity", Integer),
+)
+Table(
+    "events", _baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("description", String),
+    Column("timestamp", String),
+)
+
+
+def _legacy_database(path):
+    """A database created by the first release, with two rows for one tile."""
+    engine = make_engine(f"sqlite:///{path}")
+    _baseline.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(_baseline.tables["locations"]),
+            [{"x": x, "y": y, "terrain": "forest"} for x, y in ((1, 2), (1, 2), (5, 5))],
+        )
+        conn.execute(insert(_baseline.tables["npcs"]).values(name="Squatter", location_id=2))
+    return engine
+
+
+def _indexes(engine, table):
+    return {i["name"]: (tuple(i["column_names"]), bool(i["unique"])) for i in inspect(engine).get_indexes(table)}
+
+
+def test_legacy_database_is_upgraded_in_place(tmp_path):
+    engine = _legacy_database(tmp_path / "old.db")
+    assert "get_npcs_at" in migrations.full_scans(engine)
+
+    assert migrations.upgrade(engine) == 1
+    models.Base.metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        assert migrations.current_version(conn) == migrations.HEAD
+        assert conn.execute(select(models.Location.id).order_by(models.Location.id)).scalars().all() == [1, 3]
+        assert conn.execute(select(models.NPC.location_id)).scalar() == 1
+    locations = _indexes(engine, "locations")
+    assert locations["uq_locations_xy"] == (("x", "y"), True)
+    assert "ix_locations_x" not in locations and "ix_locations_y" not in locations
+    assert _indexes(engine, "npcs")["ix_npcs_xy"] == (("x", "y"), False)
+    assert _indexes(engine, "events")["ix_events_timestamp"] == (("timestamp",), False)
+    assert "game_time" in {c["name"] for c in inspect(engine).get_columns("worlds")}
+    assert set(models.Base.metadata.tables) <= set(inspect(engine).get_table_names())
+    assert migrations.full_scans(engine) == {}
+
+    assert migrations.upgrade(engine) == migrations.HEAD
+    engine.dispose()
+
+
+def test_new_database_gets_current_schema_and_indexed_plans(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'new.db'}")
+    assert migrations.upgrade(engine) == migrations.HEAD
+    assert set(models.Base.metadata.tables) <= set(inspect(engine).get_table_names())
+    with engine.connect() as conn:
+        plans = {name: migrations.explain(conn, stmt) for name, stmt in migrations.hot_queries().items()}
+    assert "USING INDEX uq_locations_xy (x=? AND y=?)" in plans["set_location_discovered"][0]
+    assert "ix_npcs_xy" in plans["get_npcs_at"][0]
+    assert "ix_events_timestamp" in plans["events_between"][0]
+    assert migrations.full_scans(engine) == {}
+    engine.dispose()
@@ -0,0 +1,34 @@
+"""Tests for the vectorised NPC decision engine.
+
+The engine must pick exactly the same action as ``NPCAgent.decide`` for every
+NPC when both are given the same random rolls.
+"""
+
+import numpy as np
+
+from app import models
+from app.npc_agent import ACTIONS, NPCAgent
+from app.npc_decision import DecisionEngine
+
+
+def test_engine_matches_scalar_decide():
+    rng = np.random.default_rng(2024)
+    n = 5000
+    traits = rng.uniform(-1, 1, size=(n, 3))
+    present = rng.random(n) < 0.5
+    rolls = rng.random(n)
+
+    engine = DecisionEngine(np.arange(n), traits[:, 0], traits[:, 1], traits[:, 2])
+    vectorised = engine.decide(present, rolls)
+
+    for i in range(n):
+        npc = models.NPC(name="n", kindness=traits[i, 0], greed=traits[i, 1], curiosity=traits[i, 2])
+        observation = {"players": ["someone"] if present[i] else []}
+        assert NPCAgent(npc, db=None).decide(observation, roll=rolls[i]) == ACTIONS[vectorised[i]]
+    # Every action should occur with a population this size
+    assert set(vectorised.tolist()) == set(range(len(ACTIONS)))
+
+
+def test_roll_at_upper_bound_picks_last_eligible():
+    engine = DecisionEngine([1], [-0.9], [-0.9], [0.9])
+    assert ACTIONS[engine.decide(np.array([True]), np.array([np.nextafter(1.0, 0)]))[0]] == "trade"
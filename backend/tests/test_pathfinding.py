@@ -0,0 +1,159 @@
+"""Tests for the pathfinding service.
+
+Jump point search must find routes as cheap as A* on uniform grids, the
+hierarchical search must find valid, near‑optimal routes wherever A* finds
+one, and cached routes must be dropped when the terrain they cross changes.
+Flow fields must agree with Dijkstra and lead every NPC to the goal.
+"""
+
+import math
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.game_logic import world_generator
+from app.game_logic.pathfinding import (
+    INF,
+    ArrayCostSource,
+    Grid,
+    HierarchicalPathfinder,
+    astar,
+    distances,
+    flow_field,
+    jps,
+    path_cost,
+    terrain_costs,
+)
+from app.navigation import Navigator
+from app.world_map import WorldMap, init_world
+
+
+def _valid(grid: Grid, path, start, goal) -> bool:
+    if path[0] != start or path[-1] != goal:
+        return False
+    for (x0, y0), (x1, y1) in zip(path, path[1:]):
+        if max(abs(x1 - x0), abs(y1 - y0)) != 1 or not grid.passable(x1, y1):
+            return False
+        if x0 != x1 and y0 != y1 and not (grid.passable(x1, y0) and grid.passable(x0, y1)):
+            return False  # cut a corner
+    return True
+
+
+def test_jps_matches_astar_on_uniform_grids():
+    rng = np.random.default_rng(7)
+    for _ in range(50):
+        costs = np.where(rng.random((30, 30)) < 0.3, INF, 1.0)
+        grid = Grid(costs)
+        open_tiles = np.argwhere(costs == 1.0)
+        start, goal = (tuple(int(v) for v in t) for t in rng.choice(open_tiles, 2))
+        expected = astar(grid, start, goal)
+        found = jps(grid, start, goal)
+        assert (expected is None) == (found is None)
+        if found is not None:
+            assert _valid(grid, found, start, goal)
+            assert math.isclose(path_cost(grid, found), path_cost(grid, expected))
+
+
+def test_hierarchical_routes_are_valid_and_near_optimal():
+    costs = terrain_costs(world_generator.generate_terrain(3, 0, 0, 96, 96))
+    grid = Grid(costs)
+    pathfinder = HierarchicalPathfinder(ArrayCostSource(costs, 16))
+    rng = np.random.default_rng(1)
+    open_tiles = np.argwhere(np.isfinite(costs))
+    for _ in range(40):
+        start, goal = (tuple(int(v) for v in t) for t in rng.choice(open_tiles, 2))
+        expected = astar(grid, start, goal)
+        found = pathfinder.find(start, goal)
+        assert (expected is None) == (found is None)
+        if found is not None:
+            assert _valid(grid, found, start, goal)
+            assert path_cost(grid, found) <= 1.5 * path_cost(grid, expected) + 1e-9
+
+
+def test_route_cache_hits_and_invalidation():
+    costs = np.ones((64, 64))
+    pathfinder = HierarchicalPathfinder(ArrayCostSource(costs, 16))
+    first = pathfinder.find((1, 1), (60, 60))
+    assert pathfinder.find((2, 2), (60, 60))[-1] == (60, 60)  # same start cluster
+    assert pathfinder.stats()["hits"] == 1
+    assert path_cost(Grid(costs), first) == path_cost(Grid(costs), pathfinder.find((1, 1), (60, 60)))
+
+    # Wall off the goal's cluster except for a gap on its top edge
+    costs[48:64, 48] = INF
+    costs[48, 48:64] = INF
+    costs[56, 48] = 1.0
+    pathfinder.invalidate(3, 3)
+    pathfinder.invalidate(3, 2)
+    assert pathfinder.stats()["invalidations"] >= 1
+    rerouted = pathfinder.find((1, 1), (60, 60))
+    assert _valid(Grid(costs), rerouted, (1, 1), (60, 60))
+    assert (56, 48) in rerouted
+
+
+def test_navigator_follows_the_world_terrain():
+    engine = create_engine("sqlite:///:memory:")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    world_map = WorldMap()
+    navigator = Navigator(world_map)
+    assert navigator.passable(5, 5)  # no world yet: open plains
+    init_world(db, world_map, seed=11, size=64)
+    terrain = world_generator.generate_terrain(11, 0, 0, 64, 64)
+    water = np.argwhere(terrain == world_generator.TERRAINS.index("water"))
+    land = np.argwhere(terrain != world_generator.TERRAINS.index("water"))
+    assert not navigator.passable(*(int(v) for v in water[0]))
+    assert not navigator.passable(64, 0)
+    start, goal = tuple(int(v) for v in land[0]), tuple(int(v) for v in land[-1])
+    path = navigator.path(start, goal)
+    assert _valid(Grid(terrain_costs(terrain)), path, start, goal)
+    assert navigator.next_step(start, goal) == path[1]
+    # The materialised chunk gives the same costs as the generated terrain
+    world_map.ensure_chunk(db, 0, 0)
+    navigator.invalidate_tile(0, 0)
+    assert navigator.path(start, goal) == path
+
+
+def test_flow_field_matches_dijkstra_and_leads_to_the_goal():
+    costs = terrain_costs(world_generator.generate_terrain(5, 100, 200, 48, 40))
+    grid = Grid(costs, (100, 200))
+    land = [(int(x) + 100, int(y) + 200) for x, y in np.argwhere(np.isfinite(costs))]
+    goals = [land[0], land[len(land) // 2]]
+    field = flow_field(costs, goals, (100, 200))
+    expected = {}
+    for goal in goals:
+        for tile, cost in distances(grid, goal, land).items():
+            expected[tile] = min(cost, expected.get(tile, INF))
+    for x, y in land:
+        assert math.isclose(field.cost(x, y), expected.get((x, y), INF), abs_tol=1e-9)
+
+    starts = [t for t in land[::37] if t in expected]
+    xs = np.array([x for x, _y in starts])
+    ys = np.array([y for _x, y in starts])
+    for _ in range(200):
+        nx, ny = field.next_steps(xs, ys)
+        assert [field.next_step(x, y) or (x, y) for x, y in zip(xs.tolist(), ys.tolist())] == list(
+            zip(nx.tolist(), ny.tolist())
+        )
+        xs, ys = nx, ny
+    assert set(zip(xs.tolist(), ys.tolist())) <= set(goals)
+
+
+def test_navigator_caches_flow_fields_until_the_goal_moves():
+    now = [0.0]
+    world_map = WorldMap()
+    world_map.size = 64  # open plains without a world
+    navigator = Navigator(world_map, field_radius=8, field_ttl=5.0, clock=lambda: now[0])
+    field = navigator.flow_field([(20, 20)], key=("player", 1))
+    assert field.contains(12, 28) and not field.contains(11, 20)
+    assert field.next_step(12, 12) == (13, 13)
+    assert navigator.flow_field([(20, 20)], key=("player", 1)) is field
+    moved = navigator.flow_field([(21, 20)], key=("player", 1))
+    assert moved is not field and moved.next_step(21, 20) is None
+    now[0] = 6.0
+    assert navigator.flow_field([(21, 20)], key=("player", 1)) is not moved
+    navigator.invalidate_tile(21, 21)
+    assert navigator.stats()["flow_fields"] == 0
+    assert navigator.stats()["flow_fields_built"] == 3
+    assert navigator.stats()["flow_field_hits"] == 1
@@ -0,0 +1,149 @@
+"""SQL statement budgets of the API endpoints.
+
+Every request is counted by the instrumentation middleware, which reports
+the number of statements it ran in ``X-SQL-Statements``. Each endpoint
+must stay within a fixed budget, so a commit per write or a lazy load per
+row shows up here as a failure. Moves, for instance, must commit once
+whatever happens on the tile. The unit of work behind that must run its
+callbacks after the commit, and on failure roll back and drop them.
+"""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app import main, models
+from app.database import get_async_db, make_async_engine, make_engine
+from app.entity_cache import entity_cache
+from app.event_sink import EventSink
+from app.fog import fog
+from app.game_logic.rng import rng_service
+from app.unit_of_work import after_commit, commit, unit_of_work
+from app.world_map import world_map
+
+# Most statements each request may run. The world is fully cached after the
+# first request, so these are the steady-state costs. A commit counts as a
+# statement; events are written by a "sync" event sink.
+BUDGETS = {
+    "create_player": 3,
+    "get_player": 2,  # the player, then its inventory with the items joined
+    "move": 4,
+    "move_with_npcs": 8,
+    "talk": 2,
+    "attack": 5,
+    "attack_group": 5,  # the hero against the guards still on their tile
+    "world": 1,
+    "world_player": 1,
+    "world_binary": 1,
+    "events": 1,
+}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'game.db'}"
+    engine = make_engine(url)
+    models.Base.metadata.create_all(bind=engine)
+    async_engine = make_async_engine(url)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    AsyncSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def get_db():
+        async with AsyncSession() as db:
+            yield db
+
+    monkeypatch.setitem(main.app.dependency_overrides, get_async_db, get_db)
+    monkeypatch.setattr(main, "event_sink", EventSink(Session, mode="sync"))
+    db = Session()
+    main._init_world(db, 7, 64)
+    db.add_all(models.NPC(name=f"Guard{i}", kindness=0.9, greed=-0.9, curiosity=0.9, x=3, y=0) for i in range(5))
+    db.add(models.Item(name="rope"))
+    db.commit()
+    main.reconcile_with_db(db)
+    db.close()
+    entity_cache.clear()
+    yield TestClient(main.app), Session
+    entity_cache.clear()
+    fog.clear()
+    world_map.cache.clear()
+    rng_service.reset(None)
+    async_engine.sync_engine.dispose()
+    engine.dispose()
+
+
+def _statements(response) -> int:
+    assert response.status_code == 200, response.text
+    return int(response.headers["x-sql-statements"])
+
+
+def test_endpoints_stay_within_statement_budgets(client):
+    client, Session = client
+    counts = {}
+    hero_id = client.post("/players", json={"name": "Hero"}).json()["id"]
+    counts["create_player"] = _statements(client.post("/players", json={"name": "Sidekick"}))
+    with Session() as db:
+        db.add_all(models.InventoryItem(owner_id=hero_id, item_id=1, quantity=q) for q in (1, 2, 3))
+        db.commit()
+    response = client.get(f"/players/{hero_id}")
+    assert len(response.json()["inventory_items"]) == 3
+    counts["get_player"] = _statements(response)
+
+    move = lambda: client.post(f"/players/{hero_id}/move", json={"dx": 1, "dy": 0})
+    move()
+    counts["move"] = _statements(move())
+    counts["move_with_npcs"] = _statements(move())  # onto the guards' tile
+    with Session() as db:
+        npc_id = db.query(models.NPC.id).filter(models.NPC.x == 3).first()[0]
+    counts["talk"] = _statements(client.post(f"/players/{hero_id}/talk", json={"npc_id": npc_id}))
+    counts["attack"] = _statements(client.post(f"/players/{hero_id}/attack", json={"target_id": npc_id}))
+    group = client.post(
+        f"/players/{hero_id}/attack", json={"target_id": npc_id, "group": True, "targeting": "lowest_hp"}
+    )
+    counts["attack_group"] = _statements(group)
+    assert group.json()["winner"] in ("players", "npcs")
+    counts["world"] = _statements(client.get("/world"))
+    counts["world_player"] = _statements(client.get("/world", params={"player_id": hero_id}))
+    counts["world_binary"] = _statements(client.get("/world", params={"format": "binary"}))
+    counts["events"] = _statements(client.get("/events"))
+    over = {name: (n, BUDGETS[name]) for name, n in counts.items() if n > BUDGETS[name]}
+    assert not over, f"statements (ran, budget): {over}"
+
+    for size in (-1, 0, 1_000_001):
+        assert client.post("/init", params={"size": size}).status_code == 422
+    # A new world replaces players who hold items
+    assert client.post("/init", params={"seed": 7, "size": 64}).status_code == 200
+    with Session() as db:
+        assert db.query(models.InventoryItem).count() == 0
+
+
+def test_unit_of_work_commits_once_or_rolls_back(tmp_path):
+    engine = make_async_engine(f"sqlite:///{tmp_path / 'uow.db'}")
+    Session = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    published = []
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(models.Base.metadata.create_all)
+        async with Session() as db:
+            async with unit_of_work(db):
+                db.add(models.Player(name="Hero"))
+                await db.run_sync(commit)  # only flushes
+                after_commit(db, published.append, "hero")
+                assert not published
+            assert published == ["hero"]
+            with pytest.raises(RuntimeError):
+                async with unit_of_work(db):
+                    db.add(models.Player(name="Ghost"))
+                    await db.run_sync(commit)
+                    after_commit(db, published.append, "ghost")
+                    raise RuntimeError
+        async with Session() as db:
+            names = (await db.execute(models.Player.__table__.select())).all()
+        await engine.dispose()
+        return [row.name for row in names]
+
+    assert asyncio.run(scenario()) == ["Hero"]
+    assert published == ["hero"]
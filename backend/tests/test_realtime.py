@@ -0,0 +1,115 @@
+"""Tests for the realtime delta hub.
+
+Subscribers must receive deltas published from other threads in sequence
+order, resume without gaps from a sequence number and be told to reload when
+the deltas they missed are gone.
+"""
+
+import asyncio
+import json
+import sys
+import threading
+
+from app.realtime import DeltaHub
+
+
+async def _frames(sub, n):
+    return [json.loads((await asyncio.wait_for(sub.get(), 1))[2]) for _ in range(n)]
+
+
+def test_publish_from_threads_in_order():
+    async def scenario():
+        hub = DeltaHub()
+        sub = hub.subscribe()
+        worker = threading.Thread(
+            target=lambda: [hub.publish("npc_moves", [[i, i, i]]) for i in range(50)]
+        )
+        worker.start()
+        await asyncio.to_thread(worker.join)
+        frames = await _frames(sub, 51)
+        assert frames[0] == {"seq": 0, "type": "hello", "data": {"seq": 0}}
+        assert [f["seq"] for f in frames[1:]] == list(range(1, 51))
+        assert frames[-1]["data"] == [[49, 49, 49]]
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_publishers_keep_order():
+    # The simulation thread and request workers publish at the same time
+    async def scenario():
+        hub = DeltaHub(queue_size=50_000)
+        sub = hub.subscribe()
+        switch = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            workers = [
+                threading.Thread(target=lambda: [hub.publish("hp", i) for i in range(5000)])
+                for _ in range(4)
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                await asyncio.to_thread(worker.join)
+        finally:
+            sys.setswitchinterval(switch)
+        seqs = [(await asyncio.wait_for(sub.get(), 1))[0] for _ in range(20_001)]
+        assert seqs == list(range(20_001))
+
+    asyncio.run(scenario())
+
+
+def test_resume_replays_missed_deltas():
+    async def scenario():
+        hub = DeltaHub(history=10)
+        for i in range(5):
+            hub.publish("hp", {"entity": "player", "id": 1, "hp": 20 - i})
+        sub = hub.subscribe(since=2)
+        frames = await _frames(sub, 4)
+        assert [(f["type"], f["seq"]) for f in frames] == [
+            ("hello", 5),
+            ("hp", 3),
+            ("hp", 4),
+            ("hp", 5),
+        ]
+        # Seq 1 has left a history of 10 once 11 more deltas were published
+        for i in range(11):
+            hub.publish("hp", {"entity": "player", "id": 1, "hp": i})
+        stale = hub.subscribe(since=1)
+        frames = await _frames(stale, 2)
+        assert frames[1]["type"] == "reset"
+        assert hub.stats()["resets"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_lagging_subscriber_is_reset():
+    async def scenario():
+        hub = DeltaHub(queue_size=5)
+        sub = hub.subscribe()
+        for i in range(10):
+            hub.publish("events", [{"description": str(i), "timestamp": ""}])
+        await asyncio.sleep(0)
+        assert sub.closed
+        frames = await _frames(sub, 1)
+        assert frames[0]["type"] == "reset"
+        assert hub.stats()["subscribers"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_filters_by_kind_and_player():
+    async def scenario():
+        hub = DeltaHub()
+        hub.publish("player_move", {"id": 2, "x": 0, "y": 1}, player_id=2)
+        sub = hub.subscribe(since=0, kinds=["player_move", "tiles"], player_id=1)
+        hub.publish("player_move", {"id": 1, "x": 1, "y": 0}, player_id=1)
+        hub.publish("npc_moves", [[7, 3, 3]])
+        hub.publish("tiles", [{"x": 1, "y": 0, "terrain": "forest"}])
+        frames = await _frames(sub, 3)
+        assert [(f["type"], f["seq"]) for f in frames] == [
+            ("hello", 1),
+            ("player_move", 2),
+            ("tiles", 4),
+        ]
+
+    asyncio.run(scenario())
@@ -0,0 +1,110 @@
+"""Tests for the game clock and the scheduled events.
+
+The timer wheel must expire timers in the same order as a heap holding every
+timer, across cascades between rings and the heap of far timers, with timers
+cancelled and recurring on the way. The scheduler must write its state as
+it goes, so one rebuilt from the database after a restart carries on exactly
+like one that kept running.
+"""
+
+import heapq
+import random
+
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.database import make_engine
+from app.game_logic.event_system import EventSystem
+from app.game_logic.rng import GameRNG
+from app.game_logic.timer_wheel import Timer, TimerWheel
+from app.scheduler import MINUTES_PER_DAY, EventScheduler
+
+
+def test_wheel_expires_timers_in_order():
+    rng = random.Random(3)
+    # Small rings so that every ring and the far heap are used
+    wheel = TimerWheel(now=1000, bits=3, levels=3)
+    expected = {}  # id -> [due, interval]
+    next_id = 0
+    for _ in range(300):
+        for _ in range(rng.randrange(6)):
+            next_id += 1
+            due = wheel.now + rng.choice([-2, 0, 1, rng.randrange(64), rng.randrange(5000)])
+            interval = rng.choice([None, None, rng.randrange(50, 400)])
+            wheel.schedule(Timer(next_id, due, "k", None, interval))
+            expected[next_id] = [max(due, wheel.now + 1), interval]
+        if expected and rng.random() < 0.3:
+            cancelled = rng.choice(sorted(expected))
+            assert wheel.cancel(cancelled) and not wheel.cancel(cancelled)
+            del expected[cancelled]
+        to = wheel.now + rng.choice([0, 1, 9, rng.randrange(1000)])
+
+        want = []
+        heap = [(due, i) for i, (due, _) in expected.items()]
+        heapq.heapify(heap)
+        while heap and heap[0][0] <= to:
+            due, i = heapq.heappop(heap)
+            want.append((due, i))
+            if expected[i][1] is None:
+                del expected[i]
+            else:
+                expected[i][0] += expected[i][1]
+                heapq.heappush(heap, (expected[i][0], i))
+        assert [(tick, timer.id) for tick, timer in wheel.advance(to)] == want
+        assert wheel.now == to and len(wheel) == len(expected)
+
+
+def _game(path):
+    engine = make_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    db.add(models.World(seed=1, size=64, chunk_size=16))
+    db.commit()
+    db.close()
+    return engine, Session
+
+
+def _scheduler(Session, rng):
+    scheduler = EventScheduler(Session)
+    db = Session()
+    scheduler.load(db)
+    db.close()
+    EventSystem(rng).install(scheduler)
+    bells = []
+    scheduler.handlers["bell"] = lambda s, timer, minute: bells.append(minute) or None
+    return scheduler, bells
+
+
+def _events(Session):
+    db = Session()
+    try:
+        return [e.description for e in db.query(models.Event).order_by(models.Event.id)]
+    finally:
+        db.close()
+
+
+def test_timers_survive_a_restart(tmp_path):
+    runs = {}
+    for name in ("running", "restarted"):
+        engine, Session = _game(tmp_path / f"{name}.db")
+        rng = GameRNG(9)
+        scheduler, bells = _scheduler(Session, rng)
+        scheduler.schedule("bell", 30, every=MINUTES_PER_DAY // 2)
+        scheduler.cancel(scheduler.schedule("bell", 45))
+        scheduler.step(MINUTES_PER_DAY)
+        if name == "restarted":
+            # Rebuilt from the database; the generator is restored separately
+            first_day = bells
+            scheduler, bells = _scheduler(Session, rng)
+            bells[:0] = first_day
+            assert scheduler.now == MINUTES_PER_DAY
+            assert scheduler.pending("weather") == 1 and scheduler.pending() == 2
+        scheduler.step(MINUTES_PER_DAY)
+        runs[name] = bells, _events(Session)
+        engine.dispose()
+
+    bells, events = runs["running"]
+    assert bells == [30, 750, 1470, 2190]
+    assert 6 <= len(events) <= 24 and all(e.startswith("The weather shifts to") for e in events)
+    assert runs["restarted"] == runs["running"]
@@ -0,0 +1,71 @@
+"""Tests for the region‑sharded simulation.
+
+Regions must cover the map in whole chunks. Ticks run in the workers must be
+written to the database like unsharded ticks. NPCs that cross a region
+boundary must be handed over without being lost or duplicated, and players
+routed to a region must be seen by its NPCs.
+"""
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models
+from app.game_logic.rng import GameRNG
+from app.sharding import Regions, ShardedSimulation
+from app.world_map import WorldMap
+
+
+def test_regions_are_bands_of_whole_chunks():
+    regions = Regions(size=100, chunk_size=16, count=3)
+    assert regions.width == 48
+    assert [regions.owner(x, 0) for x in (0, 47, 48, 99)] == [0, 0, 1, 2]
+    assert regions.bounds(2) == (96, 100)
+    assert Regions(size=20, chunk_size=16, count=4).owner(19, 0) == 1
+
+
+def test_sharded_ticks_hand_over_npcs_and_route_players():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    # Peaceful wanderers on both sides of the boundary at x = 32
+    db.add_all(
+        models.NPC(name=f"Walker{i}", kindness=0.9, greed=0.9, curiosity=-0.9, x=31 + i % 2, y=i)
+        for i in range(40)
+    )
+    db.add_all(
+        models.NPC(name=f"Raider{i}", kindness=-0.9, greed=0.9, curiosity=-0.9, x=50, y=50)
+        for i in range(10)
+    )
+    hero = models.Player(name="Hero", x=5, y=5, hp=20)
+    db.add(hero)
+    db.commit()
+
+    world_map = WorldMap()
+    world_map.size = 64
+    simulation = ShardedSimulation(Session, 2, world_map=world_map, rng=GameRNG(3))
+    try:
+        moved = sum(simulation.tick().moved for _ in range(5))
+        assert moved > 0 and simulation.handoffs > 0
+        assert sum(simulation.shard_npcs) == 50
+
+        # Routed to region 1, the hero meets the raiders gathered there
+        db.query(models.Player).update({"x": 50, "y": 50})
+        db.query(models.NPC).filter(models.NPC.name.startswith("Raider")).update({"x": 50, "y": 50})
+        db.commit()
+        simulation.player_moved(hero.id, "Hero", 50, 50)
+        for npc_id in range(41, 51):
+            simulation.npc_moved(npc_id, 50, 50)
+        messages = simulation.tick().messages
+        assert any(" attacks Hero!" in m for m in messages)
+    finally:
+        simulation.stop()
+
+    db.expire_all()
+    npcs = db.query(models.NPC).all()
+    assert len(npcs) == 50 and all(0 <= n.x < 64 and 0 <= n.y < 64 for n in npcs)
+    assert db.query(models.Player).one().hp < 20
+    assert simulation.stats()["ticks"] == 6
@@ -0,0 +1,43 @@
+"""Tests for the batched world simulation.
+
+A single tick should move wandering NPCs, apply attack damage to players on
+the same tile and persist the resulting log lines, all in one transaction.
+"""
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models
+from app.game_logic.rng import GameRNG
+from app.simulation import WorldSimulation
+
+
+def test_tick_applies_all_npc_actions():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    models.Base.metadata.create_all(bind=engine)
+    TestingSessionLocal = sessionmaker(bind=engine)
+    db = TestingSessionLocal()
+    db.add(models.Player(name="Hero", x=5, y=5, hp=20))
+    # Hostile and incurious: may only attack or wander
+    db.add_all(
+        [models.NPC(name=f"Raider{i}", kindness=-0.9, greed=0.9, curiosity=-0.9, x=5, y=5) for i in range(20)]
+    )
+    db.commit()
+
+    simulation = WorldSimulation(TestingSessionLocal, tick_rate=10, rng=GameRNG(1))
+    result = simulation.tick()
+
+    attacks = [m for m in result.messages if " attacks Hero!" in m]
+    assert result.npcs == 20
+    assert result.moved + len(attacks) == 20
+    assert 0 < result.moved < 20
+    db.expire_all()
+    moved = db.query(models.NPC).filter((models.NPC.x != 5) | (models.NPC.y != 5)).count()
+    assert moved == result.moved
+    damage = sum(int(m.split("dealing ")[1].split(" ")[0]) for m in attacks)
+    assert db.query(models.Player).one().hp == 20 - damage
+    assert db.query(models.Event).count() == len(attacks)
+    assert simulation.stats()["ticks"] == 1
@@ -0,0 +1,105 @@
+"""Tests for save profiles.
+
+Loading a profile must restore every table exactly, location ids included.
+Incremental snapshots must only carry what changed, deletions included, and
+files from another format version must be refused.
+"""
+
+import os
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.database import make_engine
+from app.snapshots import SnapshotStore, read_manifest
+from app.world_map import WorldMap, init_world
+
+
+def _engine(path):
+    engine = make_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def _dump(engine) -> dict:
+    with engine.connect() as conn:
+        return {
+            t.name: sorted(tuple(row) for row in conn.execute(select(t)))
+            for t in models.Base.metadata.sorted_tables
+        }
+
+
+@pytest.fixture
+def game(tmp_path):
+    engine = _engine(tmp_path / "game.db")
+    db = sessionmaker(bind=engine)()
+    world_map = WorldMap()
+    init_world(db, world_map, seed=3, size=64)
+    for x in range(0, 64, 16):
+        world_map.discover(db, x, 5)
+    item = models.Item(name="rope")
+    db.add(item)
+    for i in range(300):
+        db.add(models.Player(name=f"p{i}", x=i % 64))
+    db.flush()
+    db.add(models.InventoryItem(owner_id=1, item_id=item.id, quantity=3))
+    db.add(models.PlayerFog(player_id=1, cx=0, cy=0, bits=b"\x01" * 32))
+    db.add_all(models.Event(description=f"event {i}", timestamp=None) for i in range(50))
+    db.commit()
+    yield engine, db, SnapshotStore(str(tmp_path / "saves"), max_chain=2)
+    db.close()
+
+
+def test_full_snapshot_round_trip(game, tmp_path):
+    engine, _db, store = game
+    rng = {"world": {"seed": 3}, "streams": []}
+    result = store.save(engine, "slot1", rng)
+    assert not result["incremental"] and result["chunks"] > 0
+
+    restored = _engine(tmp_path / "restored.db")
+    loaded = store.load(restored, "slot1")
+    assert loaded["rng"] == rng and loaded["snapshots"] == 1
+    assert _dump(restored) == _dump(engine)
+
+
+def test_incremental_snapshots_store_only_changes(game, tmp_path):
+    engine, db, store = game
+    first = store.save(engine, "slot", None)
+    unchanged = store.save(engine, "slot", None)
+    assert unchanged["incremental"] and unchanged["pages"] == unchanged["chunks"] == 0
+
+    db.get(models.Player, 3).hp = 7
+    db.query(models.Player).filter(models.Player.id >= 256).delete()  # a whole page
+    world_map = WorldMap()
+    world_map.load(db)
+    world_map.discover(db, 20, 40)  # a new chunk, and a row in ``chunks``
+    db.commit()
+    second = store.save(engine, "slot", None)
+    assert second["incremental"] and second["pages"] == 3 and second["chunks"] == 1
+    assert second["bytes"] < first["bytes"]
+    assert read_manifest(os.path.join(store.root, "slot", "000003.snap")).pages["players"].keys() == {0}
+
+    restored = _engine(tmp_path / "restored.db")
+    assert store.load(restored, "slot")["snapshots"] == 3
+    assert _dump(restored) == _dump(engine)
+
+    # The chain is full, so the next save starts over and prunes the old files
+    assert not store.save(engine, "slot", None)["incremental"]
+    assert [info.seq for info in store.snapshots("slot")] == [4]
+
+
+def test_bad_profiles_and_files_are_refused(game):
+    engine, _db, store = game
+    with pytest.raises(ValueError):
+        store.save(engine, "../escape", None)
+    with pytest.raises(FileNotFoundError):
+        store.load(engine, "missing")
+    store.save(engine, "slot", None)
+    path = os.path.join(store.root, "slot", "000001.snap")
+    with open(path, "r+b") as f:
+        f.seek(4)
+        f.write(b"\x09")
+    with pytest.raises(ValueError, match="version 9"):
+        store.load(engine, "slot")
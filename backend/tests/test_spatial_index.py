@@ -0,0 +1,93 @@
+"""Tests for the in‑memory spatial index.
+
+Query results are compared against a brute‑force scan over the same random
+positions, and reconciliation is checked against a small database. A
+player moved inside a unit of work must only move in the index once the
+move is committed.
+"""
+
+import asyncio
+import random
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.database import make_async_engine
+from app.spatial_index import SpatialIndex, move_player_on_commit, player_index, players_at
+from app.unit_of_work import unit_of_work
+
+
+def test_queries_match_brute_force():
+    rng = random.Random(5)
+    positions = {i: (rng.randrange(100), rng.randrange(100)) for i in range(2000)}
+    index = SpatialIndex(cell_size=8)
+    for entity_id, (x, y) in positions.items():
+        index.insert(entity_id, x, y)
+    # Move a few entities around to exercise the update path
+    for entity_id in range(0, 2000, 7):
+        positions[entity_id] = (rng.randrange(100), rng.randrange(100))
+        index.move(entity_id, *positions[entity_id])
+
+    x, y = 40, 60
+    assert index.at(x, y) == sorted(e for e, p in positions.items() if p == (x, y))
+    assert index.within_radius(x, y, 9.5) == sorted(
+        e for e, (px, py) in positions.items() if (px - x) ** 2 + (py - y) ** 2 <= 9.5 ** 2
+    )
+    assert index.in_rect(10, 20, 33, 41) == sorted(
+        e for e, (px, py) in positions.items() if 10 <= px <= 33 and 20 <= py <= 41
+    )
+
+
+def test_reconcile_fixes_drift():
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([models.NPC(name="A", x=1, y=1), models.NPC(name="B", x=2, y=3)])
+    db.commit()
+
+    index = SpatialIndex()
+    index.insert(1, 5, 5)  # stale position
+    index.insert(99, 0, 0)  # entity no longer in the database
+    fixes = index.reconcile(db.query(models.NPC.id, models.NPC.x, models.NPC.y))
+    assert fixes == 3
+    assert index.at(1, 1) == [1] and index.at(2, 3) == [2]
+    assert 99 not in index
+    assert index.reconcile(db.query(models.NPC.id, models.NPC.x, models.NPC.y)) == 0
+
+
+def test_player_moves_wait_for_the_commit(tmp_path):
+    engine = make_async_engine(f"sqlite:///{tmp_path / 'index.db'}")
+    Session = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    def at(db, x, y):
+        return [p.id for p in players_at(db, x, y)]
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(models.Base.metadata.create_all)
+        async with Session() as db:
+            player = models.Player(name="Hero", x=0, y=0)
+            db.add(player)
+            await db.commit()
+            player_id = player.id
+            player_index.insert(player_id, 0, 0)
+            with pytest.raises(RuntimeError):
+                async with unit_of_work(db):
+                    player.x = 1
+                    move_player_on_commit(db, player_id, 1, 0)
+                    # The request sees the move, the shared index does not
+                    assert await db.run_sync(at, 1, 0) == [player_id]
+                    assert await db.run_sync(at, 0, 0) == []
+                    assert player_index.at(0, 0) == [player_id]
+                    raise RuntimeError
+            assert player_index.at(0, 0) == [player_id]
+            async with unit_of_work(db):
+                move_player_on_commit(db, player_id, 2, 0)
+            assert player_index.at(2, 0) == [player_id]
+            player_index.remove(player_id)
+        await engine.dispose()
+
+    asyncio.run(scenario())
@@ -30,3 +30,12 @@ def test_generate_world_reproducible():
         terrain_maps.append(terrain)
         db.close()
     assert terrain_maps[0] == terrain_maps[1], "World generation should be reproducible with the same seed"
+
+
+def test_generate_terrain_block_matches_full_grid():
+    # Terrain depends only on the seed and absolute coordinates, so a block
+    # generated on its own must equal the same slice of a larger grid.
+    full = world_generator.generate_terrain(7, 0, 0, 64, 64)
+    block = world_generator.generate_terrain(7, 16, 32, 16, 16)
+    assert (block == full[16:32, 32:48]).all()
+    assert set(full.ravel().tolist()) <= set(range(len(world_generator.TERRAINS)))
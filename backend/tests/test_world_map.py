@@ -0,0 +1,46 @@
+"""Tests for the chunked, lazily generated world map.
+
+These tests check that initialising a world writes no locations, that chunks
+are materialised with the same terrain as the eager generator and that hot
+chunks are served from the in‑memory cache.
+"""
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.game_logic import world_generator
+from app.world_map import WorldMap, init_world, CHUNK_SIZE
+
+
+def _session():
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def test_init_world_is_lazy():
+    db = _session()
+    world_map = WorldMap()
+    init_world(db, world_map, seed=3, size=100_000)
+    # Only the chunks holding the starting NPCs are materialised
+    chunks = db.query(models.Chunk).count()
+    assert 1 <= chunks <= len(world_generator.NPC_ARCHETYPES)
+    assert db.query(models.Location).count() == chunks * CHUNK_SIZE * CHUNK_SIZE
+
+
+def test_chunk_matches_eager_terrain_and_is_cached():
+    db = _session()
+    world_map = WorldMap()
+    seed = init_world(db, world_map, seed=11, size=40)
+    chunk = world_map.ensure_chunk(db, 2, 1)
+    # The last column of chunks is clipped to the map edge
+    assert chunk.terrain.shape == (40 - 2 * CHUNK_SIZE, CHUNK_SIZE)
+    expected = world_generator.generate_terrain(seed, 2 * CHUNK_SIZE, CHUNK_SIZE, 8, CHUNK_SIZE)
+    assert (chunk.terrain == expected).all()
+    assert world_map.ensure_chunk(db, 2, 1) is chunk
+
+    assert world_map.discover(db, 33, 17)
+    assert not world_map.discover(db, 33, 17)
+    loc = db.query(models.Location).filter_by(x=33, y=17).one()
+    assert loc.discovered
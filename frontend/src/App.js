@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import Map from './components/Map';
 import EventLog from './components/EventLog';
 import ChatBox from './components/ChatBox';
@@ -9,6 +9,8 @@ function App() {
   const [world, setWorld] = useState([]);
   const [events, setEvents] = useState([]);
   const [messages, setMessages] = useState([]);
+  // Id of the newest event fetched so far; later polls only ask for newer ones
+  const lastEventId = useRef(null);
 
   // Initialise player and world on mount
   useEffect(() => {
@@ -38,6 +40,34 @@ function App() {
     init();
   }, []);
 
+  // Apply world deltas pushed by the backend instead of re-fetching after
+  // every action. EventSource reconnects on its own and resumes from the
+  // last delta it saw.
+  const playerId = player ? player.id : null;
+  useEffect(() => {
+    if (playerId === null) return undefined;
+    const types = 'tiles,events,hp,player_move';
+    const source = new EventSource(`/api/stream?player_id=${playerId}&types=${types}`);
+    source.onmessage = (msg) => {
+      const { type, data } = JSON.parse(msg.data);
+      if (type === 'tiles') {
+        setWorld((locs) => [...locs, ...data]);
+      } else if (type === 'events') {
+        setEvents((evts) => [...data.slice().reverse(), ...evts]);
+      } else if (type === 'hp' && data.entity === 'player') {
+        setPlayer((p) => ({ ...p, hp: data.hp }));
+      } else if (type === 'player_move') {
+        setPlayer((p) => ({ ...p, x: data.x, y: data.y }));
+      } else if (type === 'reset') {
+        // Missed too much (or a new world): reload the full state
+        lastEventId.current = null;
+        fetchWorld();
+        fetchEvents();
+      }
+    };
+    return () => source.close();
+  }, [playerId]);
+
   async function fetchWorld() {
     const res = await fetch('/api/world');
     if (res.ok) {
@@ -47,10 +77,19 @@ function App() {
   }
 
   async function fetchEvents() {
-    const res = await fetch('/api/events');
+    const since = lastEventId.current;
+    const res = await fetch(since === null ? '/api/events' : `/api/events?since_id=${since}`);
     if (res.ok) {
       const data = await res.json();
-      setEvents(data);
+      if (since === null) {
+        // Newest first
+        setEvents(data);
+        if (data.length) lastEventId.current = data[0].id;
+      } else if (data.length) {
+        // Oldest first; keep the log newest first
+        setEvents((evts) => [...data.slice().reverse(), ...evts]);
+        lastEventId.current = data[data.length - 1].id;
+      }
     }
   }
 
@@ -65,11 +104,8 @@ function App() {
       const data = await res.json();
       // Update player position
       setPlayer({ ...player, x: data.x, y: data.y });
-      // Append messages
+      // Append messages; new tiles and events arrive over the stream
       setMessages((msgs) => [...msgs, ...data.messages]);
-      // Refresh world and events
-      await fetchWorld();
-      await fetchEvents();
     }
   }
 
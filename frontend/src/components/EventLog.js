@@ -7,8 +7,8 @@ export default function EventLog({ events, messages }) {
       {messages && messages.map((msg, idx) => (
         <div key={`msg-${idx}`} className="text-sm text-gray-700">{msg}</div>
       ))}
-      {events && events.map((event) => (
-        <div key={event.id} className="text-sm text-gray-500">{event.timestamp}: {event.description}</div>
+      {events && events.map((event, idx) => (
+        <div key={event.id ?? `live-${events.length - idx}`} className="text-sm text-gray-500">{event.timestamp}: {event.description}</div>
       ))}
     </div>
   );